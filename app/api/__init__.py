@@ -2,9 +2,17 @@ from fastapi import APIRouter
 
 from .v1 import endpoints as v1_endpoints
 from .v1 import bonus_endpoints
+from .v1 import live_endpoints
+from .v1 import profile_endpoints
+from .v1 import ingest_endpoints
+from .v1 import dedup_endpoints
 
 api_router = APIRouter()
 
 # Prefix v1 endpoints with /v1
 api_router.include_router(v1_endpoints.router, prefix="/v1")
 api_router.include_router(bonus_endpoints.router, prefix="/v1")
+api_router.include_router(live_endpoints.router, prefix="/v1")
+api_router.include_router(profile_endpoints.router, prefix="/v1")
+api_router.include_router(ingest_endpoints.router, prefix="/v1")
+api_router.include_router(dedup_endpoints.router, prefix="/v1")
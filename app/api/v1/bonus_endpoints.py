@@ -1,26 +1,69 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
+import os
+from typing import Optional
 
-import cv2
-import numpy as np
+from fastapi import APIRouter, Depends, File, Query, UploadFile, HTTPException
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
 
-from app.utils.face_analyzer import analyze_face
-from app.models.profile import Profile
-from app.models.deepfake import DeepfakeResult
-from app.utils.profile_store import profile_store
+from app.api.v1.response_fields import (
+    Fields,
+    analysis_payload,
+    profile_fields,
+    record_payload,
+    wants,
+)
+from app.api.v1.serialization import NEGOTIATED_CONTENT, render, response_format
+from app.core.config import settings
+from app.utils.admission import Priority, admission_priority
+from app.utils.analysis_cache import analyze_cached
+from app.utils.executor import analysis_executor
+from app.utils.metrics import metrics
+from app.utils.face_analyzer import (
+    NoFaceError,
+    QualityGateError,
+    analyze_face,
+    check_pose,
+    encode_chip,
+    generate_jitter_faces,
+)
+from app.models.profile import MultiFaceSearchResult, Profile, SearchResult
+from app.models.profile_record import ProfileRecord
+from app.models.deepfake import DeepfakeResult, FrameScore, VideoDeepfakeResult
+from app.utils.profile_store import profile_store, validate_profile_id
 from app.utils.face_compare import compare_profiles
+from app.utils.multi_face import analyze_faces_parallel
+from app.utils.spectral_scorer import get_model, score_chips, score_image
+from app.utils.upload import read_image, spool_upload
+from app.utils.video_analyzer import analyze_video
+from app.utils.warmup import readiness
 
 router = APIRouter(tags=["bonus"])
+# Video flicker verdict; image verdicts use the spectral model's threshold
 THRESHOLD = 0.60
 
 THRESH_SIMILARITY = 0.1  # tune later
 
 
+def _pose_gate(face: dict) -> None:
+    """``check_pose`` as a 400, counted with the other quality rejections."""
+    try:
+        check_pose(face)
+    except QualityGateError as exc:
+        metrics.count_failure(exc)
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.post(
     "/verify-face",
+    dependencies=[Depends(admission_priority(Priority.INTERACTIVE))],
     response_model=Profile,
     summary="Verify face authenticity",
-    description="Generates a facial profile and performs basic liveness checks (stub).",
+    description=(
+        "Generates a facial profile and performs basic liveness checks (stub); the "
+        "description reports the head pose (yaw, pitch, roll in degrees)."
+    ),
     responses={
+        200: {"content": NEGOTIATED_CONTENT},
         400: {
             "description": "Bad request – invalid image data or no face detected",
             "content": {
@@ -32,35 +75,39 @@ THRESH_SIMILARITY = 0.1  # tune later
         422: {"description": "Validation error – file not provided"},
     },
 )
-async def verify_face(file: UploadFile = File(...)) -> Profile:  # noqa: D401
+async def verify_face(
+    file: UploadFile = File(...),
+    fields: Fields = Depends(profile_fields),
+    media_type: str = Depends(response_format),
+) -> Response:  # noqa: D401
     """Upload an image and return a facial profile with a liveness placeholder."""
-    content = await file.read()
+    content = await read_image(file)
 
     try:
-        data = analyze_face(content)
+        data = await analyze_cached(analyze_face, content)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     # Placeholder liveness check (always passes)
     description = (
-        f"Face OK. Eye distance: {data['eye_distance']:.1f}px and yaw {data['yaw']:.1f}. "
+        f"Face OK. Eye distance: {data['eye_distance']:.1f}px; head pose yaw {data['yaw']:.1f}°, "
+        f"pitch {data['pitch']:.1f}°, roll {data['roll']:.1f}°. "
         "(Liveness check: stub, always passes)"
     )
 
-    return Profile(
-        landmarks=data["landmarks"],
-        eye_distance=data["eye_distance"],
-        yaw=data["yaw"],
-        description=description,
-        aligned_face=data.get("aligned_face"),
-    )
+    return render(analysis_payload(data, fields, description=description), media_type)
 
 
 @router.post(
     "/detect-deepfake",
+    dependencies=[Depends(admission_priority(Priority.NORMAL))],
     response_model=DeepfakeResult,
-    summary="Detect possible deepfakes (stub)",
-    description="Returns a dummy deepfake confidence score between 0 and 1.",
+    summary="Detect possible deepfakes",
+    description=(
+        "Scores the aligned face chip for re-sampling and re-compression artifacts "
+        "(frequency-domain features, logistic model). Images without a usable face are "
+        "scored as a whole."
+    ),
     responses={
         400: {
             "description": "Bad request – invalid image data",
@@ -72,82 +119,163 @@ async def verify_face(file: UploadFile = File(...)) -> Profile:  # noqa: D401
     },
 )
 async def detect_deepfake(file: UploadFile = File(...)) -> DeepfakeResult:  # noqa: D401
-    """Upload an image/video frame and return a stub deepfake prediction."""
-    content = await file.read()
-
-    # Simple decode to verify image validity; errors propagate as 400s
-    np_arr = np.frombuffer(content, np.uint8)
-    img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-    if img is None:
-        raise HTTPException(status_code=400, detail="Invalid image data")
-
-    # Stub: deterministic pseudo-confidence using hash of bytes for consistency
-    pseudo_val = (hash(content) % 100) / 100  # 0–0.99
-    confidence = float(round(pseudo_val, 2))
-    is_fake = confidence > THRESHOLD
-    desc = "Deepfake suspected" if is_fake else "Likely genuine"
+    """Upload an image/video frame and return its artifact score."""
+    content = await read_image(file)
+
+    try:
+        data = await analyze_cached(analyze_face, content)
+        scores = await analysis_executor.run(score_chips, [data["_chip"]])
+        confidence, scope = scores[0], "face"
+    except (NoFaceError, QualityGateError):
+        # Nothing usable to align; score the image itself
+        try:
+            confidence = await analysis_executor.run(score_image, content)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Invalid image data") from exc
+        scope = "whole image, no usable face"
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid image data") from exc
+
+    confidence = float(round(confidence, 2))
+    is_fake = confidence > get_model().threshold
+    desc = f"{'Deepfake suspected' if is_fake else 'Likely genuine'} ({scope})"
 
     return DeepfakeResult(is_deepfake=is_fake, confidence=confidence, description=desc)
 
 
+@router.post(
+    "/detect-deepfake-video",
+    dependencies=[Depends(admission_priority(Priority.BULK))],
+    response_model=VideoDeepfakeResult,
+    summary="Score a video for deep-fake landmark flicker",
+    description=(
+        "Streams the uploaded video through decode → detect/track → landmarks → score, "
+        "running full face detection only every few frames. Only the first "
+        "`VIDEO_MAX_FRAMES` frames (default 300) are analysed. Returns per-frame scores, "
+        "an aggregate verdict and the analysis throughput."
+    ),
+    responses={
+        400: {"description": "Bad request – unreadable video or no face in any frame"},
+        413: {"description": "Upload larger than VIDEO_MAX_BYTES"},
+        422: {"description": "Validation error – file not provided"},
+    },
+)
+async def detect_deepfake_video(
+    file: UploadFile = File(...),
+    detect_every: Optional[int] = Query(
+        None, ge=1, description="Run full face detection every N frames (default from settings)"
+    ),
+) -> VideoDeepfakeResult:  # noqa: D401
+    """Upload a video file and return per-frame and aggregate deep-fake scores."""
+    path = await spool_upload(file, settings.video_max_bytes)
+    try:
+        data = await analysis_executor.run(analyze_video, path, detect_every)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    finally:
+        os.unlink(path)
+
+    confidence = float(round(data["confidence"], 2))
+    is_fake = confidence > THRESHOLD
+    desc = (
+        f"Deepfake suspected ({data['faces_found']}/{data['frames_analyzed']} frames with a face)"
+        if is_fake
+        else f"Likely genuine ({data['faces_found']}/{data['frames_analyzed']} frames with a face)"
+    )
+    return VideoDeepfakeResult(
+        is_deepfake=is_fake,
+        confidence=confidence,
+        description=desc,
+        frames=[FrameScore(**f) for f in data["frames"]],
+        frames_analyzed=data["frames_analyzed"],
+        faces_found=data["faces_found"],
+        detections=data["detections"],
+        fps=data["fps"],
+        artifact_confidence=data["artifact_confidence"],
+    )
+
+
 class IdentifyResult(DeepfakeResult):  # reuse structure but different semantics
     is_match: bool
 
 
 @router.post(
     "/store-profile",
+    dependencies=[Depends(admission_priority(Priority.BULK))],
     response_model=Profile,
     summary="Store a facial profile and return its id",
-    description="Creates a profile from an uploaded image and saves it in memory for later matching.",
+    description=(
+        "Creates a profile from an uploaded image and saves it in memory for later matching. "
+        "Jittered crops are only generated now if `jitter_faces` is requested; otherwise "
+        "`GET /v1/profiles/{id}/jitter/{n}.jpg` generates them on first use. "
+        "Pass `profile_id` to store it under your own id instead of a random UUID."
+    ),
+    responses={
+        200: {"content": NEGOTIATED_CONTENT},
+        400: {"description": "Invalid image, no face or invalid profile id"},
+        409: {"description": "A profile with this id already exists"},
+        500: {"description": "Server error – landmark model missing or cannot be loaded"},
+    },
 )
-async def store_profile(file: UploadFile = File(...)) -> Profile:  # noqa: D401
-    content = await file.read()
-    data = analyze_face(content)
+async def store_profile(
+    file: UploadFile = File(...),
+    profile_id: Optional[str] = Query(
+        None, description="Id to store the profile under (1-36 letters, digits or '._:-')"
+    ),
+    fields: Fields = Depends(profile_fields),
+    media_type: str = Depends(response_format),
+) -> Response:  # noqa: D401
+    if profile_id is not None:
+        try:
+            validate_profile_id(profile_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if profile_id in profile_store:
+            raise HTTPException(status_code=409, detail=f"Profile id '{profile_id}' already exists")
+    content = await read_image(file)
+    try:
+        data = await analyze_cached(analyze_face, content)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:  # model missing etc.
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
 
-    # Generate 5 jittered crops for augmentation
+    # The chip is encoded once here and kept as raw JPEG for the asset endpoint
     chip_img = data.get("_chip")
-    jitter_faces_b64 = None
-    if chip_img is not None:
-        try:
-            import dlib
-            import base64
-
-            jitters = dlib.jitter_image(chip_img, 5)
-            encoded = []
-            for j in jitters:
-                ok, buf = cv2.imencode(".jpg", j)
-                if ok:
-                    encoded.append(base64.b64encode(buf.tobytes()).decode("ascii"))
-            jitter_faces_b64 = encoded or None
-        except Exception:
-            # Swallow any augmentation errors; continue without
-            jitter_faces_b64 = None
-
-    profile = Profile(
-        landmarks=data["landmarks"],
-        eye_distance=data["eye_distance"],
-        yaw=data["yaw"],
-        description="Stored profile",
-        aligned_face=data.get("aligned_face"),
-        jitter_faces=jitter_faces_b64,
+    aligned_face = encode_chip(chip_img) if chip_img is not None else None
+
+    # Generate 5 jittered crops for augmentation (deferred unless requested)
+    jitter_faces = None
+    if chip_img is not None and wants(fields, "jitter_faces"):
+        jitter_faces = await analysis_executor.run(generate_jitter_faces, chip_img, 5)
+
+    # The store keeps the compact record; convert to the API schema on the way out
+    record = ProfileRecord.from_analysis(
+        data, description="Stored profile", aligned_face=aligned_face, jitter_faces=jitter_faces
     )
-    _id = profile_store.add(profile)
-    profile.id = _id
-    return profile
+    try:
+        profile_store.add(record, profile_id)
+    except ValueError as exc:  # taken while this request was analysing
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    readiness.profile_served()
+    return render(record_payload(record, fields), media_type)
 
 
 @router.post(
     "/identify-face",
+    dependencies=[Depends(admission_priority(Priority.INTERACTIVE))],
     summary="Compare an image with a stored profile id and report if it matches",
     responses={
-        200: {"description": "Comparison completed"},
+        200: {"description": "Comparison completed", "content": NEGOTIATED_CONTENT},
         404: {"description": "Profile not found"},
-        400: {"description": "Invalid image or no face"},
+        400: {"description": "Invalid image, no face, or head turned past POSE_MAX_YAW / POSE_MAX_PITCH"},
     },
 )
 async def identify_face(
-    profile_id: str, file: UploadFile = File(...)
-) -> dict:  # noqa: D401
+    profile_id: str,
+    file: UploadFile = File(...),
+    media_type: str = Depends(response_format),
+) -> Response:  # noqa: D401
     """Return match boolean and distance score."""
 
     # fetch reference profile
@@ -157,30 +285,156 @@ async def identify_face(
         raise HTTPException(status_code=404, detail="Reference profile not found")
 
     # analyze new image
-    content = await file.read()
+    content = await read_image(file)
     try:
-        probe_data = analyze_face(content)
+        probe_data = await analyze_cached(analyze_face, content)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    _pose_gate(probe_data)
 
-    _fields = {
-        k: probe_data[k]
-        for k in (
-            "landmarks",
-            "eye_distance",
-            "yaw",
-            "aligned_face",
-        )
-        if k in probe_data
-    }
-    probe_profile = Profile(**_fields)
+    probe_profile = ProfileRecord(
+        landmarks=probe_data["landmarks"],
+        eye_distance=probe_data["eye_distance"],
+        yaw=probe_data["yaw"],
+    )
     distance = compare_profiles(ref_profile, probe_profile)
     distance = float(distance)
     is_match = bool(distance < THRESH_SIMILARITY)
 
-    return {
-        "is_match": is_match,
-        "distance": distance,
-        "threshold": THRESH_SIMILARITY,
-        "reference_id": profile_id,
-    }
+    return render(
+        {
+            "is_match": is_match,
+            "distance": distance,
+            "threshold": THRESH_SIMILARITY,
+            "reference_id": profile_id,
+        },
+        media_type,
+    )
+
+
+@router.post(
+    "/search-face",
+    dependencies=[Depends(admission_priority(Priority.INTERACTIVE))],
+    response_model=SearchResult,
+    summary="Find the stored profiles closest to an image",
+    description=(
+        "Scores the probe face against every stored profile in one vectorised pass "
+        "and returns the `k` closest with their distances."
+    ),
+    responses={
+        200: {"description": "Search completed (matches may be empty)", "content": NEGOTIATED_CONTENT},
+        400: {"description": "Invalid image, no face, or head turned past POSE_MAX_YAW / POSE_MAX_PITCH"},
+    },
+)
+async def search_face(
+    file: UploadFile = File(...),
+    k: int = Query(5, ge=1, le=100, description="Number of matches to return"),
+    nprobe: Optional[int] = Query(
+        None,
+        ge=1,
+        description="IVF lists to scan (higher = better recall, slower); ignored by the exact index",
+    ),
+    media_type: str = Depends(response_format),
+) -> Response:  # noqa: D401
+    """Return the top-k stored profiles closest to the uploaded face."""
+    content = await read_image(file)
+    try:
+        probe_data = await analyze_cached(analyze_face, content)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    _pose_gate(probe_data)
+
+    hits = profile_store.search(
+        probe_data["landmarks"], probe_data["eye_distance"], k, nprobe=nprobe
+    )
+    # Same shape as SearchResult
+    return render(
+        {
+            "matches": [
+                {"profile_id": pid, "distance": dist, "is_match": dist < THRESH_SIMILARITY}
+                for pid, dist in hits
+            ],
+            "threshold": THRESH_SIMILARITY,
+            "gallery_size": len(profile_store),
+        },
+        media_type,
+    )
+
+
+@router.post(
+    "/search-faces",
+    dependencies=[Depends(admission_priority(Priority.INTERACTIVE))],
+    response_model=MultiFaceSearchResult,
+    summary="Find the stored profiles closest to every face in an image",
+    description=(
+        "Detects all faces of a group photo or crowd frame in one pass (largest first, up "
+        "to `max_faces`) and returns the `k` closest stored profiles for each. Faces turned "
+        "past the server's pose limits are not searched (`skipped` says why)."
+    ),
+    responses={
+        200: {"description": "Search completed (matches may be empty)", "content": NEGOTIATED_CONTENT},
+        400: {"description": "Invalid image or no face"},
+    },
+)
+async def search_faces(
+    file: UploadFile = File(...),
+    k: int = Query(5, ge=1, le=100, description="Number of matches to return per face"),
+    max_faces: Optional[int] = Query(
+        None, ge=1, description="Search at most this many faces (capped by the server's MAX_FACES)"
+    ),
+    nprobe: Optional[int] = Query(
+        None,
+        ge=1,
+        description="IVF lists to scan (higher = better recall, slower); ignored by the exact index",
+    ),
+    media_type: str = Depends(response_format),
+) -> Response:  # noqa: D401
+    """Return the top-k stored profiles for each face in the uploaded image."""
+    content = await read_image(file)
+    try:
+        faces, detected = await analyze_faces_parallel(content, max_faces)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    results = []
+    for face in faces:
+        try:
+            check_pose(face)
+        except QualityGateError as exc:
+            # One turned head should not fail the whole group photo
+            metrics.count_failure(exc)
+            results.append({"box": face["box"], "matches": [], "skipped": str(exc)})
+            continue
+        hits = profile_store.search(face["landmarks"], face["eye_distance"], k, nprobe=nprobe)
+        results.append(
+            {
+                "box": face["box"],
+                "matches": [
+                    {"profile_id": pid, "distance": dist, "is_match": dist < THRESH_SIMILARITY}
+                    for pid, dist in hits
+                ],
+                "skipped": None,
+            }
+        )
+    # Same shape as MultiFaceSearchResult
+    return render(
+        {
+            "faces": results,
+            "faces_detected": detected,
+            "threshold": THRESH_SIMILARITY,
+            "gallery_size": len(profile_store),
+        },
+        media_type,
+    )
+
+
+@router.post(
+    "/gallery/rebuild-index",
+    summary="Retrain the gallery search index",
+    description="Re-clusters the stored profiles (IVF index) after large enrolment batches.",
+)
+async def rebuild_gallery_index() -> dict:  # noqa: D401
+    # Runs in a thread (not the analysis pool): the index lives in this process
+    # and swaps the new lists in under its own lock
+    await run_in_threadpool(profile_store.rebuild_index)
+    return {"index": profile_store.index.kind, "gallery_size": len(profile_store)}
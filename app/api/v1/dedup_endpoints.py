@@ -0,0 +1,67 @@
+import math
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.utils.gallery_dedup import DedupJob, dedup_jobs, start_dedup_job
+from app.utils.profile_store import profile_store
+
+router = APIRouter(tags=["gallery"])
+
+
+def _get_job(job_id: str) -> DedupJob:
+    job = dedup_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Duplicate scan not found")
+    return job
+
+
+@router.post(
+    "/gallery/duplicates",
+    status_code=202,
+    summary="Find duplicate and near-duplicate profiles in the background",
+    description=(
+        "Starts a scan of the whole gallery for profile pairs whose landmark distance "
+        "(the `/verify` metric) is at most `threshold`, computed in tiles across the "
+        "analysis pool behind interactive requests. Poll "
+        "`GET /v1/gallery/duplicates/{job_id}` for progress and, once done, the "
+        "clusters of duplicate ids."
+    ),
+    responses={
+        202: {"description": "Scan started"},
+        400: {"description": "Negative or non-finite threshold, or invalid job id"},
+        409: {"description": "A scan with this id is still running"},
+    },
+)
+async def start_duplicate_scan(
+    threshold: Optional[float] = Query(None, description="Largest distance counted as a duplicate (default DEDUP_THRESHOLD)"),
+    job_id: Optional[str] = Query(None, description="Id for the scan (default: random)"),
+) -> JSONResponse:
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    if not math.isfinite(threshold) or threshold < 0:
+        raise HTTPException(status_code=400, detail="threshold must be a finite number >= 0")
+    if job_id in dedup_jobs and dedup_jobs[job_id].progress.state == "running":
+        raise HTTPException(status_code=409, detail=f"Duplicate scan '{job_id}' is still running")
+    try:
+        job = start_dedup_job(profile_store, threshold, job_id=job_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return JSONResponse(job.status(), status_code=202)
+
+
+@router.get(
+    "/gallery/duplicates/{job_id}",
+    summary="Progress and clusters of a duplicate scan",
+    description=(
+        "`progress` runs from 0 to 1. When `state` is `done`, `clusters` lists groups of "
+        "profile ids linked by pairs within the threshold (largest first), each with its "
+        "pairs and their distances; pass `clusters=false` for the counts only."
+    ),
+    responses={404: {"description": "Unknown scan"}},
+)
+async def duplicate_scan_status(
+    job_id: str, clusters: bool = Query(True, description="Include the clusters")
+) -> dict:
+    return _get_job(job_id).status(include_clusters=clusters)
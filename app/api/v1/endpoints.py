@@ -1,7 +1,21 @@
-from fastapi import APIRouter, File, HTTPException, UploadFile
+import asyncio
+from typing import List, Optional
 
-from app.models.profile import Profile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import Response
+
+from app.core.config import settings
+
+from app.api.v1.response_fields import Fields, analysis_payload, face_payload, profile_fields, wants
+from app.api.v1.serialization import NEGOTIATED_CONTENT, render, response_format
+from app.models.profile import MultiFaceProfiles, Profile, ProfileBatchItem
+from app.utils.admission import Priority, admission_priority
+from app.utils.analysis_cache import analysis_cache, analyze_cached
+from app.utils.executor import analysis_executor, default_workers
 from app.utils.face_analyzer import analyze_face
+from app.utils.multi_face import analyze_faces_parallel
+from app.utils.upload import read_image
+from app.utils.warmup import readiness
 
 router = APIRouter()
 
@@ -12,11 +26,19 @@ async def ping():
     return {"ping": "pong"}
 
 
+@router.get("/analysis-cache", summary="Analysis cache statistics")
+async def analysis_cache_stats():
+    """Hit/miss counters and current size of the analysis result cache."""
+    return analysis_cache.stats()
+
+
 @router.post(
     "/create-profile",
+    dependencies=[Depends(admission_priority(Priority.NORMAL))],
     response_model=Profile,
     summary="Create facial profile",
     responses={
+        200: {"content": NEGOTIATED_CONTENT},
         400: {
             "description": "Bad request – invalid image bytes or no face detected",
             "content": {
@@ -25,6 +47,7 @@ async def ping():
                 }
             },
         },
+        413: {"description": "Upload over UPLOAD_MAX_BYTES or image over IMAGE_MAX_MEGAPIXELS"},
         500: {
             "description": "Server error – landmark model missing or cannot be loaded",
             "content": {
@@ -35,46 +58,158 @@ async def ping():
         },
     },
 )
-async def create_profile(file: UploadFile = File(...)) -> Profile:
+async def create_profile(
+    file: UploadFile = File(...),
+    fields: Fields = Depends(profile_fields),
+    media_type: str = Depends(response_format),
+) -> Response:
     """Create a facial profile from an uploaded image."""
-    content = await file.read()
+    content = await read_image(file)
 
     try:
-        profile_data = analyze_face(content)
+        profile_data = await analyze_cached(analyze_face, content)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except RuntimeError as exc:  # model missing etc.
         raise HTTPException(status_code=500, detail=str(exc))
 
-    description = f"Detected face with eye distance {profile_data['eye_distance']:.1f}px and yaw {profile_data['yaw']:.1f}."
+    readiness.profile_served()
+    return render(_basic_profile(profile_data, fields), media_type)
+
+
+def _describe(profile_data: dict) -> str:
+    return f"Detected face with eye distance {profile_data['eye_distance']:.1f}px and yaw {profile_data['yaw']:.1f}."
+
+
+def _basic_profile(profile_data: dict, fields: Fields = None) -> dict:
+    """Build the /create-profile response body from analyze_face output."""
+    return analysis_payload(profile_data, fields, description=_describe(profile_data))
+
+
+@router.post(
+    "/create-profile-batch",
+    dependencies=[Depends(admission_priority(Priority.BULK))],
+    response_model=List[ProfileBatchItem],
+    summary="Create facial profiles for many images in one request",
+    description=(
+        "Accepts several `files` parts and returns one entry per image, in upload order. "
+        "Images that cannot be profiled carry an `error` instead of failing the whole request."
+    ),
+    responses={
+        200: {"content": NEGOTIATED_CONTENT},
+        400: {"description": "Too many files in one request"},
+        413: {"description": "A file over UPLOAD_MAX_BYTES or an image over IMAGE_MAX_MEGAPIXELS"},
+        500: {"description": "Server error – landmark model missing or cannot be loaded"},
+    },
+)
+async def create_profile_batch(
+    files: List[UploadFile] = File(...),
+    fields: Fields = Depends(profile_fields),
+    media_type: str = Depends(response_format),
+) -> Response:
+    """Create a facial profile for every uploaded image."""
+    if len(files) > settings.profile_batch_max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.profile_batch_max_files} files per batch",
+        )
+
+    # Each file is read only when it can be handed to the pool, and dropped
+    # once analysed, so at most two uploads per worker are held in memory
+    # rather than the whole batch
+    in_flight = asyncio.Semaphore(2 * (analysis_executor.workers or default_workers()))
+
+    async def profile(upload: UploadFile) -> dict:
+        async with in_flight:
+            return await analyze_cached(analyze_face, await read_image(upload))
 
-    return Profile(
-        landmarks=profile_data["landmarks"],
-        eye_distance=profile_data["eye_distance"],
-        yaw=profile_data["yaw"],
-        description=description,
-        aligned_face=profile_data.get("aligned_face"),
+    results = await asyncio.gather(*(profile(f) for f in files), return_exceptions=True)
+
+    items: List[dict] = []
+    for index, (upload, result) in enumerate(zip(files, results)):
+        if isinstance(result, RuntimeError):  # model missing etc.
+            raise HTTPException(status_code=500, detail=str(result))
+        if isinstance(result, ValueError):
+            profile, error = None, str(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            profile, error = _basic_profile(result, fields), None
+        # Same shape as ProfileBatchItem
+        items.append(
+            {"index": index, "filename": upload.filename, "profile": profile, "error": error}
+        )
+    return render(items, media_type)
+
+
+@router.post(
+    "/create-profiles",
+    dependencies=[Depends(admission_priority(Priority.NORMAL))],
+    response_model=MultiFaceProfiles,
+    summary="Create a facial profile for every face in an image",
+    description=(
+        "Group photos: the image is decoded and searched for faces once, then every face "
+        "(largest first, up to `max_faces`) gets landmarks, metrics and its aligned chip. "
+        "Faces are profiled in parallel across the analysis workers."
+    ),
+    responses={
+        200: {"content": NEGOTIATED_CONTENT},
+        400: {"description": "Invalid image or no face detected"},
+        500: {"description": "Server error – landmark model missing or cannot be loaded"},
+    },
+)
+async def create_profiles(
+    file: UploadFile = File(...),
+    max_faces: Optional[int] = Query(
+        None, ge=1, description="Profile at most this many faces (capped by the server's MAX_FACES)"
+    ),
+    fields: Fields = Depends(profile_fields),
+    media_type: str = Depends(response_format),
+) -> Response:
+    """Create a facial profile for each face in the uploaded image."""
+    content = await read_image(file)
+
+    try:
+        faces, detected = await analyze_faces_parallel(
+            content, max_faces, chip_format="jpeg" if wants(fields, "aligned_face") else None
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except RuntimeError as exc:  # model missing etc.
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    readiness.profile_served()
+    # Same shape as MultiFaceProfiles
+    return render(
+        {
+            "faces": [face_payload(face, fields, description=_describe(face)) for face in faces],
+            "faces_detected": detected,
+        },
+        media_type,
     )
 
 
 @router.post(
     "/create-profile-extended",
+    dependencies=[Depends(admission_priority(Priority.NORMAL))],
     response_model=Profile,
     summary="Upload an image to generate a creative facial profile",
-    description="Returns landmarks, metrics, plus emotion and symmetry scores.",
+    description="Returns landmarks, metrics, plus emotion, symmetry and head-pose (yaw, pitch, roll) scores.",
     responses={
-        200: {"description": "Successful creative profile generation"},
+        200: {"description": "Successful creative profile generation", "content": NEGOTIATED_CONTENT},
         400: {"description": "Invalid input or face not found"},
     },
 )
 async def create_profile_extended(
     file: UploadFile = File(...),
-) -> Profile:  # noqa: D401
+    fields: Fields = Depends(profile_fields),
+    media_type: str = Depends(response_format),
+) -> Response:  # noqa: D401
     """Create an extended facial profile with additional creative metrics."""
-    content = await file.read()
+    content = await read_image(file)
 
     try:
-        data = analyze_face(content)
+        data = await analyze_cached(analyze_face, content)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -85,13 +220,8 @@ async def create_profile_extended(
 
     description = (
         f"Emotion: {emotion}; Symmetry: {symmetry}; "
-        f"Attractiveness: {attractiveness}/5"
+        f"Attractiveness: {attractiveness}/5; "
+        f"Head pose: yaw {data['yaw']:.1f}°, pitch {data['pitch']:.1f}°, roll {data['roll']:.1f}°"
     )
 
-    return Profile(
-        landmarks=data["landmarks"],
-        eye_distance=data["eye_distance"],
-        yaw=data["yaw"],
-        description=description,
-        aligned_face=data.get("aligned_face"),
-    )
+    return render(analysis_payload(data, fields, description=description), media_type)
@@ -0,0 +1,90 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from app.core.config import settings
+from app.utils.bulk_ingest import ID_MODES, IngestJob, ingest_jobs, journal_path_for, start_ingest_job
+from app.utils.profile_store import PROFILE_ID_PATTERN, profile_store
+from app.utils.upload import spool_upload
+
+router = APIRouter(tags=["gallery"])
+
+
+def _running(job_id: Optional[str]) -> bool:
+    return job_id in ingest_jobs and ingest_jobs[job_id].progress.state == "running"
+
+
+def _get_job(job_id: str) -> IngestJob:
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
+
+
+@router.post(
+    "/gallery/ingest",
+    status_code=202,
+    summary="Enroll every image of a zip or tar archive in the background",
+    description=(
+        "Streams the archive to disk and starts an ingest job: images are analysed in "
+        "parallel across the analysis pool (behind interactive requests) and stored in "
+        "batches under ids taken from their file names (`ids=stem`) or random UUIDs. "
+        "Poll `GET /v1/gallery/ingest/{job_id}` for progress. Posting the same archive "
+        "again with the same `job_id` resumes an interrupted job."
+    ),
+    responses={
+        202: {"description": "Job started"},
+        400: {"description": "Unknown id mode or invalid job id"},
+        409: {"description": "A job with this id is still running"},
+        413: {"description": "Archive over INGEST_MAX_BYTES"},
+    },
+)
+async def start_ingest(
+    file: UploadFile = File(..., description="zip or tar(.gz) archive of images"),
+    ids: str = Query("stem", description=f"Profile ids: {' or '.join(ID_MODES)}"),
+    job_id: Optional[str] = Query(None, description="Resume the job with this id"),
+) -> JSONResponse:
+    if ids not in ID_MODES:
+        raise HTTPException(status_code=400, detail=f"ids must be one of {', '.join(ID_MODES)}")
+    if job_id is not None and not PROFILE_ID_PATTERN.fullmatch(job_id):
+        raise HTTPException(status_code=400, detail=f"Invalid job id '{job_id}'")
+    if _running(job_id):
+        raise HTTPException(status_code=409, detail=f"Ingest job '{job_id}' is still running")
+
+    path = await spool_upload(file, settings.ingest_max_bytes)
+    try:
+        job = start_ingest_job(path, profile_store, ids=ids, job_id=job_id, cleanup=True)
+    except ValueError as exc:
+        os.unlink(path)
+        # Started by another request while this archive was being received
+        status_code = 409 if _running(job_id) else 400
+        raise HTTPException(status_code=status_code, detail=str(exc)) from exc
+    return JSONResponse(job.status(), status_code=202)
+
+
+@router.get("/gallery/ingest/{job_id}", summary="Progress of an ingest job")
+async def ingest_status(job_id: str) -> dict:  # noqa: D401
+    return _get_job(job_id).status()
+
+
+@router.get(
+    "/gallery/ingest/{job_id}/manifest",
+    response_class=Response,
+    summary="Per-file results of an ingest job (JSON lines)",
+    description=(
+        'One line per finished file: `{"file", "status", "id"}` with status `stored`, '
+        "`exists` (id already in the gallery) or `failed` plus an `error`."
+    ),
+    responses={200: {"content": {"application/x-ndjson": {}}}, 404: {"description": "Unknown job"}},
+)
+async def ingest_manifest(job_id: str) -> Response:  # noqa: D401
+    if not PROFILE_ID_PATTERN.fullmatch(job_id):
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    # Journals outlive the process, so earlier jobs' manifests stay readable
+    path = journal_path_for(job_id)
+    if os.path.exists(path):
+        return FileResponse(path, media_type="application/x-ndjson")
+    _get_job(job_id)
+    return Response(b"", media_type="application/x-ndjson")
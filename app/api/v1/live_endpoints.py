@@ -0,0 +1,122 @@
+import asyncio
+import time
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.utils.admission import Overloaded, Priority, prioritized
+from app.utils.executor import analysis_executor
+from app.utils.live_verifier import LiveState, process_frame
+
+router = APIRouter(tags=["live"])
+
+# Same verdict threshold as /detect-deepfake(-video)
+THRESHOLD = 0.60
+# Weight of the newest frame in the running consistency score (EWMA)
+_SCORE_SMOOTHING = 0.2
+
+
+class _LatestFrame:
+    """Single-slot mailbox: a new frame replaces one not yet processed.
+
+    The receiver keeps draining the socket while a frame is being analysed,
+    so a client that outpaces the server has its stale frames dropped
+    instead of queued, and latency stays bounded by one frame.
+    """
+
+    def __init__(self):
+        self._frame: Optional[Tuple[int, float, bytes]] = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, data: bytes) -> None:
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = (self.received, time.perf_counter(), data)
+        self.received += 1
+        self._ready.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+
+    async def take(self) -> Optional[Tuple[int, float, bytes]]:
+        """Wait for the newest frame; None once the client has gone."""
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+@router.websocket("/ws/verify")
+async def ws_verify(websocket: WebSocket) -> None:
+    """Live-camera verification: send JPEG frames as binary messages.
+
+    Each processed frame is answered with a JSON message holding the frame
+    number, face box, per-frame flicker ``score``, the connection's running
+    score and verdict, how many frames were dropped so far and the latency
+    from receipt to reply. Undecodable frames get an ``error`` message and
+    the stream continues.
+    """
+    await websocket.accept()
+    mailbox = _LatestFrame()
+
+    async def receive() -> None:
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    mailbox.put(message["bytes"])
+        finally:
+            mailbox.close()
+
+    receiver = asyncio.create_task(receive())
+    state: LiveState = None
+    running_score: Optional[float] = None
+    try:
+        while True:
+            item = await mailbox.take()
+            if item is None:
+                break
+            seq, received_at, data = item
+            try:
+                async with prioritized(Priority.INTERACTIVE):
+                    result, state = await analysis_executor.run(process_frame, data, state)
+            except Overloaded as exc:  # drop the frame; a newer one follows
+                await websocket.send_json({"frame": seq, "error": exc.detail})
+                continue
+            except ValueError as exc:
+                await websocket.send_json({"frame": seq, "error": str(exc)})
+                continue
+            except RuntimeError as exc:
+                await websocket.send_json({"frame": seq, "error": str(exc)})
+                await websocket.close(code=1011)
+                break
+
+            if result["score"] is not None:
+                running_score = (
+                    result["score"]
+                    if running_score is None
+                    else (1 - _SCORE_SMOOTHING) * running_score + _SCORE_SMOOTHING * result["score"]
+                )
+            await websocket.send_json(
+                {
+                    "frame": seq,
+                    **result,
+                    "running_score": running_score,
+                    "is_deepfake": running_score is not None and running_score > THRESHOLD,
+                    "dropped": mailbox.dropped,
+                    "latency_ms": (time.perf_counter() - received_at) * 1000.0,
+                }
+            )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
@@ -0,0 +1,235 @@
+import asyncio
+import re
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.api.v1.response_fields import Fields, profile_fields, record_payload
+from app.api.v1.serialization import MSGPACK, NEGOTIATED_CONTENT, render, response_format
+from app.api.v1.snapshot import CONFLICT_MODES, NDJSON, SNAPSHOT_FORMATS, export_snapshot, import_snapshot
+from app.core.config import settings
+from app.models.profile_record import ProfileRecord
+from app.utils.analysis_cache import content_digest
+from app.utils.executor import analysis_executor
+from app.utils.face_analyzer import generate_jitter_faces_from_jpeg
+from app.utils.profile_store import profile_store
+
+router = APIRouter(tags=["profiles"])
+
+# Ids can be deleted and reused (caller-chosen ids, snapshot imports), so
+# clients must revalidate; the ETag makes that a 304 without a body
+_ASSET_CACHE_CONTROL = "no-cache"
+
+# One member of an If-None-Match list: optional weak prefix, quoted tag
+_ETAG_ITEM = re.compile(r'\s*(?:W/)?("[^"]*")\s*(?:,|$)')
+
+# In-flight lazy jitter generations, so concurrent requests share one job
+# (keyed by id and chip: an id may be deleted and stored again meanwhile)
+_jitter_jobs: Dict[Tuple[str, bytes], "asyncio.Future[Tuple[bytes, ...]]"] = {}
+
+# Listing pages leave the images out unless they are asked for
+_LIST_FIELDS = frozenset({"id", "landmarks", "eye_distance", "yaw", "description"})
+
+_JPEG_RESPONSES = {
+    200: {"content": {"image/jpeg": {}}, "description": "Raw JPEG bytes"},
+    304: {"description": "Not modified (matching `If-None-Match`)"},
+    404: {"description": "Profile or asset not found"},
+}
+
+
+def _get_record(profile_id: str) -> ProfileRecord:
+    try:
+        return profile_store.get(profile_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header (RFC 9110).
+
+    A malformed list matches nothing, so the full response is sent.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    pos, tags = 0, []
+    while pos < len(if_none_match):
+        item = _ETAG_ITEM.match(if_none_match, pos)
+        if item is None:
+            return False
+        tags.append(item.group(1))
+        pos = item.end()
+    return etag in tags
+
+
+def _jpeg_response(jpeg: bytes, request: Request) -> Response:
+    etag = f'"{content_digest(jpeg)[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": _ASSET_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=jpeg, media_type="image/jpeg", headers=headers)
+
+
+async def _generate_jitters(profile_id: str, chip: bytes) -> Tuple[bytes, ...]:
+    jitters = await analysis_executor.run(generate_jitter_faces_from_jpeg, chip)
+    if not jitters:
+        raise HTTPException(status_code=500, detail="Jitter generation failed")
+    # Only attach them to the profile they were made from: it may have been
+    # deleted, or deleted and stored again under the same id, meanwhile
+    try:
+        current = profile_store.get(profile_id)
+        if current.aligned_face == chip and current.jitter_faces is None:
+            profile_store.set_jitter_faces(profile_id, jitters)
+    except KeyError:
+        pass
+    return tuple(jitters)
+
+
+async def _ensure_jitters(profile_id: str, record: ProfileRecord) -> Tuple[bytes, ...]:
+    """Return the profile's jitters, generating and storing them on first use."""
+    if record.jitter_faces is not None:
+        return record.jitter_faces
+    if record.aligned_face is None:
+        raise HTTPException(status_code=404, detail="Profile has no aligned face")
+    key = (profile_id, record.aligned_face)
+    job = _jitter_jobs.get(key)
+    if job is None:
+        job = asyncio.ensure_future(_generate_jitters(profile_id, record.aligned_face))
+        _jitter_jobs[key] = job
+        job.add_done_callback(lambda _: _jitter_jobs.pop(key, None))
+    return await asyncio.shield(job)
+
+
+@router.get(
+    "/profiles/{profile_id}/chip.jpg",
+    response_class=Response,
+    summary="Aligned face chip of a stored profile",
+    description="Serves the 150×150 aligned chip as raw JPEG (no base-64), with an ETag.",
+    responses=_JPEG_RESPONSES,
+)
+async def profile_chip(profile_id: str, request: Request) -> Response:  # noqa: D401
+    record = _get_record(profile_id)
+    if record.aligned_face is None:
+        raise HTTPException(status_code=404, detail="Profile has no aligned face")
+    return _jpeg_response(record.aligned_face, request)
+
+
+@router.get(
+    "/profiles/{profile_id}/jitter/{n}.jpg",
+    response_class=Response,
+    summary="Jittered augmentation crop of a stored profile",
+    description=(
+        "Serves jittered crop `n` as raw JPEG with an ETag. The crops are generated on "
+        "first request (once per profile) and stored with the profile."
+    ),
+    responses=_JPEG_RESPONSES,
+)
+async def profile_jitter(
+    profile_id: str,
+    request: Request,
+    n: int = Path(..., ge=0, description="Crop index (0-based)"),
+) -> Response:  # noqa: D401
+    record = _get_record(profile_id)
+    jitters = await _ensure_jitters(profile_id, record)
+    if n >= len(jitters):
+        raise HTTPException(status_code=404, detail=f"Profile has {len(jitters)} jitter crops")
+    return _jpeg_response(jitters[n], request)
+
+
+@router.get(
+    "/profiles",
+    response_class=Response,
+    summary="List stored profiles, one page at a time",
+    description=(
+        "Returns up to `limit` profiles in id order plus a `next_cursor`; pass it back as "
+        "`cursor` for the following page (`null` on the last one). Pages stay consistent "
+        "while profiles are added or deleted. Images are left out unless requested with "
+        "`fields`."
+    ),
+    responses={200: {"content": NEGOTIATED_CONTENT}},
+)
+async def list_profiles(
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Profiles per page"),
+    fields: Fields = Depends(profile_fields),
+    media_type: str = Depends(response_format),
+) -> Response:  # noqa: D401
+    ids = profile_store.list_ids(cursor, limit + 1)
+    profiles = []
+    for profile_id in ids[:limit]:
+        try:
+            profiles.append(record_payload(profile_store.get(profile_id), fields or _LIST_FIELDS))
+        except KeyError:
+            continue  # deleted since it was listed
+    payload = {
+        "profiles": profiles,
+        "next_cursor": ids[limit - 1] if len(ids) > limit else None,
+        "total": len(profile_store),
+    }
+    return render(payload, media_type)
+
+
+@router.get(
+    "/profiles/export",
+    response_class=StreamingResponse,
+    summary="Stream a snapshot of the whole gallery",
+    description=(
+        "Streams every profile, images included, as JSON lines (`format=ndjson`) or "
+        "back-to-back MessagePack maps (`format=msgpack`), after a header object "
+        "`{\"snapshot\", \"version\", \"profiles\"}`. Profiles are read from the store "
+        "a page at a time, so memory use does not grow with the gallery. "
+        "`POST /v1/profiles/import` restores the file on any node."
+    ),
+    responses={200: {"content": {NDJSON: {}, MSGPACK: {}}}, 400: {"description": "Unknown format"}},
+)
+async def export_profiles(
+    format: str = Query("ndjson", description=f"Snapshot encoding: {' or '.join(SNAPSHOT_FORMATS)}"),
+) -> StreamingResponse:  # noqa: D401
+    media_type = SNAPSHOT_FORMATS.get(format)
+    if media_type is None:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(SNAPSHOT_FORMATS)}")
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        export_snapshot(profile_store, media_type, settings.snapshot_page_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="profiles-{stamp}.{format}"'},
+    )
+
+
+@router.post(
+    "/profiles/import",
+    summary="Restore profiles from a snapshot",
+    description=(
+        "Takes a snapshot from `GET /v1/profiles/export` as the raw request body "
+        f"(`Content-Type: {NDJSON}` or `{MSGPACK}`) and adds its profiles under their "
+        "own ids, parsing and committing them as the body streams in. Profiles whose id "
+        "is already stored are skipped (`on_conflict=skip`, so an interrupted import can "
+        "simply be re-sent) or stop the import (`on_conflict=fail`). On an error the "
+        "records before the failing one are kept."
+    ),
+    responses={
+        200: {"description": "Counts of records read, imported and skipped"},
+        400: {"description": "Malformed snapshot or unknown conflict mode"},
+        409: {"description": "Profile id already stored (`on_conflict=fail`)"},
+        413: {"description": "Snapshot over SNAPSHOT_MAX_BYTES"},
+        415: {"description": "Body is neither NDJSON nor MessagePack"},
+    },
+)
+async def import_profiles(
+    request: Request,
+    on_conflict: str = Query("skip", description=f"Existing ids: {' or '.join(CONFLICT_MODES)}"),
+) -> dict:
+    if on_conflict not in CONFLICT_MODES:
+        raise HTTPException(status_code=400, detail=f"on_conflict must be one of {', '.join(CONFLICT_MODES)}")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in (NDJSON, MSGPACK):
+        raise HTTPException(status_code=415, detail=f"Send the snapshot as {NDJSON} or {MSGPACK}")
+    return await import_snapshot(
+        request.stream(),
+        profile_store,
+        content_type,
+        on_conflict=on_conflict,
+        batch_size=settings.snapshot_page_size,
+        max_bytes=settings.snapshot_max_bytes,
+    )
@@ -0,0 +1,110 @@
+from typing import Any, Dict, FrozenSet, Optional, Sequence
+
+import numpy as np
+from fastapi import HTTPException, Query
+
+from app.models.profile import Profile
+from app.models.profile_record import ProfileRecord
+from app.utils.face_analyzer import encode_chip
+
+PROFILE_FIELDS = frozenset(Profile.__fields__)
+
+Fields = Optional[FrozenSet[str]]
+
+_FIELDS_HELP = (
+    "Comma-separated profile fields to return (e.g. `id,landmarks,eye_distance`). "
+    "Images that are not requested are never encoded. Default: every field the endpoint fills."
+)
+
+
+def profile_fields(
+    fields: Optional[str] = Query(None, description=_FIELDS_HELP),
+    include: Optional[str] = Query(None, description="Alias of `fields`"),
+) -> Fields:
+    """Parse the ``fields``/``include`` selection (None → endpoint default)."""
+    raw = fields if fields is not None else include
+    if raw is None:
+        return None
+    selected = frozenset(f.strip() for f in raw.split(",") if f.strip())
+    unknown = selected - PROFILE_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(sorted(unknown))} "
+            f"(expected any of {', '.join(sorted(PROFILE_FIELDS))})",
+        )
+    return selected
+
+
+def wants(fields: Fields, name: str) -> bool:
+    return fields is None or name in fields
+
+
+def profile_payload(
+    fields: Fields,
+    landmarks: Any,
+    eye_distance: float,
+    yaw: float,
+    description: Optional[str] = None,
+    aligned_face: Optional[bytes] = None,
+    jitter_faces: Optional[Sequence[bytes]] = None,
+    id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build a ``Profile``-shaped response body without model validation.
+
+    Landmarks stay a numpy int array and images raw JPEG bytes; the
+    negotiated encoder (``serialization.encode``) turns them into lists and
+    base-64 for JSON or packed int16 and bin for MessagePack.
+    """
+    payload = {
+        "landmarks": np.asarray(landmarks, dtype=np.int16),
+        "eye_distance": float(eye_distance),
+        "yaw": float(yaw),
+        "description": description,
+        "aligned_face": aligned_face,
+        "jitter_faces": list(jitter_faces) if jitter_faces is not None else None,
+        "id": id,
+    }
+    if fields is None:
+        return payload
+    return {k: v for k, v in payload.items() if k in fields}
+
+
+def analysis_payload(data: Dict[str, Any], fields: Fields, description: Optional[str] = None) -> Dict[str, Any]:
+    """Profile body from ``analyze_face`` output; the chip is encoded only if wanted."""
+    chip = data.get("_chip")
+    return profile_payload(
+        fields,
+        data["landmarks"],
+        data["eye_distance"],
+        data["yaw"],
+        description=description,
+        aligned_face=encode_chip(chip) if chip is not None and wants(fields, "aligned_face") else None,
+    )
+
+
+def face_payload(face: Dict[str, Any], fields: Fields, description: Optional[str] = None) -> Dict[str, Any]:
+    """One entry of a multi-face response (``profile_faces`` output + its box)."""
+    payload = profile_payload(
+        fields,
+        face["landmarks"],
+        face["eye_distance"],
+        face["yaw"],
+        description=description,
+        aligned_face=face.get("aligned_face"),
+    )
+    payload["box"] = face["box"]
+    return payload
+
+
+def record_payload(record: ProfileRecord, fields: Fields) -> Dict[str, Any]:
+    return profile_payload(
+        fields,
+        record.landmarks,
+        record.eye_distance,
+        record.yaw,
+        description=record.description,
+        aligned_face=record.aligned_face,
+        jitter_faces=record.jitter_faces,
+        id=record.id,
+    )
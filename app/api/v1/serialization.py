@@ -0,0 +1,94 @@
+import base64
+import json
+from typing import Any, Optional
+
+import msgpack
+import numpy as np
+from fastapi import Header
+from fastapi.responses import Response
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+# Accept values answered with MessagePack
+_MSGPACK_TYPES = frozenset({MSGPACK, "application/x-msgpack", "application/vnd.msgpack"})
+
+# Shown in the OpenAPI docs of every negotiated endpoint
+NEGOTIATED_CONTENT = {
+    JSON: {},
+    MSGPACK: {
+        "schema": {
+            "description": (
+                "Same keys as the JSON body; `landmarks` is a 272-byte bin of "
+                "little-endian int16 (x0, y0, x1, y1, …) and images are raw JPEG bytes."
+            )
+        }
+    },
+}
+
+
+def response_format(accept: Optional[str] = Header(None)) -> str:
+    """Pick the response media type from the ``Accept`` header.
+
+    MessagePack is returned when it is the client's highest-quality
+    acceptable type; anything else (including no header) gets JSON.
+    """
+    if not accept:
+        return JSON
+    best, best_q = JSON, 0.0
+    for part in accept.split(","):
+        media, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        # Strictly greater: on ties the type listed first wins
+        if media.lower() in _MSGPACK_TYPES and q > best_q:
+            best, best_q = MSGPACK, q
+        elif media.lower() in (JSON, "application/*", "*/*") and q > best_q:
+            best, best_q = JSON, q
+    return best
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode("ascii")
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return np.ascontiguousarray(obj, dtype="<i2").tobytes()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def encode(payload: Any, media_type: str) -> bytes:
+    """Serialise an already-computed payload without model validation.
+
+    Payloads are plain dicts/lists whose landmark arrays are numpy int arrays
+    and whose images are raw bytes; JSON renders them as nested lists and
+    base-64, MessagePack as packed int16 and bin.
+    """
+    if media_type == MSGPACK:
+        return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+    return json.dumps(
+        payload, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def render(payload: Any, media_type: str, status_code: int = 200) -> Response:
+    return Response(
+        content=encode(payload, media_type),
+        status_code=status_code,
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
@@ -7,6 +7,125 @@ class Settings(BaseSettings):
     app_name: str = "Validia"
     api_v1_prefix: str = "/v1"
 
+    # Face-analysis execution backend: "process" (default) or "thread"
+    analysis_backend: str = "process"
+    # Number of pool workers (0 → the CPU cores shared out between the
+    # web_concurrency web worker processes, each of which starts its own pool)
+    analysis_workers: int = 0
+    # Web worker processes on this host (gunicorn/uvicorn WEB_CONCURRENCY)
+    web_concurrency: int = 1
+    # Maximum analysis jobs handed to the pool at once (0 → one per worker,
+    # so that backlog waits in priority order rather than the pool's FIFO)
+    analysis_queue_size: int = 0
+    # Admission queue in front of the pool: more than analysis_max_waiting
+    # queued callers, or a wait over analysis_max_wait_seconds, gets 503
+    # with Retry-After (0 = no limit)
+    analysis_max_waiting: int = 256
+    analysis_max_wait_seconds: float = 10.0
+
+    # Load the landmark model and run a warm-up inference at startup, before
+    # the pool forks; /ready reports 503 until this has succeeded
+    preload_model: bool = True
+
+    # Per-stage timing histograms and counters on /metrics plus a
+    # Server-Timing header on every response
+    metrics_enabled: bool = True
+
+    # Upper bound on faces profiled per image by the multi-face endpoints
+    # (largest faces first; 0 = no limit)
+    max_faces: int = 10
+
+    # Head-pose pre-filter of /identify-face, /search-face and /search-faces:
+    # faces turned further than this many degrees (|yaw| or |pitch|) are not
+    # searched (0 = no limit). Pitch is measured against a generic 3D face,
+    # so leave some headroom for people whose features sit differently
+    pose_max_yaw: float = 0.0
+    pose_max_pitch: float = 0.0
+
+    # Micro-batching of concurrent single-image calls (0 ms disables it)
+    batch_window_ms: float = 2.0
+    batch_max_size: int = 16
+    # Upper bound on images accepted by /create-profile-batch
+    profile_batch_max_files: int = 256
+
+    # Result cache for repeated uploads (keyed by SHA-256 of the bytes);
+    # max_entries=0 disables it
+    analysis_cache_max_entries: int = 1024
+    analysis_cache_ttl_seconds: float = 600.0
+    analysis_cache_max_bytes: int = 128 * 1024 * 1024
+
+    # Gallery index behind /search-face: "exact" (brute force) or "ivf"
+    # (k-means inverted lists; ivf_nlist=0 → sqrt(N) lists, ivf_nprobe lists
+    # scanned per query, exact search until ivf_min_train_size profiles)
+    gallery_index: str = "exact"
+    ivf_nlist: int = 0
+    ivf_nprobe: int = 8
+    ivf_min_train_size: int = 10000
+
+    # Profile store backend: "memory" (lost on restart), "mmap" (durable,
+    # memory-mapped column files under profile_store_path) or "shared" (the
+    # mmap files shared by every worker process, one writer at a time)
+    profile_store_backend: str = "memory"
+    profile_store_path: str = "data/profiles"
+    # fsync every write (crash-safe); disable only for bulk loads you can redo
+    profile_store_fsync: bool = True
+
+    # Uploads: larger files get 413 while streaming; images whose header
+    # reports more than image_max_megapixels get 413 before decoding, and
+    # larger-than image_decode_max_megapixels images are decoded at 1/2, 1/4
+    # or 1/8 size (0 disables either pixel limit)
+    upload_max_bytes: int = 20 * 1024 * 1024
+    image_max_megapixels: float = 100.0
+    image_decode_max_megapixels: float = 24.0
+
+    # /detect-deepfake: JSON parameters of the spectral artifact scorer (empty
+    # uses the built-in weights); chips are scored in stacks of this size
+    deepfake_model_path: str = ""
+    deepfake_batch_size: int = 32
+
+    # Face detection: HOG runs on a copy whose longest side is at most
+    # detect_max_side (0 disables downscaling); images smaller than
+    # detect_upsample_below are upsampled detect_upsample times instead.
+    detect_max_side: int = 640
+    detect_upsample: int = 1
+    detect_upsample_below: int = 400
+
+    # Bulk ingest (POST /v1/gallery/ingest, python -m app.ingest): images per
+    # pool job, profiles committed per store write, largest archive accepted
+    # over HTTP and where the resumable per-job journals are kept
+    ingest_chunk_size: int = 8
+    ingest_batch_size: int = 256
+    ingest_max_bytes: int = 4 * 1024 * 1024 * 1024
+    ingest_journal_dir: str = "data/ingest"
+
+    # Gallery snapshots (GET /v1/profiles/export, POST /v1/profiles/import):
+    # profiles read per export chunk and committed per import write, and the
+    # largest snapshot an import accepts (0 = no limit)
+    snapshot_page_size: int = 256
+    snapshot_max_bytes: int = 16 * 1024 * 1024 * 1024
+
+    # Duplicate scan (POST /v1/gallery/duplicates): default distance under
+    # which two profiles count as duplicates (same units as /verify) and the
+    # rows per side of one tile of the blocked distance matrix
+    dedup_threshold: float = 0.02
+    dedup_tile_rows: int = 512
+
+    # Video deepfake analysis: full detection every video_detect_every frames
+    # (or when the correlation tracker's confidence drops below
+    # video_min_track_confidence). Only the first video_max_frames frames
+    # are analysed (0 = all): one upload is one pool job holding an
+    # admission slot throughout, and 300 frames (10 s at 30 fps) take about
+    # 8 s with tracking, 27 s detecting every frame
+    video_detect_every: int = 10
+    video_min_track_confidence: float = 7.0
+    video_max_frames: int = 300
+    # Largest accepted upload; it is streamed to a temporary file in chunks
+    video_max_bytes: int = 256 * 1024 * 1024
+
+    # /ws/verify: frames re-fit landmarks at the previous face position and
+    # search a window around it every ws_refine_every frames
+    ws_refine_every: int = 15
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,75 @@
+"""Bulk-enroll a directory, zip or tar archive of face images into the profile store.
+
+Profiles are named after their file (``emp-0042.jpg`` → ``emp-0042``) unless
+``--ids uuid`` is given, and written to the store configured by
+``PROFILE_STORE_BACKEND``/``PROFILE_STORE_PATH``. Use ``shared`` to enroll
+into the gallery of a running server (``mmap`` only with the server
+stopped). Every finished file is appended to the journal, which is also the
+per-file error manifest; re-running the same command after an interruption
+skips what the journal already lists.
+
+Usage::
+
+    python -m app.ingest photos.zip [--journal data/ingest/photos.jsonl] [--ids stem|uuid] [--workers 8]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from app.core.config import settings
+from app.utils.bulk_ingest import ID_MODES, IngestProgress, ingest
+from app.utils.executor import analysis_executor
+from app.utils.profile_store import profile_store
+from app.utils.warmup import readiness
+
+
+def _print_progress(progress: IngestProgress) -> None:
+    p = progress.as_dict()
+    print(
+        f"\r{p['seen']} files: {p['stored']} stored, {p['exists']} existing, {p['failed']} failed, "
+        f"{p['resumed']} done earlier | {p['images_per_minute']:.0f} images/min",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Directory, .zip or .tar(.gz) of images")
+    parser.add_argument("--journal", help="Resume/manifest file (default: INGEST_JOURNAL_DIR/<source name>.jsonl)")
+    parser.add_argument("--ids", choices=ID_MODES, default="stem")
+    parser.add_argument("--workers", type=int, default=0, help="Analysis processes (default: ANALYSIS_WORKERS or one per core)")
+    parser.add_argument("--batch-size", type=int, help="Profiles per store commit (default: INGEST_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    if settings.profile_store_backend == "memory":
+        parser.error("PROFILE_STORE_BACKEND=memory would discard the profiles; use mmap or shared")
+    name = os.path.basename(os.path.normpath(args.source))
+    journal = args.journal or os.path.join(settings.ingest_journal_dir, f"{name}.jsonl")
+
+    # Load the model once before forking so the workers share it
+    if not readiness.warm_up():
+        parser.exit(1, f"{readiness.error}\n")
+    analysis_executor.start(workers=args.workers or None)
+    try:
+        progress = asyncio.run(
+            ingest(
+                args.source,
+                profile_store,  # the configured store, opened once at import
+                journal,
+                ids=args.ids,
+                on_progress=_print_progress,
+                batch_size=args.batch_size,
+            )
+        )
+    except (ValueError, RuntimeError) as exc:
+        parser.exit(1, f"\nIngest stopped: {exc} (re-run to resume)\n")
+    finally:
+        analysis_executor.shutdown()
+    print(f"\n{progress.as_dict()['state']}; manifest: {journal}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 
 from app.api import api_router
+from app.core.config import settings
+from app.utils.batcher import analysis_batcher
+from app.utils.executor import analysis_executor
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE, ServerTimingMiddleware, metrics
+from app.utils.warmup import readiness
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Warm the model, then start the analysis pool for the lifetime of the app.
+
+    The model is loaded before the pool forks so process workers inherit it
+    instead of each reading the ~100 MB file again. Under gunicorn the
+    master has already warmed up (``on_starting``) before forking this
+    worker, which then inherits the ready state and skips it.
+    """
+    if settings.preload_model:
+        if not readiness.ready:
+            readiness.warm_up()
+    else:
+        readiness.ready = True
+    analysis_executor.start()
+    analysis_batcher.start()
+    try:
+        yield
+    finally:
+        analysis_batcher.stop()
+        analysis_executor.shutdown()
+
 
-app = FastAPI(title="Validia API")
+app = FastAPI(title="Validia API", lifespan=lifespan)
+app.add_middleware(ServerTimingMiddleware)
 
 # Include API routers
 app.include_router(api_router)
@@ -14,6 +47,20 @@ async def read_root():
     return {"message": "Validia API is up"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the landmark model is loaded and warmed up."""
+    return JSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Stage histograms and counters in the Prometheus text format."""
+    if not settings.metrics_enabled:
+        return JSONResponse({"detail": "Metrics are disabled"}, status_code=404)
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,9 +1,35 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
 class DeepfakeResult(BaseModel):
-    """Simple schema for deep-fake detection stub."""
+    """Deep-fake verdict: ``confidence`` is the artifact (or flicker) score."""
 
     is_deepfake: bool
     confidence: float  # 0.0 – 1.0
     description: str
+
+
+class FrameScore(BaseModel):
+    """Per-frame result of video deep-fake analysis."""
+
+    index: int
+    face_found: bool
+    tracked: bool  # located by the correlation tracker instead of HOG detection
+    score: Optional[float] = None  # None for the first frame of each face track
+    artifact_score: Optional[float] = None  # spectral artifact score of the face chip
+    yaw: Optional[float] = None  # head pose in degrees (None without a face)
+    pitch: Optional[float] = None
+    roll: Optional[float] = None
+
+
+class VideoDeepfakeResult(DeepfakeResult):
+    """Aggregate verdict plus per-frame scores for an uploaded video."""
+
+    frames: List[FrameScore]
+    frames_analyzed: int
+    faces_found: int
+    detections: int  # frames that ran full HOG detection
+    fps: float  # analysis throughput (frames per second)
+    artifact_confidence: Optional[float] = None  # mean artifact score over faces
@@ -19,3 +19,64 @@ class Profile(BaseModel):
         description="Five base-64 encoded jittered crops for augmentation (only returned by /store-profile)",
     )
     id: Optional[str] = Field(default=None, description="Unique profile identifier")
+
+
+class FaceProfile(Profile):
+    """Profile of one face in a multi-face image."""
+
+    box: Tuple[int, int, int, int] = Field(
+        description="Face rectangle in image pixels (left, top, right, bottom)"
+    )
+
+
+class MultiFaceProfiles(BaseModel):
+    """Every profiled face of one image, largest first."""
+
+    faces: List[FaceProfile]
+    faces_detected: int = Field(description="Faces found before the max_faces limit was applied")
+
+
+class ProfileBatchItem(BaseModel):
+    """Outcome for one image of a /create-profile-batch upload."""
+
+    index: int = Field(description="Position of the image in the upload")
+    filename: Optional[str] = None
+    profile: Optional[Profile] = None
+    error: Optional[str] = Field(
+        default=None, description="Why no profile was produced for this image"
+    )
+
+
+class SearchMatch(BaseModel):
+    """One stored profile returned by /search-face."""
+
+    profile_id: str
+    distance: float = Field(description="Landmark distance to the probe (lower is closer)")
+    is_match: bool
+
+
+class SearchResult(BaseModel):
+    """Top-k closest stored profiles for a probe image."""
+
+    matches: List[SearchMatch]
+    threshold: float
+    gallery_size: int
+
+
+class FaceSearchResult(BaseModel):
+    """Closest stored profiles for one face of a multi-face probe."""
+
+    box: Tuple[int, int, int, int]
+    matches: List[SearchMatch]
+    skipped: Optional[str] = Field(
+        default=None, description="Why the face was not searched (head turned past the pose limits)"
+    )
+
+
+class MultiFaceSearchResult(BaseModel):
+    """Top-k matches for every face in a probe image."""
+
+    faces: List[FaceSearchResult]
+    faces_detected: int
+    threshold: float
+    gallery_size: int
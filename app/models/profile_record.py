@@ -0,0 +1,106 @@
+import base64
+from typing import AbstractSet, Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.models.profile import Profile
+
+
+class ProfileRecord:
+    """Compact internal representation of a stored profile.
+
+    The API-facing ``Profile`` holds 68 tuples of Python ints plus base-64
+    strings, several kilobytes of object overhead per face. Records keep an
+    int16 (68, 2) landmark array and raw JPEG bytes in a ``__slots__`` object;
+    ``to_profile()`` converts at the API boundary only.
+    """
+
+    __slots__ = ("id", "landmarks", "eye_distance", "yaw", "description", "aligned_face", "jitter_faces")
+
+    def __init__(
+        self,
+        landmarks: Union[np.ndarray, Sequence[Tuple[int, int]]],
+        eye_distance: float,
+        yaw: float,
+        description: Optional[str] = None,
+        aligned_face: Optional[bytes] = None,
+        jitter_faces: Optional[Sequence[bytes]] = None,
+        id: Optional[str] = None,
+    ):
+        arr = np.asarray(landmarks)
+        if arr.shape != (68, 2):
+            raise ValueError("Profiles must have 68 landmarks each")
+        if arr.size and (arr.min() < -32768 or arr.max() > 32767):
+            raise ValueError("Landmark coordinates out of int16 range")
+        self.landmarks = arr.astype(np.int16)
+        self.landmarks.flags.writeable = False
+        self.eye_distance = float(eye_distance)
+        self.yaw = float(yaw)
+        self.description = description
+        self.aligned_face = aligned_face
+        self.jitter_faces = tuple(jitter_faces) if jitter_faces is not None else None
+        self.id = id
+
+    def __repr__(self) -> str:
+        return f"ProfileRecord(id={self.id!r}, eye_distance={self.eye_distance:.1f})"
+
+    @classmethod
+    def from_analysis(
+        cls,
+        data: Dict[str, Any],
+        description: Optional[str] = None,
+        aligned_face: Optional[bytes] = None,
+        jitter_faces: Optional[Sequence[bytes]] = None,
+    ) -> "ProfileRecord":
+        """Build a record from ``analyze_face`` output and encoded JPEG assets."""
+        return cls(
+            landmarks=data["landmarks"],
+            eye_distance=data["eye_distance"],
+            yaw=data["yaw"],
+            description=description,
+            aligned_face=aligned_face,
+            jitter_faces=jitter_faces,
+        )
+
+    @classmethod
+    def from_profile(cls, profile: Profile) -> "ProfileRecord":
+        return cls(
+            landmarks=profile.landmarks,
+            eye_distance=profile.eye_distance,
+            yaw=profile.yaw,
+            description=profile.description,
+            aligned_face=(
+                base64.b64decode(profile.aligned_face) if profile.aligned_face is not None else None
+            ),
+            jitter_faces=(
+                [base64.b64decode(j) for j in profile.jitter_faces]
+                if profile.jitter_faces is not None
+                else None
+            ),
+            id=profile.id,
+        )
+
+    @classmethod
+    def coerce(cls, obj: Union["ProfileRecord", Profile]) -> "ProfileRecord":
+        return obj if isinstance(obj, cls) else cls.from_profile(obj)
+
+    def to_profile(self, fields: Optional[AbstractSet[str]] = None) -> Profile:
+        """Convert to the API schema (landmark tuples, base-64 images).
+
+        With ``fields``, images not listed are left out instead of encoded.
+        """
+        aligned = self.aligned_face if fields is None or "aligned_face" in fields else None
+        jitters = self.jitter_faces if fields is None or "jitter_faces" in fields else None
+        return Profile.construct(
+            id=self.id,
+            landmarks=[tuple(p) for p in self.landmarks.tolist()],
+            eye_distance=self.eye_distance,
+            yaw=self.yaw,
+            description=self.description,
+            aligned_face=base64.b64encode(aligned).decode("ascii") if aligned is not None else None,
+            jitter_faces=(
+                [base64.b64encode(j).decode("ascii") for j in jitters]
+                if jitters is not None
+                else None
+            ),
+        )
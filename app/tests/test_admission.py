@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.endpoints as ep
+from app.main import app
+from app.utils import admission
+from app.utils.admission import AdmissionController, ClientDisconnected, Overloaded, Priority
+from app.utils.metrics import metrics
+
+client = TestClient(app)
+
+
+async def _queued(controller, priority, order, **kwargs):
+    async with controller.slot(priority, **kwargs):
+        order.append(priority)
+
+
+def test_waiting_callers_are_served_by_priority():
+    async def go():
+        controller = AdmissionController(1, max_waiting=10, max_wait=0)
+        order = []
+        await controller.acquire()
+        tasks = [
+            asyncio.ensure_future(_queued(controller, p, order))
+            for p in (Priority.BULK, Priority.NORMAL, Priority.BULK, Priority.INTERACTIVE)
+        ]
+        await asyncio.sleep(0)
+        assert controller.waiting == 4
+        controller.release(0.05)
+        await asyncio.gather(*tasks)
+        assert controller.active == 0 and controller.waiting == 0
+        return order
+
+    assert asyncio.run(go()) == [Priority.INTERACTIVE, Priority.NORMAL, Priority.BULK, Priority.BULK]
+
+
+def test_full_queue_refuses_or_sheds_lower_priority():
+    async def go():
+        controller = AdmissionController(1, max_waiting=2, max_wait=0)
+        await controller.acquire()
+        bulk = [asyncio.ensure_future(controller.acquire(Priority.BULK)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as refused:
+            await controller.acquire(Priority.BULK)
+        assert refused.value.status_code == 503 and refused.value.reason == "queue_full"
+        assert int(refused.value.headers["Retry-After"]) >= 1
+
+        urgent = asyncio.ensure_future(controller.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await bulk[1]  # the newest bulk caller made room
+        assert shed.value.reason == "shed"
+
+        controller.release()
+        await urgent
+        assert not bulk[0].done() and controller.waiting == 1
+        controller.release()
+        await bulk[0]
+
+    asyncio.run(go())
+
+
+def test_queue_timeout_and_disconnect_leave_no_slot_behind():
+    async def go():
+        controller = AdmissionController(1, max_waiting=0, max_wait=0.05)
+        await controller.acquire()
+        with pytest.raises(Overloaded) as timed_out:
+            await controller.acquire()
+        assert timed_out.value.reason == "timeout"
+
+        gone = asyncio.Event()
+
+        async def disconnected():
+            return gone.is_set()
+
+        controller.max_wait = 0
+        waiter = asyncio.ensure_future(controller.acquire(Priority.NORMAL, disconnected))
+        await asyncio.sleep(0)
+        gone.set()
+        with pytest.raises(ClientDisconnected):
+            await waiter
+        assert controller.waiting == 0
+
+        controller.release()
+        assert controller.active == 0
+        await controller.acquire()  # fast path again
+        assert controller.active == 1
+
+    metrics.reset()
+    asyncio.run(go())
+    body = metrics.render()
+    assert 'validia_admission_rejections_total{reason="timeout"} 1' in body
+    assert 'validia_admission_rejections_total{reason="disconnected"} 1' in body
+    assert 'validia_admission_wait_seconds_count{priority="normal"}' in body
+
+
+def test_dependency_sets_request_priority():
+    class FakeRequest:
+        async def is_disconnected(self):
+            return False
+
+    async def go():
+        await admission.admission_priority(Priority.BULK)(FakeRequest())
+        return admission.current()
+
+    priority, probe = asyncio.run(go())
+    assert priority == Priority.BULK and probe is not None
+    assert admission.current() == (Priority.NORMAL, None)
+
+
+def test_overload_is_reported_as_503_with_retry_after(monkeypatch):
+    def busy(_content):
+        raise Overloaded("queue_full", 3)
+
+    monkeypatch.setattr(ep, "analyze_face", busy)
+    res = client.post("/v1/create-profile", files={"file": ("a.jpg", b"admission-1", "image/jpeg")})
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "3"
@@ -0,0 +1,63 @@
+import asyncio
+
+from app.utils import analysis_cache as ac
+from app.utils.analysis_cache import AnalysisCache, content_digest
+
+
+def _result():
+    return {"landmarks": [(i, i) for i in range(68)], "eye_distance": 10.0, "yaw": 0.0}
+
+
+def test_content_digest_is_stable():
+    # Unlike hash(), the digest does not depend on per-process salting
+    assert content_digest(b"abc") == (
+        "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+    )
+
+
+def test_lru_eviction_and_counters():
+    cache = AnalysisCache(max_entries=2, ttl_seconds=60, max_bytes=10**9)
+    cache.put(("f", "a"), _result())
+    cache.put(("f", "b"), _result())
+    assert cache.get(("f", "a")) is not None  # "a" becomes most recent
+    cache.put(("f", "c"), _result())  # evicts "b"
+    assert cache.get(("f", "b")) is None
+    assert cache.stats()["entries"] == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ac.time, "monotonic", lambda: now[0])
+    cache = AnalysisCache(max_entries=10, ttl_seconds=5, max_bytes=10**9)
+    cache.put(("f", "a"), _result())
+    now[0] += 6
+    assert cache.get(("f", "a")) is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_memory_cap():
+    cache = AnalysisCache(max_entries=100, ttl_seconds=60, max_bytes=3 * ac._BASE_ENTRY_BYTES)
+    for key in "abcd":
+        cache.put(("f", key), _result())
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_analyze_cached_runs_pipeline_once(monkeypatch):
+    monkeypatch.setattr(ac, "analysis_cache", AnalysisCache(10, 60, 10**9))
+    calls = []
+
+    def fake(content):
+        calls.append(content)
+        return _result()
+
+    async def go():
+        first = await ac.analyze_cached(fake, b"img")
+        second = await ac.analyze_cached(fake, b"img")
+        return first, second
+
+    first, second = asyncio.run(go())
+    assert first == second
+    assert calls == [b"img"]
+    assert ac.analysis_cache.stats()["hits"] == 1
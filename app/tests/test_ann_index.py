@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.utils.ann_index import ExactIndex, IVFIndex, build_index
+
+
+def _gallery(n, seed=0):
+    """Clustered synthetic landmark vectors (a few 'poses' plus noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(50, 450, size=(20, 136)).astype(np.float32)
+    vectors = centers[rng.integers(0, 20, n)] + rng.normal(0, 8, (n, 136)).astype(np.float32)
+    eye = rng.uniform(50, 90, n).astype(np.float32)
+    return [f"id-{i}" for i in range(n)], vectors, eye
+
+
+def test_ivf_with_all_lists_matches_exact():
+    ids, vectors, eye = _gallery(3000)
+    exact, ivf = ExactIndex(), IVFIndex(nlist=16, nprobe=4, min_train_size=1000)
+    exact.add_many(ids, vectors, eye)
+    ivf.add_many(ids, vectors, eye)
+    ivf.join_training()
+    assert ivf.trained
+
+    probe = vectors[42] + 1.0
+    want = exact.search(probe, 70.0, k=10)
+    got = ivf.search(probe, 70.0, k=10, nprobe=16)
+    assert [h[0] for h in got] == [h[0] for h in want]
+    np.testing.assert_allclose([h[1] for h in got], [h[1] for h in want], rtol=1e-5)
+
+
+def test_ivf_finds_self_with_few_probes_and_incremental_inserts():
+    ids, vectors, eye = _gallery(2000, seed=1)
+    ivf = IVFIndex(nlist=32, nprobe=2, min_train_size=1000)
+    ivf.add_many(ids[:1500], vectors[:1500], eye[:1500])
+    ivf.join_training()
+    for i in range(1500, 2000):  # added after training → pending rows
+        ivf.add(ids[i], vectors[i], eye[i])
+
+    for i in (3, 700, 1999):
+        assert ivf.search(vectors[i], eye[i], k=1)[0] == (ids[i], pytest.approx(0.0))
+
+    ivf.rebuild()
+    assert ivf.search(vectors[1999], eye[1999], k=1)[0][0] == ids[1999]
+
+
+def test_untrained_ivf_is_exact():
+    ids, vectors, eye = _gallery(100, seed=2)
+    ivf = IVFIndex(min_train_size=1000)
+    ivf.add_many(ids, vectors, eye)
+    assert not ivf.trained
+    assert ivf.search(vectors[5], eye[5], k=1)[0][0] == ids[5]
+
+
+def test_build_index_rejects_unknown_kind():
+    assert build_index("ivf").kind == "ivf"
+    with pytest.raises(ValueError):
+        build_index("hnsw")
+
+
+def test_training_runs_off_the_adding_thread(monkeypatch):
+    ids, vectors, eye = _gallery(1500, seed=3)
+    ivf = IVFIndex(nlist=8, nprobe=8, min_train_size=1000)
+    release = threading.Event()
+    train = ivf._train
+
+    def slow_train(data):
+        release.wait(5)
+        return train(data)
+
+    monkeypatch.setattr(ivf, "_train", slow_train)
+    ivf.add_many(ids[:1000], vectors[:1000], eye[:1000])
+    # add() returned while k-means is still waiting; searches stay exact
+    assert not ivf.trained
+    ivf.add_many(ids[1000:], vectors[1000:], eye[1000:])
+    assert ivf.search(vectors[1200], eye[1200], k=1)[0][0] == ids[1200]
+
+    release.set()
+    ivf.join_training()
+    assert ivf.trained and ivf._trained_size == 1000
+    assert ivf._pending == [(1000, 1500)]  # rows added during training
+    for i in (5, 999, 1000, 1499):
+        assert ivf.search(vectors[i], eye[i], k=1)[0][0] == ids[i]
@@ -15,3 +15,52 @@ def test_ping():
     response = client.get("/v1/ping")
     assert response.status_code == 200
     assert response.json() == {"ping": "pong"}
+
+
+def test_create_profile_batch_reports_per_item_errors(monkeypatch):
+    import app.api.v1.endpoints as ep
+
+    def fake(content):
+        if content == b"bad":
+            raise ValueError("No face detected in the image")
+        return {"landmarks": [(i, i) for i in range(68)], "eye_distance": 50.0, "yaw": 0.0}
+
+    monkeypatch.setattr(ep, "analyze_face", fake)
+
+    files = [
+        ("files", ("a.jpg", b"good", "image/jpeg")),
+        ("files", ("b.jpg", b"bad", "image/jpeg")),
+        ("files", ("c.jpg", b"good2", "image/jpeg")),
+    ]
+    response = client.post("/v1/create-profile-batch", files=files)
+    assert response.status_code == 200
+    items = response.json()
+    assert [item["index"] for item in items] == [0, 1, 2]
+    assert items[0]["profile"]["eye_distance"] == 50.0
+    assert items[1]["profile"] is None
+    assert items[1]["error"] == "No face detected in the image"
+    assert items[2]["filename"] == "c.jpg"
+
+
+def test_create_profile_batch_reads_files_as_the_pool_frees_up(monkeypatch):
+    import app.api.v1.endpoints as ep
+
+    held, peak = [0], [0]
+    real_read = ep.read_image
+
+    async def counting_read(upload):
+        held[0] += 1
+        peak[0] = max(peak[0], held[0])
+        return await real_read(upload)
+
+    def fake(content):
+        held[0] -= 1
+        return {"landmarks": [(i, i) for i in range(68)], "eye_distance": 50.0, "yaw": 0.0}
+
+    monkeypatch.setattr(ep, "read_image", counting_read)
+    monkeypatch.setattr(ep, "analyze_face", fake)
+    monkeypatch.setattr(ep.analysis_executor, "workers", 2)
+    files = [("files", (f"{k}.jpg", b"batch-%d" % k, "image/jpeg")) for k in range(40)]
+    response = client.post("/v1/create-profile-batch", files=files)
+    assert response.status_code == 200 and len(response.json()) == 40
+    assert peak[0] <= 4  # two per worker, not the whole batch
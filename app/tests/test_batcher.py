@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.utils.batcher import MicroBatcher, run_batch
+
+
+class _RecordingExecutor:
+    """Executor double that runs inline and records each pool job."""
+
+    workers = 1
+
+    def __init__(self):
+        self.jobs = []
+
+    async def run(self, fn, *args):
+        self.jobs.append(args)
+        return fn(*args)
+
+
+def _double(x):
+    if x < 0:
+        raise ValueError("negative")
+    return x * 2
+
+
+def test_run_batch_isolates_failures():
+    results = run_batch(_double, [1, -1, 3])
+    assert results[0] == (True, 2)
+    assert results[1][0] is False and isinstance(results[1][1], ValueError)
+    assert results[2] == (True, 6)
+
+
+def test_concurrent_calls_share_one_job():
+    executor = _RecordingExecutor()
+    batcher = MicroBatcher(executor)
+    batcher.start(window_ms=5, max_size=16)
+
+    async def go():
+        return await asyncio.gather(
+            *(batcher.submit(_double, x) for x in (1, 2, -3, 4)),
+            return_exceptions=True,
+        )
+
+    out = asyncio.run(go())
+    assert out[:2] == [2, 4] and out[3] == 8
+    assert isinstance(out[2], ValueError)
+    assert len(executor.jobs) == 1  # one run_batch call for all four items
+
+
+def test_max_size_flushes_early():
+    executor = _RecordingExecutor()
+    batcher = MicroBatcher(executor)
+    batcher.start(window_ms=1000, max_size=2)
+
+    async def go():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit(_double, 1), batcher.submit(_double, 2)),
+            timeout=0.5,
+        )
+
+    assert asyncio.run(go()) == [2, 4]
+
+
+def test_not_started_calls_directly():
+    executor = _RecordingExecutor()
+    batcher = MicroBatcher(executor)
+    assert asyncio.run(batcher.submit(_double, 5)) == 10
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.submit(_double, -5))
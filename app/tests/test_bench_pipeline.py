@@ -0,0 +1,27 @@
+from benchmarks.bench_pipeline import compare
+
+BASE = [
+    {"benchmark": "analyze_face", "case": "sample", "stage": "detect", "p50_ms": 60.0, "p95_ms": 70.0},
+    {"benchmark": "analyze_face", "case": "sample", "stage": "chip", "p50_ms": 0.4, "p95_ms": 0.5},
+    {"benchmark": "endpoint", "case": "create-profile", "stage": "c4", "p50_ms": 100.0, "p95_ms": 120.0, "rps": 20.0},
+]
+
+
+def _with(i, **changes):
+    rows = [dict(r) for r in BASE]
+    rows[i].update(changes)
+    return rows
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    assert compare(BASE, BASE, 0.25) == []
+    assert compare(_with(0, p50_ms=74.0), BASE, 0.25) == []
+    assert len(compare(_with(0, p50_ms=80.0), BASE, 0.25)) == 1
+    assert len(compare(_with(2, rps=15.0), BASE, 0.25)) == 1
+
+
+def test_compare_ignores_sub_millisecond_noise_and_new_rows():
+    # +100 % but only 0.4 ms slower
+    assert compare(_with(1, p50_ms=0.8), BASE, 0.25) == []
+    extra = BASE + [{"benchmark": "new", "case": "x", "stage": "total", "p50_ms": 1e6, "p95_ms": 1e6}]
+    assert compare(extra, BASE, 0.25) == []
@@ -1,6 +1,7 @@
 import base64
 from io import BytesIO
 
+import numpy as np
 import pytest  # noqa: F401
 from fastapi.testclient import TestClient
 
@@ -75,3 +76,47 @@ def test_identify_matching(monkeypatch):
     assert res2.status_code == 200
     out = res2.json()
     assert out["is_match"] is True
+
+
+def test_store_profile_reports_analysis_errors(monkeypatch):
+    def no_face(_bytes):
+        raise fa.NoFaceError("No face detected")
+
+    monkeypatch.setattr(be, "analyze_face", no_face)
+    res = client.post("/v1/store-profile", files={"file": ("img.jpg", b"store-blank", "image/jpeg")})
+    assert res.status_code == 400 and res.json()["detail"] == "No face detected"
+
+    def no_model(_bytes):
+        raise RuntimeError("Landmark model not found")
+
+    monkeypatch.setattr(be, "analyze_face", no_model)
+    res = client.post("/v1/store-profile", files={"file": ("img.jpg", b"store-model", "image/jpeg")})
+    assert res.status_code == 500 and "model" in res.json()["detail"]
+
+
+def test_search_face_ranks_stored_profiles(monkeypatch):
+    def fake(_bytes):
+        return dummy_profile()
+
+    monkeypatch.setattr(be, "analyze_face", fake)
+
+    res = client.post(
+        "/v1/store-profile", files={"file": ("img.jpg", b"search-ref", "image/jpeg")}
+    )
+    pid = res.json()["id"]
+
+    res2 = client.post(
+        "/v1/search-face?k=1",
+        files={"file": ("probe.jpg", b"search-probe", "image/jpeg")},
+    )
+    assert res2.status_code == 200
+    out = res2.json()
+    assert out["gallery_size"] >= 1
+    assert len(out["matches"]) == 1
+    assert out["matches"][0]["distance"] == 0.0
+    assert out["matches"][0]["is_match"] is True
+    # Other tests may have stored the same dummy landmarks; any of them is exact
+    np.testing.assert_array_equal(
+        be.profile_store.get(out["matches"][0]["profile_id"]).landmarks,
+        be.profile_store.get(pid).landmarks,
+    )
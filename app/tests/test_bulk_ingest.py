@@ -0,0 +1,176 @@
+import asyncio
+import io
+import json
+import tarfile
+import time
+import zipfile
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.bonus_endpoints as be
+import app.api.v1.ingest_endpoints as ie
+from app.main import app
+from app.utils import bulk_ingest as bi
+from app.utils import face_analyzer as fa
+from app.utils.mmap_store import MmapProfileStore
+from app.utils.profile_store import _InMemoryProfileStore
+
+
+def fake_analysis(content):
+    if content.startswith(b"bad"):
+        raise ValueError("No face detected in the image")
+    seed = sum(content)
+    return {
+        "landmarks": [(seed % 500 + i, i) for i in range(68)],
+        "eye_distance": 50.0,
+        "yaw": 0.0,
+        "_chip": np.full((150, 150, 3), seed % 255, dtype=np.uint8),
+    }
+
+
+FILES = {
+    "emp-001.jpg": b"face-1",
+    "team/emp-002.JPG": b"face-2",
+    "emp-003.png": b"bad-3",
+    "not an id!.jpg": b"face-4",
+    "notes.txt": b"ignored",
+    "._emp-001.jpg": b"resource fork",
+}
+
+
+def _write_sources(tmp_path):
+    folder = tmp_path / "photos"
+    for name, data in FILES.items():
+        (folder / name).parent.mkdir(parents=True, exist_ok=True)
+        (folder / name).write_bytes(data)
+    with zipfile.ZipFile(tmp_path / "photos.zip", "w") as archive:
+        for name, data in FILES.items():
+            archive.writestr(name, data)
+    with tarfile.open(tmp_path / "photos.tar.gz", "w:gz") as archive:
+        for name, data in FILES.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return [str(folder), str(tmp_path / "photos.zip"), str(tmp_path / "photos.tar.gz")]
+
+
+def test_iter_images_reads_directories_zip_and_tar(tmp_path):
+    listings = [sorted((n, d) for n, d, _ in bi.iter_images(src)) for src in _write_sources(tmp_path)]
+    expected = sorted((n, d) for n, d in FILES.items() if n not in ("notes.txt", "._emp-001.jpg"))
+    assert all(listing == expected for listing in listings)
+    with pytest.raises(ValueError):
+        list(bi.iter_images(str(tmp_path / "photos" / "notes.txt")))
+
+
+def test_ingest_stores_named_profiles_and_writes_a_manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(bi, "analyze_face", fake_analysis)
+    source = _write_sources(tmp_path)[1]
+    store = _InMemoryProfileStore()
+    store.add(bi.ProfileRecord(landmarks=np.zeros((68, 2)), eye_distance=1.0, yaw=0.0), "emp-002")
+    journal = str(tmp_path / "journal.jsonl")
+
+    progress = asyncio.run(bi.ingest(source, store, journal, batch_size=2, chunk_size=1))
+    assert progress.as_dict()["state"] == "done"
+    assert (progress.stored, progress.exists, progress.failed) == (1, 1, 2)
+    assert store.get("emp-001").aligned_face[:2] == b"\xff\xd8"  # chip kept as JPEG
+    assert store.get("emp-001").jitter_faces is None  # generated on first use
+
+    lines = {entry["file"]: entry for entry in map(json.loads, open(journal))}
+    assert lines["emp-001.jpg"]["status"] == "stored"
+    assert lines["team/emp-002.JPG"]["status"] == "exists"
+    assert lines["emp-003.png"]["error"] == "No face detected in the image"
+    assert "not a valid profile id" in lines["not an id!.jpg"]["error"]
+
+
+def test_interrupted_ingest_resumes_from_the_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(bi, "analyze_face", fake_analysis)
+    source = _write_sources(tmp_path)[0]
+    store = MmapProfileStore(str(tmp_path / "store"), fsync=False)
+    journal = tmp_path / "journal.jsonl"
+    asyncio.run(bi.ingest(source, store, str(journal), batch_size=1, chunk_size=1))
+    assert len(store) == 2
+
+    # Lose the last journal line (crash after the store commit) plus a torn write
+    lines = journal.read_text().splitlines()
+    journal.write_text("\n".join(lines[:-1]) + '\n{"file": "emp-0')
+    progress = asyncio.run(bi.ingest(source, store, str(journal)))
+    assert progress.resumed == len(lines) - 1
+    assert progress.stored == 0 and progress.exists + progress.failed == 1
+    assert len(store) == 2
+
+
+def test_caller_supplied_ids(tmp_path):
+    for store in (_InMemoryProfileStore(), MmapProfileStore(str(tmp_path), fsync=False)):
+        record = bi.ProfileRecord(landmarks=np.ones((68, 2)), eye_distance=2.0, yaw=0.0)
+        assert store.add(record, "ext:42") == "ext:42"
+        assert store.get("ext:42").eye_distance == 2.0
+        with pytest.raises(ValueError):
+            store.add(record, "ext:42")
+        with pytest.raises(ValueError):
+            store.add(record, "x" * 37)
+        with pytest.raises(ValueError):
+            store.add_many([("a1", record), ("a1", record)])
+        assert "a1" not in store
+        ids = store.add_many([("b1", record), (None, record)])
+        assert ids[0] == "b1" and len(ids[1]) == 36 and len(store) == 3
+
+
+def test_store_profile_accepts_an_external_id(monkeypatch):
+    monkeypatch.setattr(be, "analyze_face", fake_analysis)
+    client = TestClient(app)
+    res = client.post("/v1/store-profile?profile_id=badge-7781", files={"file": ("a.jpg", b"ingest-ext", "image/jpeg")})
+    assert res.status_code == 200 and res.json()["id"] == "badge-7781"
+    again = client.post("/v1/store-profile?profile_id=badge-7781", files={"file": ("a.jpg", b"ingest-ext", "image/jpeg")})
+    assert again.status_code == 409
+    bad = client.post("/v1/store-profile?profile_id=no/slash", files={"file": ("a.jpg", b"ingest-ext", "image/jpeg")})
+    assert bad.status_code == 400
+
+
+def test_ingest_endpoint_runs_a_background_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(bi, "analyze_face", fake_analysis)
+    monkeypatch.setattr(ie, "profile_store", _InMemoryProfileStore())
+    monkeypatch.setattr(bi.settings, "ingest_journal_dir", str(tmp_path / "journals"))
+    monkeypatch.setattr(bi.settings, "preload_model", False)
+    monkeypatch.setattr(bi.settings, "analysis_backend", "thread")
+    monkeypatch.setattr(bi.settings, "analysis_workers", 1)
+    monkeypatch.setattr(fa, "_predictor", None)  # thread workers warm it; restore afterwards
+    archive = open(_write_sources(tmp_path)[2], "rb").read()
+
+    with TestClient(app) as client:
+        res = client.post("/v1/gallery/ingest?job_id=nightly-1", files={"file": ("p.tar.gz", archive)})
+        assert res.status_code == 202 and res.json()["job_id"] == "nightly-1"
+        for _ in range(200):
+            status = client.get("/v1/gallery/ingest/nightly-1").json()
+            if status["state"] != "running":
+                break
+            time.sleep(0.02)
+        assert status["state"] == "done" and status["stored"] == 2 and status["failed"] == 2
+        manifest = client.get("/v1/gallery/ingest/nightly-1/manifest")
+        assert manifest.headers["content-type"] == "application/x-ndjson"
+        assert len(manifest.text.splitlines()) == 4
+        assert client.get("/v1/gallery/ingest/unknown").status_code == 404
+
+
+def test_ingest_start_errors_map_to_400_or_409(monkeypatch):
+    client = TestClient(app)
+    assert client.post("/v1/gallery/ingest?job_id=no/slash", files={"file": ("p.zip", b"x")}).status_code == 400
+
+    def rejected(*_a, **_k):
+        raise ValueError("Unsupported archive")
+
+    monkeypatch.setattr(ie, "start_ingest_job", rejected)
+    assert client.post("/v1/gallery/ingest?job_id=late", files={"file": ("p.zip", b"x")}).status_code == 400
+
+    class Running:
+        class progress:
+            state = "running"
+
+    def raced(*_a, job_id=None, **_k):  # another request started it meanwhile
+        monkeypatch.setitem(bi.ingest_jobs, job_id, Running())
+        raise ValueError(f"Ingest job '{job_id}' is still running")
+
+    monkeypatch.setattr(ie, "start_ingest_job", raced)
+    res = client.post("/v1/gallery/ingest?job_id=late", files={"file": ("p.zip", b"x")})
+    assert res.status_code == 409 and "still running" in res.json()["detail"]
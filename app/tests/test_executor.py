@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+import pytest
+
+from app.utils import face_analyzer as fa
+from app.utils.executor import AnalysisExecutor
+
+
+def _fail(_bytes):
+    raise ValueError("No face detected in the image")
+
+
+def test_run_without_start_uses_threadpool():
+    executor = AnalysisExecutor()
+    assert not executor.started
+    assert asyncio.run(executor.run(len, b"abc")) == 3
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_backend_runs_calls_and_propagates_errors(backend, monkeypatch):
+    # Thread workers warm the module-level predictor; restore it afterwards
+    monkeypatch.setattr(fa, "_predictor", None)
+    executor = AnalysisExecutor()
+    executor.start(backend=backend, workers=2, queue_size=4)
+    try:
+        assert executor.started and executor.workers == 2
+
+        async def go():
+            pids = await asyncio.gather(*(executor.run(os.getpid) for _ in range(4)))
+            with pytest.raises(ValueError):
+                await executor.run(_fail, b"")
+            return pids
+
+        pids = asyncio.run(go())
+        if backend == "process":
+            assert os.getpid() not in pids
+    finally:
+        executor.shutdown()
+    assert not executor.started
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        AnalysisExecutor().start(backend="gpu")
+
+
+def test_default_pool_shares_cores_between_web_workers(monkeypatch):
+    import app.utils.executor as ex
+
+    monkeypatch.setattr(ex.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(ex.settings, "web_concurrency", 1)
+    assert ex.default_workers() == 8
+    monkeypatch.setattr(ex.settings, "web_concurrency", 4)
+    assert ex.default_workers() == 2
+    monkeypatch.setattr(ex.settings, "web_concurrency", 16)
+    assert ex.default_workers() == 1
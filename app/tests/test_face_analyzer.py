@@ -49,3 +49,138 @@ def test_quality_gate_blurry():
     _, enc = cv2.imencode(".jpg", grey)
     with pytest.raises(ValueError):
         analyze_face(enc.tobytes())
+
+
+def test_detect_faces_downscales_large_images(monkeypatch):
+    """HOG runs on a reduced copy and rectangles come back in full-res coordinates."""
+    import dlib
+    import numpy as np
+
+    from app.utils import face_analyzer as fa
+
+    calls = []
+
+    def fake_detector(img, upsample):
+        calls.append((img.shape, upsample))
+        return [dlib.rectangle(10, 20, 110, 120)]
+
+    monkeypatch.setattr(fa, "_detector", fake_detector)
+    monkeypatch.setattr(fa.settings, "detect_max_side", 500)
+
+    rects = fa._detect_faces(np.zeros((1000, 2000), dtype=np.uint8))
+    assert calls == [((250, 500), 0)]
+    r = rects[0]
+    assert (r.left(), r.top(), r.right(), r.bottom()) == (40, 80, 440, 480)
+
+
+def test_detect_faces_upsamples_small_images_or_on_miss(monkeypatch):
+    import numpy as np
+
+    from app.utils import face_analyzer as fa
+
+    calls = []
+    monkeypatch.setattr(fa, "_detector", lambda img, up: calls.append(up) or [])
+    monkeypatch.setattr(fa.settings, "detect_max_side", 640)
+    monkeypatch.setattr(fa.settings, "detect_upsample_below", 400)
+    monkeypatch.setattr(fa.settings, "detect_upsample", 2)
+
+    fa._detect_faces(np.zeros((300, 200), dtype=np.uint8))
+    fa._detect_faces(np.zeros((480, 600), dtype=np.uint8))
+    # No upfront upsampling for the larger image; upsampled retry when nothing found
+    assert calls == [2, 0, 2]
+
+
+def test_reduction_factor_keeps_detection_size(monkeypatch):
+    from app.utils import face_analyzer as fa
+
+    monkeypatch.setattr(fa.settings, "detect_max_side", 640)
+    assert fa._reduction_factor(None) == 1
+    assert fa._reduction_factor((640, 480)) == 1
+    assert fa._reduction_factor((1920, 1080)) == 2
+    assert fa._reduction_factor((4032, 3024)) == 4
+    assert fa._reduction_factor((6000, 4000)) == 8
+
+
+def test_quality_gate_rejects_before_full_decode(monkeypatch):
+    """A large dark image is rejected from the reduced grayscale decode alone."""
+    import cv2
+    import numpy as np
+
+    from app.utils import face_analyzer as fa
+
+    dark = np.full((1500, 2000, 3), 10, dtype=np.uint8)
+    _, enc = cv2.imencode(".jpg", dark)
+
+    flags = []
+    real_imdecode = cv2.imdecode
+
+    def spy(buf, flag):
+        flags.append(flag)
+        return real_imdecode(buf, flag)
+
+    monkeypatch.setattr(fa.cv2, "imdecode", spy)
+    with pytest.raises(ValueError, match="brightness"):
+        fa.analyze_face(enc.tobytes())
+    assert flags == [cv2.IMREAD_REDUCED_GRAYSCALE_2]
+
+
+def _blurred_canvas(sigma):
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    canvas = np.full((3000, 4000), 110, dtype=np.uint8)
+    for _ in range(3000):
+        x, y = (int(v) for v in rng.integers(0, (4000, 3000)))
+        w, h = (int(v) for v in rng.integers(20, 120, 2))
+        cv2.rectangle(canvas, (x, y), (x + w, y + h), int(rng.integers(40, 220)), -1)
+    return cv2.imencode(".jpg", cv2.GaussianBlur(canvas, (0, 0), sigma))[1]
+
+
+def _spy_decodes(monkeypatch, faces):
+    import cv2
+    import dlib
+
+    from app.utils import face_analyzer as fa
+
+    flags = []
+    real_imdecode = cv2.imdecode
+    monkeypatch.setattr(fa.cv2, "imdecode", lambda buf, flag: flags.append(flag) or real_imdecode(buf, flag))
+    rects = dlib.rectangles()
+    if faces:
+        rects.append(dlib.rectangle(300, 300, 500, 500))
+    monkeypatch.setattr(fa, "_detect_faces", lambda _gray: rects)
+    monkeypatch.setattr(fa, "_load_predictor", lambda: None)
+    return flags
+
+
+def test_quality_gate_judges_sharpness_at_full_resolution(monkeypatch):
+    """A blurred large image is rejected although its reduced decode looks sharp."""
+    import cv2
+
+    from app.utils import face_analyzer as fa
+
+    enc = _blurred_canvas(2.5)
+    reduced = cv2.imdecode(enc, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    assert cv2.Laplacian(reduced, cv2.CV_64F).var() > fa.LAPLACIAN_VAR_MIN
+    flags = _spy_decodes(monkeypatch, faces=True)
+    with pytest.raises(fa.QualityGateError) as info:
+        fa.analyze_face(enc.tobytes())
+    assert info.value.reason == "blurry"
+    assert flags == [cv2.IMREAD_REDUCED_GRAYSCALE_4, cv2.IMREAD_COLOR]
+
+
+def test_blurry_and_faceless_uploads_skip_the_colour_decode(monkeypatch):
+    import cv2
+
+    from app.utils import face_analyzer as fa
+
+    flags = _spy_decodes(monkeypatch, faces=True)
+    with pytest.raises(fa.QualityGateError, match="blurry"):
+        fa.analyze_face(_blurred_canvas(12.0).tobytes())  # blurry even at 1/4 size
+    assert flags == [cv2.IMREAD_REDUCED_GRAYSCALE_4]
+
+    flags = _spy_decodes(monkeypatch, faces=False)
+    with pytest.raises(fa.NoFaceError):
+        fa.analyze_face(_blurred_canvas(2.5).tobytes())
+    assert flags == [cv2.IMREAD_REDUCED_GRAYSCALE_4]
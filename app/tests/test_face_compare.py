@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.models.profile import Profile
+from app.utils.face_compare import compare_profiles, landmark_distances
+from app.utils.profile_store import _InMemoryProfileStore
+
+
+def _random_profile(rng, eye=None):
+    pts = rng.integers(0, 400, size=(68, 2))
+    return Profile(
+        landmarks=[tuple(p) for p in pts.tolist()],
+        eye_distance=float(eye if eye is not None else rng.uniform(40, 120)),
+        yaw=0.0,
+    )
+
+
+def test_landmark_distances_match_compare_profiles():
+    rng = np.random.default_rng(0)
+    gallery = [_random_profile(rng) for _ in range(2500)]  # spans several blocks
+    probe = _random_profile(rng)
+
+    matrix = np.array([p.landmarks for p in gallery], dtype=np.float32).reshape(-1, 136)
+    eye = np.array([p.eye_distance for p in gallery], dtype=np.float32)
+    got = landmark_distances(matrix, eye, np.array(probe.landmarks), probe.eye_distance)
+
+    expected = [compare_profiles(g, probe) for g in gallery]
+    np.testing.assert_allclose(got, expected, rtol=1e-4)
+
+
+def test_store_search_returns_closest_first():
+    rng = np.random.default_rng(1)
+    store = _InMemoryProfileStore()
+    profiles = [_random_profile(rng) for _ in range(50)]
+    ids = [store.add(p) for p in profiles]
+
+    probe = profiles[17]
+    hits = store.search(probe.landmarks, probe.eye_distance, k=3)
+    assert len(hits) == 3
+    assert hits[0] == (ids[17], pytest.approx(0.0))
+    assert hits[1][1] <= hits[2][1]
+    assert len(store) == 50
+
+
+def test_store_grows_past_initial_capacity(monkeypatch):
+    import app.utils.ann_index as ai
+    import app.utils.profile_store as ps
+
+    monkeypatch.setattr(ai, "_INITIAL_CAPACITY", 4)
+    rng = np.random.default_rng(2)
+    store = ps._InMemoryProfileStore()
+    profiles = [_random_profile(rng) for _ in range(9)]
+    ids = [store.add(p) for p in profiles]
+    assert store.search(profiles[0].landmarks, profiles[0].eye_distance, k=1)[0][0] == ids[0]
+    assert store.search(profiles[8].landmarks, profiles[8].eye_distance, k=1)[0][0] == ids[8]
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.dedup_endpoints as de
+from app.main import app
+from app.models.profile_record import ProfileRecord
+from app.utils import face_analyzer as fa
+from app.utils import gallery_dedup as gd
+from app.utils.face_compare import landmark_distances
+from app.utils.mmap_store import MmapProfileStore
+from app.utils.profile_store import _InMemoryProfileStore
+from app.utils.shared_store import SharedProfileStore
+
+
+def random_gallery(n, seed=0):
+    rng = np.random.default_rng(seed)
+    face = rng.normal(0, 40, (1, 68, 2))
+    position = rng.uniform(100, 500, (n, 1, 2))
+    scale = rng.uniform(0.8, 1.2, (n, 1, 1))
+    vectors = (face * scale + position + rng.normal(0, 3, (n, 68, 2))).reshape(n, 136)
+    eye = rng.uniform(40, 80, n)
+    # A handful of re-enrollments of profile 0 and one exact copy of profile 1
+    vectors[100:106] = vectors[0] + rng.normal(0, 0.5, (6, 136))
+    eye[100:106] = eye[0]
+    vectors[200], eye[200] = vectors[1], eye[1]
+    return vectors.astype(np.float32), eye.astype(np.float32)
+
+
+def brute_force_pairs(vectors, eye, threshold):
+    pairs = set()
+    for a in range(len(vectors)):
+        dist = landmark_distances(vectors[a + 1 :], eye[a + 1 :], vectors[a], eye[a])
+        pairs.update((a, a + 1 + b) for b in np.flatnonzero(dist <= threshold).tolist())
+    return pairs
+
+
+def test_tiled_scan_finds_exactly_the_brute_force_pairs():
+    vectors, eye = random_gallery(1500)
+    regions = gd.region_centroids(vectors)
+    for threshold in (0.0, 0.02, 0.1, 0.3):
+        order, tiles = gd.plan_tiles(regions, eye, threshold, tile_rows=64)
+        assert sum((t[1] - t[0]) * (t[3] - t[2]) for t in tiles) < 0.2 * 1500 * 1500 / 2
+        assert all(t[1] - t[0] <= 64 and t[3] - t[2] <= 64 for t in tiles)
+        found = set()
+        for tile in tiles:
+            i, j, dist = gd.tile_pairs(vectors[order], eye[order], regions[order], tile, threshold)
+            found.update(tuple(sorted(p)) for p in zip(order[i].tolist(), order[j].tolist()))
+        assert found == brute_force_pairs(vectors, eye, threshold)
+    assert (1, 200) in found
+
+
+def test_pairs_become_single_linkage_clusters():
+    ids = ["a", "b", "c", "d", "e"]
+    clusters = gd.cluster_pairs(
+        ids, np.array([0, 1, 3]), np.array([1, 2, 4]), np.array([0.01, 0.02, 0.0], dtype=np.float32)
+    )
+    assert [c["ids"] for c in clusters] == [["a", "b", "c"], ["d", "e"]]
+    assert [p["distance"] for p in clusters[0]["pairs"]] == [0.01, 0.02]
+
+
+def test_find_duplicates_over_every_store_backend(tmp_path):
+    vectors, eye = random_gallery(300, seed=1)
+    records = [
+        ProfileRecord(landmarks=v.reshape(68, 2), eye_distance=float(e), yaw=0.0) for v, e in zip(vectors, eye)
+    ]
+    stores = [
+        _InMemoryProfileStore(),
+        MmapProfileStore(str(tmp_path / "mmap"), fsync=False),
+        SharedProfileStore(str(tmp_path / "shared"), fsync=False),
+    ]
+    for store in stores:
+        store.add_many([(f"p{k}", r) for k, r in enumerate(records)])
+        if hasattr(store, "delete"):
+            store.delete("p105")
+        clusters = asyncio.run(gd.find_duplicates(store, 0.05, tile_rows=32))
+        expected = ["p0", "p100", "p101", "p102", "p103", "p104"]
+        if not hasattr(store, "delete"):
+            expected.append("p105")
+        assert clusters[0]["ids"] == sorted(expected)
+        assert {"ids": ["p1", "p200"], "pairs": [{"a": "p1", "b": "p200", "distance": 0.0}]} in clusters
+
+
+def test_gallery_is_snapshotted_on_the_event_loop(monkeypatch):
+    vectors, eye = random_gallery(300, seed=2)
+    records = [
+        ProfileRecord(landmarks=v.reshape(68, 2), eye_distance=float(e), yaw=0.0) for v, e in zip(vectors, eye)
+    ]
+    store = _InMemoryProfileStore()
+    store.add_many([(f"p{k}", r) for k, r in enumerate(records)])
+    threads = []
+    snapshot = store.snapshot
+    monkeypatch.setattr(store, "snapshot", lambda: threads.append(threading.get_ident()) or snapshot())
+
+    async def scan():
+        return threading.get_ident(), await gd.find_duplicates(store, 0.05, tile_rows=32)
+
+    loop_thread, clusters = asyncio.run(scan())
+    assert threads == [loop_thread]
+    assert {"ids": ["p1", "p200"], "pairs": [{"a": "p1", "b": "p200", "distance": 0.0}]} in clusters
+
+
+def test_non_finite_thresholds_are_rejected():
+    for bad in (-0.1, float("nan"), float("inf")):
+        with pytest.raises(ValueError, match="finite"):
+            gd.start_dedup_job(_InMemoryProfileStore(), bad)
+
+
+def test_duplicate_scan_endpoint_runs_a_background_job(monkeypatch):
+    store = _InMemoryProfileStore()
+    vectors, eye = random_gallery(300, seed=2)
+    store.add_many(
+        [(f"x{k}", ProfileRecord(landmarks=v.reshape(68, 2), eye_distance=float(e), yaw=0.0)) for k, (v, e) in enumerate(zip(vectors, eye))]
+    )
+    monkeypatch.setattr(de, "profile_store", store)
+    monkeypatch.setattr(gd.settings, "preload_model", False)
+    monkeypatch.setattr(gd.settings, "analysis_backend", "thread")
+    monkeypatch.setattr(gd.settings, "analysis_workers", 1)
+    monkeypatch.setattr(fa, "_predictor", None)  # thread workers warm it; restore afterwards
+
+    with TestClient(app) as client:
+        for bad in ("-1", "nan", "inf"):
+            assert client.post(f"/v1/gallery/duplicates?threshold={bad}&job_id=bad").status_code == 400
+        assert "bad" not in gd.dedup_jobs
+        res = client.post("/v1/gallery/duplicates?threshold=0.05&job_id=weekly")
+        assert res.status_code == 202 and res.json()["job_id"] == "weekly"
+        for _ in range(200):
+            status = client.get("/v1/gallery/duplicates/weekly").json()
+            if status["state"] != "running":
+                break
+            time.sleep(0.02)
+        assert status["state"] == "done" and status["progress"] == 1.0 and status["profiles"] == 300
+        assert status["clusters"][0]["ids"][0] == "x0" and len(status["clusters"][0]["ids"]) == 7
+        counts = client.get("/v1/gallery/duplicates/weekly?clusters=false").json()
+        assert "clusters" not in counts and counts["duplicates"] == status["duplicates"]
+        assert client.get("/v1/gallery/duplicates/unknown").status_code == 404
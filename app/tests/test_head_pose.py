@@ -0,0 +1,98 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.bonus_endpoints as be
+import app.utils.multi_face as mf
+from app.main import app
+from app.utils import face_analyzer as fa
+from app.utils import head_pose as hp
+from app.utils.sample_face import sample_face_jpeg
+
+client = TestClient(app)
+
+needs_model = pytest.mark.skipif(not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded")
+
+
+def rotation(yaw, pitch, roll):
+    y, p, r = np.radians([yaw, pitch, roll])
+    rx = np.array([[1, 0, 0], [0, np.cos(p), -np.sin(p)], [0, np.sin(p), np.cos(p)]])
+    ry = np.array([[np.cos(y), 0, np.sin(y)], [0, 1, 0], [-np.sin(y), 0, np.cos(y)]])
+    rz = np.array([[np.cos(r), -np.sin(r), 0], [np.sin(r), np.cos(r), 0], [0, 0, 1]])
+    return rz @ ry @ rx
+
+
+def project(poses, size=(640, 480), depth=3000.0, shift=(0.0, 0.0)):
+    """(B, 68, 2) landmarks whose model points are the reference face seen at ``poses``."""
+    focal, cx, cy = hp.camera_intrinsics(*size)
+    out = np.zeros((len(poses), 68, 2))
+    for k, pose in enumerate(poses):
+        cam = hp._MODEL @ rotation(*pose).T + (shift[0], shift[1], depth)
+        out[k, hp._MODEL_INDICES] = focal * cam[:, :2] / cam[:, 2:] + (cx, cy)
+    return out
+
+
+def test_synthetic_poses_round_trip():
+    rng = np.random.default_rng(0)
+    poses = rng.uniform((-50, -35, -30), (50, 35, 30), (200, 3))
+    landmarks = project(poses, shift=(150.0, -80.0))
+    np.testing.assert_allclose(hp.estimate_poses(landmarks, (640, 480)), poses, atol=0.5)
+    # Sign conventions: turned to the image's left, chin down, clockwise
+    yaw, pitch, roll = hp.head_pose(project([(30, 20, 10)])[0], (640, 480))
+    assert yaw > 25 and pitch > 15 and roll > 5
+
+
+def test_batch_matches_single_faces_and_caches_intrinsics():
+    poses = [(20, -10, 5), (-35, 15, -12), (0, 0, 0)]
+    sizes = [(640, 480), (1280, 720), (640, 480)]
+    landmarks = np.concatenate([project([pose], size) for pose, size in zip(poses, sizes)])
+    hp.camera_intrinsics.cache_clear()
+    batch = hp.estimate_poses(landmarks, sizes)
+    assert hp.camera_intrinsics.cache_info().misses == 2  # one per distinct size
+    for k, size in enumerate(sizes):
+        np.testing.assert_allclose(batch[k], hp.head_pose(landmarks[k], size), atol=1e-9)
+    np.testing.assert_allclose(batch, poses, atol=0.5)
+
+
+@needs_model
+def test_mirrored_face_mirrors_yaw_and_roll():
+    img = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    faces = fa.analyze_faces(cv2.imencode(".png", np.hstack([img, cv2.flip(img, 1)]))[1].tobytes())
+    left, right = sorted(faces, key=lambda f: f["box"][0])
+    assert np.sign(left["yaw"]) == -np.sign(right["yaw"]) and abs(left["yaw"]) > 5
+    assert left["yaw"] == pytest.approx(-right["yaw"], abs=5)
+    assert left["pitch"] == pytest.approx(right["pitch"], abs=3)
+
+
+def _face(yaw, offset=0):
+    return {
+        "landmarks": [(i + offset, 2 * i) for i in range(68)],
+        "eye_distance": 80.0,
+        "yaw": yaw,
+        "pitch": 5.0,
+        "roll": 0.0,
+        "box": (offset, 0, offset + 100, 100),
+    }
+
+
+def test_pose_gate_skips_identification(monkeypatch):
+    monkeypatch.setattr(be, "analyze_face", lambda _b: {**_face(62.0), "_chip": None})
+    monkeypatch.setattr(be.profile_store, "search", lambda *_a, **_k: pytest.fail("gallery should not be searched"))
+    fa.check_pose(_face(62.0))  # no limits by default
+    monkeypatch.setattr(fa.settings, "pose_max_yaw", 45.0)
+    with pytest.raises(fa.QualityGateError) as info:
+        fa.check_pose(_face(-62.0))
+    assert info.value.reason == "pose"
+
+    res = client.post("/v1/search-face", files={"file": ("p.jpg", b"pose-1", "image/jpeg")})
+    assert res.status_code == 400 and "yaw" in res.json()["detail"]
+
+    monkeypatch.setattr(mf, "detect_face_crops", lambda _content, limit: (["a"], 1))
+    monkeypatch.setattr(mf, "profile_faces", lambda crops, _fmt: [_face(62.0)])
+    res = client.post("/v1/search-faces", files={"file": ("g.jpg", b"pose-2", "image/jpeg")})
+    assert res.status_code == 200
+    (face,) = res.json()["faces"]
+    assert face["matches"] == [] and "yaw" in face["skipped"]
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import statistics
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.live_endpoints import _LatestFrame
+from app.main import app
+from app.utils import face_analyzer as fa
+from app.utils.sample_face import sample_face_jpeg
+
+client = TestClient(app)
+
+needs_model = pytest.mark.skipif(
+    not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded"
+)
+
+# Sustained per-connection processing rate the channel must keep up with
+TARGET_FPS = 15.0
+
+
+def _camera_frames(count, size=(640, 480)):
+    """JPEG frames of the sample face drifting across a textured background."""
+    w, h = size
+    rng = np.random.default_rng(0)
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.resize(cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE), (200, 200))
+    background = cv2.resize(rng.integers(90, 170, (h // 8, w // 8, 3), dtype=np.uint8), (w, h))
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        x, y = 100 + 3 * i, 120 + i
+        frame[y : y + 200, x : x + 200] = face
+        frames.append(cv2.imencode(".jpg", frame)[1].tobytes())
+    return frames
+
+
+def test_latest_frame_drops_stale_frames():
+    async def go():
+        mailbox = _LatestFrame()
+        for data in (b"a", b"b", b"c"):
+            mailbox.put(data)
+        seq, _, data = await mailbox.take()
+        mailbox.close()
+        return seq, data, mailbox.dropped, await mailbox.take()
+
+    seq, data, dropped, after_close = asyncio.run(go())
+    assert (seq, data, dropped) == (2, b"c", 2)
+    assert after_close is None
+
+
+@needs_model
+def test_ws_verify_tracks_between_refines(monkeypatch):
+    monkeypatch.setattr(fa.settings, "ws_refine_every", 10)
+    replies = []
+    with client.websocket_connect("/v1/ws/verify") as ws:
+        for frame in _camera_frames(30):
+            ws.send_bytes(frame)
+            replies.append(ws.receive_json())
+
+    assert all(r["face_found"] for r in replies)
+    modes = [r["mode"] for r in replies]
+    assert modes[0] == "detected"
+    assert modes.count("tracked") >= 25
+    assert "refined" in modes
+    assert replies[0]["score"] is None and replies[-1]["score"] is not None
+    assert replies[-1]["running_score"] < 0.6 and replies[-1]["is_deepfake"] is False
+    assert replies[-1]["dropped"] == 0
+
+    # Server-side processing must sustain the per-connection target
+    median_ms = statistics.median(r["latency_ms"] for r in replies)
+    assert 1000.0 / median_ms >= TARGET_FPS
+
+
+@needs_model
+def test_ws_verify_drops_frames_when_client_outpaces_server():
+    frames = _camera_frames(40)
+    with client.websocket_connect("/v1/ws/verify") as ws:
+        for frame in frames:
+            ws.send_bytes(frame)
+        replies = []
+        while not replies or replies[-1]["frame"] != len(frames) - 1:
+            replies.append(ws.receive_json())
+
+    assert len(replies) < len(frames)
+    assert replies[-1]["dropped"] == len(frames) - len(replies)
+    # Replies are always for increasingly recent frames
+    assert [r["frame"] for r in replies] == sorted(r["frame"] for r in replies)
+
+
+@needs_model
+def test_ws_verify_reports_bad_frames_and_continues():
+    with client.websocket_connect("/v1/ws/verify") as ws:
+        ws.send_bytes(b"not a jpeg")
+        error = ws.receive_json()
+        ws.send_bytes(_camera_frames(1)[0])
+        ok = ws.receive_json()
+    assert error["frame"] == 0 and "error" in error
+    assert ok["frame"] == 1 and ok["face_found"] is True
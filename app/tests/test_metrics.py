@@ -0,0 +1,99 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.bonus_endpoints as be
+import app.api.v1.endpoints as ep
+from app.main import app
+from app.core.config import settings
+from app.utils import face_analyzer as fa
+from app.utils.batcher import run_batch
+from app.utils.face_analyzer import NoFaceError, QualityGateError
+from app.utils.metrics import Histogram, metrics
+from app.utils.sample_face import sample_face_jpeg
+from app.utils.stage_timer import stage
+
+client = TestClient(app)
+
+needs_model = pytest.mark.skipif(not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded")
+
+
+def fake_analysis(content):
+    if content == b"dark":
+        raise QualityGateError("Image brightness 10.0 outside acceptable range 60-200.", reason="too_dark")
+    if content == b"empty":
+        raise NoFaceError("No face detected in the image")
+    with stage("detect"):
+        pass
+    return {"landmarks": [(i, i) for i in range(68)], "eye_distance": 50.0, "yaw": 0.0}
+
+
+def _timing_names(response):
+    return [part.split(";")[0] for part in response.headers["server-timing"].split(", ")]
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram((0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 2.0):
+        hist.observe(value)
+    lines = hist.lines("x", 'stage="a"')
+    assert lines[:3] == ['x_bucket{stage="a",le="0.01"} 1', 'x_bucket{stage="a",le="0.1"} 3', 'x_bucket{stage="a",le="+Inf"} 4']
+    assert lines[-1] == 'x_count{stage="a"} 4'
+
+
+def test_server_timing_header_and_stage_histograms(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    metrics.reset()
+    res = client.post("/v1/create-profile", files={"file": ("a.jpg", b"metrics-1", "image/jpeg")})
+    assert res.status_code == 200
+    names = _timing_names(res)
+    assert {"upload_read", "detect"} <= set(names) and names[-1] == "total"
+    body = client.get("/metrics").text
+    assert 'validia_stage_duration_seconds_count{stage="detect"} 1' in body
+    assert "validia_analysis_cache_misses_total" in body
+    assert "validia_profile_store_size" in body
+
+
+def test_rejections_are_counted_by_reason(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    metrics.reset()
+    for content in (b"dark", b"dark", b"empty"):
+        res = client.post("/v1/create-profile", files={"file": ("a.jpg", content, "image/jpeg")})
+        assert res.status_code == 400
+    body = client.get("/metrics").text
+    assert 'validia_quality_gate_rejections_total{reason="too_dark"} 2' in body
+    assert "validia_faces_not_found_total 1" in body
+
+
+def test_store_lookups_are_timed(monkeypatch):
+    monkeypatch.setattr(be, "analyze_face", fake_analysis)
+    client.post("/v1/store-profile?fields=id", files={"file": ("a.jpg", b"metrics-2", "image/jpeg")})
+    res = client.post("/v1/search-face?k=1", files={"file": ("a.jpg", b"metrics-3", "image/jpeg")})
+    assert "store_search" in _timing_names(res)
+
+
+def test_run_batch_returns_worker_timings():
+    [(ok, value)] = run_batch(fake_analysis, [b"ok"])
+    assert ok and "detect" in value["_stages"]
+    [(ok, exc)] = run_batch(fake_analysis, [b"dark"])
+    assert not ok and exc.reason == "too_dark"
+
+
+def test_metrics_can_be_switched_off(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    res = client.post("/v1/create-profile", files={"file": ("a.jpg", b"metrics-4", "image/jpeg")})
+    assert res.status_code == 200
+    assert "server-timing" not in res.headers
+    assert client.get("/metrics").status_code == 404
+
+
+@needs_model
+def test_real_pipeline_reports_its_stages():
+    res = client.post(
+        "/v1/create-profile?fields=eye_distance",
+        files={"file": ("s.jpg", sample_face_jpeg(), "image/jpeg")},
+    )
+    assert res.status_code == 200
+    assert {"decode", "quality_gate", "detect", "landmarks", "chip"} <= set(_timing_names(res))
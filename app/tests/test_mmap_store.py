@@ -0,0 +1,95 @@
+import base64
+import struct
+
+import numpy as np
+import pytest
+
+from app.models.profile import Profile
+from app.utils.mmap_store import MmapProfileStore
+
+
+def _profile(seed, **extra):
+    rng = np.random.default_rng(seed)
+    return Profile(
+        landmarks=[tuple(p) for p in rng.integers(-5, 600, size=(68, 2)).tolist()],
+        eye_distance=float(rng.uniform(40, 90)),
+        yaw=0.0,
+        **extra,
+    )
+
+
+def test_roundtrip_survives_reopen(tmp_path):
+    chip = base64.b64encode(b"\xff\xd8fake-jpeg\xff\xd9").decode("ascii")
+    store = MmapProfileStore(str(tmp_path))
+    p1 = _profile(1, description="Stored profile", aligned_face=chip, jitter_faces=[chip, chip])
+    p2 = _profile(2)
+    id1, id2 = store.add(p1), store.add(p2)
+    store.close()
+
+    reopened = MmapProfileStore(str(tmp_path))
+    assert len(reopened) == 2
+    got = reopened.get(id1)
+    np.testing.assert_array_equal(got.landmarks, p1.landmarks)
+    assert got.eye_distance == pytest.approx(p1.eye_distance)
+    assert got.description == "Stored profile"
+    assert got.aligned_face == b"\xff\xd8fake-jpeg\xff\xd9"
+    api = got.to_profile()
+    assert api.aligned_face == chip and api.jitter_faces == [chip, chip]
+    assert reopened.get(id2).aligned_face is None
+    assert reopened.search(p2.landmarks, p2.eye_distance, k=1)[0][0] == id2
+    with pytest.raises(KeyError):
+        reopened.get("missing")
+
+
+def test_uncommitted_tail_is_ignored(tmp_path):
+    store = MmapProfileStore(str(tmp_path))
+    pid = store.add(_profile(1, description="kept"))
+    store.add(_profile(2, description="lost"))
+    # Simulate a crash after the second add wrote its data but before commit
+    with open(tmp_path / "count.0", "r+b") as fh:
+        fh.write(struct.pack("<Q", 1))
+    store.close()
+
+    reopened = MmapProfileStore(str(tmp_path))
+    assert len(reopened) == 1
+    assert reopened.get(pid).description == "kept"
+    new_id = reopened.add(_profile(3, description="after"))
+    assert reopened.get(new_id).description == "after"
+    assert reopened.get(pid).description == "kept"
+
+
+def test_delete_and_compact(tmp_path):
+    store = MmapProfileStore(str(tmp_path))
+    ids = [store.add(_profile(i, description=f"p{i}")) for i in range(5)]
+    store.delete(ids[1])
+    store.delete(ids[3])
+    assert len(store) == 3
+    deleted = _profile(1)
+    assert all(h[0] != ids[1] for h in store.search(deleted.landmarks, deleted.eye_distance, k=5))
+
+    assert store.compact() == 2
+    store.close()
+
+    reopened = MmapProfileStore(str(tmp_path))
+    assert len(reopened) == 3
+    assert [reopened.get(i).description for i in (ids[0], ids[2], ids[4])] == ["p0", "p2", "p4"]
+    assert not (tmp_path / "rows.0").exists()
+
+
+def test_lazy_jitters_survive_reopen(tmp_path):
+    store = MmapProfileStore(str(tmp_path))
+    chip = base64.b64encode(b"chip").decode("ascii")
+    first = store.add(_profile(1, description="a", aligned_face=chip))
+    second = store.add(_profile(2, description="b"))
+    store.set_jitter_faces(first, [b"j0", b"j1"])
+    store.close()
+
+    reopened = MmapProfileStore(str(tmp_path))
+    got = reopened.get(first)
+    assert got.jitter_faces == (b"j0", b"j1") and got.aligned_face == b"chip"
+    assert reopened.get(second).description == "b"
+    blobs = tmp_path / f"blobs.{reopened._generation}"
+    size = blobs.stat().st_size
+    assert reopened.compact() == 0  # no rows deleted, but the stale blob is dropped
+    assert (tmp_path / f"blobs.{reopened._generation}").stat().st_size < size
+    assert reopened.get(first).jitter_faces == (b"j0", b"j1")
@@ -0,0 +1,117 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.bonus_endpoints as be
+import app.utils.multi_face as mf
+from app.main import app
+from app.utils import face_analyzer as fa
+from app.utils.face_analyzer import NoFaceError
+from app.utils.sample_face import sample_face_jpeg
+
+client = TestClient(app)
+
+needs_model = pytest.mark.skipif(not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded")
+
+SIDES = (300, 280, 260, 240)
+
+
+def group_jpeg(sides=SIDES, width=1280, height=720, seed=0) -> bytes:
+    """The sample face pasted side by side at several sizes onto a textured canvas."""
+    rng = np.random.default_rng(seed)
+    canvas = cv2.resize(rng.integers(90, 170, (height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8), (width, height))
+    grain = rng.integers(-24, 25, (height, width, 1), dtype=np.int16)
+    canvas = np.clip(canvas.astype(np.int16) + grain, 0, 255).astype(np.uint8)
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    x = 20
+    for side in sides:
+        y = (height - side) // 2
+        canvas[y : y + side, x : x + side] = cv2.resize(face, (side, side), interpolation=cv2.INTER_AREA)
+        x += side + 20
+    return cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def _area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+@needs_model
+def test_analyze_faces_profiles_every_face_largest_first():
+    faces = fa.analyze_faces(group_jpeg())
+    assert len(faces) == len(SIDES)
+    areas = [_area(f["box"]) for f in faces]
+    assert areas == sorted(areas, reverse=True)
+    for face in faces:
+        left, top, right, bottom = face["box"]
+        xs, ys = zip(*face["landmarks"])
+        assert len(face["landmarks"]) == 68 and face["_chip"].shape == (150, 150, 3)
+        # Landmarks are in image coordinates, inside their own face box (with slack)
+        assert left - 40 <= np.mean(xs) <= right + 40 and top - 40 <= np.mean(ys) <= bottom + 40
+
+    crops, detected = fa.detect_face_crops(group_jpeg(), max_faces=2)
+    assert len(crops) == 2 and detected == len(SIDES)
+
+
+@needs_model
+def test_create_profiles_endpoint(monkeypatch):
+    res = client.post(
+        "/v1/create-profiles?max_faces=3",
+        files={"file": ("group.jpg", group_jpeg(), "image/jpeg")},
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert body["faces_detected"] == len(SIDES) and len(body["faces"]) == 3
+    assert all(f["aligned_face"] and len(f["box"]) == 4 for f in body["faces"])
+
+    monkeypatch.setattr(fa, "encode_chip", lambda _chip: pytest.fail("chip should not be encoded"))
+    res = client.post(
+        "/v1/create-profiles?fields=landmarks",
+        files={"file": ("group.jpg", group_jpeg(), "image/jpeg")},
+    )
+    assert [set(f) for f in res.json()["faces"]] == [{"landmarks", "box"}] * len(SIDES)
+
+
+def test_max_faces_is_capped_by_settings(monkeypatch):
+    monkeypatch.setattr(mf.settings, "max_faces", 5)
+    assert mf.face_limit(None) == 5 and mf.face_limit(2) == 2 and mf.face_limit(50) == 5
+    monkeypatch.setattr(mf.settings, "max_faces", 0)
+    assert mf.face_limit(None) is None and mf.face_limit(50) == 50
+
+
+def _fake_face(offset):
+    return {
+        "landmarks": [(i + offset, 2 * i) for i in range(68)],
+        "eye_distance": 80.0,
+        "yaw": 0.0,
+        "box": (offset, 0, offset + 100, 100),
+    }
+
+
+def test_search_faces_matches_each_face(monkeypatch):
+    monkeypatch.setattr(be, "analyze_face", lambda _b: {**_fake_face(1000), "_chip": None})
+    stored = client.post("/v1/store-profile?fields=id", files={"file": ("a.jpg", b"multi-1", "image/jpeg")})
+    stored_id = stored.json()["id"]
+
+    monkeypatch.setattr(mf, "detect_face_crops", lambda _content, limit: (["a", "b"], 3))
+    monkeypatch.setattr(mf, "profile_faces", lambda crops, _fmt: [_fake_face(1000 if c == "a" else 5000) for c in crops])
+    res = client.post("/v1/search-faces?k=1", files={"file": ("g.jpg", b"multi-2", "image/jpeg")})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["faces_detected"] == 3 and len(body["faces"]) == 2
+    first, second = body["faces"]
+    assert first["box"] == [1000, 0, 1100, 100]
+    assert first["matches"][0] == {"profile_id": stored_id, "distance": 0.0, "is_match": True}
+    assert not second["matches"][0]["is_match"]
+
+
+def test_no_face_is_400(monkeypatch):
+    def no_face(_content, _limit):
+        raise NoFaceError("No face detected in the image")
+
+    monkeypatch.setattr(mf, "detect_face_crops", no_face)
+    res = client.post("/v1/create-profiles", files={"file": ("g.jpg", b"multi-3", "image/jpeg")})
+    assert res.status_code == 400
@@ -0,0 +1,149 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+import app.api.v1.bonus_endpoints as be
+import app.api.v1.endpoints as ep
+import app.api.v1.profile_endpoints as pe
+import app.api.v1.response_fields as rf
+
+client = TestClient(app)
+
+
+def fake_analysis(_bytes):
+    rng = np.random.default_rng(0)
+    return {
+        "landmarks": [(i, 2 * i) for i in range(68)],
+        "eye_distance": 80.0,
+        "yaw": 0.0,
+        "pitch": 0.0,
+        "roll": 0.0,
+        "_chip": rng.integers(0, 255, size=(150, 150, 3), dtype=np.uint8),
+    }
+
+
+def _no_encode(_chip):
+    raise AssertionError("chip should not be encoded")
+
+
+def test_fields_skip_chip_encoding(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    monkeypatch.setattr(rf, "encode_chip", _no_encode)
+    res = client.post(
+        "/v1/create-profile?fields=landmarks,eye_distance",
+        files={"file": ("a.jpg", b"fields-1", "image/jpeg")},
+    )
+    assert res.status_code == 200
+    assert set(res.json()) == {"landmarks", "eye_distance"}
+
+
+def test_default_response_keeps_aligned_face(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    res = client.post(
+        "/v1/create-profile", files={"file": ("a.jpg", b"fields-2", "image/jpeg")}
+    )
+    assert res.status_code == 200
+    assert res.json()["aligned_face"]
+
+
+def test_include_alias_and_unknown_field(monkeypatch):
+    monkeypatch.setattr(be, "analyze_face", fake_analysis)
+    res = client.post(
+        "/v1/verify-face?include=eye_distance",
+        files={"file": ("a.jpg", b"fields-3", "image/jpeg")},
+    )
+    assert res.json() == {"eye_distance": 80.0}
+    res = client.post(
+        "/v1/verify-face?fields=eye_distance,nope",
+        files={"file": ("a.jpg", b"fields-3", "image/jpeg")},
+    )
+    assert res.status_code == 400
+
+
+def test_store_defers_jitters_and_serves_assets(monkeypatch):
+    monkeypatch.setattr(be, "analyze_face", fake_analysis)
+    monkeypatch.setattr(be, "generate_jitter_faces", _no_encode)
+    res = client.post(
+        "/v1/store-profile?fields=id,eye_distance",
+        files={"file": ("a.jpg", b"assets-1", "image/jpeg")},
+    )
+    assert res.status_code == 200
+    pid = res.json()["id"]
+    assert set(res.json()) == {"id", "eye_distance"}
+
+    chip = client.get(f"/v1/profiles/{pid}/chip.jpg")
+    assert chip.status_code == 200
+    assert chip.headers["content-type"] == "image/jpeg"
+    assert chip.content[:2] == b"\xff\xd8"
+    etag = chip.headers["etag"]
+    assert chip.headers["cache-control"] == "no-cache"
+    cached = client.get(f"/v1/profiles/{pid}/chip.jpg", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and not cached.content
+    for header, status in (
+        (f'"other", W/{etag}', 304),
+        ("*", 304),
+        (f'"x{etag[1:]}', 200),  # contains the digest, but is another tag
+        (f"{etag[:-1]}", 200),  # unterminated
+        ('"other"', 200),
+    ):
+        res = client.get(f"/v1/profiles/{pid}/chip.jpg", headers={"If-None-Match": header})
+        assert res.status_code == status, header
+
+    calls = []
+    real = pe.generate_jitter_faces_from_jpeg
+
+    def counting(jpeg, *args):
+        calls.append(1)
+        return real(jpeg, *args)
+
+    monkeypatch.setattr(pe, "generate_jitter_faces_from_jpeg", counting)
+    first = client.get(f"/v1/profiles/{pid}/jitter/0.jpg")
+    assert first.status_code == 200 and first.content[:2] == b"\xff\xd8"
+    again = client.get(f"/v1/profiles/{pid}/jitter/4.jpg")
+    assert again.status_code == 200
+    assert len(calls) == 1  # generated lazily, exactly once
+    assert client.get(f"/v1/profiles/{pid}/jitter/5.jpg").status_code == 404
+
+
+def test_assets_of_unknown_profile_404():
+    assert client.get("/v1/profiles/missing/chip.jpg").status_code == 404
+    assert client.get("/v1/profiles/missing/jitter/0.jpg").status_code == 404
+
+
+def test_jitters_are_dropped_when_the_profile_changes_meanwhile(monkeypatch, tmp_path):
+    import asyncio
+
+    from app.models.profile_record import ProfileRecord
+    from app.utils.mmap_store import MmapProfileStore
+
+    store = MmapProfileStore(str(tmp_path), fsync=False)
+    monkeypatch.setattr(pe, "profile_store", store)
+
+    def record(chip):
+        return ProfileRecord(landmarks=[(i, i) for i in range(68)], eye_distance=50.0, yaw=0.0, aligned_face=chip)
+
+    class Executor:
+        def __init__(self, change):
+            self.change = change
+
+        async def run(self, fn, *args):
+            self.change()  # what another request does while the crops are made
+            return [b"\xff\xd8jitter"]
+
+    def delete():
+        store.delete("p1")
+
+    def replace():
+        store.delete("p1")
+        store.add(record(b"\xff\xd8new"), "p1")
+
+    for change in (delete, replace):
+        store.add(record(b"\xff\xd8old"), "p1")
+        monkeypatch.setattr(pe, "analysis_executor", Executor(change))
+        jitters = asyncio.run(pe._ensure_jitters("p1", store.get("p1")))
+        assert jitters == (b"\xff\xd8jitter",)
+    assert store.get("p1").jitter_faces is None  # the new profile kept none of the old crops
+
+    monkeypatch.setattr(pe, "analysis_executor", Executor(lambda: None))
+    asyncio.run(pe._ensure_jitters("p1", store.get("p1")))
+    assert store.get("p1").jitter_faces == (b"\xff\xd8jitter",)
@@ -0,0 +1,61 @@
+import base64
+
+import numpy as np
+import pytest
+
+from app.models.profile import Profile
+from app.models.profile_record import ProfileRecord
+from app.utils.face_compare import compare_profiles
+from app.utils.profile_store import _InMemoryProfileStore
+
+
+def _profile(seed):
+    rng = np.random.default_rng(seed)
+    chip = base64.b64encode(rng.bytes(32)).decode("ascii")
+    return Profile(
+        landmarks=[tuple(p) for p in rng.integers(-5, 600, size=(68, 2)).tolist()],
+        eye_distance=float(rng.uniform(40, 90)),
+        yaw=0.0,
+        description="d",
+        aligned_face=chip,
+        jitter_faces=[chip, chip],
+    )
+
+
+def test_roundtrip_to_api_schema():
+    profile = _profile(1)
+    record = ProfileRecord.from_profile(profile)
+    assert record.landmarks.dtype == np.int16
+    assert isinstance(record.aligned_face, bytes)
+    assert record.to_profile().dict() == profile.dict()
+
+
+def test_record_has_no_instance_dict():
+    record = ProfileRecord.from_profile(_profile(1))
+    with pytest.raises(AttributeError):
+        record.extra = 1
+
+
+def test_compare_profiles_accepts_records():
+    p1, p2 = _profile(1), _profile(2)
+    expected = compare_profiles(p1, p2)
+    r1, r2 = ProfileRecord.from_profile(p1), ProfileRecord.from_profile(p2)
+    assert compare_profiles(r1, r2) == pytest.approx(expected)
+    assert compare_profiles(r1, p2) == pytest.approx(expected)
+
+
+def test_store_keeps_records():
+    store = _InMemoryProfileStore()
+    profile = _profile(3)
+    pid = store.add(profile)
+    assert profile.id == pid
+    got = store.get(pid)
+    assert isinstance(got, ProfileRecord)
+    assert got.to_profile().landmarks == profile.landmarks
+
+
+def test_rejects_bad_landmarks():
+    with pytest.raises(ValueError):
+        ProfileRecord(landmarks=[(0, 0)] * 67, eye_distance=1.0, yaw=0.0)
+    with pytest.raises(ValueError):
+        ProfileRecord(landmarks=[(40000, 0)] * 68, eye_distance=1.0, yaw=0.0)
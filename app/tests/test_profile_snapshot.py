@@ -0,0 +1,193 @@
+import asyncio
+import json
+
+import msgpack
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.profile_endpoints as pe
+from app.api.v1.snapshot import NDJSON, SnapshotReader, export_snapshot, import_snapshot
+from app.main import app
+from app.models.profile_record import ProfileRecord
+from app.utils.mmap_store import MmapProfileStore
+from app.utils.profile_store import _InMemoryProfileStore
+from app.utils.shared_store import SharedProfileStore
+
+client = TestClient(app)
+
+
+def make_record(k, jitters=True):
+    return ProfileRecord(
+        landmarks=np.arange(136).reshape(68, 2) + k,
+        eye_distance=50.0 + k,
+        yaw=0.5,
+        description=f"profile {k}",
+        aligned_face=b"\xff\xd8chip%d" % k,
+        jitter_faces=[b"\xff\xd8j%d" % i for i in range(2)] if jitters else None,
+    )
+
+
+def filled_store(n=7):
+    store = _InMemoryProfileStore()
+    store.add_many([(f"emp-{k:03d}", make_record(k, jitters=k % 2 == 0)) for k in range(n)])
+    return store
+
+
+@pytest.mark.parametrize("backend", ["memory", "mmap", "shared"])
+def test_list_ids_pages_in_id_order_and_skips_deleted(tmp_path, backend):
+    store = {
+        "memory": lambda: _InMemoryProfileStore(),
+        "mmap": lambda: MmapProfileStore(str(tmp_path), fsync=False),
+        "shared": lambda: SharedProfileStore(str(tmp_path), fsync=False),
+    }[backend]()
+    store.add_many([(pid, make_record(0)) for pid in ("c", "a", "e", "b", "d")])
+    assert store.list_ids(None, 2) == ["a", "b"]
+    assert store.list_ids("b", 2) == ["c", "d"]
+    store.add(make_record(1), "bb")  # lands behind the cursor: not repeated
+    if backend != "memory":
+        store.delete("d")
+    assert store.list_ids("c", 10) == (["e"] if backend != "memory" else ["d", "e"])
+    assert store.list_ids("zzz", 10) == []
+
+
+def test_profiles_listing_walks_the_gallery_with_a_cursor(monkeypatch):
+    monkeypatch.setattr(pe, "profile_store", filled_store())
+    seen, cursor = [], None
+    while True:
+        page = client.get("/v1/profiles", params={"limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+        assert page["total"] == 7 and len(page["profiles"]) <= 3
+        seen += [p["id"] for p in page["profiles"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"emp-{k:03d}" for k in range(7)]
+    assert set(page["profiles"][0]) == {"id", "landmarks", "eye_distance", "yaw", "description"}
+    chips = client.get("/v1/profiles?limit=1&fields=id,aligned_face").json()
+    assert chips["profiles"] == [{"id": "emp-000", "aligned_face": "/9hjaGlwMA=="}]
+    assert client.get("/v1/profiles?limit=0").status_code == 422
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "msgpack"])
+def test_export_then_import_restores_every_profile(monkeypatch, fmt):
+    source = filled_store()
+    monkeypatch.setattr(pe, "profile_store", source)
+    res = client.get(f"/v1/profiles/export?format={fmt}")
+    assert res.status_code == 200 and "attachment" in res.headers["content-disposition"]
+    snapshot = res.content
+
+    target = _InMemoryProfileStore()
+    target.add(make_record(0), "emp-003")  # already there: skipped
+    monkeypatch.setattr(pe, "profile_store", target)
+    content_type = res.headers["content-type"].split(";")[0]
+    imported = client.post("/v1/profiles/import", content=snapshot, headers={"content-type": content_type})
+    assert imported.json() == {"records": 7, "imported": 6, "skipped": 1}
+    for k in (0, 1, 6):
+        want, got = source.get(f"emp-{k:03d}"), target.get(f"emp-{k:03d}")
+        assert np.array_equal(got.landmarks, want.landmarks)
+        assert (got.eye_distance, got.yaw, got.description) == (want.eye_distance, want.yaw, want.description)
+        assert (got.aligned_face, got.jitter_faces) == (want.aligned_face, want.jitter_faces)
+
+    again = client.post("/v1/profiles/import?on_conflict=fail", content=snapshot, headers={"content-type": content_type})
+    assert again.status_code == 409
+
+
+def exported(store, media_type, page_size=256):
+    async def collect():
+        return [chunk async for chunk in export_snapshot(store, media_type, page_size)]
+
+    return asyncio.run(collect())
+
+
+def test_export_is_chunked_and_the_reader_accepts_any_split():
+    store = filled_store(600)
+    chunks = exported(store, NDJSON)
+    assert len(chunks) == 1 + 3  # header, then one chunk per page
+    data = b"".join(chunks)
+    for reader_type, payload in ((NDJSON, data), ("application/msgpack", b"".join(exported(store, "application/msgpack")))):
+        reader = SnapshotReader(reader_type)
+        objects = []
+        for start in range(0, len(payload), 1000):
+            objects += reader.feed(payload[start : start + 1000])
+        objects += reader.close()
+        assert objects[0]["profiles"] == 600 and len(objects) == 601
+
+
+def test_import_rejects_malformed_snapshots(monkeypatch):
+    monkeypatch.setattr(pe, "profile_store", _InMemoryProfileStore())
+    good = json.dumps({"id": "ok-1", "landmarks": [[1, 2]] * 68, "eye_distance": 40.0, "yaw": 0.0})
+    bad = json.dumps({"id": "bad-2", "landmarks": [[1, 2]] * 5, "eye_distance": 40.0, "yaw": 0.0})
+    res = client.post("/v1/profiles/import", content=f"{good}\n{bad}\n", headers={"content-type": NDJSON})
+    assert res.status_code == 400 and res.json()["detail"].startswith("Record 2:")
+    assert "ok-1" in pe.profile_store  # records before the bad one are kept
+
+    truncated = msgpack.packb({"id": "x", "landmarks": b"\x00" * 272, "eye_distance": 1.0, "yaw": 0.0})[:-3]
+    res = client.post("/v1/profiles/import", content=truncated, headers={"content-type": "application/msgpack"})
+    assert res.status_code == 400
+    assert client.post("/v1/profiles/import", content=b"{}", headers={"content-type": "text/csv"}).status_code == 415
+
+
+def test_import_commits_do_not_race_other_writers(tmp_path):
+    store = MmapProfileStore(str(tmp_path), fsync=False)
+    sources = [filled_store(400), _InMemoryProfileStore()]
+    sources[1].add_many([(f"imp-{k:03d}", make_record(k)) for k in range(400)])
+
+    async def chunks(source):
+        async for chunk in export_snapshot(source, NDJSON, page_size=8):
+            yield chunk
+            await asyncio.sleep(0)
+
+    async def enroll():  # what /store-profile and ingest do on the loop meanwhile
+        for k in range(400):
+            store.add(make_record(k), f"live-{k:03d}")
+            await asyncio.sleep(0)
+
+    async def run():
+        return await asyncio.gather(
+            *(import_snapshot(chunks(source), store, NDJSON, batch_size=8) for source in sources), enroll()
+        )
+
+    counts = asyncio.run(run())
+    assert [c["imported"] for c in counts[:2]] == [400, 400]
+    store.close()
+    reopened = MmapProfileStore(str(tmp_path), fsync=False)
+    assert len(reopened) == 1200 and len(reopened.list_ids(limit=2000)) == 1200
+    assert reopened.get("imp-123").description == "profile 123"
+
+
+@pytest.mark.parametrize("backend", ["memory", "mmap", "shared"])
+def test_sorted_ids_follow_writes_without_a_full_resort(tmp_path, backend):
+    store = {
+        "memory": lambda: _InMemoryProfileStore(),
+        "mmap": lambda: MmapProfileStore(str(tmp_path), fsync=False),
+        "shared": lambda: SharedProfileStore(str(tmp_path), fsync=False),
+    }[backend]()
+    store.add_many([(f"p{k:04d}", make_record(0)) for k in range(0, 1000, 2)])
+    assert store.list_ids(None, 3) == ["p0000", "p0002", "p0004"]
+    reads = []
+    indexed_ids = store._indexed_ids
+    store._indexed_ids = lambda start=0: reads.append(start) or indexed_ids(start)
+    for k in range(1, 40, 2):
+        store.add(make_record(0), f"p{k:04d}")
+        assert store.list_ids(f"p{k - 1:04d}", 2) == [f"p{k:04d}", f"p{k + 1:04d}"]
+    assert 0 not in reads  # only the new rows were read
+    if backend != "memory":
+        store.delete("p0001")
+        store.add(make_record(1), "p0001")
+    assert store.list_ids(None, 4) == ["p0000", "p0001", "p0002", "p0003"]
+
+
+def test_export_reads_pages_between_writes_on_the_loop(tmp_path):
+    store = MmapProfileStore(str(tmp_path), fsync=False)
+    store.add_many([(f"emp-{k:03d}", make_record(k)) for k in range(300)])
+
+    async def run():
+        chunks = []
+        async for chunk in export_snapshot(store, NDJSON, page_size=16):
+            chunks.append(chunk)
+            store.add_many([(f"new-{len(chunks)}-{k}", make_record(k)) for k in range(64)])
+        return chunks
+
+    objects = SnapshotReader(NDJSON).feed(b"".join(asyncio.run(run())))
+    ids = [obj["id"] for obj in objects[1:]]
+    assert ids == sorted(set(ids)) and {f"emp-{k:03d}" for k in range(300)} <= set(ids)
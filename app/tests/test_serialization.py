@@ -0,0 +1,91 @@
+import msgpack
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.v1.serialization import JSON, MSGPACK, response_format
+from app.models.profile import Profile
+import app.api.v1.bonus_endpoints as be
+import app.api.v1.endpoints as ep
+
+client = TestClient(app)
+
+LANDMARKS = [(i, 300 + i) for i in range(68)]
+
+
+def fake_analysis(_bytes):
+    return {
+        "landmarks": LANDMARKS,
+        "eye_distance": 80.0,
+        "yaw": 0.0,
+        "_chip": np.full((150, 150, 3), 128, dtype=np.uint8),
+    }
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/json", JSON),
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("application/json;q=0.5, application/msgpack", MSGPACK),
+        ("application/msgpack;q=0.2, application/json", JSON),
+        ("text/html", JSON),
+    ],
+)
+def test_response_format_negotiation(accept, expected):
+    assert response_format(accept) == expected
+
+
+def test_json_default_matches_profile_schema(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    res = client.post("/v1/create-profile", files={"file": ("a.jpg", b"ser-1", "image/jpeg")})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == JSON
+    body = res.json()
+    assert set(body) == set(Profile.__fields__)
+    assert Profile(**body).landmarks == LANDMARKS
+
+
+def test_msgpack_profile_packs_landmarks_and_raw_images(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    res = client.post(
+        "/v1/create-profile",
+        files={"file": ("a.jpg", b"ser-2", "image/jpeg")},
+        headers={"Accept": MSGPACK},
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"] == MSGPACK
+    body = msgpack.unpackb(res.content)
+    landmarks = np.frombuffer(body["landmarks"], dtype="<i2").reshape(68, 2)
+    assert landmarks.tolist() == [list(p) for p in LANDMARKS]
+    assert body["aligned_face"][:2] == b"\xff\xd8"
+    assert len(res.content) < len(
+        client.post("/v1/create-profile", files={"file": ("a.jpg", b"ser-2", "image/jpeg")}).content
+    )
+
+
+def test_msgpack_batch_and_search(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", fake_analysis)
+    monkeypatch.setattr(be, "analyze_face", fake_analysis)
+    res = client.post(
+        "/v1/create-profile-batch?fields=landmarks",
+        files=[("files", ("a.jpg", b"ser-3", "image/jpeg"))],
+        headers={"Accept": MSGPACK},
+    )
+    items = msgpack.unpackb(res.content)
+    assert items[0]["index"] == 0 and items[0]["error"] is None
+    assert len(items[0]["profile"]["landmarks"]) == 68 * 2 * 2
+
+    client.post("/v1/store-profile?fields=id", files={"file": ("a.jpg", b"ser-4", "image/jpeg")})
+    res = client.post(
+        "/v1/search-face?k=1",
+        files={"file": ("b.jpg", b"ser-5", "image/jpeg")},
+        headers={"Accept": MSGPACK},
+    )
+    result = msgpack.unpackb(res.content)
+    assert result["matches"][0]["distance"] == 0.0
+    assert result["gallery_size"] >= 1
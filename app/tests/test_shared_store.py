@@ -0,0 +1,121 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from app.models.profile import Profile
+from app.utils.mmap_store import MmapProfileStore
+from app.utils.profile_store import create_profile_store
+from app.utils.shared_store import SharedProfileStore
+
+
+def _profile(seed, **extra):
+    rng = np.random.default_rng(seed)
+    return Profile(
+        landmarks=[tuple(p) for p in rng.integers(-5, 600, size=(68, 2)).tolist()],
+        eye_distance=float(rng.uniform(40, 90)),
+        yaw=0.0,
+        **extra,
+    )
+
+
+def test_enrollment_is_visible_to_other_workers(tmp_path):
+    a = SharedProfileStore(str(tmp_path), fsync=False)
+    b = SharedProfileStore(str(tmp_path), fsync=False)
+    p = _profile(1, description="from a")
+    pid = a.add(p)
+
+    assert pid in b and len(b) == 1
+    assert b.get(pid).description == "from a"
+    assert b.search(p.landmarks, p.eye_distance, k=1) == [(pid, 0.0)]
+
+    # Writes from both sides interleave without clobbering each other
+    pid_b = b.add(_profile(2, description="from b"))
+    pid_a = a.add(_profile(3, description="from a again"))
+    for store in (a, b):
+        assert len(store) == 3
+        assert store.get(pid_b).description == "from b"
+        assert store.get(pid_a).description == "from a again"
+
+    b.delete(pid)
+    assert pid not in a and len(a) == 2
+    assert all(hit[0] != pid for hit in a.search(p.landmarks, p.eye_distance, k=3))
+    with pytest.raises(KeyError):
+        a.get(pid)
+
+
+def test_search_scans_the_mapped_files_without_a_copy(tmp_path):
+    store = SharedProfileStore(str(tmp_path), fsync=False)
+    profiles = [_profile(i) for i in range(20)]
+    ids = [store.add(p) for p in profiles]
+    assert np.shares_memory(store.index.vectors, store._landmarks.array)
+    hits = store.search(profiles[7].landmarks, profiles[7].eye_distance, k=3)
+    assert hits[0] == (ids[7], 0.0) and len(hits) == 3
+
+
+def test_readers_follow_compaction_and_jitter_updates(tmp_path):
+    a = SharedProfileStore(str(tmp_path), fsync=False)
+    b = SharedProfileStore(str(tmp_path), fsync=False)
+    ids = [a.add(_profile(i, description=f"p{i}")) for i in range(4)]
+    a.delete(ids[0])
+    a.set_jitter_faces(ids[1], [b"j1", b"j2"])
+    assert b.get(ids[1]).jitter_faces == (b"j1", b"j2")
+
+    assert a.compact() == 1
+    assert len(b) == 3 and ids[0] not in b
+    assert [b.get(i).description for i in ids[1:]] == ["p1", "p2", "p3"]
+    new_id = b.add(_profile(9, description="after compaction"))
+    assert a.get(new_id).description == "after compaction"
+
+
+def test_opens_a_store_written_by_the_mmap_backend(tmp_path):
+    old = MmapProfileStore(str(tmp_path), fsync=False)
+    pid = old.add(_profile(1, description="legacy"))
+    old.close()
+    store = SharedProfileStore(str(tmp_path), fsync=False)
+    assert store.get(pid).description == "legacy"
+    assert store.get(store.add(_profile(2, description="new"))).description == "new"
+
+
+def _enroll(path, seeds, queue):
+    store = SharedProfileStore(path, fsync=False)
+    queue.put([store.add(_profile(s)) for s in seeds])
+
+
+def test_enrollments_from_another_process(tmp_path):
+    reader = SharedProfileStore(str(tmp_path), fsync=False)
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=_enroll, args=(str(tmp_path), range(i * 50, i * 50 + 50), queue)) for i in range(2)]
+    for w in workers:
+        w.start()
+    ids = queue.get(timeout=30) + queue.get(timeout=30)
+    for w in workers:
+        w.join(timeout=30)
+
+    assert len(reader) == 100 and len(set(ids)) == 100
+    assert all(pid in reader for pid in ids)
+    p = _profile(73)
+    assert reader.search(p.landmarks, p.eye_distance, k=1)[0][1] == 0.0
+
+
+def test_backend_is_selectable(tmp_path, monkeypatch):
+    from app.utils import profile_store as ps
+
+    monkeypatch.setattr(ps.settings, "profile_store_path", str(tmp_path))
+    assert isinstance(create_profile_store("shared"), SharedProfileStore)
+
+
+def test_id_added_again_after_delete_resolves_to_the_new_row(tmp_path):
+    store = SharedProfileStore(str(tmp_path), fsync=False)
+    store.add(_profile(1, description="old"), "a")
+    store.delete("a")
+    store.add(_profile(2, description="new"), "a")
+    store.add(_profile(3), "b")
+    for reader in (store, SharedProfileStore(str(tmp_path), fsync=False)):
+        assert "a" in reader and len(reader) == 2
+        assert reader.get("a").description == "new"
+        assert reader.list_ids() == ["a", "b"]
+    store.delete("a")
+    reopened = SharedProfileStore(str(tmp_path), fsync=False)
+    assert "a" not in reopened and reopened.list_ids() == ["b"] and len(reopened) == 1
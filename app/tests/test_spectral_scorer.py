@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.bonus_endpoints as be
+from app.main import app
+from app.utils import spectral_scorer as ss
+from app.utils.sample_face import sample_face_jpeg
+
+client = TestClient(app)
+
+
+def face_chips(n: int = 6) -> np.ndarray:
+    """Chip-sized crops of the sample face at slightly different framings."""
+    img = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    h, w = img.shape[:2]
+    side = min(h, w)
+    chips = []
+    for i in range(n):
+        crop = img[i * 2 : side - i * 2, i * 2 : side - i * 2]
+        chips.append(cv2.resize(crop, (150, 150), interpolation=cv2.INTER_AREA))
+    return np.stack(chips)
+
+
+def _recompress(chip: np.ndarray, quality: int) -> np.ndarray:
+    buf = cv2.imencode(".jpg", chip, [cv2.IMWRITE_JPEG_QUALITY, quality])[1]
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+
+def test_stack_scores_match_single_chip_scores():
+    model = ss.SpectralModel(ss.DEFAULT_MODEL)
+    chips = face_chips()
+    stacked = model.score(chips)
+    assert stacked.shape == (len(chips),)
+    single = [model.score(chip[None])[0] for chip in chips]
+    np.testing.assert_allclose(stacked, single, rtol=1e-5)
+    # Grayscale and other chip sizes go through the same path
+    gray = cv2.cvtColor(chips[0], cv2.COLOR_BGR2GRAY)
+    assert 0.0 <= model.score(cv2.resize(gray, (200, 200))[None])[0] <= 1.0
+
+
+def test_recompression_artifacts_raise_the_score():
+    model = ss.SpectralModel(ss.DEFAULT_MODEL)
+    chips = [_recompress(c, 92) for c in face_chips()]
+    blocky = [_recompress(c, 15) for c in chips]
+    assert model.score(np.stack(blocky)).mean() > model.score(np.stack(chips)).mean() + 0.2
+    features = model.features(np.stack(blocky + chips))
+    blockiness = features[:, ss.FEATURES.index("blockiness")]
+    assert blockiness[: len(blocky)].mean() > blockiness[len(blocky) :].mean()
+
+
+def test_model_loads_from_file(tmp_path, monkeypatch):
+    path = tmp_path / "model.json"
+    params = {**ss.DEFAULT_MODEL, "threshold": 0.9}
+    ss.SpectralModel(params).save(str(path))
+    monkeypatch.setattr(ss.settings, "deepfake_model_path", str(path))
+    monkeypatch.setattr(ss, "_model", None)
+    assert ss.get_model().threshold == 0.9
+    assert ss.get_model() is ss.get_model()
+
+    with pytest.raises(ValueError):
+        ss.SpectralModel({**params, "features": ["hf_ratio"]})
+
+
+def test_detect_deepfake_scores_the_face_chip(monkeypatch):
+    chip = face_chips(1)[0]
+    monkeypatch.setattr(be, "analyze_face", lambda _bytes: {"landmarks": [], "eye_distance": 1.0, "_chip": chip})
+    res = client.post("/v1/detect-deepfake", files={"file": ("a.jpg", b"spectral-1", "image/jpeg")})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["confidence"] == round(ss.score_chips([chip])[0], 2)
+    assert body["description"].endswith("(face)")
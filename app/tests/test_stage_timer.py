@@ -0,0 +1,46 @@
+import os
+import threading
+
+import pytest
+
+from app.utils import face_analyzer as fa
+from app.utils.sample_face import sample_face_jpeg
+from app.utils.stage_timer import record_stages, stage
+
+needs_model = pytest.mark.skipif(not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded")
+
+
+def test_stage_is_noop_outside_recording():
+    with stage("decode"):
+        pass
+    with record_stages() as timings:
+        with stage("decode"):
+            pass
+        with stage("decode"):
+            pass
+    assert set(timings) == {"decode"} and timings["decode"] >= 0
+
+
+def test_recordings_do_not_leak_across_threads():
+    seen = {}
+
+    def other():
+        with stage("other"):
+            pass
+        with record_stages() as timings:
+            with stage("mine"):
+                pass
+        seen.update(timings)
+
+    with record_stages() as timings:
+        t = threading.Thread(target=other)
+        t.start()
+        t.join()
+    assert timings == {} and set(seen) == {"mine"}
+
+
+@needs_model
+def test_analyze_face_reports_pipeline_stages():
+    with record_stages() as timings:
+        fa.analyze_face(sample_face_jpeg())
+    assert {"decode", "quality_gate", "model_load", "detect", "landmarks", "chip"} <= set(timings)
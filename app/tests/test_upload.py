@@ -0,0 +1,102 @@
+import io
+import os
+import struct
+import zlib
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import app.api.v1.endpoints as ep
+import app.utils.upload as up
+from app.main import app
+from app.utils import face_analyzer as fa
+from app.utils.image_header import sniff_image
+from app.utils.sample_face import sample_face_jpeg
+
+client = TestClient(app)
+
+needs_model = pytest.mark.skipif(not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded")
+
+
+def png_header(width: int, height: int) -> bytes:
+    """A PNG signature, IHDR chunk claiming ``width`` x ``height`` and an empty IDAT."""
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = b"IHDR" + ihdr
+    head = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + chunk + struct.pack(">I", zlib.crc32(chunk))
+    return head + struct.pack(">I", 0) + b"IDAT" + struct.pack(">I", zlib.crc32(b"IDAT"))
+
+
+def _fail_analysis(_bytes):
+    raise AssertionError("oversized upload reached the analyzer")
+
+
+def test_sniff_reads_dimensions_without_pixels():
+    header = sniff_image(png_header(20000, 15000))
+    assert header.format == "PNG" and (header.width, header.height) == (20000, 15000)
+    assert header.megapixels == 300.0
+    assert sniff_image(b"not an image") is None
+
+
+def test_sniff_leaves_pillows_bomb_guard_alone_and_reads_in_place():
+    from PIL import Image
+
+    assert Image.MAX_IMAGE_PIXELS is not None  # other callers keep the guard
+    jpeg = cv2.imencode(".jpg", np.zeros((30, 40, 3), np.uint8))[1].tobytes()
+    metadata = b"\xff\xe1" + struct.pack(">H", 65000) + bytes(64998)
+    big = bytearray(jpeg[:2] + metadata * 2 + jpeg[2:])  # header past HEADER_BYTES
+    header = sniff_image(big)
+    assert header.format == "JPEG" and (header.width, header.height) == (40, 30)
+
+
+def test_upload_over_byte_limit_is_413(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", _fail_analysis)
+    monkeypatch.setattr(up.settings, "upload_max_bytes", 1000)
+    res = client.post("/v1/create-profile", files={"file": ("a.jpg", b"x" * 1001, "image/jpeg")})
+    assert res.status_code == 413
+    assert "1000 bytes" in res.json()["detail"]
+
+
+def test_image_over_megapixel_limit_is_413_before_decode(monkeypatch):
+    monkeypatch.setattr(ep, "analyze_face", _fail_analysis)
+    res = client.post("/v1/create-profile", files={"file": ("a.png", png_header(20000, 15000), "image/png")})
+    assert res.status_code == 413
+    assert "300.0 MP" in res.json()["detail"]
+
+
+def test_streamed_read_grows_buffer_and_enforces_limits(monkeypatch):
+    data = os.urandom(3 * up.CHUNK_BYTES + 123)
+    buf = up._read_limited(io.BytesIO(data), None, 0)
+    assert isinstance(buf, bytearray) and buf == data
+
+    with pytest.raises(HTTPException) as exc:
+        up._read_limited(io.BytesIO(data), None, up.CHUNK_BYTES)
+    assert exc.value.status_code == 413
+
+    monkeypatch.setattr(up.settings, "image_max_megapixels", 100.0)
+    with pytest.raises(HTTPException):
+        up._read_limited(io.BytesIO(png_header(20000, 15000) + bytes(100_000)), None, 0)
+
+
+@needs_model
+def test_decode_budget_downscales_but_keeps_original_coordinates(monkeypatch):
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    rng = np.random.default_rng(0)
+    canvas = cv2.resize(rng.integers(90, 170, (181, 321, 3), dtype=np.uint8), (2560, 1440))
+    grain = rng.integers(-24, 25, (1440, 2560, 1), dtype=np.int16)
+    canvas = np.clip(canvas.astype(np.int16) + grain, 0, 255).astype(np.uint8)
+    canvas[240:1140, 800:1700] = cv2.resize(face, (900, 900), interpolation=cv2.INTER_AREA)
+    jpeg = cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+    monkeypatch.setattr(fa.settings, "image_decode_max_megapixels", 0)
+    full = fa.analyze_face(jpeg)
+    monkeypatch.setattr(fa.settings, "image_decode_max_megapixels", 1.0)
+    reduced = fa.analyze_face(jpeg)
+
+    a, b = np.array(full["landmarks"]), np.array(reduced["landmarks"])
+    assert b[:, 0].min() > 800 and b[:, 0].max() < 1700
+    assert np.abs(a - b).mean() < 6
+    assert reduced["eye_distance"] == pytest.approx(full["eye_distance"], rel=0.05)
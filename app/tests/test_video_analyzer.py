@@ -0,0 +1,132 @@
+import os
+
+import cv2
+import dlib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import face_analyzer as fa
+from app.utils import video_analyzer as va
+from app.utils.sample_face import sample_face_jpeg
+
+client = TestClient(app)
+
+needs_model = pytest.mark.skipif(
+    not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded"
+)
+
+
+def _write_video(path, frames=30, flicker=False, size=(640, 480)):
+    """Write an MJPG AVI of the sample face drifting across a textured background.
+
+    With ``flicker`` the face is randomly rotated/stretched every frame,
+    mimicking the per-frame instability of face-swap output.
+    """
+    w, h = size
+    rng = np.random.default_rng(0)
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.resize(cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE), (200, 200))
+    background = cv2.resize(rng.integers(90, 170, (h // 8, w // 8, 3), dtype=np.uint8), (w, h))
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25, (w, h))
+    for i in range(frames):
+        frame = background.copy()
+        patch = face
+        if flicker:
+            m = cv2.getRotationMatrix2D((100, 100), rng.uniform(-4, 4), 1.0)
+            m[0, :2] *= rng.uniform(0.92, 1.08)
+            patch = cv2.warpAffine(face, m, (200, 200), borderMode=cv2.BORDER_REPLICATE)
+        x, y = 100 + 2 * i, 120 + i
+        frame[y : y + 200, x : x + 200] = patch
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def test_iter_frames_downscales(tmp_path, monkeypatch):
+    monkeypatch.setattr(va.settings, "detect_max_side", 320)
+    path = _write_video(tmp_path / "clip.avi", frames=5)
+    frames = list(va.iter_frames(str(path)))
+    assert [i for i, _ in frames] == [0, 1, 2, 3, 4]
+    assert frames[0][1].shape == (240, 320)
+
+
+def test_iter_frames_rejects_garbage(tmp_path):
+    path = tmp_path / "junk.avi"
+    path.write_bytes(b"not a video")
+    with pytest.raises(ValueError):
+        list(va.iter_frames(str(path)))
+
+
+def test_tracker_detects_every_n_frames(tmp_path, monkeypatch):
+    """Between detections the correlation tracker supplies the face box."""
+    calls = []
+
+    def fake_detect(gray):
+        calls.append(1)
+        rects = dlib.rectangles()
+        rects.append(dlib.rectangle(100, 120, 300, 320))
+        return rects
+
+    monkeypatch.setattr(va, "_detect_faces", fake_detect)
+    path = _write_video(tmp_path / "clip.avi", frames=20)
+    tracker = va.FaceTracker(detect_every=5, min_confidence=0.0)
+    results = [tracker.locate(gray) for _, gray in va.iter_frames(str(path))]
+    assert len(calls) == tracker.detections == 4
+    assert sum(tracked for _, tracked in results) == 16
+
+
+@needs_model
+def test_analyze_video_tracks_and_scores(tmp_path):
+    path = _write_video(tmp_path / "genuine.avi")
+    out = va.analyze_video(str(path), detect_every=10)
+    assert out["frames_analyzed"] == out["faces_found"] == 30
+    assert out["detections"] < out["frames_analyzed"]
+    assert out["frames"][0]["score"] is None
+    assert 0.0 <= out["confidence"] < 0.6
+    assert out["fps"] > 0
+
+    flicker = va.analyze_video(str(_write_video(tmp_path / "fake.avi", flicker=True)))
+    assert flicker["confidence"] > out["confidence"]
+
+
+@needs_model
+def test_detect_deepfake_video_endpoint(tmp_path):
+    path = _write_video(tmp_path / "clip.avi", frames=12)
+    with open(path, "rb") as fh:
+        res = client.post(
+            "/v1/detect-deepfake-video?detect_every=4",
+            files={"file": ("clip.avi", fh, "video/x-msvideo")},
+        )
+    assert res.status_code == 200
+    body = res.json()
+    assert body["frames_analyzed"] == len(body["frames"]) == 12
+    assert body["detections"] <= 3
+    assert isinstance(body["is_deepfake"], bool)
+
+
+@needs_model
+def test_detect_deepfake_video_rejects_invalid(tmp_path):
+    res = client.post(
+        "/v1/detect-deepfake-video",
+        files={"file": ("clip.avi", b"definitely not a video", "video/x-msvideo")},
+    )
+    assert res.status_code == 400
+
+
+def test_detect_deepfake_video_size_limit(monkeypatch):
+    monkeypatch.setattr(va.settings, "video_max_bytes", 10)
+    res = client.post(
+        "/v1/detect-deepfake-video",
+        files={"file": ("clip.avi", b"x" * 100, "video/x-msvideo")},
+    )
+    assert res.status_code == 413
+
+
+@needs_model
+def test_analyze_video_stops_at_the_frame_cap(tmp_path, monkeypatch):
+    assert va.settings.video_max_frames > 0  # a long upload must not hold a pool slot indefinitely
+    monkeypatch.setattr(va.settings, "video_max_frames", 8)
+    out = va.analyze_video(str(_write_video(tmp_path / "long.avi", frames=20)))
+    assert out["frames_analyzed"] == len(out["frames"]) == 8
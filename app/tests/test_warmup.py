@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.v1.endpoints as ep
+import app.main as main
+from app.main import app
+from app.utils import face_analyzer as fa
+from app.utils.warmup import Readiness
+
+client = TestClient(app)
+
+needs_model = pytest.mark.skipif(not os.path.exists(fa.MODEL_PATH), reason="landmark model not downloaded")
+
+
+def test_ready_is_503_until_warmed(monkeypatch):
+    monkeypatch.setattr(main, "readiness", Readiness())
+    res = client.get("/ready")
+    assert res.status_code == 503
+    assert res.json()["status"] == "starting"
+    # Liveness is unaffected
+    assert client.get("/v1/ping").status_code == 200
+
+
+def test_missing_model_is_reported_not_raised(monkeypatch):
+    monkeypatch.setattr(fa, "_predictor", None)
+    monkeypatch.setattr(fa, "MODEL_PATH", "models/does-not-exist.dat")
+    state = Readiness()
+    monkeypatch.setattr(main, "readiness", state)
+    assert state.warm_up() is False
+    res = client.get("/ready")
+    assert res.status_code == 503
+    assert res.json()["status"] == "unavailable"
+    assert "does-not-exist" in res.json()["detail"]
+
+
+@needs_model
+def test_warm_up_loads_model_and_runs_inference(monkeypatch):
+    state = Readiness()
+    monkeypatch.setattr(main, "readiness", state)
+    assert state.warm_up() is True
+    assert fa._predictor is not None
+    body = client.get("/ready").json()
+    assert body["status"] == "ready"
+    assert body["model_load_ms"] >= 0 and body["warmup_ms"] > 0
+
+
+def test_first_profile_time_is_recorded_once(monkeypatch):
+    state = Readiness()
+    monkeypatch.setattr(ep, "readiness", state)
+    monkeypatch.setattr(
+        ep, "analyze_face", lambda _b: {"landmarks": [(i, i) for i in range(68)], "eye_distance": 50.0, "yaw": 0.0}
+    )
+    client.post("/v1/create-profile", files={"file": ("a.jpg", b"warm-1", "image/jpeg")})
+    first = state.first_profile_s
+    assert first is not None and first > 0
+    client.post("/v1/create-profile", files={"file": ("a.jpg", b"warm-2", "image/jpeg")})
+    assert state.first_profile_s == first
+
+
+def test_lifespan_marks_ready_without_preload(monkeypatch):
+    state = Readiness()
+    monkeypatch.setattr(main, "readiness", state)
+    monkeypatch.setattr(main.settings, "preload_model", False)
+    monkeypatch.setattr(main.settings, "analysis_backend", "thread")
+    monkeypatch.setattr(main.settings, "analysis_workers", 1)
+    with TestClient(app) as live:
+        assert live.get("/ready").status_code == 200
+
+
+def test_lifespan_skips_warm_up_inherited_from_master(monkeypatch):
+    state = Readiness()
+    state.ready = True  # warmed by gunicorn's master before the fork
+    monkeypatch.setattr(state, "warm_up", lambda: pytest.fail("warmed up twice"))
+    monkeypatch.setattr(main, "readiness", state)
+    monkeypatch.setattr(main.settings, "preload_model", True)
+    monkeypatch.setattr(main.settings, "analysis_backend", "thread")
+    monkeypatch.setattr(main.settings, "analysis_workers", 1)
+    with TestClient(app) as live:
+        assert live.get("/ready").status_code == 200
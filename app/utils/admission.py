@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+from app.utils.metrics import metrics
+from app.utils.stage_timer import add_stages
+
+# How often a queued caller checks whether its client has gone away
+DISCONNECT_POLL_SECONDS = 0.25
+
+DisconnectProbe = Callable[[], Awaitable[bool]]
+
+
+class Priority(IntEnum):
+    """Scheduling class of analysis work; lower values are served first."""
+
+    INTERACTIVE = 0  # a user is waiting on the answer (verify, identify, search)
+    NORMAL = 1  # default for everything else
+    BULK = 2  # enrollment and batch jobs that tolerate delay
+
+
+# Priority and disconnect probe of the request being served (set by the
+# ``admission_priority`` dependency, inherited by tasks it spawns)
+_priority: ContextVar[Priority] = ContextVar("admission_priority", default=Priority.NORMAL)
+_disconnected: ContextVar[Optional[DisconnectProbe]] = ContextVar("admission_disconnected", default=None)
+
+
+class Overloaded(HTTPException):
+    """Analysis queue is saturated: 503 with a ``Retry-After`` hint."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy ({reason}); retry in {retry_after} s",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(HTTPException):
+    """The client went away while its work was still queued (never sent: 499)."""
+
+    def __init__(self):
+        super().__init__(status_code=499, detail="Client closed request")
+
+
+def current() -> Tuple[Priority, Optional[DisconnectProbe]]:
+    """Priority and disconnect probe of the calling request."""
+    return _priority.get(), _disconnected.get()
+
+
+@asynccontextmanager
+async def prioritized(priority: Priority, disconnected: Optional[DisconnectProbe] = None) -> AsyncIterator[None]:
+    """Run the block's analysis calls under ``priority`` (and ``disconnected``)."""
+    p_token = _priority.set(priority)
+    d_token = _disconnected.set(disconnected)
+    try:
+        yield
+    finally:
+        _priority.reset(p_token)
+        _disconnected.reset(d_token)
+
+
+def admission_priority(priority: Priority) -> Callable[[Request], Awaitable[None]]:
+    """FastAPI dependency: schedule the endpoint's analysis work at ``priority``.
+
+    Queued work of the request is dropped (499) once its client disconnects.
+    """
+
+    async def dependency(request: Request) -> None:
+        _priority.set(priority)
+        _disconnected.set(request.is_disconnected)
+
+    return dependency
+
+
+class AdmissionController:
+    """Bounded, priority-ordered admission to a limited number of slots.
+
+    At most ``max_active`` callers hold a slot; the rest wait in a heap
+    ordered by (priority, arrival). Callers are turned away with
+    ``Overloaded`` (503) when ``max_waiting`` are already queued and none
+    of them ranks below the newcomer, when a queued lower-priority caller
+    is pushed out by a more urgent one, or after ``max_wait`` seconds in the
+    queue. Queued callers whose client disconnects leave the queue with
+    ``ClientDisconnected``. A limit of 0 disables it.
+    """
+
+    def __init__(self, max_active: int, max_waiting: Optional[int] = None, max_wait: Optional[float] = None):
+        self.max_active = max(1, max_active)
+        self.max_waiting = settings.analysis_max_waiting if max_waiting is None else max_waiting
+        self.max_wait = settings.analysis_max_wait_seconds if max_wait is None else max_wait
+        self.active = 0
+        self.waiting = 0
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # Exponentially weighted slot hold time, for Retry-After estimates
+        self._service_time = 0.1
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue should have drained (1–60)."""
+        seconds = (self.waiting + 1) * self._service_time / self.max_active
+        return min(60, max(1, math.ceil(seconds)))
+
+    def _reject(self, reason: str) -> Overloaded:
+        metrics.count_admission_rejection(reason)
+        return Overloaded(reason, self.retry_after())
+
+    def _shed_lowest(self, priority: Priority) -> bool:
+        """Turn away the newest queued caller ranked below ``priority``, if any."""
+        live = [entry for entry in self._heap if not entry[2].done()]
+        victim = max(live, key=lambda entry: (entry[0], entry[1]), default=None)
+        if victim is None or victim[0] <= priority:
+            return False
+        victim[2].set_exception(self._reject("shed"))
+        self.waiting -= 1
+        return True
+
+    async def acquire(self, priority: Priority = Priority.NORMAL, disconnected: Optional[DisconnectProbe] = None) -> None:
+        if self.active < self.max_active and not self.waiting:
+            self.active += 1
+            metrics.observe_admission_wait(priority.name.lower(), 0.0)
+            return
+        if self.max_waiting and self.waiting >= self.max_waiting and not self._shed_lowest(priority):
+            raise self._reject("queue_full")
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        heapq.heappush(self._heap, (int(priority), next(self._seq), fut))
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await self._wait(fut, disconnected, start)
+        except BaseException:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self.release()  # granted just as we gave up: pass the slot on
+            elif not fut.done():
+                fut.cancel()
+                self.waiting -= 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            metrics.observe_admission_wait(priority.name.lower(), waited)
+            add_stages({"queue_wait": waited * 1000})
+
+    async def _wait(self, fut: asyncio.Future, disconnected: Optional[DisconnectProbe], start: float) -> None:
+        while True:
+            timeout = DISCONNECT_POLL_SECONDS if disconnected is not None else None
+            if self.max_wait:
+                remaining = self.max_wait - (time.perf_counter() - start)
+                if remaining <= 0:
+                    raise self._reject("timeout")
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            await asyncio.wait((fut,), timeout=timeout)
+            if fut.done():
+                fut.result()  # raises if this caller was shed
+                return
+            if disconnected is not None and await disconnected():
+                metrics.count_admission_rejection("disconnected")
+                raise ClientDisconnected()
+
+    def release(self, held: Optional[float] = None) -> None:
+        if held is not None:
+            self._service_time += 0.2 * (held - self._service_time)
+        while self._heap:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                # Hand the slot straight to the next caller; active is unchanged
+                self.waiting -= 1
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None, disconnected: Optional[DisconnectProbe] = None) -> AsyncIterator[None]:
+        """Hold a slot for the block; defaults to the calling request's priority."""
+        if priority is None:
+            priority, disconnected = current()
+        await self.acquire(priority, disconnected)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_active": self.max_active,
+            "max_waiting": self.max_waiting,
+            "retry_after": self.retry_after(),
+        }
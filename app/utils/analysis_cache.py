@@ -0,0 +1,135 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.batcher import analysis_batcher
+from app.utils.metrics import metrics
+from app.utils.stage_timer import add_stages
+
+# Rough per-entry overhead of the landmark list, floats and dict itself
+_BASE_ENTRY_BYTES = 8 * 1024
+
+
+def content_digest(content: bytes) -> str:
+    """Stable SHA-256 hex digest of upload bytes (identical on every worker)."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _entry_size(result: Dict[str, Any]) -> int:
+    size = _BASE_ENTRY_BYTES
+    for value in result.values():
+        if isinstance(value, np.ndarray):
+            size += value.nbytes
+        elif isinstance(value, (str, bytes)):
+            size += len(value)
+    return size
+
+
+class AnalysisCache:
+    """Bounded LRU + TTL cache of analysis results keyed by content digest.
+
+    Entries hold everything ``analyze_face`` returns, including the internal
+    ``_chip`` array, so repeated uploads of the same bytes skip the pipeline.
+    Eviction happens on age, entry count and an approximate memory cap.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.max_entries = settings.analysis_cache_max_entries if max_entries is None else max_entries
+        self.ttl = settings.analysis_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.max_bytes = settings.analysis_cache_max_bytes if max_bytes is None else max_bytes
+        # key -> (expires_at, size, result)
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, int, Dict[str, Any]]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            self._pop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[2])
+
+    def put(self, key: Tuple[str, str], result: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        size = _entry_size(result)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._pop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, result)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: Tuple[str, str]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+analysis_cache = AnalysisCache()
+
+
+async def analyze_cached(fn: Callable[[bytes], Dict[str, Any]], content: bytes) -> Dict[str, Any]:
+    """Return ``fn(content)`` from the cache or via the micro-batcher.
+
+    The key includes the analysis function so different pipelines over the
+    same bytes never share entries. Failures are not cached; they and the
+    stage timings of batched calls are fed to ``metrics``.
+    """
+    key = (f"{fn.__module__}.{fn.__qualname__}", content_digest(content))
+    result = analysis_cache.get(key)
+    if result is None:
+        try:
+            result = await analysis_batcher.submit(fn, content)
+        except ValueError as exc:
+            add_stages(getattr(exc, "stages", {}))
+            metrics.count_failure(exc)
+            raise
+        add_stages(result.pop("_stages", {}))
+        analysis_cache.put(key, result)
+        result = dict(result)
+    return result
+
+
+metrics.register(
+    "validia_analysis_cache_hits_total", "counter", "Analysis results served from the cache.",
+    lambda: analysis_cache.hits,
+)
+metrics.register(
+    "validia_analysis_cache_misses_total", "counter", "Analysis cache lookups that ran the pipeline.",
+    lambda: analysis_cache.misses,
+)
+metrics.register(
+    "validia_analysis_cache_entries", "gauge", "Results currently held by the analysis cache.",
+    lambda: analysis_cache.stats()["entries"],
+)
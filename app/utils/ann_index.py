@@ -0,0 +1,272 @@
+import math
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.face_compare import landmark_distances
+
+_INITIAL_CAPACITY = 1024
+
+Hit = Tuple[str, float]
+
+
+def _top_k(dist: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` smallest distances, closest first."""
+    k = min(k, dist.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(dist, k - 1)[:k] if k < dist.shape[0] else np.arange(dist.shape[0])
+    return top[np.argsort(dist[top], kind="stable")]
+
+
+class ExactIndex:
+    """Brute-force gallery index.
+
+    Keeps a contiguous (N, 136) float32 landmark matrix and an (N,)
+    eye-distance vector, grown in place with amortised doubling, and scores
+    a probe against every row in one vectorised pass.
+    """
+
+    kind = "exact"
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._vectors = np.empty((_INITIAL_CAPACITY, 136), dtype=np.float32)
+        self._eye = np.empty(_INITIAL_CAPACITY, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[: len(self._ids)]
+
+    @property
+    def eye_distances(self) -> np.ndarray:
+        return self._eye[: len(self._ids)]
+
+    def add(self, profile_id: str, vector: np.ndarray, eye_distance: float) -> None:
+        self.add_many([profile_id], np.asarray(vector).reshape(1, 136), [eye_distance])
+
+    def add_many(
+        self, ids: Sequence[str], vectors: np.ndarray, eye_distances: Sequence[float]
+    ) -> None:
+        """Append rows in bulk (one copy, no per-row Python work)."""
+        start = len(self._ids)
+        stop = start + len(ids)
+        if stop > self._vectors.shape[0]:
+            capacity = max(stop, 2 * self._vectors.shape[0])
+            self._vectors = np.resize(self._vectors, (capacity, 136))
+            self._eye = np.resize(self._eye, capacity)
+        self._vectors[start:stop] = np.asarray(vectors, dtype=np.float32).reshape(-1, 136)
+        self._eye[start:stop] = eye_distances
+        self._ids.extend(ids)
+        self._on_added(start, stop)
+
+    def _on_added(self, start: int, stop: int) -> None:
+        """Hook for subclasses that maintain extra structures per row."""
+
+    def rebuild(self) -> None:
+        """Retrain any derived structure (nothing to do for brute force)."""
+
+    def search(
+        self, probe: np.ndarray, probe_eye: float, k: int, nprobe: Optional[int] = None
+    ) -> List[Hit]:
+        dist = landmark_distances(self.vectors, self.eye_distances, probe, probe_eye)
+        return [(self._ids[i], float(dist[i])) for i in _top_k(dist, k)]
+
+    def _score_rows(self, rows: np.ndarray, probe: np.ndarray, probe_eye: float, k: int) -> List[Hit]:
+        dist = landmark_distances(self._vectors[rows], self._eye[rows], probe, probe_eye)
+        return [(self._ids[rows[i]], float(dist[i])) for i in _top_k(dist, k)]
+
+
+def _kmeans(data: np.ndarray, n_clusters: int, iterations: int, seed: int = 0) -> np.ndarray:
+    """Plain Lloyd's k-means with GEMM-based squared distances."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(data.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest_centroid(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=n_clusters)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters from random points
+        if empty.any():
+            centroids[empty] = data[rng.choice(data.shape[0], int(empty.sum()), replace=False)]
+    return centroids
+
+
+def _centroid_distances(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return (
+        np.einsum("ij,ij->i", data, data)[:, None]
+        - 2.0 * data @ centroids.T
+        + np.einsum("ij,ij->i", centroids, centroids)[None, :]
+    )
+
+
+def _nearest_centroid(data: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+    labels = np.empty(data.shape[0], dtype=np.int64)
+    for start in range(0, data.shape[0], block):
+        chunk = data[start : start + block]
+        labels[start : start + block] = _centroid_distances(chunk, centroids).argmin(axis=1)
+    return labels
+
+
+class IVFIndex(ExactIndex):
+    """Inverted-file approximate index for large galleries.
+
+    Rows are bucketed by their nearest k-means centroid in raw landmark
+    space. A query scans only the ``nprobe`` closest buckets (plus rows
+    added since the last training) and re-ranks those candidates with the
+    exact ``compare_profiles`` metric, so ``nprobe`` trades recall for
+    latency. Until the gallery reaches ``min_train_size`` it behaves like
+    ``ExactIndex``; it retrains itself once the gallery doubles.
+
+    Automatic (re)training runs on a background thread, so ``add`` never
+    waits for k-means: searches keep using the previous lists (or exact
+    search) until the new ones are swapped in.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        min_train_size: Optional[int] = None,
+    ):
+        super().__init__()
+        self.nlist = settings.ivf_nlist if nlist is None else nlist
+        self.nprobe = nprobe or settings.ivf_nprobe
+        self.min_train_size = min_train_size or settings.ivf_min_train_size
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+        # Row ranges not bucketed into _lists yet (every add is recorded,
+        # trained or not, so a swap can tell which rows training missed)
+        self._pending: List[Tuple[int, int]] = []
+        # Guards _centroids, _lists, _trained_size and _pending against the
+        # training thread's swap
+        self._lock = threading.Lock()
+        self._training: Optional[threading.Thread] = None
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _train(self, data: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Centroids and bucket lists for ``data``; touches no shared state."""
+        n = data.shape[0]
+        nlist = self.nlist or int(math.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        sample_size = min(n, 64 * nlist)
+        sample = data[np.random.default_rng(0).choice(n, sample_size, replace=False)]
+        centroids = _kmeans(sample, nlist, iterations=10)
+
+        labels = _nearest_centroid(data, centroids)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+        return centroids, [order[bounds[i] : bounds[i + 1]] for i in range(nlist)]
+
+    def _fit(self, data: np.ndarray) -> None:
+        """Train on ``data`` (the first ``len(data)`` rows) and swap the result in.
+
+        Rows are append-only and a grown matrix is a new array, so a view
+        of the rows present when training starts stays a consistent
+        snapshot while the owning thread keeps adding.
+        """
+        n = data.shape[0]
+        centroids, lists = self._train(data)
+        with self._lock:
+            if self._centroids is not None and self._trained_size > n:
+                return  # a run on more rows finished first
+            self._centroids, self._lists, self._trained_size = centroids, lists, n
+            # Rows added meanwhile stay pending
+            self._pending = [(max(a, n), b) for a, b in self._pending if b > n]
+
+    def rebuild(self) -> None:
+        """(Re)train centroids on the current gallery and rebucket every row.
+
+        Runs on the calling thread (e.g. a worker thread of
+        ``/gallery/rebuild-index``); adds and searches may continue meanwhile.
+        """
+        n = len(self)
+        if n < self.min_train_size:
+            with self._lock:
+                self._centroids = None
+                self._lists = []
+                self._trained_size = 0
+            return
+        self._fit(self._vectors[:n])
+
+    def join_training(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background training run, if any, to finish."""
+        thread = self._training
+        if thread is not None:
+            thread.join(timeout)
+
+    def _start_training(self, n: int) -> None:
+        if self._training is not None and self._training.is_alive():
+            return
+        data = self._vectors[:n]
+        self._training = threading.Thread(target=self._fit, args=(data,), name="ivf-train", daemon=True)
+        self._training.start()
+
+    def _on_added(self, start: int, stop: int) -> None:
+        with self._lock:
+            self._pending.append((start, stop))
+            trained_size = self._trained_size if self._centroids is not None else None
+        if trained_size is None:
+            if stop >= self.min_train_size:
+                self._start_training(stop)
+            return
+        if stop >= 2 * trained_size:
+            self._start_training(stop)
+        elif sum(b - a for a, b in self._pending) >= 4096:
+            self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        """Bucket rows added since training into their nearest lists."""
+        with self._lock:
+            if not self._pending or self._centroids is None:
+                return
+            rows = np.concatenate([np.arange(a, b) for a, b in self._pending])
+            labels = _nearest_centroid(self._vectors[rows], self._centroids)
+            lists = list(self._lists)
+            for c in np.unique(labels):
+                lists[c] = np.concatenate([lists[c], rows[labels == c]])
+            self._lists = lists
+            self._pending = []
+
+    def search(
+        self, probe: np.ndarray, probe_eye: float, k: int, nprobe: Optional[int] = None
+    ) -> List[Hit]:
+        with self._lock:
+            centroids, lists, pending = self._centroids, self._lists, list(self._pending)
+        if centroids is None:
+            return super().search(probe, probe_eye, k)
+
+        probe = np.asarray(probe, dtype=np.float32).reshape(1, 136)
+        nprobe = min(nprobe or self.nprobe, len(lists))
+        coarse = _centroid_distances(probe, centroids)[0]
+        probed = np.argpartition(coarse, nprobe - 1)[:nprobe]
+        parts = [lists[c] for c in probed]
+        parts.extend(np.arange(a, b) for a, b in pending)
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return self._score_rows(rows, probe[0], probe_eye, k)
+
+
+INDEX_KINDS = {cls.kind: cls for cls in (ExactIndex, IVFIndex)}
+
+
+def build_index(kind: Optional[str] = None) -> ExactIndex:
+    """Instantiate the gallery index configured in ``Settings.gallery_index``."""
+    kind = kind or settings.gallery_index
+    if kind not in INDEX_KINDS:
+        raise ValueError(
+            f"Unknown gallery index '{kind}' (expected one of {', '.join(INDEX_KINDS)})"
+        )
+    return INDEX_KINDS[kind]()
@@ -0,0 +1,140 @@
+import asyncio
+import math
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.utils import admission
+from app.utils.admission import DisconnectProbe, Priority
+from app.utils.executor import AnalysisExecutor, analysis_executor
+from app.utils.stage_timer import record_stages
+
+
+def run_batch(fn: Callable[[Any], Any], items: List[Any]) -> List[Tuple[bool, Any]]:
+    """Apply ``fn`` to every item inside one pool job.
+
+    Returns ``(ok, value)`` pairs so one failing image does not fail its
+    neighbours; ``value`` is the exception when ``ok`` is False. With metrics
+    enabled each item's stage timings are returned under ``"_stages"`` of a
+    dict result (or as ``stages`` on the exception).
+    """
+    results: List[Tuple[bool, Any]] = []
+    for item in items:
+        timings: Dict[str, float] = {}
+        try:
+            if settings.metrics_enabled:
+                with record_stages() as timings:
+                    value = fn(item)
+                if isinstance(value, dict):
+                    value["_stages"] = timings
+            else:
+                value = fn(item)
+            results.append((True, value))
+        except Exception as exc:  # noqa: BLE001 – returned to the caller
+            if timings:
+                exc.stages = timings
+            results.append((False, exc))
+    return results
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batched pool jobs.
+
+    Calls arriving within ``window_ms`` of each other (and for the same
+    function) are grouped, then split across the pool workers so one IPC
+    round trip carries several images. A batch is admitted at the most
+    urgent priority among its callers and leaves the queue only once all of
+    them have disconnected. Before ``start()`` every call goes straight to
+    the executor.
+    """
+
+    def __init__(self, executor: AnalysisExecutor):
+        self._executor = executor
+        self._window: Optional[float] = None
+        self._max_size = 1
+        self._pending: Dict[Callable, List[Tuple[Any, asyncio.Future, Tuple[Priority, Optional[DisconnectProbe]]]]] = {}
+        self._timers: Dict[Callable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def started(self) -> bool:
+        return self._window is not None
+
+    def start(
+        self, window_ms: Optional[float] = None, max_size: Optional[int] = None
+    ) -> None:
+        window_ms = settings.batch_window_ms if window_ms is None else window_ms
+        self._max_size = max(1, max_size or settings.batch_max_size)
+        self._window = window_ms / 1000.0 if window_ms > 0 else None
+
+    def stop(self) -> None:
+        for fn in list(self._pending):
+            self._flush(fn)
+        self._window = None
+
+    async def submit(self, fn: Callable[[Any], Any], item: Any) -> Any:
+        """Run ``fn(item)`` as part of the next batch and return its result."""
+        if self._window is None:
+            return await self._executor.run(fn, item)
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        pending = self._pending.setdefault(fn, [])
+        pending.append((item, fut, admission.current()))
+        if len(pending) >= self._max_size:
+            self._flush(fn)
+        elif fn not in self._timers:
+            self._timers[fn] = loop.call_later(self._window, self._flush, fn)
+        return await fut
+
+    def _flush(self, fn: Callable) -> None:
+        timer = self._timers.pop(fn, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(fn, [])
+        if not batch:
+            return
+
+        # Spread the batch over the workers so coalescing never idles cores
+        n_chunks = max(1, min(len(batch), self._executor.workers or 1))
+        size = math.ceil(len(batch) / n_chunks)
+        for start in range(0, len(batch), size):
+            task = asyncio.ensure_future(self._run(fn, batch[start : start + size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, fn: Callable, batch: List[Tuple[Any, asyncio.Future, Tuple[Priority, Optional[DisconnectProbe]]]]) -> None:
+        priority = min(p for _, _, (p, _) in batch)
+        probes = [probe for _, _, (_, probe) in batch]
+        try:
+            async with admission.prioritized(priority, _all_disconnected(probes)):
+                results = await self._executor.run(run_batch, fn, [item for item, _, _ in batch])
+        except Exception as exc:  # pool failure or refused – every caller sees it
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+
+        for (_, fut, _), (ok, value) in zip(batch, results):
+            if fut.done():  # caller went away
+                continue
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+
+def _all_disconnected(probes: List[Optional[DisconnectProbe]]) -> Optional[DisconnectProbe]:
+    """Probe that reports a batch gone once every caller's client is."""
+    if any(probe is None for probe in probes):
+        return None
+
+    async def probe() -> bool:
+        for one in probes:
+            if not await one():
+                return False
+        return True
+
+    return probe
+
+
+analysis_batcher = MicroBatcher(analysis_executor)
@@ -0,0 +1,376 @@
+import asyncio
+import json
+import os
+import tarfile
+import time
+import uuid
+import zipfile
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.profile_record import ProfileRecord
+from app.utils.admission import Overloaded, Priority, prioritized
+from app.utils.batcher import run_batch
+from app.utils.executor import AnalysisExecutor, analysis_executor
+from app.utils.face_analyzer import analyze_face, encode_chip
+from app.utils.image_header import sniff_image
+from app.utils.profile_store import PROFILE_ID_PATTERN, _BaseProfileStore
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# How ingested profiles are named: the file name without extension
+# ("photos/emp-0042.jpg" → "emp-0042") or a random UUID
+ID_MODES = ("stem", "uuid")
+
+# (name inside the source, image bytes or None, error if the file is skipped)
+SourceEntry = Tuple[str, Optional[bytes], Optional[str]]
+
+
+def _is_image(name: str) -> bool:
+    base = os.path.basename(name)
+    # Skip hidden files and macOS resource forks ("._IMG_1.jpg", "__MACOSX/...")
+    return not base.startswith(".") and "__MACOSX" not in name and base.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _too_large(size: int) -> Optional[str]:
+    limit = settings.upload_max_bytes
+    return f"File is {size} bytes; at most {limit} accepted" if limit and size > limit else None
+
+
+def iter_images(source: str) -> Iterator[SourceEntry]:
+    """Yield the images of a directory, zip or tar archive one at a time.
+
+    Only one image is held in memory at a time; tar archives (optionally
+    gzip/bz2/xz compressed) are read as a stream. Files over
+    ``Settings.upload_max_bytes`` are reported instead of read.
+
+    Raises:
+        ValueError: If ``source`` is none of those.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for fname in sorted(files):
+                path = os.path.join(root, fname)
+                name = os.path.relpath(path, source)
+                if not _is_image(name):
+                    continue
+                error = _too_large(os.path.getsize(path))
+                if error:
+                    yield name, None, error
+                    continue
+                with open(path, "rb") as fh:
+                    yield name, fh.read(), None
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_image(info.filename):
+                    continue
+                error = _too_large(info.file_size)
+                yield info.filename, None if error else archive.read(info), error
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, "r|*") as archive:
+            for member in archive:
+                if not member.isfile() or not _is_image(member.name):
+                    continue
+                error = _too_large(member.size)
+                yield member.name, None if error else archive.extractfile(member).read(), error
+    else:
+        raise ValueError(f"'{os.path.basename(source)}' is not a directory, zip or tar archive")
+
+
+def profile_id_for(name: str, mode: str) -> str:
+    """Profile id of a source file under ``mode`` (see ``ID_MODES``).
+
+    Raises:
+        ValueError: If the file name does not make a valid profile id.
+    """
+    if mode == "uuid":
+        return str(uuid.uuid4())
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if not PROFILE_ID_PATTERN.fullmatch(stem):
+        raise ValueError(f"File name '{stem}' is not a valid profile id (1-36 letters, digits or '._:-')")
+    return stem
+
+
+def analyze_for_ingest(content: bytes) -> Dict[str, Any]:
+    """``analyze_face`` for enrollment: checks the pixel limit, returns the chip as JPEG.
+
+    Runs in a pool worker; the JPEG is much cheaper to send back than the
+    chip array. Jitter crops are left to be generated on first use.
+    """
+    header = sniff_image(content)
+    limit = settings.image_max_megapixels
+    if limit and header is not None and header.megapixels > limit:
+        raise ValueError(f"Image is {header.width}x{header.height}; at most {limit:g} MP accepted")
+    data = analyze_face(content)
+    chip = data.pop("_chip", None)
+    data["aligned_face"] = encode_chip(chip) if chip is not None else None
+    return data
+
+
+class IngestJournal:
+    """Append-only JSON-lines record of every finished source file.
+
+    One line per file: ``{"file", "status", "id"}`` with status ``stored``,
+    ``exists`` (its id was already in the gallery) or ``failed`` (plus
+    ``error``). Lines are written only after the profiles they mention are
+    committed to the store, so the journal doubles as the resume point and
+    as the per-file error manifest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path) as fh:
+                for line in fh:
+                    try:
+                        self.done.add(json.loads(line)["file"])
+                    except (ValueError, KeyError):
+                        continue  # torn last line of an interrupted run
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def record(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        with open(self.path, "a") as fh:
+            fh.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.done.update(entry["file"] for entry in entries)
+
+
+class IngestProgress:
+    """Counters of one ingest run, reported by the CLI and the job endpoint."""
+
+    def __init__(self):
+        self.state = "running"
+        self.seen = 0
+        self.stored = 0
+        self.exists = 0
+        self.failed = 0
+        self.resumed = 0
+        self.error: Optional[str] = None
+        self._start = time.monotonic()
+        self.elapsed = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        if self.state == "running":
+            self.elapsed = time.monotonic() - self._start
+        analysed = self.stored + self.failed
+        return {
+            "state": self.state,
+            "seen": self.seen,
+            "stored": self.stored,
+            "exists": self.exists,
+            "failed": self.failed,
+            "resumed": self.resumed,
+            "elapsed_s": round(self.elapsed, 2),
+            "images_per_minute": round(analysed * 60 / self.elapsed, 1) if self.elapsed else 0.0,
+            "error": self.error,
+        }
+
+
+async def _analyze_chunk(executor: AnalysisExecutor, contents: List[bytes]) -> List[Tuple[bool, Any]]:
+    while True:
+        try:
+            return await executor.run(run_batch, analyze_for_ingest, contents)
+        except Overloaded as exc:  # interactive traffic has the pool: back off
+            await asyncio.sleep(exc.retry_after)
+
+
+async def ingest(
+    source: str,
+    store: _BaseProfileStore,
+    journal_path: str,
+    ids: str = "stem",
+    executor: AnalysisExecutor = analysis_executor,
+    progress: Optional[IngestProgress] = None,
+    on_progress: Optional[Callable[[IngestProgress], None]] = None,
+    batch_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> IngestProgress:
+    """Enroll every image of ``source`` into ``store``; resumable via ``journal_path``.
+
+    Images are read one chunk at a time, analysed in parallel pool jobs of
+    ``chunk_size`` images (at most two per worker in flight, at bulk
+    priority) and committed with ``store.add_many`` every ``batch_size``
+    results. Files already in the journal are skipped, so re-running an
+    interrupted ingest with the same journal picks up where it stopped.
+
+    Raises:
+        ValueError: Unknown ``ids`` mode or unreadable source.
+        RuntimeError: The landmark model is missing (nothing more can succeed).
+    """
+    if ids not in ID_MODES:
+        raise ValueError(f"Unknown id mode '{ids}' (expected one of {', '.join(ID_MODES)})")
+    batch_size = max(1, batch_size or settings.ingest_batch_size)
+    chunk_size = max(1, chunk_size or settings.ingest_chunk_size)
+    max_in_flight = 2 * max(1, executor.workers)
+    journal = IngestJournal(journal_path)
+    progress = progress or IngestProgress()
+    entries = iter_images(source)
+
+    claimed: Set[str] = set()
+    ready: List[Tuple[str, str, ProfileRecord]] = []  # analysed, not yet stored
+    finished: List[Dict[str, Any]] = []  # journal lines waiting for that commit
+    in_flight: Dict[asyncio.Future, List[Tuple[str, str]]] = {}  # job → its (file, id)s
+
+    def flush() -> None:
+        if ready:
+            items = [(pid, record) for _, pid, record in ready]
+            try:
+                store.add_many(items)
+                stored = ready
+            except ValueError:
+                # An id was taken meanwhile (another writer): isolate it
+                stored = []
+                for name, pid, record in ready:
+                    try:
+                        store.add(record, pid)
+                        stored.append((name, pid, record))
+                    except ValueError as exc:
+                        finished.append({"file": name, "status": "failed", "id": pid, "error": str(exc)})
+                        progress.failed += 1
+            finished.extend({"file": name, "status": "stored", "id": pid} for name, pid, _ in stored)
+            progress.stored += len(stored)
+            ready.clear()
+        journal.record(finished)
+        finished.clear()
+        if on_progress is not None:
+            on_progress(progress)
+
+    def fail(name: str, pid: Optional[str], error: str) -> None:
+        finished.append({"file": name, "status": "failed", "id": pid, "error": error})
+        progress.failed += 1
+
+    def collect(done: Set[asyncio.Future]) -> None:
+        for task in done:
+            for (name, pid), (ok, value) in zip(in_flight.pop(task), task.result()):
+                if not ok:
+                    if isinstance(value, RuntimeError):
+                        raise value
+                    fail(name, pid, str(value))
+                    continue
+                record = ProfileRecord.from_analysis(
+                    value, description=f"Ingested from {name}", aligned_face=value["aligned_face"]
+                )
+                ready.append((name, pid, record))
+        if len(ready) + len(finished) >= batch_size:
+            flush()
+
+    def next_chunk() -> List[SourceEntry]:
+        return [entry for _, entry in zip(range(chunk_size), entries)]
+
+    try:
+        # Background work: never ahead of interactive requests, never tied
+        # to the client connection that may have started it
+        async with prioritized(Priority.BULK):
+            while True:
+                chunk = await run_in_threadpool(next_chunk)
+                if not chunk:
+                    break
+                pending: List[Tuple[str, str]] = []
+                contents: List[bytes] = []
+                for name, data, error in chunk:
+                    progress.seen += 1
+                    if name in journal.done:
+                        progress.resumed += 1
+                        continue
+                    try:
+                        pid = profile_id_for(name, ids)
+                    except ValueError as exc:
+                        fail(name, None, str(exc))
+                        continue
+                    if error is not None:
+                        fail(name, pid, error)
+                    elif pid in claimed:
+                        fail(name, pid, f"Duplicate profile id '{pid}' in this source")
+                    elif pid in store:
+                        finished.append({"file": name, "status": "exists", "id": pid})
+                        progress.exists += 1
+                    else:
+                        claimed.add(pid)
+                        pending.append((name, pid))
+                        contents.append(data)
+                if contents:
+                    in_flight[asyncio.ensure_future(_analyze_chunk(executor, contents))] = pending
+                while len(in_flight) >= max_in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+        flush()
+        progress.state = "done"
+    except BaseException as exc:
+        for task in in_flight:
+            task.cancel()
+        try:
+            flush()  # keep what was already analysed
+        except Exception:
+            pass  # the original error is the one to report
+        progress.state = "failed"
+        progress.error = str(exc) or type(exc).__name__
+        raise
+    finally:
+        progress.elapsed = time.monotonic() - progress._start
+    return progress
+
+
+class IngestJob:
+    """A background ``ingest`` started by ``POST /v1/gallery/ingest``."""
+
+    def __init__(self, job_id: str, source: str, journal_path: str, cleanup: bool):
+        self.id = job_id
+        self.source = source
+        self.journal_path = journal_path
+        self.progress = IngestProgress()
+        self._cleanup = cleanup
+        self.task: Optional[asyncio.Task] = None
+
+    def status(self) -> Dict[str, Any]:
+        return {"job_id": self.id, **self.progress.as_dict()}
+
+    async def run(self, store: _BaseProfileStore, ids: str) -> None:
+        try:
+            await ingest(self.source, store, self.journal_path, ids=ids, progress=self.progress)
+        except Exception:
+            pass  # state and error are on self.progress
+        finally:
+            if self._cleanup:
+                os.unlink(self.source)
+
+
+# Jobs of this process by id (finished ones stay until the process exits)
+ingest_jobs: Dict[str, IngestJob] = {}
+
+
+def journal_path_for(job_id: str) -> str:
+    return os.path.join(settings.ingest_journal_dir, f"{job_id}.jsonl")
+
+
+def start_ingest_job(
+    source: str, store: _BaseProfileStore, ids: str = "stem", job_id: Optional[str] = None, cleanup: bool = False
+) -> IngestJob:
+    """Run ``ingest`` in the background; reusing a ``job_id`` resumes that job's journal.
+
+    Raises:
+        ValueError: Invalid job id, or a job with that id is still running.
+    """
+    if ids not in ID_MODES:
+        raise ValueError(f"Unknown id mode '{ids}' (expected one of {', '.join(ID_MODES)})")
+    job_id = job_id or uuid.uuid4().hex
+    if not PROFILE_ID_PATTERN.fullmatch(job_id):
+        raise ValueError(f"Invalid job id '{job_id}'")
+    running = ingest_jobs.get(job_id)
+    if running is not None and running.progress.state == "running":
+        raise ValueError(f"Ingest job '{job_id}' is still running")
+    job = IngestJob(job_id, source, journal_path_for(job_id), cleanup)
+    ingest_jobs[job_id] = job
+    job.task = asyncio.ensure_future(job.run(store, ids))
+    return job
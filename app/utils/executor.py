@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.utils import face_analyzer
+from app.utils.admission import AdmissionController
+from app.utils.metrics import metrics
+from app.utils.stage_timer import add_stages, record_stages
+
+BACKENDS = ("process", "thread")
+
+
+def _warm_worker() -> None:
+    """Pool initializer: load the landmark model once per worker and keep it.
+
+    A no-op when the worker was forked from a parent that already preloaded it.
+    """
+    try:
+        face_analyzer._load_predictor()
+    except RuntimeError:
+        # Missing model is reported per request (HTTP 500); keep the worker alive.
+        pass
+
+
+def _timed(call: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    """Run ``call`` in the worker and return its stage timings with the result.
+
+    On failure the timings ride along on the exception as ``stages``.
+    """
+    with record_stages() as timings:
+        try:
+            return call(), timings
+        except Exception as exc:
+            exc.stages = timings
+            raise
+
+
+def default_workers() -> int:
+    """Pool size when none is configured: this process's share of the cores.
+
+    Every web worker process runs its own pool and admission controller,
+    so each takes ``cores / web_concurrency`` workers (at least one) rather
+    than all cores, which would oversubscribe the CPU ``web_concurrency``
+    times over while admission control counted one slot per core.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, settings.web_concurrency))
+
+
+class AnalysisExecutor:
+    """Runs CPU-heavy analysis calls off the event loop.
+
+    The pool is created at application startup so every worker has the dlib
+    detector and shape predictor loaded before the first request arrives.
+    Until ``start()`` is called (e.g. in unit tests or scripts) calls fall back
+    to Starlette's shared thread pool.
+
+    Calls reach the pool through an ``AdmissionController``: at most
+    ``queue_size`` jobs are in the pool, the rest queue by the calling
+    request's priority and are refused with 503 once the queue is full.
+    """
+
+    def __init__(self):
+        self._pool: Optional[Executor] = None
+        self.admission: Optional[AdmissionController] = None
+        self.backend: Optional[str] = None
+        self.workers = 0
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def start(
+        self,
+        backend: Optional[str] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ) -> None:
+        if self._pool is not None:
+            return
+
+        backend = backend or settings.analysis_backend
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown analysis backend '{backend}' (expected one of {', '.join(BACKENDS)})"
+            )
+        workers = workers or settings.analysis_workers or default_workers()
+        queue_size = queue_size or settings.analysis_queue_size
+
+        if backend == "process":
+            # Fork explicitly (not the platform default): workers then share
+            # the model already loaded by the parent copy-on-write
+            context = (
+                multiprocessing.get_context("fork")
+                if "fork" in multiprocessing.get_all_start_methods()
+                else None
+            )
+            pool: Executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=context, initializer=_warm_worker
+            )
+        else:
+            pool = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="analysis",
+                initializer=_warm_worker,
+            )
+
+        # Spin every worker up now so the model load is not paid by a caller
+        for fut in [pool.submit(os.getpid) for _ in range(workers)]:
+            fut.result()
+
+        self._pool = pool
+        self.admission = AdmissionController(max(queue_size, workers))
+        self.backend = backend
+        self.workers = workers
+
+    def shutdown(self) -> None:
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        self.admission = None
+        self.backend = None
+        self.workers = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Execute ``fn(*args, **kwargs)`` in the pool and await its result.
+
+        With the process backend ``fn`` and its arguments must be picklable
+        (module-level functions such as ``analyze_face`` are).
+        """
+        call = functools.partial(fn, *args, **kwargs)
+        if not settings.metrics_enabled:
+            return await self._submit(call)
+
+        try:
+            value, timings = await self._submit(functools.partial(_timed, call))
+        except Exception as exc:
+            add_stages(getattr(exc, "stages", {}))
+            raise
+        add_stages(timings)
+        return value
+
+    async def _submit(self, call: Callable[[], Any]) -> Any:
+        if self._pool is None:
+            return await run_in_threadpool(call)
+
+        async with self.admission.slot():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, call)
+
+
+analysis_executor = AnalysisExecutor()
+
+metrics.register(
+    "validia_admission_active", "gauge", "Analysis jobs currently in the pool.",
+    lambda: analysis_executor.admission.active if analysis_executor.admission else 0,
+)
+metrics.register(
+    "validia_admission_queue_depth", "gauge", "Analysis calls waiting for a pool slot.",
+    lambda: analysis_executor.admission.waiting if analysis_executor.admission else 0,
+)
@@ -1,9 +1,13 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import dlib
 import numpy as np
-import base64
+
+from app.core.config import settings
+from app.utils.head_pose import estimate_poses
+from app.utils.image_header import sniff_image
+from app.utils.stage_timer import stage
 
 # Initialize dlib's detector and predictor only once (lazy load predictor because model file is large)
 _detector = dlib.get_frontal_face_detector()
@@ -18,6 +22,18 @@ BRIGHTNESS_MAX = 200
 LAPLACIAN_VAR_MIN = 100.0
 
 
+class QualityGateError(ValueError):
+    """Image rejected by the quality gate; ``reason`` is a short metrics label."""
+
+    def __init__(self, message: str, reason: str = "other"):
+        super().__init__(message)
+        self.reason = reason
+
+
+class NoFaceError(ValueError):
+    """No face was found in an otherwise acceptable image."""
+
+
 def _load_predictor() -> dlib.shape_predictor:
     """Load the shape predictor lazily to avoid startup overhead."""
     global _predictor
@@ -32,67 +48,419 @@ def _load_predictor() -> dlib.shape_predictor:
     return _predictor
 
 
-def analyze_face(image_bytes: bytes) -> Dict[str, any]:
-    """Analyze a face in the given image bytes and return simple metrics.
+def _scale_rect(rect: dlib.rectangle, factor: float) -> dlib.rectangle:
+    return dlib.rectangle(
+        int(round(rect.left() * factor)),
+        int(round(rect.top() * factor)),
+        int(round(rect.right() * factor)),
+        int(round(rect.bottom() * factor)),
+    )
 
-    Raises:
-        ValueError: If no face is detected.
-        RuntimeError: If the predictor model cannot be loaded.
+
+def _detect_faces(gray: np.ndarray) -> dlib.rectangles:
+    """Run the HOG detector at a resolution sized for speed.
+
+    Large images are downscaled so their longest side is ``detect_max_side``
+    (faces in phone photos stay well above the detector's ~80 px window) and
+    the rectangles are mapped back to full resolution. Only images smaller
+    than ``detect_upsample_below`` are upsampled up front; otherwise the
+    upsampled pass is a fallback for when the fast pass finds nothing.
     """
-    # Convert bytes to numpy array & decode image first
-    np_arr = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-    if img is None:
-        raise ValueError("Provided bytes do not represent a valid image")
+    h, w = gray.shape[:2]
+    longest = max(h, w)
+    max_side = settings.detect_max_side
 
-    # Image quality gate — brightness & sharpness heuristics
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    scale = 1.0
+    img = gray
+    if max_side and longest > max_side:
+        scale = max_side / longest
+        img = cv2.resize(
+            gray,
+            (max(1, round(w * scale)), max(1, round(h * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    upsample = settings.detect_upsample if longest < settings.detect_upsample_below else 0
+    rects = _detector(img, upsample)
+    if not rects and upsample == 0 and settings.detect_upsample:
+        # Small faces fall below the HOG window at reduced scale
+        rects = _detector(img, settings.detect_upsample)
+
+    if scale == 1.0:
+        return rects
+    full_res = dlib.rectangles()
+    for rect in rects:
+        full_res.append(_scale_rect(rect, 1.0 / scale))
+    return full_res
+
+
+# cv2.imread flags for DCT-scaled (JPEG) / resized (other formats) grayscale decode
+_REDUCED_GRAY_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Colour counterparts used when a huge image is decoded at reduced size
+_REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Extra context kept around the detected face when cropping for landmarks/chip
+_FACE_ROI_MARGIN = 0.5
+
+
+def _probe_dimensions(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from the image header without decoding pixels."""
+    header = sniff_image(image_bytes)
+    return (header.width, header.height) if header else None
+
+
+def _reduction_factor(size: Optional[Tuple[int, int]]) -> int:
+    """Largest decode reduction that keeps the image at least detection-sized."""
+    if size is None or not settings.detect_max_side:
+        return 1
+    longest = max(size)
+    for factor in (8, 4, 2):
+        if longest // factor >= settings.detect_max_side:
+            return factor
+    return 1
 
+
+def _full_decode_factor(size: Optional[Tuple[int, int]]) -> int:
+    """Smallest decode reduction keeping the colour image within the megapixel budget."""
+    budget = settings.image_decode_max_megapixels * 1e6
+    if size is None or budget <= 0:
+        return 1
+    for factor in (1, 2, 4):
+        if size[0] * size[1] / (factor * factor) <= budget:
+            return factor
+    return 8
+
+
+def _check_brightness(gray: np.ndarray) -> None:
+    """Reject too dark/bright images (raises ValueError)."""
     brightness = float(np.mean(gray))
     if brightness < BRIGHTNESS_MIN or brightness > BRIGHTNESS_MAX:
-        raise ValueError(
-            f"Image brightness {brightness:.1f} outside acceptable range {BRIGHTNESS_MIN}-{BRIGHTNESS_MAX}."
+        raise QualityGateError(
+            f"Image brightness {brightness:.1f} outside acceptable range {BRIGHTNESS_MIN}-{BRIGHTNESS_MAX}.",
+            reason="too_dark" if brightness < BRIGHTNESS_MIN else "too_bright",
         )
 
-    lap_var = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+def _laplacian_variance(gray: np.ndarray) -> float:
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def _check_sharpness(gray: np.ndarray, lap_var: Optional[float] = None) -> None:
+    """Reject blurry images (raises ValueError)."""
+    lap_var = _laplacian_variance(gray) if lap_var is None else lap_var
     if lap_var < LAPLACIAN_VAR_MIN:
-        raise ValueError(
-            f"Image too blurry (variance of Laplacian {lap_var:.1f} < {LAPLACIAN_VAR_MIN})."
+        raise QualityGateError(
+            f"Image too blurry (variance of Laplacian {lap_var:.1f} < {LAPLACIAN_VAR_MIN}).",
+            reason="blurry",
         )
 
+
+def _reduced_sharpness_is_conclusive(lap_var: float, factor: int) -> bool:
+    """Whether a 1/``factor`` decode's Laplacian variance settles the sharpness gate.
+
+    ``LAPLACIAN_VAR_MIN`` is calibrated on full-resolution pixels, and a
+    reduced decode shrinks blur along with the image: its variance is at
+    most ``factor**4`` times the full-resolution one, and only falls below
+    it for noise-like images scoring far above the threshold. So an image
+    blurry even at reduced size is blurry, one still sharp after dividing
+    by ``factor**4`` is sharp, and only scores in between need the
+    full-resolution pixels.
+    """
+    return lap_var < LAPLACIAN_VAR_MIN or lap_var / factor**4 >= LAPLACIAN_VAR_MIN
+
+
+def _quality_gate(gray: np.ndarray) -> None:
+    """Reject too dark/bright or blurry images (raises ValueError)."""
+    _check_brightness(gray)
+    _check_sharpness(gray)
+
+
+def _face_roi(rect: dlib.rectangle, shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+    """Return an (x0, y0, x1, y1) crop around ``rect`` covering the chip's padding."""
+    h, w = shape[:2]
+    mx = int(rect.width() * _FACE_ROI_MARGIN)
+    my = int(rect.height() * _FACE_ROI_MARGIN)
+    return (
+        max(0, rect.left() - mx),
+        max(0, rect.top() - my),
+        min(w, rect.right() + mx + 1),
+        min(h, rect.bottom() + my + 1),
+    )
+
+
+# A face region cut from the colour image: (BGR crop, face box inside the
+# crop as (left, top, right, bottom), crop origin (x0, y0), factor mapping
+# the decoded image's coordinates to the original's, original image
+# (width, height) for the head-pose camera model)
+FaceCrop = Tuple[np.ndarray, Tuple[int, int, int, int], Tuple[int, int], float, Tuple[int, int]]
+
+
+def _decode_and_detect(image_bytes: bytes) -> Tuple[np.ndarray, dlib.rectangles, float]:
+    """Decode once, gate and detect; return the colour image, its face boxes
+    and the factor from its coordinates to the original image's.
+
+    The quality gate and face detection run on a reduced grayscale decode,
+    so dark, bright, clearly blurry and faceless uploads are rejected
+    before the colour decode, which is itself reduced for images above
+    ``Settings.image_decode_max_megapixels``. Sharpness that the reduced
+    decode cannot settle (see ``_reduced_sharpness_is_conclusive``) is
+    checked on the colour decode.
+    """
+    # Zero-copy view: image_bytes may be bytes, bytearray or memoryview
+    np_arr = np.frombuffer(image_bytes, np.uint8)
+
+    # Cheap reduced grayscale decode for the quality gate and detection
+    with stage("decode"):
+        size = _probe_dimensions(image_bytes)
+        factor = _reduction_factor(size)
+        if factor == 1:
+            img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError("Provided bytes do not represent a valid image")
+            gray_small = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        else:
+            img = None
+            gray_small = cv2.imdecode(np_arr, _REDUCED_GRAY_FLAGS[factor])
+            if gray_small is None:
+                raise ValueError("Provided bytes do not represent a valid image")
+
+    # Image quality gate — brightness & sharpness heuristics
+    with stage("quality_gate"):
+        _check_brightness(gray_small)
+        lap_var = _laplacian_variance(gray_small)
+        if _reduced_sharpness_is_conclusive(lap_var, factor):
+            _check_sharpness(gray_small, lap_var)
+            lap_var = None
+
     # Ensure landmark predictor can be loaded (raises RuntimeError if missing)
-    predictor = _load_predictor()
+    with stage("model_load"):
+        _load_predictor()
 
     # Detect faces
-    rects = _detector(gray, 1)
+    with stage("detect"):
+        rects = _detect_faces(gray_small)
     if not rects:
-        raise ValueError("No face detected in the image")
+        raise NoFaceError("No face detected in the image")
+
+    # Colour pixels (full resolution unless over the decode budget)
+    scale = 1.0
+    if img is None:
+        with stage("decode_full"):
+            img = cv2.imdecode(np_arr, _REDUCED_COLOR_FLAGS[_full_decode_factor(size)])
+        if img is None:
+            raise ValueError("Provided bytes do not represent a valid image")
+        if lap_var is not None:
+            with stage("quality_gate"):
+                _check_sharpness(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+        # Longest sides, as EXIF rotation may have swapped width and height
+        if size is not None and max(size) != max(img.shape[:2]):
+            scale = max(size) / max(img.shape[:2])
 
-    # Use the first detected face
-    rect = rects[0]
-    shape = predictor(gray, rect)
-    landmarks: List[Tuple[int, int]] = [(pt.x, pt.y) for pt in shape.parts()]
+    factor = img.shape[1] / gray_small.shape[1]
+    if factor != 1.0:
+        scaled = dlib.rectangles()
+        for rect in rects:
+            scaled.append(_scale_rect(rect, factor))
+        rects = scaled
+    return img, rects, scale
+
+
+def _face_crop(img: np.ndarray, rect: dlib.rectangle, scale: float = 1.0) -> FaceCrop:
+    """Cut the region landmarks and chip extraction need out of ``img``."""
+    x0, y0, x1, y1 = _face_roi(rect, img.shape)
+    face_img = np.ascontiguousarray(img[y0:y1, x0:x1])
+    box = (rect.left() - x0, rect.top() - y0, rect.right() - x0, rect.bottom() - y0)
+    image_size = (int(round(img.shape[1] * scale)), int(round(img.shape[0] * scale)))
+    return face_img, box, (x0, y0), scale, image_size
+
+
+def profile_face(
+    face_img: np.ndarray,
+    box: Tuple[int, int, int, int],
+    origin: Tuple[int, int],
+    scale: float = 1.0,
+    image_size: Optional[Tuple[int, int]] = None,
+    with_pose: bool = True,
+) -> Dict[str, any]:
+    """Landmarks, metrics and aligned chip of one face crop (see ``FaceCrop``).
+
+    Landmarks are reported in the original image's pixel coordinates. Head
+    pose (``yaw``, ``pitch``, ``roll`` in degrees, see ``head_pose``) assumes
+    a camera centred on ``image_size``, by default the crop's extent; with
+    ``with_pose=False`` it is left for the caller to fill in.
+    """
+    predictor = _load_predictor()
+    x0, y0 = origin
+    with stage("landmarks"):
+        face_gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
+        shape = predictor(face_gray, dlib.rectangle(*box))
+        if scale == 1.0:
+            landmarks: List[Tuple[int, int]] = [(pt.x + x0, pt.y + y0) for pt in shape.parts()]
+        else:
+            landmarks = [
+                (int(round((pt.x + x0) * scale)), int(round((pt.y + y0) * scale))) for pt in shape.parts()
+            ]
 
     # Example metric: eye distance between outer eye corners
     left_eye = landmarks[36]  # landmark 37 in 1-indexed spec
     right_eye = landmarks[45]  # landmark 46
     eye_distance = float(np.linalg.norm(np.subtract(left_eye, right_eye)))
 
-    # Placeholder values for yaw (head pose) until implemented
-    yaw = 0.0
+    # Aligned 150×150 face chip; JPEG encoding is left to callers that need it
+    with stage("chip"):
+        chip_img = dlib.get_face_chip(face_img, shape, size=150)
 
-    # Aligned 150×150 face chip
-    chip_img = dlib.get_face_chip(img, shape, size=150)
-    # Encode chip to JPEG base64
-    success, buf = cv2.imencode(".jpg", chip_img)
-    if not success:
-        raise RuntimeError("Failed to encode aligned face chip")
-    aligned_face_b64 = base64.b64encode(buf.tobytes()).decode("ascii")
-
-    return {
+    data = {
         "landmarks": landmarks,
         "eye_distance": eye_distance,
-        "yaw": yaw,
-        "aligned_face": aligned_face_b64,
         "_chip": chip_img,  # internal use (not serialised in API)
     }
+    if with_pose:
+        if image_size is None:
+            h, w = face_img.shape[:2]
+            image_size = (int(round((x0 + w) * scale)), int(round((y0 + h) * scale)))
+        _set_poses([data], [image_size])
+    return data
+
+
+def _set_poses(faces: List[Dict[str, any]], image_sizes: List[Tuple[int, int]]) -> None:
+    """Fill in ``yaw``/``pitch``/``roll`` of several faces with one batched solve."""
+    with stage("pose"):
+        poses = estimate_poses(np.array([f["landmarks"] for f in faces]), image_sizes)
+    for face, (yaw, pitch, roll) in zip(faces, poses.tolist()):
+        face.update(yaw=yaw, pitch=pitch, roll=roll)
+
+
+def check_pose(face: Dict[str, any]) -> None:
+    """Reject a face turned too far for landmark identification.
+
+    A cheap pre-filter for the identification endpoints: beyond
+    ``Settings.pose_max_yaw`` / ``pose_max_pitch`` degrees (0 = no limit)
+    half the landmarks are guessed rather than seen, so searching the
+    gallery with them is wasted work.
+
+    Raises:
+        QualityGateError: With reason ``"pose"``.
+    """
+    for angle, limit in (("yaw", settings.pose_max_yaw), ("pitch", settings.pose_max_pitch)):
+        if limit and abs(face[angle]) > limit:
+            raise QualityGateError(
+                f"Head {angle} {face[angle]:.1f}° exceeds the ±{limit:g}° limit for identification.",
+                reason="pose",
+            )
+
+
+def analyze_face(image_bytes: bytes) -> Dict[str, any]:
+    """Analyze a face in the given image bytes and return simple metrics.
+
+    The quality gate and face detection run on a reduced grayscale decode,
+    so only images with a face pay for the full-resolution colour decode,
+    and landmarks/chip extraction work on the face region only. Only the
+    first detected face is used; see ``analyze_faces`` for group photos.
+
+    Raises:
+        ValueError: If no face is detected.
+        RuntimeError: If the predictor model cannot be loaded.
+    """
+    img, rects, scale = _decode_and_detect(image_bytes)
+    return profile_face(*_face_crop(img, rects[0], scale))
+
+
+def detect_face_crops(image_bytes: bytes, max_faces: Optional[int] = None) -> Tuple[List[FaceCrop], int]:
+    """One decode and one detection pass for every face in the image.
+
+    Returns the crops of the ``max_faces`` largest faces (largest first) and
+    the number of faces detected. Crops are small, so they can be shipped to
+    other pool workers for ``profile_faces``.
+    """
+    img, rects, scale = _decode_and_detect(image_bytes)
+    ordered = sorted(rects, key=lambda r: r.area(), reverse=True)
+    limit = max_faces or settings.max_faces or len(ordered)
+    return [_face_crop(img, rect, scale) for rect in ordered[:limit]], len(ordered)
+
+
+CHIP_FORMATS = ("raw", "jpeg", None)
+
+
+def profile_faces(crops: List[FaceCrop], chip_format: Optional[str] = "raw") -> List[Dict[str, any]]:
+    """``profile_face`` for several crops, with each face's box in image coordinates.
+
+    Head poses of all crops are estimated in one batched call.
+
+    ``chip_format`` selects what is returned for the aligned chip: the raw
+    array (``_chip``), JPEG bytes encoded right here (``aligned_face``), or
+    nothing, so unneeded pixels never cross the process boundary.
+    """
+    if chip_format not in CHIP_FORMATS:
+        raise ValueError(f"Unknown chip format '{chip_format}'")
+    faces = []
+    for face_img, box, origin, scale, _ in crops:
+        data = profile_face(face_img, box, origin, scale, with_pose=False)
+        x0, y0 = origin
+        data["box"] = tuple(int(round((v + o) * scale)) for v, o in zip(box, (x0, y0, x0, y0)))
+        if chip_format != "raw":
+            chip = data.pop("_chip")
+            if chip_format == "jpeg":
+                data["aligned_face"] = encode_chip(chip)
+        faces.append(data)
+    if faces:
+        _set_poses(faces, [crop[4] for crop in crops])
+    return faces
+
+
+def analyze_faces(image_bytes: bytes, max_faces: Optional[int] = None) -> List[Dict[str, any]]:
+    """Profile every detected face (up to ``max_faces``, largest first) in one process."""
+    crops, _ = detect_face_crops(image_bytes, max_faces)
+    return profile_faces(crops)
+
+
+def encode_chip(chip_img: np.ndarray) -> bytes:
+    """JPEG-encode an aligned face chip (raw bytes, no base-64)."""
+    with stage("encode_chip"):
+        success, buf = cv2.imencode(".jpg", chip_img)
+    if not success:
+        raise RuntimeError("Failed to encode aligned face chip")
+    return buf.tobytes()
+
+
+def decode_chip(jpeg: bytes) -> np.ndarray:
+    """Inverse of ``encode_chip`` (used to derive jitters from a stored chip)."""
+    img = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Stored chip is not a valid JPEG")
+    return img
+
+
+def generate_jitter_faces(chip_img: np.ndarray, count: int = 5) -> Optional[List[bytes]]:
+    """Return ``count`` randomly jittered copies of an aligned chip as raw JPEG bytes.
+
+    Augmentation is best-effort: any failure yields ``None`` instead of an error.
+    """
+    try:
+        with stage("jitter"):
+            jitters = dlib.jitter_image(chip_img, count)
+            encoded = []
+            for j in jitters:
+                ok, buf = cv2.imencode(".jpg", j)
+                if ok:
+                    encoded.append(buf.tobytes())
+        return encoded or None
+    except Exception:
+        # Swallow any augmentation errors; continue without
+        return None
+
+
+def generate_jitter_faces_from_jpeg(chip_jpeg: bytes, count: int = 5) -> Optional[List[bytes]]:
+    """``generate_jitter_faces`` for a stored (JPEG-encoded) chip."""
+    return generate_jitter_faces(decode_chip(chip_jpeg), count)
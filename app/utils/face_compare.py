@@ -1,8 +1,17 @@
+from typing import Union
+
 import numpy as np
 from app.models.profile import Profile
+from app.models.profile_record import ProfileRecord
+from app.utils.stage_timer import stage
+
+ProfileLike = Union[Profile, ProfileRecord]
+
+# Rows scored per step in landmark_distances (keeps scratch buffers in cache)
+_BLOCK_ROWS = 1024
 
 
-def compare_profiles(p1: Profile, p2: Profile) -> float:
+def compare_profiles(p1: ProfileLike, p2: ProfileLike) -> float:
     """Compute a naive similarity score between two profiles (0 identical, higher worse).
 
     We align landmarks lists and calculate mean Euclidean distance, normalized by eye-distance.
@@ -10,9 +19,59 @@ def compare_profiles(p1: Profile, p2: Profile) -> float:
     if len(p1.landmarks) != 68 or len(p2.landmarks) != 68:
         raise ValueError("Profiles must have 68 landmarks each")
 
-    arr1 = np.array(p1.landmarks, dtype=float)
-    arr2 = np.array(p2.landmarks, dtype=float)
+    with stage("compare"):
+        arr1 = np.array(p1.landmarks, dtype=float)
+        arr2 = np.array(p2.landmarks, dtype=float)
+
+        raw_dist = np.linalg.norm(arr1 - arr2, axis=1).mean()
+        norm_factor = (p1.eye_distance + p2.eye_distance) / 2.0 or 1.0
+        return raw_dist / norm_factor
+
+
+def landmark_distances(
+    gallery: np.ndarray,
+    gallery_eye: np.ndarray,
+    probe: np.ndarray,
+    probe_eye: float,
+) -> np.ndarray:
+    """Vectorised ``compare_profiles`` of one probe against a whole gallery.
+
+    Args:
+        gallery: (N, 136) matrix of flattened (x, y) landmarks (float32, or
+            any numeric dtype such as the mmap stores' int32 column).
+        gallery_eye: (N,) eye distances of the gallery rows.
+        probe: 136 flattened probe landmarks.
+        probe_eye: probe eye distance.
+
+    Returns: (N,) float32 distances, identical in meaning to ``compare_profiles``.
+    """
+    n = gallery.shape[0]
+    out = np.empty(n, dtype=np.float32)
+    if n == 0:
+        return out
+
+    probe = np.asarray(probe, dtype=np.float32).reshape(136)
+    weights = np.full(68, 1.0 / 68, dtype=np.float32)
+    block = min(n, _BLOCK_ROWS)
+    diff = np.empty((block, 136), dtype=np.float32)
+    point_dist = np.empty((block, 68), dtype=np.float32)
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        d = diff[: stop - start]
+        p = point_dist[: stop - start]
+        if gallery.dtype == np.float32:
+            np.subtract(gallery[start:stop], probe, out=d)
+        else:
+            # e.g. int32 rows mapped straight from disk: casting into the
+            # scratch block first is much faster than a mixed-type subtract
+            np.copyto(d, gallery[start:stop], casting="unsafe")
+            np.subtract(d, probe, out=d)
+        np.square(d, out=d)
+        np.add(d[:, 0::2], d[:, 1::2], out=p)
+        np.sqrt(p, out=p)
+        np.dot(p, weights, out=out[start:stop])
 
-    raw_dist = np.linalg.norm(arr1 - arr2, axis=1).mean()
-    norm_factor = (p1.eye_distance + p2.eye_distance) / 2.0 or 1.0
-    return raw_dist / norm_factor
+    norm = (gallery_eye + np.float32(probe_eye)) / np.float32(2.0)
+    norm[norm == 0] = 1.0
+    out /= norm
+    return out
@@ -0,0 +1,389 @@
+import asyncio
+import math
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.utils.admission import Overloaded, Priority, prioritized
+from app.utils.executor import AnalysisExecutor, analysis_executor
+from app.utils.profile_store import PROFILE_ID_PATTERN, _BaseProfileStore
+
+# iBUG 68-point regions (jaw, brows, nose, eyes, mouth). The mean offset
+# between two faces' regions bounds their mean point distance from below, so
+# most pairs of a tile are rejected on 14 numbers instead of 136
+_REGIONS = ((0, 17), (17, 22), (22, 27), (27, 36), (36, 42), (42, 48), (48, 68))
+_REGION_WEIGHTS = np.array([(b - a) / 68 for a, b in _REGIONS], dtype=np.float32)
+
+# Lower bounds are computed in float32; keep a pair unless it is clearly out
+_BOUND_SLACK = 1.001
+
+# Exact distances are computed for this many candidate pairs at a time
+_EXACT_ROWS = 8192
+
+# Pair evaluations (tile rows x tile columns) per pool job
+_JOB_PAIRS = 1 << 24
+
+Tile = Tuple[int, int, int, int]  # rows [a0, a1) against rows [b0, b1)
+PairArrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def region_centroids(vectors: np.ndarray) -> np.ndarray:
+    """(N, 14) float32 centroids of the seven landmark regions of each row."""
+    points = np.asarray(vectors, dtype=np.float32).reshape(-1, 68, 2)
+    return np.concatenate([points[:, a:b].mean(axis=1) for a, b in _REGIONS], axis=1)
+
+
+def _pair_norm(eye_a: np.ndarray, eye_b: np.ndarray) -> np.ndarray:
+    """``landmark_distances``' normaliser: mean eye distance, 1 when both are 0."""
+    norm = (eye_a + eye_b) / np.float32(2.0)
+    norm[norm == 0] = 1.0
+    return norm
+
+
+def pair_distances(vectors: np.ndarray, eye: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """``compare_profiles`` distance of each row pair ``(a[k], b[k])``."""
+    out = np.empty(len(a), dtype=np.float32)
+    for start in range(0, len(a), _EXACT_ROWS):
+        stop = min(len(a), start + _EXACT_ROWS)
+        d = vectors[a[start:stop]] - vectors[b[start:stop]]
+        np.square(d, out=d)
+        p = d[:, 0::2] + d[:, 1::2]
+        np.sqrt(p, out=p)
+        out[start:stop] = p.mean(axis=1)
+    return out / _pair_norm(eye[a], eye[b])
+
+
+def tile_pairs(
+    vectors: np.ndarray, eye: np.ndarray, regions: np.ndarray, tile: Tile, threshold: float
+) -> PairArrays:
+    """Pairs ``(i, j, distance)`` of one tile with distance <= ``threshold``.
+
+    A tile whose row ranges overlap is part of the diagonal: only ``j > i``
+    is reported there, so each pair comes out once.
+    """
+    a0, a1, b0, b1 = tile
+    ra, rb = regions[a0:a1], regions[b0:b1]
+    bound = np.zeros((a1 - a0, b1 - b0), dtype=np.float32)
+    for g, weight in enumerate(_REGION_WEIGHTS):
+        offset = np.hypot(ra[:, 2 * g, None] - rb[None, :, 2 * g], ra[:, 2 * g + 1, None] - rb[None, :, 2 * g + 1])
+        offset *= weight
+        bound += offset
+    limit = _pair_norm(eye[a0:a1, None], eye[None, b0:b1])
+    limit *= np.float32(threshold * _BOUND_SLACK)
+    mask = bound <= limit
+    if b0 < a1 and a0 < b1:
+        mask &= np.arange(b0, b1)[None, :] > np.arange(a0, a1)[:, None]
+    i, j = np.nonzero(mask)
+    i += a0
+    j += b0
+    dist = pair_distances(vectors, eye, i, j)
+    keep = dist <= threshold
+    return i[keep], j[keep], dist[keep]
+
+
+def plan_tiles(regions: np.ndarray, eye: np.ndarray, threshold: float, tile_rows: int) -> Tuple[np.ndarray, List[Tile]]:
+    """Sort rows so near-duplicates are close together and list the tiles to score.
+
+    Two profiles within ``threshold`` have face centroids within ``radius``
+    (threshold times the largest pair normaliser) of each other. Rows are
+    sorted into vertical strips ``radius`` wide, by centroid ``y`` inside a
+    strip, so a block of rows only has to be scored against the ``y`` window
+    of its own strip and of the next one; everything else is skipped unseen.
+
+    Returns: the row order and the ``(a0, a1, b0, b1)`` tiles in that order,
+    each at most ``tile_rows`` by ``tile_rows``.
+    """
+    n = len(eye)
+    if n < 2:
+        return np.arange(n), []
+    weights = np.repeat(_REGION_WEIGHTS, 2)
+    centroid = (regions * weights).reshape(n, 7, 2).sum(axis=1)
+    largest = float(eye.max())
+    if (eye == 0).any():
+        largest = max(largest, 1.0)
+    radius = threshold * largest * _BOUND_SLACK
+    width = radius if radius > 0 else 1.0
+
+    strip = np.floor(centroid[:, 0] / width).astype(np.int64)
+    order = np.lexsort((centroid[:, 1], strip))
+    strip, y = strip[order], centroid[order, 1]
+    keys, starts = np.unique(strip, return_index=True)
+    ends = np.append(starts[1:], n)
+
+    tiles: List[Tile] = []
+
+    def add(a0: int, a1: int, b0: int, b1: int) -> None:
+        for b in range(b0, b1, tile_rows):
+            tiles.append((a0, a1, b, min(b1, b + tile_rows)))
+
+    for s, (key, s0, s1) in enumerate(zip(keys, starts, ends)):
+        following = s + 1 < len(keys) and keys[s + 1] == key + 1
+        for a0 in range(s0, s1, tile_rows):
+            a1 = min(s1, a0 + tile_rows)
+            low, high = y[a0] - radius, y[a1 - 1] + radius
+            add(a0, a1, a0, s0 + int(np.searchsorted(y[s0:s1], high, side="right")))
+            if following:
+                t0, t1 = starts[s + 1], ends[s + 1]
+                add(
+                    a0,
+                    a1,
+                    t0 + int(np.searchsorted(y[t0:t1], low, side="left")),
+                    t0 + int(np.searchsorted(y[t0:t1], high, side="right")),
+                )
+    return order, [t for t in tiles if t[3] > t[2]]
+
+
+@lru_cache(maxsize=2)
+def _open_snapshot(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return tuple(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ("vectors", "eye", "regions"))
+
+
+def score_tiles(snapshot: str, tiles: Sequence[Tile], threshold: float) -> PairArrays:
+    """Pool job: the duplicate pairs of ``tiles`` of the gallery saved at ``snapshot``.
+
+    The gallery is memory-mapped from disk rather than pickled per job, so
+    every worker reads the same pages.
+    """
+    vectors, eye, regions = _open_snapshot(snapshot)
+    found = [tile_pairs(vectors, eye, regions, tile, threshold) for tile in tiles]
+    if not found:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+    return tuple(np.concatenate(parts) for parts in zip(*found))
+
+
+def cluster_pairs(ids: Sequence[str], i: np.ndarray, j: np.ndarray, dist: np.ndarray) -> List[Dict[str, Any]]:
+    """Group duplicate pairs into connected clusters of profile ids.
+
+    Clusters are single-linkage: ``a~b`` and ``b~c`` put ``a`` and ``c`` in
+    one cluster even if they are further apart. Largest clusters first.
+    """
+    parent: Dict[int, int] = {}
+
+    def root(x: int) -> int:
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(i.tolist(), j.tolist()):
+        ra, rb = root(a), root(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    members: Dict[int, List[int]] = {}
+    for x in parent:
+        members.setdefault(root(x), []).append(x)
+    pairs: Dict[int, List[Dict[str, Any]]] = {r: [] for r in members}
+    for k in np.argsort(dist, kind="stable").tolist():
+        a, b = int(i[k]), int(j[k])
+        pairs[root(a)].append({"a": ids[a], "b": ids[b], "distance": round(float(dist[k]), 6)})
+    clusters = [
+        {"ids": sorted(ids[x] for x in rows), "pairs": pairs[r]} for r, rows in members.items()
+    ]
+    clusters.sort(key=lambda c: (-len(c["ids"]), c["pairs"][0]["distance"], c["ids"][0]))
+    return clusters
+
+
+class DedupProgress:
+    """Counters of one duplicate scan, reported by the job endpoint."""
+
+    def __init__(self, threshold: float):
+        self.state = "running"
+        self.threshold = threshold
+        self.profiles = 0
+        self.work_total = 0
+        self.work_done = 0
+        self.pairs = 0
+        self.error: Optional[str] = None
+        self._start = time.monotonic()
+        self.elapsed = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        if self.state == "running":
+            self.elapsed = time.monotonic() - self._start
+        return {
+            "state": self.state,
+            "threshold": self.threshold,
+            "profiles": self.profiles,
+            "progress": round(self.work_done / self.work_total, 4) if self.work_total else float(self.state == "done"),
+            "pairs": self.pairs,
+            "elapsed_s": round(self.elapsed, 2),
+            "error": self.error,
+        }
+
+
+def _prepare(
+    ids: List[str], vectors: np.ndarray, eye: np.ndarray, threshold: float, tile_rows: int, path: str
+) -> Tuple[List[str], List[Tile]]:
+    """Save a gallery snapshot into ``path`` in scan order; return its ids and tiles."""
+    regions = region_centroids(vectors)
+    order, tiles = plan_tiles(regions, eye, threshold, tile_rows)
+    np.save(os.path.join(path, "vectors.npy"), vectors[order])
+    np.save(os.path.join(path, "eye.npy"), eye[order])
+    np.save(os.path.join(path, "regions.npy"), regions[order])
+    return [ids[k] for k in order.tolist()], tiles
+
+
+def _group_tiles(tiles: List[Tile]) -> List[List[Tile]]:
+    """Consecutive tiles batched into pool jobs of about ``_JOB_PAIRS`` evaluations."""
+    jobs: List[List[Tile]] = [[]]
+    size = 0
+    for tile in tiles:
+        if size >= _JOB_PAIRS:
+            jobs.append([])
+            size = 0
+        jobs[-1].append(tile)
+        size += (tile[1] - tile[0]) * (tile[3] - tile[2])
+    return [job for job in jobs if job]
+
+
+async def _score_job(executor: AnalysisExecutor, snapshot: str, tiles: List[Tile], threshold: float) -> PairArrays:
+    while True:
+        try:
+            return await executor.run(score_tiles, snapshot, tiles, threshold)
+        except Overloaded as exc:  # interactive traffic has the pool: back off
+            await asyncio.sleep(exc.retry_after)
+
+
+def _check_threshold(threshold: Optional[float]) -> float:
+    threshold = settings.dedup_threshold if threshold is None else threshold
+    if not math.isfinite(threshold) or threshold < 0:
+        raise ValueError("threshold must be a finite number >= 0")
+    return threshold
+
+
+async def find_duplicates(
+    store: _BaseProfileStore,
+    threshold: Optional[float] = None,
+    executor: AnalysisExecutor = analysis_executor,
+    progress: Optional[DedupProgress] = None,
+    on_progress: Optional[Callable[[DedupProgress], None]] = None,
+    tile_rows: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Clusters of profiles in ``store`` within ``threshold`` of each other.
+
+    Computes every pair at distance <= ``threshold`` (``compare_profiles``
+    units) as a blocked self-join: the gallery is snapshotted on the event
+    loop and saved to a temporary directory in ``plan_tiles`` order, its
+    tiles are scored in parallel pool jobs at bulk priority and the pairs
+    are merged into ``cluster_pairs`` clusters. Memory per job is bounded
+    by ``tile_rows`` squared.
+
+    Raises:
+        ValueError: If ``threshold`` is negative or not finite.
+    """
+    threshold = _check_threshold(threshold)
+    tile_rows = tile_rows or settings.dedup_tile_rows
+    progress = progress or DedupProgress(threshold)
+    root = tempfile.mkdtemp(prefix="validia-dedup-")
+    # Unique per scan: workers cache the mapped snapshot by path
+    path = os.path.join(root, uuid.uuid4().hex)
+    os.mkdir(path)
+    in_flight: Dict[asyncio.Future, int] = {}
+    try:
+        # Taken on the event loop, where every other store write happens; only
+        # the ordering and saving of the copy run in a thread
+        ids, vectors, eye = store.snapshot()
+        ids, tiles = await run_in_threadpool(_prepare, ids, vectors, eye, threshold, tile_rows, path)
+        del vectors, eye
+        progress.profiles = len(ids)
+        jobs = _group_tiles(tiles)
+        progress.work_total = sum((t[1] - t[0]) * (t[3] - t[2]) for t in tiles)
+        max_in_flight = 2 * (executor.workers or os.cpu_count() or 1)
+        found: List[PairArrays] = []
+
+        def collect(done: Set[asyncio.Future]) -> None:
+            for task in done:
+                work = in_flight.pop(task)
+                found.append(task.result())
+                progress.work_done += work
+                progress.pairs += len(found[-1][0])
+            if on_progress is not None:
+                on_progress(progress)
+
+        # Background work: never ahead of interactive requests
+        async with prioritized(Priority.BULK):
+            for job in jobs:
+                work = sum((t[1] - t[0]) * (t[3] - t[2]) for t in job)
+                in_flight[asyncio.ensure_future(_score_job(executor, path, job, threshold))] = work
+                while len(in_flight) >= max_in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+
+        if found:
+            i, j, dist = (np.concatenate(parts) for parts in zip(*found))
+        else:
+            i = j = np.empty(0, np.int64)
+            dist = np.empty(0, np.float32)
+        clusters = cluster_pairs(ids, i, j, dist)
+        progress.state = "done"
+        return clusters
+    except BaseException as exc:
+        for task in in_flight:
+            task.cancel()
+        progress.state = "failed"
+        progress.error = str(exc) or type(exc).__name__
+        raise
+    finally:
+        progress.elapsed = time.monotonic() - progress._start
+        shutil.rmtree(root, ignore_errors=True)
+
+
+class DedupJob:
+    """A background ``find_duplicates`` started by ``POST /v1/gallery/duplicates``."""
+
+    def __init__(self, job_id: str, threshold: float):
+        self.id = job_id
+        self.progress = DedupProgress(threshold)
+        self.clusters: Optional[List[Dict[str, Any]]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def status(self, include_clusters: bool = True) -> Dict[str, Any]:
+        status = {"job_id": self.id, **self.progress.as_dict()}
+        if self.clusters is not None:
+            status["duplicates"] = sum(len(c["ids"]) for c in self.clusters)
+            if include_clusters:
+                status["clusters"] = self.clusters
+        return status
+
+    async def run(self, store: _BaseProfileStore) -> None:
+        try:
+            self.clusters = await find_duplicates(store, self.progress.threshold, progress=self.progress)
+        except Exception:
+            pass  # state and error are on self.progress
+
+
+# Jobs of this process by id (finished ones stay until the process exits)
+dedup_jobs: Dict[str, DedupJob] = {}
+
+
+def start_dedup_job(store: _BaseProfileStore, threshold: Optional[float] = None, job_id: Optional[str] = None) -> DedupJob:
+    """Run ``find_duplicates`` over ``store`` in the background.
+
+    Raises:
+        ValueError: Negative or non-finite threshold, invalid job id, or a
+            job with that id is still running.
+    """
+    threshold = _check_threshold(threshold)
+    job_id = job_id or uuid.uuid4().hex
+    if not PROFILE_ID_PATTERN.fullmatch(job_id):
+        raise ValueError(f"Invalid job id '{job_id}'")
+    running = dedup_jobs.get(job_id)
+    if running is not None and running.progress.state == "running":
+        raise ValueError(f"Duplicate scan '{job_id}' is still running")
+    job = DedupJob(job_id, threshold)
+    dedup_jobs[job_id] = job
+    job.task = asyncio.ensure_future(job.run(store))
+    return job
@@ -0,0 +1,117 @@
+from functools import lru_cache
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+# Generic 3D face (millimetre-ish units, nose tip at the origin) for six
+# stable landmarks, in camera axes: x to the image's right, y down and z away
+# from the camera, so a face looking into the lens has the identity rotation
+_MODEL_INDICES = np.array([30, 8, 36, 45, 48, 54])  # nose tip, chin, eye and mouth corners
+_MODEL = np.array(
+    [
+        (0.0, 0.0, 0.0),
+        (0.0, 330.0, 65.0),
+        (-225.0, -170.0, 135.0),
+        (225.0, -170.0, 135.0),
+        (-150.0, 150.0, 125.0),
+        (150.0, 150.0, 125.0),
+    ]
+)
+# Least-squares solve of the POS step, fixed because the model is
+_MODEL_PINV = np.linalg.pinv(_MODEL[1:])
+
+# Perspective corrections after the initial scaled-orthographic fit
+POSIT_ITERATIONS = 4
+
+ImageSizes = Union[Tuple[int, int], Sequence[Tuple[int, int]], np.ndarray]
+
+
+@lru_cache(maxsize=64)
+def camera_intrinsics(width: int, height: int) -> Tuple[float, float, float]:
+    """``(focal, cx, cy)`` in pixels for an uncalibrated camera of this image size.
+
+    The focal length is taken as the longer image side (about a 53° field of
+    view) and the principal point as the image centre.
+    """
+    return float(max(width, height)), width / 2.0, height / 2.0
+
+
+def _intrinsics(image_sizes: ImageSizes, n: int) -> np.ndarray:
+    """(B, 3) or broadcastable (1, 3) intrinsics, looked up once per distinct image size."""
+    sizes = np.asarray(image_sizes, dtype=np.int64).reshape(-1, 2)
+    if len(sizes) == 1:
+        return np.array([camera_intrinsics(int(sizes[0, 0]), int(sizes[0, 1]))])
+    if len(sizes) != n:
+        raise ValueError(f"{len(sizes)} image sizes for {n} landmark sets")
+    unique, inverse = np.unique(sizes, axis=0, return_inverse=True)
+    table = np.array([camera_intrinsics(int(w), int(h)) for w, h in unique])
+    return table[inverse.reshape(-1)]
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # np.cross on (B, 3) rows, without its axis-juggling overhead
+    return np.stack(
+        [
+            a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1],
+            a[:, 2] * b[:, 0] - a[:, 0] * b[:, 2],
+            a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0],
+        ],
+        axis=1,
+    )
+
+
+def rotation_to_euler(rotation: np.ndarray) -> np.ndarray:
+    """(B, 3) ``(yaw, pitch, roll)`` in degrees of (B, 3, 3) rotations.
+
+    Decomposed as ``Rz(roll) @ Ry(yaw) @ Rx(pitch)``: positive yaw turns the
+    face towards the image's left, positive pitch tilts it down (chin towards
+    the chest) and positive roll tilts it clockwise in the image.
+    """
+    yaw = np.arcsin(np.clip(-rotation[:, 2, 0], -1.0, 1.0))
+    pitch = np.arctan2(rotation[:, 2, 1], rotation[:, 2, 2])
+    roll = np.arctan2(rotation[:, 1, 0], rotation[:, 0, 0])
+    return np.degrees(np.stack([yaw, pitch, roll], axis=1))
+
+
+def estimate_rotations(landmarks: np.ndarray, image_sizes: ImageSizes) -> np.ndarray:
+    """(B, 3, 3) head rotations of a stack of 68-point landmark sets.
+
+    Batched POSIT (DeMenthon & Davis): a scaled-orthographic fit of the
+    reference model, then ``POSIT_ITERATIONS`` perspective corrections. The
+    two fitted axes are projected onto the nearest orthonormal pair with one
+    batched SVD per iteration, so the whole stack is solved in a handful of
+    array operations instead of a ``solvePnP`` call per face.
+
+    Args:
+        landmarks: (B, 68, 2) or (68, 2) pixel coordinates.
+        image_sizes: ``(width, height)`` shared by the stack, or one per set.
+    """
+    points = np.asarray(landmarks, dtype=np.float64).reshape(-1, 68, 2)[:, _MODEL_INDICES]
+    n = points.shape[0]
+    camera = _intrinsics(image_sizes, n)
+    # Normalised image coordinates (focal length 1, centred)
+    uv = (points - camera[:, None, 1:]) / camera[:, None, :1]
+    ref, rest = uv[:, :1], uv[:, 1:]
+
+    eps = np.zeros((n, len(_MODEL) - 1))
+    for _ in range(POSIT_ITERATIONS + 1):
+        target = rest * (1.0 + eps)[..., None] - ref
+        axes = np.einsum("kj,bjc->bck", _MODEL_PINV, target)  # (B, 2, 3): scaled i and j rows
+        u, s, vt = np.linalg.svd(axes, full_matrices=False)
+        rows = u @ vt
+        r3 = _cross(rows[:, 0], rows[:, 1])
+        # Depth of the nose tip is focal / scale, and focal is 1 here
+        scale = (s[:, :1] + s[:, 1:]) * 0.5
+        eps = (r3 @ _MODEL[1:].T) * scale
+    return np.concatenate([rows, r3[:, None]], axis=1)
+
+
+def estimate_poses(landmarks: np.ndarray, image_sizes: ImageSizes) -> np.ndarray:
+    """(B, 3) ``(yaw, pitch, roll)`` in degrees; see ``estimate_rotations``."""
+    return rotation_to_euler(estimate_rotations(landmarks, image_sizes))
+
+
+def head_pose(landmarks: Sequence[Tuple[int, int]], image_size: Tuple[int, int]) -> Tuple[float, float, float]:
+    """``(yaw, pitch, roll)`` in degrees of one face."""
+    yaw, pitch, roll = estimate_poses(np.asarray(landmarks), image_size)[0]
+    return float(yaw), float(pitch), float(roll)
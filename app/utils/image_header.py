@@ -0,0 +1,83 @@
+import io
+from typing import NamedTuple, Optional
+
+from PIL import Image
+
+# Image headers (JPEG SOF, PNG IHDR, …) sit well inside this many bytes;
+# only files with unusually large metadata segments need more.
+HEADER_BYTES = 64 * 1024
+
+
+class ImageHeader(NamedTuple):
+    format: str
+    width: int
+    height: int
+
+    @property
+    def megapixels(self) -> float:
+        return self.width * self.height / 1e6
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only file over a buffer; reads copy only what is asked for."""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def _read_header(fp: _BufferReader) -> Optional[ImageHeader]:
+    # Image.open() without its decompression-bomb check: that pixel limit
+    # would hide exactly the sizes callers need to see, and the service
+    # enforces its own (Settings.image_max_megapixels). Pillow's global
+    # limit stays in force for everything else in the process.
+    Image.init()
+    prefix = fp.read(16)
+    for fmt in Image.ID:
+        factory, accept = Image.OPEN[fmt]
+        try:
+            accepted = accept(prefix) if accept else True
+            if not accepted or isinstance(accepted, str):
+                continue
+            fp.seek(0)
+            with factory(fp, None) as im:
+                return ImageHeader(im.format or "unknown", *im.size)
+        except Exception:
+            continue
+    return None
+
+
+def sniff_image(data) -> Optional[ImageHeader]:
+    """Format and pixel size from the start of an image, without decoding pixels.
+
+    ``data`` may be any buffer (bytes, bytearray, memoryview) holding at
+    least the header; only the first ``HEADER_BYTES`` are looked at first.
+    The buffer is read in place, never copied as a whole. Returns None when
+    the header cannot be parsed.
+    """
+    view = memoryview(data).cast("B")
+    for head in (view[:HEADER_BYTES], view) if len(view) > HEADER_BYTES else (view,):
+        header = _read_header(_BufferReader(head))
+        if header is not None:
+            return header
+    return None
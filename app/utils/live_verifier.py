@@ -0,0 +1,143 @@
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import dlib
+import numpy as np
+
+from app.core.config import settings
+from app.utils.face_analyzer import (
+    _REDUCED_GRAY_FLAGS,
+    _detect_faces,
+    _detector,
+    _load_predictor,
+    _probe_dimensions,
+    _reduction_factor,
+)
+from app.utils.video_analyzer import _FLICKER_SCALE, _landmark_rect, _normalized_shape
+
+# Landmark jump (fraction of the eye distance) between consecutive frames
+# beyond which the track is considered lost and the face is searched again
+_LOST_FLICKER = 0.25
+
+# Search window around the previous face box for the refine pass
+_REFINE_MARGIN = 0.5
+# Faces smaller than this (pixels) are upsampled once in the refine pass;
+# HOG's detection window is about 80 px
+_REFINE_UPSAMPLE_BELOW = 90
+
+Rect = Tuple[int, int, int, int]
+
+
+def _to_rect(r: Rect) -> dlib.rectangle:
+    return dlib.rectangle(*r)
+
+
+def _from_rect(r: dlib.rectangle) -> Rect:
+    return (r.left(), r.top(), r.right(), r.bottom())
+
+
+def _decode_frame(frame_bytes: bytes) -> Tuple[np.ndarray, float]:
+    """Grayscale decode at (roughly) detection resolution.
+
+    Returns the frame and the factor mapping its coordinates back to the
+    original resolution.
+    """
+    size = _probe_dimensions(frame_bytes)
+    factor = _reduction_factor(size)
+    gray = cv2.imdecode(np.frombuffer(frame_bytes, np.uint8), _REDUCED_GRAY_FLAGS[factor])
+    if gray is None:
+        raise ValueError("Provided bytes do not represent a valid image")
+    return gray, (size[0] / gray.shape[1] if size else 1.0)
+
+
+def _refine(gray: np.ndarray, previous: Rect) -> Optional[dlib.rectangle]:
+    """Run HOG only on a window around the previous face box."""
+    h, w = gray.shape[:2]
+    left, t, r, b = previous
+    mx, my = int((r - left) * _REFINE_MARGIN), int((b - t) * _REFINE_MARGIN)
+    x0, y0 = max(0, left - mx), max(0, t - my)
+    x1, y1 = min(w, r + mx + 1), min(h, b + my + 1)
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    upsample = 1 if min(r - left, b - t) < _REFINE_UPSAMPLE_BELOW else 0
+    rects = _detector(np.ascontiguousarray(gray[y0:y1, x0:x1]), upsample)
+    if not rects:
+        return None
+    best = max(rects, key=lambda rc: rc.area())
+    return dlib.rectangle(best.left() + x0, best.top() + y0, best.right() + x0, best.bottom() + y0)
+
+
+LiveState = Optional[Dict[str, Any]]
+
+
+def process_frame(frame_bytes: bytes, state: LiveState) -> Tuple[Dict[str, Any], LiveState]:
+    """Analyse one live-camera frame given the connection's previous state.
+
+    Track-then-refine: the face box is first taken from the previous
+    frame's landmarks and the predictor re-fitted there (no detector pass).
+    Every ``ws_refine_every`` frames, or when the landmarks jump too far, HOG
+    runs on a window around the previous box; a full-image detection only
+    happens when there is no track or the window search fails.
+
+    ``state`` is a small picklable dict (face box, normalised landmarks,
+    frame size, frames since refine) so the call can run in the process
+    pool; the new state is returned alongside the frame result.
+
+    Raises:
+        ValueError: If the bytes are not a decodable image.
+        RuntimeError: If the predictor model cannot be loaded.
+    """
+    gray, scale = _decode_frame(frame_bytes)
+    predictor = _load_predictor()
+    if state and tuple(state["frame_shape"]) != gray.shape:
+        state = None  # resolution changed mid-stream: start a new track
+
+    def fit(rect: dlib.rectangle) -> np.ndarray:
+        shape = predictor(gray, rect)
+        return np.array([(p.x, p.y) for p in shape.parts()], dtype=np.float32)
+
+    previous = state["shape"] if state else None
+    mode = "tracked"
+    rect: Optional[dlib.rectangle] = None
+    points: Optional[np.ndarray] = None
+    flicker: Optional[float] = None
+
+    if state and state["since_refine"] < settings.ws_refine_every:
+        rect = _to_rect(state["rect"])
+        points = fit(rect)
+        flicker = float(np.linalg.norm(_normalized_shape(points) - previous, axis=1).mean())
+        if flicker > _LOST_FLICKER:
+            rect = points = None
+
+    if rect is None and state:
+        mode = "refined"
+        rect = _refine(gray, state["rect"])
+    if rect is None:
+        mode = "detected"
+        rects = _detect_faces(gray)
+        rect = max(rects, key=lambda rc: rc.area()) if rects else None
+    if rect is None:
+        return {"face_found": False, "mode": mode, "score": None}, None
+
+    if points is None:
+        points = fit(rect)
+        flicker = (
+            float(np.linalg.norm(_normalized_shape(points) - previous, axis=1).mean())
+            if previous is not None
+            else None
+        )
+
+    result = {
+        "face_found": True,
+        "mode": mode,
+        "rect": tuple(int(round(v * scale)) for v in _from_rect(rect)),
+        "eye_distance": float(np.linalg.norm(points[36] - points[45])) * scale,
+        "score": None if flicker is None else float(1.0 - np.exp(-flicker / _FLICKER_SCALE)),
+    }
+    new_state = {
+        "rect": _from_rect(_landmark_rect(points, rect)),
+        "shape": _normalized_shape(points),
+        "frame_shape": gray.shape,
+        "since_refine": state["since_refine"] + 1 if mode == "tracked" else 1,
+    }
+    return result, new_state
@@ -0,0 +1,184 @@
+import bisect
+import time
+from typing import Callable, Dict, List, Mapping, Sequence, Tuple
+
+from app.core.config import settings
+from app.utils.stage_timer import record_stages
+
+# Seconds; covers a sub-millisecond store lookup up to a 12 MP decode
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        out = []
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+class Metrics:
+    """Process-wide counters and stage histograms behind ``GET /metrics``.
+
+    Updated from the event loop only (request middleware and endpoint
+    error paths), so no locking. Values owned by other components (cache
+    counters, store size) are read through callbacks at scrape time.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Histogram] = {}
+        self.quality_rejections: Dict[str, int] = {}
+        self.faces_not_found = 0
+        self.admission_wait: Dict[str, Histogram] = {}
+        self.admission_rejections: Dict[str, int] = {}
+        self._callbacks: List[Tuple[str, str, str, Callable[[], float]]] = []
+
+    def register(self, name: str, kind: str, help_text: str, fn: Callable[[], float]) -> None:
+        """Expose a value read on every scrape (``kind`` is counter or gauge)."""
+        self._callbacks = [c for c in self._callbacks if c[0] != name]
+        self._callbacks.append((name, kind, help_text, fn))
+
+    def observe_stages(self, timings: Mapping[str, float]) -> None:
+        for name, ms in timings.items():
+            hist = self.stages.get(name)
+            if hist is None:
+                hist = self.stages[name] = Histogram()
+            hist.observe(ms / 1000)
+
+    def count_failure(self, exc: BaseException) -> None:
+        """Count analysis rejections by kind (see ``face_analyzer`` errors)."""
+        # Imported here: face_analyzer pulls in dlib, metrics must stay light
+        from app.utils.face_analyzer import NoFaceError, QualityGateError
+
+        if isinstance(exc, QualityGateError):
+            self.quality_rejections[exc.reason] = self.quality_rejections.get(exc.reason, 0) + 1
+        elif isinstance(exc, NoFaceError):
+            self.faces_not_found += 1
+
+    def observe_admission_wait(self, priority: str, seconds: float) -> None:
+        hist = self.admission_wait.get(priority)
+        if hist is None:
+            hist = self.admission_wait[priority] = Histogram()
+        hist.observe(seconds)
+
+    def count_admission_rejection(self, reason: str) -> None:
+        """Count analysis calls turned away by admission control (see ``admission``)."""
+        self.admission_rejections[reason] = self.admission_rejections.get(reason, 0) + 1
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self.quality_rejections.clear()
+        self.faces_not_found = 0
+        self.admission_wait.clear()
+        self.admission_rejections.clear()
+
+    def render(self) -> str:
+        out = [
+            "# HELP validia_stage_duration_seconds Time spent per pipeline stage.",
+            "# TYPE validia_stage_duration_seconds histogram",
+        ]
+        for name in sorted(self.stages):
+            out += self.stages[name].lines("validia_stage_duration_seconds", f'stage="{name}"')
+
+        out += [
+            "# HELP validia_quality_gate_rejections_total Images rejected by the quality gate.",
+            "# TYPE validia_quality_gate_rejections_total counter",
+        ]
+        for reason in sorted(self.quality_rejections):
+            out.append(f'validia_quality_gate_rejections_total{{reason="{reason}"}} {self.quality_rejections[reason]}')
+
+        out += [
+            "# HELP validia_faces_not_found_total Acceptable images in which no face was detected.",
+            "# TYPE validia_faces_not_found_total counter",
+            f"validia_faces_not_found_total {self.faces_not_found}",
+            "# HELP validia_admission_wait_seconds Time analysis calls waited for a pool slot.",
+            "# TYPE validia_admission_wait_seconds histogram",
+        ]
+        for priority in sorted(self.admission_wait):
+            out += self.admission_wait[priority].lines("validia_admission_wait_seconds", f'priority="{priority}"')
+
+        out += [
+            "# HELP validia_admission_rejections_total Analysis calls refused (503) or dropped by admission control.",
+            "# TYPE validia_admission_rejections_total counter",
+        ]
+        for reason in sorted(self.admission_rejections):
+            out.append(f'validia_admission_rejections_total{{reason="{reason}"}} {self.admission_rejections[reason]}')
+        for name, kind, help_text, fn in self._callbacks:
+            out += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {fn()}"]
+        return "\n".join(out) + "\n"
+
+
+metrics = Metrics()
+
+
+def server_timing(timings: Mapping[str, float]) -> str:
+    """Format stage timings as a ``Server-Timing`` header value."""
+    return ", ".join(f"{name};dur={ms:.2f}" for name, ms in timings.items())
+
+
+class ServerTimingMiddleware:
+    """Record stage timings per HTTP request.
+
+    Everything the request runs (including pool work, whose timings travel
+    back with the result) is collected with ``record_stages()``, echoed in a
+    ``Server-Timing`` header and added to the stage histograms. Time spent
+    waiting for request body chunks is reported as ``upload_read``. A pure
+    ASGI middleware: with ``Settings.metrics_enabled`` off it only forwards.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with record_stages() as timings:
+
+            async def timed_receive():
+                t0 = time.perf_counter()
+                message = await receive()
+                if message["type"] == "http.request":
+                    ms = (time.perf_counter() - t0) * 1000
+                    timings["upload_read"] = timings.get("upload_read", 0.0) + ms
+                return message
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    header = server_timing(
+                        {**timings, "total": (time.perf_counter() - start) * 1000}
+                    )
+                    message = {
+                        **message,
+                        "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))],
+                    }
+                await send(message)
+
+            try:
+                await self.app(scope, timed_receive, send_with_timing)
+            finally:
+                metrics.observe_stages(timings)
@@ -0,0 +1,378 @@
+import os
+import struct
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.profile_record import ProfileRecord
+from app.utils.ann_index import ExactIndex, build_index
+from app.utils.profile_store import ProfileLike, _BaseProfileStore
+from app.utils.stage_timer import stage
+
+# Fixed-width per-profile metrics (one row per profile, append-only)
+_ROW_DTYPE = np.dtype(
+    [
+        ("deleted", "u1"),
+        ("eye_distance", "<f4"),
+        ("yaw", "<f4"),
+        ("blob_offset", "<u8"),
+        ("blob_length", "<u4"),
+    ]
+)
+_ID_DTYPE = np.dtype("S36")
+_LANDMARK_DTYPE = np.dtype("<i4")
+_LANDMARK_SHAPE = (68, 2)
+
+# Column files grow by at least this many rows at a time
+_GROW_ROWS = 4096
+
+# Blob flags: which optional profile fields are present
+_HAS_DESCRIPTION, _HAS_ALIGNED, _HAS_JITTER = 1, 2, 4
+_BLOB_HEADER = struct.Struct("<BH")
+
+
+def _encode_blob(record: ProfileRecord) -> bytes:
+    """Pack description + raw JPEG chip/jitter bytes into one blob."""
+    flags = 0
+    fields: List[bytes] = []
+    if record.description is not None:
+        flags |= _HAS_DESCRIPTION
+        fields.append(record.description.encode("utf-8"))
+    if record.aligned_face is not None:
+        flags |= _HAS_ALIGNED
+        fields.append(record.aligned_face)
+    if record.jitter_faces is not None:
+        flags |= _HAS_JITTER
+        fields.extend(record.jitter_faces)
+    lengths = struct.pack(f"<{len(fields)}I", *(len(f) for f in fields))
+    return _BLOB_HEADER.pack(flags, len(fields)) + lengths + b"".join(fields)
+
+
+def _decode_blob(blob: bytes) -> dict:
+    flags, count = _BLOB_HEADER.unpack_from(blob)
+    lengths = struct.unpack_from(f"<{count}I", blob, _BLOB_HEADER.size)
+    pos = _BLOB_HEADER.size + 4 * count
+    fields = []
+    for length in lengths:
+        fields.append(blob[pos : pos + length])
+        pos += length
+
+    out: dict = {}
+    if flags & _HAS_DESCRIPTION:
+        out["description"] = fields.pop(0).decode("utf-8")
+    if flags & _HAS_ALIGNED:
+        out["aligned_face"] = fields.pop(0)
+    if flags & _HAS_JITTER:
+        out["jitter_faces"] = fields
+    return out
+
+
+class _Column:
+    """Fixed-width, append-only column backed by a memory-mapped file."""
+
+    def __init__(self, path: str, dtype: np.dtype, tail: Tuple[int, ...] = ()):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.tail = tail
+        self.row_bytes = self.dtype.itemsize * int(np.prod(tail, dtype=np.int64))
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        self._map(os.path.getsize(path) // self.row_bytes)
+
+    def _map(self, capacity: int) -> None:
+        self.capacity = capacity
+        if capacity:
+            self.array = np.memmap(
+                self.path, dtype=self.dtype, mode="r+", shape=(capacity,) + self.tail
+            )
+        else:
+            self.array = np.empty((0,) + self.tail, dtype=self.dtype)
+
+    def reserve(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, 2 * self.capacity, _GROW_ROWS)
+        self.close()
+        with open(self.path, "r+b") as fh:
+            fh.truncate(capacity * self.row_bytes)
+        self._map(capacity)
+
+    def flush(self) -> None:
+        if isinstance(self.array, np.memmap):
+            self.array.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.array = np.empty((0,) + self.tail, dtype=self.dtype)
+        self.capacity = 0
+
+
+class MmapProfileStore(_BaseProfileStore):
+    """Durable profile store built on memory-mapped column files.
+
+    Layout of ``path`` (``<g>`` is the current generation, see ``CURRENT``):
+
+    * ``ids.<g>`` / ``landmarks.<g>`` / ``rows.<g>`` – fixed-width columns
+      (profile id, int32 68×2 landmarks, metrics + blob reference)
+    * ``blobs.<g>`` – append-only description/chip/jitter JPEG bytes
+    * ``count.<g>`` – number of committed rows (the commit point)
+
+    An add writes the blob and column rows first, syncs them, then bumps the
+    count, so a crash mid-write leaves only uncommitted bytes past the count
+    that are ignored (and truncated) on the next open. Opening maps the
+    columns instead of parsing them; the gallery index is bulk-loaded from the
+    landmark column in one copy. ``compact()`` rewrites live rows into a new
+    generation and switches ``CURRENT`` atomically.
+
+    Only one process may write to a store directory at a time.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        index: Optional[ExactIndex] = None,
+        fsync: Optional[bool] = None,
+    ):
+        super().__init__(index)
+        self.path = path
+        self._fsync = settings.profile_store_fsync if fsync is None else fsync
+        os.makedirs(path, exist_ok=True)
+        self._generation = self._read_current()
+        self._open_generation()
+        self._load()
+
+    # ------------------------------------------------------------------ files
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        gen = self._generation if generation is None else generation
+        return os.path.join(self.path, f"{name}.{gen}")
+
+    def _read_current(self) -> int:
+        try:
+            with open(os.path.join(self.path, "CURRENT")) as fh:
+                return int(fh.read().strip())
+        except FileNotFoundError:
+            return 0
+
+    def _write_current(self, generation: int) -> None:
+        tmp = os.path.join(self.path, "CURRENT.tmp")
+        with open(tmp, "w") as fh:
+            fh.write(str(generation))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, os.path.join(self.path, "CURRENT"))
+        self._sync_dir()
+
+    def _sync_dir(self) -> None:
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _open_generation(self) -> None:
+        self._ids = _Column(self._file("ids"), _ID_DTYPE)
+        self._landmarks = _Column(self._file("landmarks"), _LANDMARK_DTYPE, _LANDMARK_SHAPE)
+        self._rows = _Column(self._file("rows"), _ROW_DTYPE)
+        self._blobs = open(self._file("blobs"), "a+b")
+        count_path = self._file("count")
+        if not os.path.exists(count_path):
+            with open(count_path, "wb") as fh:
+                fh.write(struct.pack("<Q", 0))
+        self._count_file = open(count_path, "r+b")
+        self._count = struct.unpack("<Q", self._count_file.read(8))[0]
+
+    def _columns(self) -> Tuple[_Column, ...]:
+        return (self._ids, self._landmarks, self._rows)
+
+    def _write_count(self, count: int) -> None:
+        self._count_file.seek(0)
+        self._count_file.write(struct.pack("<Q", count))
+        self._count_file.flush()
+        if self._fsync:
+            os.fsync(self._count_file.fileno())
+        self._count = count
+
+    def _load(self) -> None:
+        n = self._count
+        rows = self._rows.array[:n]
+
+        # Drop blob bytes no committed row points at (crash mid-add/update)
+        self._blob_end = int((rows["blob_offset"] + rows["blob_length"]).max()) if n else 0
+        self._blobs.truncate(self._blob_end)
+
+        ids = [raw.decode("ascii") for raw in self._ids.array[:n].tolist()]
+        live = np.flatnonzero(rows["deleted"] == 0)
+        self._row_of = {ids[i]: int(i) for i in live}
+        self._index.add_many(
+            [ids[i] for i in live],
+            self._landmarks.array[:n][live].reshape(-1, 136),
+            rows["eye_distance"][live],
+        )
+
+    def close(self) -> None:
+        for col in self._columns():
+            col.close()
+        self._blobs.close()
+        self._count_file.close()
+
+    # ------------------------------------------------------------- interface
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, profile_id: str) -> bool:
+        return profile_id in self._row_of
+
+    def _row(self, profile_id: str) -> int:
+        """Row of a live profile (KeyError if unknown or deleted)."""
+        if profile_id not in self._row_of:
+            raise KeyError(f"Profile '{profile_id}' not found")
+        return self._row_of[profile_id]
+
+    def add_many(self, items: Sequence[Tuple[Optional[str], ProfileLike]]) -> List[str]:
+        """Store the profiles with one blob write, one fsync and one commit."""
+        if not items:
+            return []
+        ids = self._claim_ids([profile_id for profile_id, _ in items])
+        records = [ProfileRecord.coerce(profile) for _, profile in items]
+        with stage("store_add"):
+            self._append(list(zip(ids, records)))
+        for _id, record, (_, profile) in zip(ids, records, items):
+            record.id = profile.id = _id
+        return ids
+
+    def get(self, profile_id: str) -> ProfileRecord:
+        i = self._row(profile_id)
+        row = self._rows.array[i]
+        with stage("store_get"):
+            blob = os.pread(self._blobs.fileno(), int(row["blob_length"]), int(row["blob_offset"]))
+        return ProfileRecord(
+            id=profile_id,
+            landmarks=self._landmarks.array[i],
+            eye_distance=float(row["eye_distance"]),
+            yaw=float(row["yaw"]),
+            **_decode_blob(blob),
+        )
+
+    def set_jitter_faces(self, profile_id: str, jitter_faces: Sequence[bytes]) -> None:
+        """Rewrite a profile's blob with jitters; the old blob is reclaimed by ``compact()``."""
+        record = self.get(profile_id)
+        record.jitter_faces = tuple(jitter_faces)
+        blob = _encode_blob(record)
+        self._blobs.write(blob)
+        self._blobs.flush()
+        if self._fsync:
+            os.fsync(self._blobs.fileno())
+        # Repoint the row only once the new blob is durable
+        i = self._row(profile_id)
+        self._rows.array["blob_offset"][i] = self._blob_end
+        self._rows.array["blob_length"][i] = len(blob)
+        self._rows.flush()
+        self._blob_end += len(blob)
+
+    def delete(self, profile_id: str) -> None:
+        """Mark a profile deleted; its space is reclaimed by ``compact()``."""
+        i = self._row(profile_id)
+        self._rows.array["deleted"][i] = 1
+        self._rows.flush()
+        del self._row_of[profile_id]
+
+    def _append(self, items: Sequence[Tuple[str, ProfileRecord]]) -> None:
+        start = self._count
+        stop = start + len(items)
+        for col in self._columns():
+            col.reserve(stop)
+
+        blobs = [_encode_blob(p) for _, p in items]
+        offsets = np.cumsum([0] + [len(b) for b in blobs[:-1]], dtype=np.uint64) + np.uint64(
+            self._blob_end
+        )
+        self._blobs.write(b"".join(blobs))
+        self._blobs.flush()
+        if self._fsync:
+            os.fsync(self._blobs.fileno())
+
+        landmarks = np.asarray([p.landmarks for _, p in items], dtype=_LANDMARK_DTYPE)
+        self._ids.array[start:stop] = [pid.encode("ascii") for pid, _ in items]
+        self._landmarks.array[start:stop] = landmarks
+        rows = self._rows.array[start:stop]
+        rows["deleted"] = 0
+        rows["eye_distance"] = [p.eye_distance for _, p in items]
+        rows["yaw"] = [p.yaw for _, p in items]
+        rows["blob_offset"] = offsets
+        rows["blob_length"] = [len(b) for b in blobs]
+        if self._fsync:
+            for col in self._columns():
+                col.flush()
+
+        self._blob_end += sum(len(b) for b in blobs)
+        self._write_count(stop)  # commit point
+        self._on_committed([pid for pid, _ in items], start, landmarks, rows["eye_distance"])
+
+    def _on_committed(self, ids: List[str], start: int, landmarks: np.ndarray, eye: np.ndarray) -> None:
+        """Make rows ``start:start+len(ids)`` findable once they are committed."""
+        self._row_of.update(zip(ids, range(start, start + len(ids))))
+        self._index.add_many(ids, landmarks.reshape(-1, 136), eye)
+
+    def compact(self) -> int:
+        """Rewrite live profiles into a fresh generation; return rows reclaimed.
+
+        Also runs when only blob space is dead (blobs replaced by
+        ``set_jitter_faces``), in which case it returns 0.
+        """
+        n = self._count
+        live = np.flatnonzero(self._rows.array[:n]["deleted"] == 0)
+        reclaimed = n - len(live)
+        live_bytes = int(self._rows.array[:n]["blob_length"][live].sum())
+        if not reclaimed and live_bytes == self._blob_end:
+            return 0
+
+        old_generation = self._generation
+        new_generation = old_generation + 1
+        self._copy_rows(live, new_generation)
+        self._write_current(new_generation)
+
+        self.close()
+        for name in ("ids", "landmarks", "rows", "blobs", "count"):
+            try:
+                os.remove(self._file(name, old_generation))
+            except FileNotFoundError:
+                pass
+
+        self._generation = new_generation
+        self._index = build_index(self._index.kind)
+        self._open_generation()
+        self._load()
+        return reclaimed
+
+    def _copy_rows(self, live: Iterable[int], generation: int) -> None:
+        live = np.asarray(live)
+        m = len(live)
+        ids = _Column(self._file("ids", generation), _ID_DTYPE)
+        landmarks = _Column(self._file("landmarks", generation), _LANDMARK_DTYPE, _LANDMARK_SHAPE)
+        rows = _Column(self._file("rows", generation), _ROW_DTYPE)
+        for col in (ids, landmarks, rows):
+            col.reserve(m)
+
+        ids.array[:m] = self._ids.array[live]
+        landmarks.array[:m] = self._landmarks.array[live]
+        new_rows = self._rows.array[live].copy()
+
+        offset = 0
+        with open(self._file("blobs", generation), "wb") as out:
+            for j, row in enumerate(new_rows):
+                length = int(row["blob_length"])
+                out.write(os.pread(self._blobs.fileno(), length, int(row["blob_offset"])))
+                new_rows["blob_offset"][j] = offset
+                offset += length
+            out.flush()
+            os.fsync(out.fileno())
+        rows.array[:m] = new_rows
+
+        for col in (ids, landmarks, rows):
+            col.flush()
+            col.close()
+        with open(self._file("count", generation), "wb") as fh:
+            fh.write(struct.pack("<Q", m))
+            fh.flush()
+            os.fsync(fh.fileno())
@@ -0,0 +1,39 @@
+import asyncio
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.executor import analysis_executor
+from app.utils.face_analyzer import detect_face_crops, profile_faces
+from app.utils.metrics import metrics
+
+
+def face_limit(requested: Optional[int]) -> Optional[int]:
+    """Caller's ``max_faces`` capped by ``Settings.max_faces`` (None = no limit)."""
+    if not settings.max_faces:
+        return requested
+    return min(requested or settings.max_faces, settings.max_faces)
+
+
+async def analyze_faces_parallel(
+    content: bytes, max_faces: Optional[int] = None, chip_format: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Profile every face of an image across the analysis pool.
+
+    One pool job decodes the image and runs detection once; the face crops
+    are then split over the workers so landmark prediction, chip extraction
+    and JPEG encoding (``chip_format="jpeg"``) of a group photo use every core.
+    Returns the faces (largest first) and the number detected.
+    """
+    try:
+        crops, detected = await analysis_executor.run(detect_face_crops, content, face_limit(max_faces))
+    except ValueError as exc:
+        metrics.count_failure(exc)
+        raise
+    n_chunks = max(1, min(len(crops), analysis_executor.workers or 1))
+    size = math.ceil(len(crops) / n_chunks)
+    chunks = [crops[i : i + size] for i in range(0, len(crops), size)]
+    results = await asyncio.gather(
+        *(analysis_executor.run(profile_faces, chunk, chip_format) for chunk in chunks)
+    )
+    return [face for chunk in results for face in chunk], detected
@@ -1,25 +1,240 @@
+import bisect
+import re
 import uuid
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
+
+from app.core.config import settings
 from app.models.profile import Profile
+from app.models.profile_record import ProfileRecord
+from app.utils.ann_index import ExactIndex, build_index
+from app.utils.metrics import metrics
+from app.utils.stage_timer import stage
+
+STORE_BACKENDS = ("memory", "mmap", "shared")
+
+# Caller-supplied profile ids: URL-safe and at most 36 ASCII characters
+# (the width of a UUID, which is what the mmap id column holds)
+PROFILE_ID_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._:-]{0,35}")
+
+ProfileLike = Union[ProfileRecord, Profile]
+
+
+def validate_profile_id(profile_id: str) -> str:
+    """Return ``profile_id`` if it is usable as a stored profile id.
+
+    Raises:
+        ValueError: If it is empty, longer than 36 characters or contains
+            anything but letters, digits and ``._:-``.
+    """
+    if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+        raise ValueError(
+            f"Invalid profile id '{profile_id}': use 1-36 letters, digits or '._:-', "
+            "starting with a letter or digit"
+        )
+    return profile_id
+
+
+class _BaseProfileStore:
+    """Shared search logic for profile store backends.
+
+    Landmarks are mirrored into a gallery index (``Settings.gallery_index``)
+    holding a contiguous (N, 136) float32 matrix, so a probe can be scored
+    against the whole gallery without Python loops. Backends implement
+    ``add_many``/``get``/``__contains__``/``__len__``; they accept a
+    ``Profile`` or ``ProfileRecord`` and hand back ``ProfileRecord`` objects.
+    Profiles get a random UUID unless the caller supplies an id.
+    """
+
+    def __init__(self, index: Optional[ExactIndex] = None):
+        self._index = index if index is not None else build_index()
+
+    @property
+    def index(self) -> ExactIndex:
+        return self._index
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, profile_id: str) -> bool:
+        raise NotImplementedError
+
+    def add(self, profile: ProfileLike, profile_id: Optional[str] = None) -> str:
+        """Store one profile under ``profile_id`` (or a new UUID) and return its id."""
+        return self.add_many([(profile_id, profile)])[0]
+
+    def add_many(self, items: Sequence[Tuple[Optional[str], ProfileLike]]) -> List[str]:
+        """Store ``(profile_id or None, profile)`` pairs in one write; return their ids.
+
+        Raises:
+            ValueError: If an id is invalid, already stored or repeated; nothing
+                is stored then.
+        """
+        raise NotImplementedError
+
+    def _claim_ids(self, requested: Sequence[Optional[str]]) -> List[str]:
+        ids: List[str] = []
+        seen = set()
+        for profile_id in requested:
+            if profile_id is None:
+                profile_id = str(uuid.uuid4())
+            else:
+                validate_profile_id(profile_id)
+                if profile_id in seen or profile_id in self:
+                    raise ValueError(f"Profile id '{profile_id}' already exists")
+            seen.add(profile_id)
+            ids.append(profile_id)
+        return ids
 
+    def set_jitter_faces(self, profile_id: str, jitter_faces: Sequence[bytes]) -> None:
+        """Attach lazily generated jitter JPEGs to a stored profile."""
+        raise NotImplementedError
 
-class _InMemoryProfileStore:
+    def list_ids(self, after: Optional[str] = None, limit: int = 100) -> List[str]:
+        """Up to ``limit`` live profile ids in sorted order, starting after ``after``.
+
+        Passing the last id of one page as ``after`` gives the next page; the
+        order does not depend on insertion, so paging stays consistent while
+        profiles are added or deleted in between.
+        """
+        ids = self._sorted_ids()
+        position = bisect.bisect_right(ids, after) if after is not None else 0
+        page: List[str] = []
+        while len(page) < limit and position < len(ids):
+            profile_id = ids[position]
+            if profile_id in self:  # deleted profiles stay in the index
+                page.append(profile_id)
+            position += 1
+        return page
+
+    def _indexed_ids(self, start: int = 0) -> Sequence[str]:
+        """Ids of index rows ``start:``, including deleted and re-added ones."""
+        return self._index._ids[start:]
+
+    def _sorted_ids(self) -> List[str]:
+        # Kept up to date as the index grows (it is append-only), so a page
+        # costs a few bisections rather than a sort of the whole gallery
+        key = (getattr(self, "_generation", 0), id(self._index))
+        count = len(self._index)
+        cached = getattr(self, "_sorted_cache", None)
+        if cached is None or cached[0] != key or cached[1] > count:
+            cached = self._sorted_cache = [key, count, sorted(set(self._indexed_ids()))]
+        elif cached[1] < count:
+            ids = cached[2]
+            added = self._indexed_ids(cached[1])
+            if len(added) > len(ids) // 8:
+                ids[:] = sorted(set(ids).union(added))
+            else:
+                for profile_id in added:
+                    i = bisect.bisect_left(ids, profile_id)
+                    if i == len(ids) or ids[i] != profile_id:  # re-added ids are listed once
+                        ids.insert(i, profile_id)
+            cached[1] = count
+        return cached[2]
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Ids, (N, 136) float32 landmarks and (N,) eye distances of every live profile.
+
+        The arrays are copies, safe to use while the store keeps changing.
+        """
+        ids = list(self._index._ids)
+        vectors = np.array(self._index.vectors, dtype=np.float32)
+        eye = np.array(self._index.eye_distances, dtype=np.float32)
+        if len(ids) != len(self):
+            # Deleted profiles (and earlier rows of re-added ids) are still indexed
+            last = {profile_id: row for row, profile_id in enumerate(ids)}
+            live = np.array(sorted(row for pid, row in last.items() if pid in self), dtype=np.int64)
+            ids = [ids[row] for row in live.tolist()]
+            vectors, eye = vectors[live], eye[live]
+        return ids, vectors, eye
+
+    def search(
+        self,
+        landmarks: Sequence[Tuple[int, int]],
+        eye_distance: float,
+        k: int = 5,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (profile_id, distance) pairs, closest first.
+
+        ``nprobe`` overrides the index's recall/latency knob (IVF only).
+        Deleted profiles still present in the index are skipped.
+        """
+        if len(self._index) == 0 or k <= 0:
+            return []
+        with stage("store_search"):
+            probe = np.asarray(landmarks, dtype=np.float32).reshape(136)
+            stale = len(self._index) - len(self)
+            hits = self._index.search(probe, eye_distance, k + stale, nprobe=nprobe)
+            if stale:
+                hits = [h for h in hits if h[0] in self]
+        return hits[:k]
+
+    def rebuild_index(self) -> None:
+        """Retrain the gallery index on the current contents."""
+        self._index.rebuild()
+
+
+class _InMemoryProfileStore(_BaseProfileStore):
     """Very simple in-process storage of profiles by UUID."""
 
-    def __init__(self):
-        self._store: Dict[str, Profile] = {}
+    def __init__(self, index: Optional[ExactIndex] = None):
+        super().__init__(index)
+        self._store: Dict[str, ProfileRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, profile_id: str) -> bool:
+        return profile_id in self._store
+
+    def add_many(self, items: Sequence[Tuple[Optional[str], ProfileLike]]) -> List[str]:
+        if not items:
+            return []
+        ids = self._claim_ids([profile_id for profile_id, _ in items])
+        records = [ProfileRecord.coerce(profile) for _, profile in items]
+        with stage("store_add"):
+            self._index.add_many(
+                ids,
+                np.stack([r.landmarks for r in records]).astype(np.float32).reshape(-1, 136),
+                [r.eye_distance for r in records],
+            )
+            for _id, record, (_, profile) in zip(ids, records, items):
+                record.id = profile.id = _id
+                self._store[_id] = record
+        return ids
+
+    def get(self, profile_id: str) -> ProfileRecord:
+        with stage("store_get"):
+            if profile_id not in self._store:
+                raise KeyError(f"Profile '{profile_id}' not found")
+            return self._store[profile_id]
+
+    def set_jitter_faces(self, profile_id: str, jitter_faces: Sequence[bytes]) -> None:
+        self.get(profile_id).jitter_faces = tuple(jitter_faces)
+
+
+def create_profile_store(backend: Optional[str] = None) -> _BaseProfileStore:
+    """Instantiate the backend configured in ``Settings.profile_store_backend``."""
+    backend = backend or settings.profile_store_backend
+    if backend == "memory":
+        return _InMemoryProfileStore()
+    if backend == "mmap":
+        from app.utils.mmap_store import MmapProfileStore
+
+        return MmapProfileStore(settings.profile_store_path)
+    if backend == "shared":
+        from app.utils.shared_store import SharedProfileStore
 
-    def add(self, profile: Profile) -> str:
-        _id = str(uuid.uuid4())
-        profile.id = _id
-        self._store[_id] = profile
-        return _id
+        return SharedProfileStore(settings.profile_store_path)
+    raise ValueError(
+        f"Unknown profile store backend '{backend}' (expected one of {', '.join(STORE_BACKENDS)})"
+    )
 
-    def get(self, profile_id: str) -> Profile:
-        if profile_id not in self._store:
-            raise KeyError(f"Profile '{profile_id}' not found")
-        return self._store[profile_id]
 
+profile_store = create_profile_store()
 
-profile_store = _InMemoryProfileStore()
+metrics.register(
+    "validia_profile_store_size", "gauge", "Profiles in the gallery.", lambda: len(profile_store)
+)
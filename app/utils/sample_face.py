@@ -0,0 +1,169 @@
+import base64
+from functools import lru_cache
+
+# 150×150 aligned face crop (JPEG) bundled for warm-up, benchmarks and tests.
+# Same image as the one written out by ``decode_script.py``.
+_SAMPLE_FACE_B64 = (
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAIBAQEBAQIBAQECAgICAgQDAgICAgUEBAMEBgUGBgYF"
+    "BgYGBwkIBgcJBwYGCAsICQoKCgoKBggLDAsKDAkKCgr/2wBDAQICAgICAgUDAwUKBwYHCgoKCgoK"
+    "CgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgr/wAARCACWAJYDASIA"
+    "AhEBAxEB/8QAHwAAAQUBAQEBAQEAAAAAAAAAAAECAwQFBgcICQoL/8QAtRAAAgEDAwIEAwUFBAQA"
+    "AAF9AQIDAAQRBRIhMUEGE1FhByJxFDKBkaEII0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3"
+    "ODk6Q0RFRkdISUpTVFVWV1hZWmNkZWZnaGlqc3R1dnd4eXqDhIWGh4iJipKTlJWWl5iZmqKjpKWm"
+    "p6ipqrKztLW2t7i5usLDxMXGx8jJytLT1NXW19jZ2uHi4+Tl5ufo6erx8vP09fb3+Pn6/8QAHwEA"
+    "AwEBAQEBAQEBAQAAAAAAAAECAwQFBgcICQoL/8QAtREAAgECBAQDBAcFBAQAAQJ3AAECAxEEBSEx"
+    "BhJBUQdhcRMiMoEIFEKRobHBCSMzUvAVYnLRChYkNOEl8RcYGRomJygpKjU2Nzg5OkNERUZHSElK"
+    "U1RVVldYWVpjZGVmZ2hpanN0dXZ3eHl6goOEhYaHiImKkpOUlZaXmJmaoqOkpaanqKmqsrO0tba3"
+    "uLm6wsPExcbHyMnK0tPU1dbX2Nna4uPk5ebn6Onq8vP09fb3+Pn6/9oADAMBAAIRAxEAPwDBl8H3"
+    "uoaYVsJ4Y1IAmmljIc8dADkHj0rmL3wlJbiRY75yY1IzIAFY9v8A9Qr2XXVsk0eHT9PRWdsnzHUg"
+    "9+g4OM/nWLd+BpEtlubvfuOCFMgXP4dPSvga8Gtj7jBRjJe8eV2Ph65gmW6ithv4w/QZHt/9etaz"
+    "TViBNLaQsinDFVXIP94f55rtNS0RBbs08O0huw4AHf61VsrGNQkEEXyxnLsVHOR3/KuG7TPU9nB7"
+    "IteEtduGsnsrmIwq42JIQSjtxjJwSpz2xir5ilhkVJSgyMEMgH5ZIzVG7tSkyS2VwsRABVQdo6/r"
+    "zV/T7bU72JY3u9+3n5m+ZR7N6e1J1LqzNYYdXuiVGvUcLIscdvxvlJ+cjucKDz/nNFxeWdmx8pFj"
+    "Vc7J9zu4GDzwOD+vNPOgtta6EwRhH8wUnccd8j/GoTY3strsR7nhh800vXpnilznSsO0ZTXlrHA0"
+    "y3Ukq5O0MQo+pzz+PWsi61GyuY/NuL+VZCx2OHLDOfTHH4Vu3OnxkswuBGXO1VmXdz6fSs+a3iJI"
+    "+zRNMoO2VoRtU+oB4z71nKTZvFOGqGrfavZtCDq7SQIpC5k2s5/ibaeo96yr+/uru8826gVJt+xn"
+    "U43Y+64x0qO60zUDdL5srsCNxJ5LH8T/ACq3D4c1K7LyS20pRmyA2OD1zz/KhT0E4XldGff+J9Zs"
+    "HWK5RZ4sf68oDtPpyDxj1q3a669/bqPPeMBsL5QG36EYxVm80OeziEcZP7uLBLEEj1FYximubhYX"
+    "uWMcQ+44wB9BS9oYTpR6o1J54yBEsg2tkuN+xSfXIxg/SoVvBFeIYgwbYMrG+5B9OMn8azfEQSJk"
+    "Bj+Yr8mOKn0yTyBG0Zy+QSCflPsfT8a1w826iRw4yEY0m0dXr3iK78OeHR9otUnjniJXg/kM9O/5"
+    "V9Y/s/XujeLfhjoniGGTzfOsY8OG4JAwScdTXx78S9ZQ/Dx7y2jbdA+Xik6g46EdRx1+gNe+f8E5"
+    "dX1O6/Z2sZNSiZInvro2Kuv/ACy804x6gHI/Cvqsql+9aPi8wXu3PoMp9lbEIwp7LRSMzOBJnIPT"
+    "mivoDyD5J0O2is0OqakhlmYZCn+EdhkdPoOar6/4gvGTyBbRJGGyqxBQ3+P61R1LxhbW9oLfT0WQ"
+    "kYaR5MhT7YqtollquooZLtVKNkqVPrXxFafRH3eFpNR5mQavem9sigTDOOCG/nVfQ4TG8lmMsSAW"
+    "YjIz61qJpexijRBipIGe2Kv6FaWVm3mSYLN0QdSfWvOmerRV2jGfQ5Ip/tFym4/eUBM49KvWs8yA"
+    "Ry2wjAOQSe3+e1dathp2qxfZ5LpYN4AQ4wSaz9S+Dd9dWRew8RKWL8b3wR9MGs1TlLY7IuMHqyK2"
+    "1G0NoTKI9/Qrngj1qONrOFnjs48o45XPI/Wud1v4eeP9JcMkv2kY6Rgk9enSsltQ1y1byry2lV06"
+    "t0PB5FZPni7NHfCVKa3Os1HSllG9F3nPHHT396op4fMoRtyscnLdQR9Kr2vjhfsO63kjAPL71OR/"
+    "nmoLnxXep5f9nCMxScsQOvHtS54idIvR6fpqzAqUd4xh24GG/rilkuraFQ05AC9z1IrldU8UXEP2"
+    "iQfvCrgIB6nvSjT/ABD4jAnundEAOEHcY4zUczk7IluMI3kXL/U7ASSMVRgSfvNkgVgtHBNOZkQr"
+    "833FXiun0L4Wxag4R74jcpaTc3GP6Cn3+gvp9uLPSYRMVBEb4+VgOvNaxo1HHRHBUrUlLV6nF69b"
+    "NPB5kqE4b5GHb2NVtSSyfRIQ940M4J2SlMrnsDj+tdLe2TzWcrS2MkRUfvBIm0cd/euH8d3E+nwx"
+    "eUPlycbSfzFbUIuM9TgxbUoOxd1O8m1XwlPoephUZ4gvnK2RjHDD8iDX3Z8F9B0bwr8MPD2g6Pap"
+    "DFb6RFiNH3BWKqTz3JOTmvz/ANOvhqdj5O5mYRHdE3bjBP69P8a+0f2ZfFF/4k+E2k3wcy7LYRNI"
+    "echcjn3x/KvqMnmnUlF9j47M4OyZ64s86uVUjb1FFZ2naq8qkHAK8Yor6FM8Y+IbbTtUuNUSLz3I"
+    "QqNrcAdOP8+lek+H7R9PtI/tEQwc7iOlUdC0G1ks47ifBdQA4HQt3xWlLqFrDHJaXEo2DIBzjHpX"
+    "w2Ii46n6FhZqWhS12KaLT3vbQEgPyB2BxVXwLc2ytPrOt6eDGvKytIflAPoMfrViS6bR7d7K8kjm"
+    "iul/ctkbTn+HnofSuM+IXxG0vw/pv2eW5eFVcglVAJ45Gc8DpzWSjG92U5SXuxZ2XiX4w+CdKeLz"
+    "rC5UK5J82LKsO+3OMjNc1qn7WvhnSZxbaTIIwjnak9oqgjHs5FfMHxJ/bM8C2OuyafY6dqOrywtt"
+    "aOzhLRR4/wBvGD+Zrh/+G6fAeo6nFp978K7kPcPiN2Tfnp1CjiuiCrP4IaGM/Yx/iVNT720f9rvQ"
+    "NaRD4j0tfsr8GeNQrKR/dBwGH45rA8U/Gfw5rLSz2CQyRMhCTLEB83TDDPUZ/D6Gvjef47eFdTht"
+    "7iPwxHFbXY3RgT+UxGe24YP51D4k+JWjabo8l7pWrXEanDC1lkIBPpz/AEqKsZzdnGzN6DjTjeM9"
+    "D6J1TxXb213cQ290rpI5ESKfer8WsSx20UZwRtwWBwBgV4t8E9K8VfEK6tdWMzeXIoeMc45+o5Nf"
+    "TGlfAa+n0gXtzckN5edo5ryalCXNofQUKrlTTPP7bxzpEN1Lc3YDRqoO3d3B6/hxT3+PNtaaj9tu"
+    "NTiS3hjAdJSN0jZ4wuDmvIf2kbs/C7xBHDeTyBbmYxKqA5kwCeBXlmpfGGwtnmtfD2kSXd8kJkdL"
+    "jMh4HQIDx/wIj8a7sNhrxujyMZiV7Rxk7WPqc/tX6fqGq28FtZXRQplsxlIlY+qr1H8q9D8L/EvS"
+    "bm3jv7m8jluHU8QSSDJ6gABeBX53WH7YPxUTVlsrT4Uo0Spua4MQwFA5OD39uTXqehftA/FmGJNQ"
+    "t/h3JqSmBZpVtLcgR5GduWA5Ar0J08RSWqX3o8mEsNWlpJ/cz7U1W8t/E+lTRNeCBynDM+VBPXHH"
+    "PXv+VeU/FbSprSOOFpg4jYbmXpkjisj4KftQWXjTRE+3WQsHQ7biwuYFDxt3Ug9D711nxEuIPEGn"
+    "KEhMTylCiEfdXoDmuKT5pLTU6nFxi0npY4XQPtceppKx2rChYluhzwAfx5/Cvrr/AIJ3/EC2bQdd"
+    "+HWtQhmtrgXVhJvzmJgFKkdsMM/8Cr5RtrGSSOGGHIl34dMc8Hp+fNfW37DfwoWy8T33iCeZfKj0"
+    "3ynYd3Zgf/Za9PK3OGMjyngZiouhLmPbglvPfyug2j1WitmWx0S3zCkwDBuSDRX1fLc+cufLGkRQ"
+    "/Yo7sDPnqHX0XPIFZWqTaXeu9vqFyYGXkHy+nPpXQWNgb3w6ktqPk2ndt/gYH/CsHUjoupX01oNN"
+    "a7KKNxwVA5z1/wAK+NrLnSZ9xQbg2jD1DwnqfiS3kttIvrFLMH5ruaWVSW9h04+teW/FT9mzxXrY"
+    "EV/4ovLvTi2ZI7WFvnQYO0knJB6cdq9ftL9INSKahbr5qf8AHvaov7u3TsNo4LfWtx9G8SeI7USQ"
+    "WzWkXTMpyzfh0FeVKpJSdj2YUIyirnkPhr4V/CG3sgraJaW5hhAmHkDp0yV6j0Pv9asy/BL4E6sW"
+    "ki0zR2APys1sMfmQfyrufEHwNvtYdLu8gvBcIpK3MEvlnGOQdvDD2Oa4fWP2RPFt4xm0TxTeWanO"
+    "Un2tyT/s7cVtTrztsV9Sb+BnLeMPhZ8IdI02eAraIoG3EUa8+4x2rm/BvwH8BeJ7CaSLRAbQKVi3"
+    "REFz67SMHp1r0bR/2Omsn+3+KvFt5fPFyYYpNiA/nXWeGrHT9Fn+ywwCKKIBFAGelFSvKHka0sHz"
+    "v3+hh/BD4X2XgOa3srKMhI4whQnIB7Y9K+kobaH/AIQ3fbsRIYSBxg44rz7SNMiikF1aqp811EgK"
+    "+teiaGrRaQ0U4L7VIyegrenFcr80dTSikl0PlP8AaF+DPh/4geI7aHVbVTNCCyMWPykqeuPWvLLX"
+    "4JeGPA+ppc6hBBAjyEM6QSdPYqP519SeIbS1m8U3BFuNwTgkdhXN3Pgz+0Jzby2itGTykqZBz9a4"
+    "I1501ZEPC061Tm6nEeGx8ELdY45tQaaTj93HYiQ/QZTNddbf8IXeJ9k8O+Hrm4bGAstuqKnoSoAH"
+    "/fVaWm/s6eG9TVb1rIxOrZ2xzMqk/QHFdNF4Bu9CtljsoMRRrgqpzg1rUq1FC9jOGATfvM8rvf2e"
+    "vBel3Nx4s1rSre01C8bMc8K7grdtx6E/hjtXLeJNR8QeGQ15dXMU0sdxFGEEO1QhYA8d8ivbtRkt"
+    "9TtZdM1W3BiY4Kk85FeQfGuzgWykgW9YC2dZGc9QFYYz68cVnCreSdzlr0EnZIt+D9HOt+PINLlT"
+    "HmXSgbWxncFYD9a+zfhVpOoeFtJaxsW2lzmVh3Pp+HSvkP4EQx678YvC0wZfLutQtyRu/u4zkfQV"
+    "94bNP0YmFFBXPBFfT5Ko1OeoujsfIZ7GVGUIPqrlGDS9Rkle4edgW6jNFWW8S6aWMKMCVPI9KK9/"
+    "Q+fuz5v+Fes3k3w/iuNWsxa3Ui7ryBjkI+SCPpxx9aeJItKsrrVRlJ5+UG37o7fTrTdKsL2yu7/T"
+    "b5sbZVcJGflGRwPfFcn4l8QTyalPZwPvWLt2J5r4n2j9krn33s0qrDwzdRtrEk0sOWMxLSsck+/0"
+    "r1PwzrVkLZobqXLZyFI5ryPR47y3tpbqRFDbwqgnqAMn9TU9r4wktJCjXaqAT8obkc+teXUfJqe1"
+    "h1Gb1Z9B6fq+lSxLBJIuGXjPJqn4g1LQbS3/AHdxGCDlgW4x9a8Yb4lzW0TFLrKKOSrc1ynjX4zW"
+    "8Vk8ct7GuV4LvkA+/rTpY5wVrXPQWDitbnpnjP4keH7CKdGuo4o1UlcOBxXz9e/tN6bH43k8N6Do"
+    "UkyA4knCFlBB615T8ZvjR4r8V2cugeB7RrmZv9Y8a5C9utesfsSeAPDPhz4YprHjgI+o3srT3TXC"
+    "guD2XnkADHFaK9X3p6HPWqJVOSm/U+hvhJ4j0jxro0V00QbzTh+MYIx1r2mzWxsdCeNY1yEIGQOR"
+    "jjrXi/w51fwroN7crpSwSR3EwdQjjC5HOK67WvEbvbrEZimRiQq3y7RXdQnyUnrqZunKbRx/xFgs"
+    "7B77XLRNzeSWUAcFs9vxrw/wt+09oM3iSfw940s3sLi2bDIy4Y88cH+dfQHxFuNMi0O2vPPRIDKv"
+    "yFsswz3z0HFfMX7afw+8D6/DZ/EPwZqCw6xERBcLERiReSCQPTH5GuGVOLTu9UNVfZ1ND6L8J/Ez"
+    "wfq2kolhcqQ5yjb8kfWtK/8AElja8RXKMr4GA2a/P74XfHfWNI1AaHqsjQTQPtYByA+K+gPCnxNO"
+    "r6aL970FgvftWNWrUUeVo9Gm6E48yZ6b4kkt2R3xxyQxP+FeS+JLNPEPiiTSdUWSW2kg3TInUqCC"
+    "en0rWuviAl3B5bXnTPOaZ8P5rW98cRXNypkjls5VwT3GD/Ws6V2jzsXbnVj0D9nT4dXH/C4tMh07"
+    "TsQ6ZE9zGwBOE2YU5+pH519K61qd3AxiuGJI7CuR/ZG0y2ludd1VAC8VpFaRSY9SXYfotdLq6Xku"
+    "uSW0sZKucKcV9tkdH2eAUv5m3+n6H5/xBWdXMXD+VJfr+pntfp55uEjYblwRiitVbTTrVdlyhBHA"
+    "4xRXsHiHzL8IL7x3caRqviLxiIxJeukltArlzEgXGC3r34qjJZm4uZDGpaRZO3fNcl+yz8S7/wAV"
+    "/Dm7TVZizEK8RLE5TJH9MV3fh6SOa4uPMXLKcgYr4dck4R5Nj9OzXA18szGrhqzvKLtdaHO/EHX7"
+    "nRdPGmWTEOqjc4PQf49a8x1XxfqdoS8pJwcksetegeOfLkJuAuAHYlT3PpXk/jlZXVrfzmLNklFI"
+    "wO46V59SzdmVQbWqI/EXxdS2tme5vFjVQdzZ/n6V5zrni3W/Hk/2HTFeO2Zsmdh94f7I/rWLfeGt"
+    "S1nXJL/xRO6afbSYhtz0fH8TDv8AyrsPDHifwJa3JEM8TFBt2hxt6dqqFCKemprUxUmrM6/4N+EX"
+    "0OJHhsg6tw8smMnP865n4y3HxL8KarcXXgnUk2u5YRSkhc9x8teo+BfF2hXeni2hRI2Evykcb1x2"
+    "NO8aaJo2q2ovLXMgAySOTnvk1drMlVOZWSPGvg1+1L8QvCV62j/EWzKJKQYp4pCVyO3PSvVbn9sS"
+    "MXSwyXsp3HJIcgEZFebeOPh/POXePTBJv6EdBXIQfC7XYbtQltIc8qu44/KnKNGet7FU6+KpRslc"
+    "9e+In7VniLxVbHS/C9uzyFgiPM2RGPX3+lUvDlvrWvxONWvWmlIyB0rn/Cvw2mguES7XY2QzBuma"
+    "9K0nw7Z6dpn2mPVIImAwzSSYK1NoLSJnKVaU+aR4f8Xfh5qMF/8A2xp0Xk3EbcuB1+tN+HXxT1W0"
+    "jfR7+Vo5IWxLHnp3/KvUfEXirwob/wCw397Bcp90hSDk+ted6v4Pgn+JdjqelwKLS7gaKQKuOhBB"
+    "/nVSUXHVE05z59Gdjofiu71S6FuLjepOcA5OK9j+CXhH4geO/EUWmfD/AEQXl1DC/nySyhI4IzgG"
+    "Rye2cDjJya810v4Z2fhmdddtp8gr8wboPpX0t/wTfiuNR+LOrW9vKdr+H5TIM9f30eKeDo08RiY0"
+    "3s2ZZjiKmGw8q0d4o94+CPguX4b6Qvhu3vmmnLGW7uP+esrdT9OMD2Arqry01B78SCLPPpzTNc8O"
+    "aj4dv/tcBOCc8VNYeLWSZTfQ8j+LbX31KnClBQirJbH5vVqzrVHUk7t7mZr9nqayqWt2Kkdh3orp"
+    "rzxXoj4DqHPsKK1djO7Pyu/ZA8ULHcX3hyORQy2BdYd4wpDDIx265r2vwn4nUaxJbykZk3DO71Bx"
+    "Xiv/AATc+DF38TP2lPHXgLSIJJrnwv4WvGurhW+RLzeqRRehJw/5V2kN7daX4saKeT51c793BUg9"
+    "K+HpUK1GjF1Fa+x+0cc5hluP4nrSwdRTSsm1tzdUn1t373N3xpIGQ+S5Vh94McY55rj20eO5vVuZ"
+    "4AFc4Ygdfz9a2dZ19JbpohPtJXPC5B9qyLSUST7FuGB4DZbOBmvOqRakePRl7iZhfEDwNpU0AFrG"
+    "Nzy/OByMYrzT4i/sO2PxJ0pr/wAJ65d6RqUYDRXFpMUDnqAQDgjNe/DwwmqSKiAmMDcu411Gg6Ib"
+    "ZT5DjheVOPlIp0a9SjK8WaToUq8XzI+K/BPgT45/B7UrXw/4/wBY1EQxq+NScGSGbj5SSeRzXuvg"
+    "f4ffGPxB4V0nWNA1G11A6lLsZInwIzgnPuOOlewz6lp1ujQeILGK6tnyskMqDjscHtW/4U8E/DnV"
+    "1tdQ8I+I5tKubc74ljfZtfoSR0PB7jvXqQq4fEv30k/uOaOBrU1+5qNeT1X+Z4lP8Gf2iZNfutKH"
+    "h9pfscSNI7SAKSxPTj0FM8D/AAd+MXjPWrnTE8OPC9lcGGeW5fC52g/Lxzwfavo03nxk8N6ncTaT"
+    "4jsdSFyOTLbqxAUYGSpFZGh+L/jr4Zv7yaDT9FeS5m81/kYbdwA9fb9ac6OChJKRjKGdxbSs/M8q"
+    "0v8AZF+LM9hYa5rmvw20FzqUsF0iAkpGA+CpPf5fTvXzB8dvht8W/HHjBvhp8LvGuoNGt4ftmqRP"
+    "sS3jV2BXcuOwHFfdWveIviPeaNb6R49+IVulrbTyTm20i1VHfdu+UsSTwGPTFec2VloWiW76V4Z0"
+    "ZLe03liP45DydzN1Y1nPFYelrSjr5ipYLF1JNYifyT/Nnjvgn9mvT/h34ai0/wDtWfUb0qDd319M"
+    "XeV+5BOcD0FdrNoOl6ZpMM0dqvmxY2SA8jNbmrxXF6FVc/KSy7V6Ckittix+ZCrMTk7myBxXnTqS"
+    "qu8j0VCFHSKMbUJ7p7FEd2HGdrHPFfR3/BNm5n0zxzruvrGBHb6ZHbue255Nw/RK+b9a1BPPd4x8"
+    "qcHjqfSvsL9hf4dXPhv4NL4qvYSs3iK8a7GVwREvyRj8cFv+BV6OTUnUx8Wvs3Z4+eVlTy+Sf2rJ"
+    "f18j6O1zX7G/QO7ryOmKyn0/S9VGyKQBh3rPu9PleMMrMBjnApttZS2kDTozg44yK+2bufBWXQ04"
+    "fAVo3zte8n0NFY8Wr6vubdMeDgZoovENT5x/4N4/gleeE/2V9X+O/iNfN1Xx/wCIJbn7TLy7W0JM"
+    "a5J55k81v+BVw/7aPwqufhJ8f9VtYl2Wd9ObyykC4GyQlsD1wcj8K+xP+CWnhS38LfsE/DHRbZFA"
+    "HhK1lcDu0i+Yx/NjU/7cn7N0Xx18Ai90iBRrekKz2R/57IeWjP5ZHv8AWuDMMO69G63Wp3ZdiVh6"
+    "+uz0Pzgm1VVcTMm4KMYFaEWk3FzbC9tLVgsiFlZj19q5y+t7/RNTl0XU4ZIJ4ZSsiSLghgehFdn4"
+    "B8WaY6pp9/8AMjHsvKmvj8RTtK59vh6l4WOp+HVtaXttHLqI/eKxUrGAMfWu61fwuotEvrODa6r2"
+    "A+YdM157Y6jB4X1aVJpsQy/NFI0XDfWvTvB+v6d4mthaOY5JYwA8eePr1rlcbHo0akZaHLX/AIfi"
+    "u4JILuA7yOPl5Nef+J/Dnirw5cF9OnbaTiNefzyOa95bw3bz3Etu4ABXPBGM+x9akTwZ4X1liLmy"
+    "SRm4IDk4/KiMZTdkdrpx5ea58xXHj34k6U/2aEXAZOuw9qls/iJ8T764Ja3nVJBhpH4z+NfR8/wS"
+    "8Bmcwt4eJP8AE/zE8epqjq3wd8Jwaebi0sCqjqrMxonScVsNKUn8R4VCuvXrq+qXrDPJXrWzpul3"
+    "d2hiSNsAfex0Ht+dd9B8PtKQfZlsihJLIcE5+lX4PD1lpVrwi4bAOO1ZJybsZypxgm2cRL4ct9Ms"
+    "RNffI0i43MOnpzXD+IGkF8NLtmLyuxwAcgD1rtPin4pt0uP7IsJhKVQABBkkntXIapGvg3w9Jc3j"
+    "r/aF0C0zMQdv+yD7fzrVRsjilUUpWRX+GPwv1D4wfFvRvhZpcr4ubkG/uF6RQL80jfgoOPciv098"
+    "P6B4b0TRbfw/YWyRW1nbpDbxoMBEUAAD8BXzF+wH8EJ/AfgeT4t+JIHTWPEaZtkkHMFnnKY7gv8A"
+    "ePttr6CXUWgO9pCa+zybC/VsPzyXvS/LofC53jPrWJ5Iv3Y6fPqb8lrpduCuzI7gmq9wdJSFikJI"
+    "7+1ZJ1b7QdjHOamhvLcjyTzuHNewpHi2Hw/2DdqVaULtPeisXX/D9ypW405zhzyKKfNboFmUP+CS"
+    "HjGDxr+wZ8N9Tjk3GLw3Dbyc5w0WYyP/AB2voHxLY5jLL6dq+Bf+Ddn4t2/i39kR/AUtzm48O6vN"
+    "AUJ+6jnzF/D5q/QjUUFxCQVBNVXp8k2jKE7s+J/22f2PrL4ivL4/8BWkdvraEtcwKAFu8d/Z/fv3"
+    "r4o1Oy1fwVrrWesWMltNDJiaF0IZSOK/XTxVou8tvTr7V84/tPfsveH/AItaXJdWcSWurQoTbXSp"
+    "97j7reoP6V87jcFGd2tz6HL8xlRajLY+Pl1qHVdLCz3DOBgq277tVdK+ImseBNbiuoWLx7uMdx7/"
+    "AONY3izwj4u+F/iCbQtcspbeSKQhw3Q+49R71lanqcF5AYnclhxu9K8CVFx91o+op1oytOLPpDTv"
+    "jdpeswW979oXcU/eDdwM46VuReP9Kidb6zuWlAyzAt8yn09K+SNP1zUNLbbbT4UcfNW7pfxWurPH"
+    "22cqyrwEOMmsJUasXdHqUcZTejZ9b6d8UZL7d50igFgcMRU994+0toxbabPDJJ5ZYKrDC+or5Ovf"
+    "jddTwiGC5eIKPlw/Jq5/wt6O0so5rUMz4BeR26+wrO+I2sd3tcPvc9yuviPFEGklIeVSRtB4Hvmu"
+    "S8Y/Fyw0/SHWzuN9zMCI0Qg4Y14vq/xZ1rUptgLBWOCUPJFJZ6oEYanqD/vB/q4s5x7mrjQmtWeZ"
+    "iMYptqJ2GhBbASeIddnDzHMg3/w57Vztp8a/hLdftI+Dfh38VNYENlreqJE0IGcjPy+Zn7qO4VCf"
+    "c+leofs6/sw+Ov2j9Rj13VHm03wtDMPtGoOCGucdUhH8Xu3Qe54r4M/4K0fDnTvgh+39rmheEIJL"
+    "OyXT9PuNMUSMTGPIUbgxOc70Jz6k17eXZc69VTqfCvx/4B8xmOaKhB06fxP8P+Cfuct7DHCkFvEs"
+    "cSIEiRFwqqBgAegxQ1wjx5DV+YH7Nn/BcfxRoOh2Hhv47eAYtWgt4Uhk1bSpfLuCFAG5kbKucDJw"
+    "Rmvtb4Kft6fsr/H+2jTwH8TrSG+kHOl6mwtrgH0CucN/wEmvqXFo+W0PZfOKjK9++aFvGLBlJG08"
+    "Gq9rMJovMXDKRww5BoSYI5BB9uKQGvZ+IAqmO5ydvSisG4usS5GaKpSJsj80f+Dd34x6z4W/aR1/"
+    "4Wx73sdZ0tblkzwksThd34h/0r9w0cTRB8ckUUV3YtJKL8jkg/fZia/aI6Fj3rhfEOlRMWwR35oo"
+    "rycQlY7ae54t8dvgn4Q+JejPZ61aKs8YPk3aKN8Z9j3Hsa+FPiv8N3+HviW50OW9Sdo2+WVARleo"
+    "yDRRXh4qMb3se/l0535b6HLeRDPGIpF5Az0rntd0/ZITHMy/3QG6UUVx2S2PXTbZQsLe5ac+ZfyE"
+    "H8a2LSFBgNcStj1Ioop2QOT2NiC2t7YbkQluzE8173+xt+y7o3xf1g+LfGt6sum2coP9nITmY9cM"
+    "f7vsKKKqjGMqyTRzYupOGGbiz730TTNP0uyg0rS7OO3tbWIJBbwoFVFAwAAOlfif/wAHBVjHYftz"
+    "2N5FgNc+DbR2IHcSzL/IUUV9HhvjPkp6nxzo13J5eCetalvdTwst1bTNHInIZDgg+oxRRXorczPd"
+    "fgP/AMFJ/wBrD4DPDaaB8RrjU9OiwBpetk3EOPQbvmX8DX3J+y7/AMFidA+Mes2fg34gfCe9sdUu"
+    "GCG60idJIGb12yMrKPxNFFVOEew03c+2dPey1XTodTtkcLMu5RIACB+BooorCyLsj//Z"
+)
+
+
+@lru_cache(maxsize=1)
+def sample_face_jpeg() -> bytes:
+    """Return the bundled sample face as JPEG bytes."""
+    return base64.b64decode(_SAMPLE_FACE_B64)
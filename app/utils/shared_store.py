@@ -0,0 +1,317 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.profile_record import ProfileRecord
+from app.utils.ann_index import ExactIndex, Hit, _top_k
+from app.utils.face_compare import landmark_distances
+from app.utils.mmap_store import MmapProfileStore
+from app.utils.profile_store import ProfileLike
+from app.utils.stage_timer import stage
+
+# Shared header kept in ``count.<g>`` (little-endian u64 slots); slot 0 is
+# the committed row count that MmapProfileStore already uses
+_COUNT, _VERSION, _SUCCESSOR, _BLOB_END = range(4)
+_HEADER_SLOTS = 4
+
+# Ids enrolled since the last sort are looked up in a dict; past this many
+# (or an eighth of the gallery) they are merged into the sorted order
+_RECENT_MAX = 4096
+
+
+class _MappedIndex(ExactIndex):
+    """Brute-force search straight over the store's mapped landmark column.
+
+    Holds no copy of the gallery: ``vectors`` and ``eye_distances`` are views
+    of the shared files, so every worker scores against the same pages.
+    Deleted rows are masked out; ids are decoded for the hits only.
+    """
+
+    kind = "exact"
+
+    def __init__(self, store: "SharedProfileStore"):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store._count
+
+    @property
+    def vectors(self) -> np.ndarray:
+        n = self._store._count
+        return np.asarray(self._store._landmarks.array[:n]).reshape(n, 136)
+
+    @property
+    def eye_distances(self) -> np.ndarray:
+        return np.asarray(self._store._rows.array["eye_distance"][: self._store._count])
+
+    def add_many(self, ids: Sequence[str], vectors: np.ndarray, eye_distances: Sequence[float]) -> None:
+        """Nothing to do: rows are searchable as soon as the store commits them."""
+
+    def search(self, probe: np.ndarray, probe_eye: float, k: int, nprobe: Optional[int] = None) -> List[Hit]:
+        store = self._store
+        n = store._count
+        dist = landmark_distances(self.vectors, self.eye_distances, probe, probe_eye)
+        dist[store._rows.array["deleted"][:n] != 0] = np.inf
+        top = [i for i in _top_k(dist, k) if np.isfinite(dist[i])]
+        ids = store._ids.array
+        return [(ids[i].decode("ascii"), float(dist[i])) for i in top]
+
+
+class SharedProfileStore(MmapProfileStore):
+    """``MmapProfileStore`` shared by every worker process on one host.
+
+    All workers map the same column files, so the gallery (landmark matrix,
+    ids and metrics) sits in the page cache once however many workers run;
+    searches scan the mapped landmarks directly (``_MappedIndex``) instead of
+    copying them into a per-process index.
+
+    Protocol:
+
+    * **One writer at a time** – adds, deletes, jitter updates and
+      compaction hold an exclusive ``flock`` on ``LOCK``. The writer first
+      catches up with the shared state, then writes and commits exactly like
+      ``MmapProfileStore`` and finally bumps the header version.
+    * **Lock-free readers** – the count file carries a small shared header
+      (committed count, version, successor generation, blob end). Every
+      call compares the mapped version with the one last seen; a changed
+      version maps any grown columns and indexes only the new rows, so an
+      enrollment is visible to every worker on its next request.
+    * **Compaction** – the writer builds the next generation, then sets the
+      old header's successor slot; readers see it and re-open the new files
+      (under a shared lock, so they never race a writer).
+
+    Processes must share a local filesystem (``flock`` and mmap coherence).
+    """
+
+    def __init__(self, path: str, fsync: Optional[bool] = None):
+        os.makedirs(path, exist_ok=True)
+        self._lock_fd = os.open(os.path.join(path, "LOCK"), os.O_RDWR | os.O_CREAT, 0o644)
+        self._header: Optional[np.memmap] = None
+        with self._locked(fcntl.LOCK_SH):
+            super().__init__(path, index=_MappedIndex(self), fsync=fsync)
+
+    # ---------------------------------------------------------------- locking
+    @contextmanager
+    def _locked(self, mode: int) -> Iterator[None]:
+        fcntl.flock(self._lock_fd, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the writer lock, starting from the latest committed state."""
+        with self._locked(fcntl.LOCK_EX):
+            self._refresh(locked=True)
+            # Drop bytes a crashed writer appended but never committed
+            if os.fstat(self._blobs.fileno()).st_size != self._blob_end:
+                self._blobs.truncate(self._blob_end)
+            yield
+            self._publish()
+
+    def _publish(self) -> None:
+        header = self._header
+        header[_BLOB_END] = self._blob_end
+        header[_VERSION] += 1
+        if self._fsync:
+            header.flush()
+        self._version = int(header[_VERSION])
+
+    # ------------------------------------------------------------------ files
+    def _open_generation(self) -> None:
+        super()._open_generation()
+        count_path = self._file("count")
+        if os.path.getsize(count_path) < _HEADER_SLOTS * 8:
+            with open(count_path, "r+b") as fh:
+                fh.truncate(_HEADER_SLOTS * 8)
+        self._header = np.memmap(count_path, dtype="<u8", mode="r+", shape=(_HEADER_SLOTS,))
+
+    def _write_count(self, count: int) -> None:
+        header = self._header
+        header[_BLOB_END] = self._blob_end
+        header[_COUNT] = count
+        if self._fsync:
+            header.flush()
+        self._count = count
+
+    def _load(self) -> None:
+        header = self._header
+        n = self._count = int(header[_COUNT])
+        rows = self._rows.array[:n]
+        blob_end = int(header[_BLOB_END])
+        if n and not blob_end:
+            # Store written by MmapProfileStore: derive it from the rows
+            blob_end = int((rows["blob_offset"] + rows["blob_length"]).max())
+        self._blob_end = blob_end
+        self._version = int(header[_VERSION])
+        self._deleted = int(rows["deleted"].sum()) if n else 0
+        self._sort_ids()
+
+    def close(self) -> None:
+        super().close()
+        self._header = None
+
+    def __del__(self):
+        try:
+            os.close(self._lock_fd)
+        except (AttributeError, OSError):
+            pass
+
+    # ---------------------------------------------------------------- refresh
+    def _refresh(self, locked: bool = False) -> None:
+        """Catch up with commits made by other processes."""
+        header = self._header
+        if header[_SUCCESSOR]:
+            self._reopen(locked)
+            return
+        if int(header[_VERSION]) == self._version:
+            return
+        old, new = self._count, int(header[_COUNT])
+        if new > old:
+            for col in self._columns():
+                if col.capacity < new:
+                    col._map(os.path.getsize(col.path) // col.row_bytes)
+            ids = [raw.decode("ascii") for raw in self._ids.array[old:new].tolist()]
+            self._count = new
+            self._remember(ids, old)
+        self._blob_end = int(header[_BLOB_END]) or self._blob_end
+        self._deleted = int(self._rows.array["deleted"][: self._count].sum())
+        self._version = int(header[_VERSION])
+
+    def _reopen(self, locked: bool) -> None:
+        """Follow a compaction to the current generation."""
+        super().close()
+        if locked:
+            self._generation = self._read_current()
+            self._open_generation()
+            self._load()
+            return
+        with self._locked(fcntl.LOCK_SH):
+            self._generation = self._read_current()
+            self._open_generation()
+            self._load()
+
+    def refresh(self) -> None:
+        """Pick up other workers' changes now (normally done on every call)."""
+        self._refresh()
+
+    # ---------------------------------------------------------------- lookups
+    def _sort_ids(self) -> None:
+        """Order committed rows by id for binary search; start a new recent set."""
+        n = self._count
+        self._sorted = np.argsort(self._ids.array[:n], kind="stable")
+        self._sorted_count = n
+        self._recent: Dict[str, int] = {}
+
+    def _find(self, profile_id: str) -> Optional[int]:
+        i = self._recent.get(profile_id)
+        if i is None and self._sorted_count:
+            try:
+                key = np.array(profile_id.encode("ascii"), dtype=self._ids.dtype)
+            except UnicodeEncodeError:
+                return None
+            ids = self._ids.array[: self._sorted_count]
+            # An id deleted and added again has several rows; the stable sort
+            # keeps them in commit order, so walk back from the newest
+            deleted = self._rows.array["deleted"]
+            pos = int(np.searchsorted(ids, key, side="right", sorter=self._sorted)) - 1
+            while pos >= 0 and ids[self._sorted[pos]] == key:
+                row = int(self._sorted[pos])
+                if not deleted[row]:
+                    return row
+                pos -= 1
+            return None
+        if i is None or self._rows.array["deleted"][i]:
+            return None
+        return i
+
+    def _row(self, profile_id: str) -> int:
+        i = self._find(profile_id)
+        if i is None:
+            raise KeyError(f"Profile '{profile_id}' not found")
+        return i
+
+    def _remember(self, ids: List[str], start: int) -> None:
+        self._recent.update(zip(ids, range(start, start + len(ids))))
+        if len(self._recent) > max(_RECENT_MAX, self._count // 8):
+            self._sort_ids()
+
+    def _on_committed(self, ids: List[str], start: int, landmarks: np.ndarray, eye: np.ndarray) -> None:
+        self._remember(ids, start)
+
+    # ------------------------------------------------------------- interface
+    def __len__(self) -> int:
+        self._refresh()
+        return self._count - self._deleted
+
+    def __contains__(self, profile_id: str) -> bool:
+        self._refresh()
+        return self._find(profile_id) is not None
+
+    def add_many(self, items: Sequence[Tuple[Optional[str], ProfileLike]]) -> List[str]:
+        with self._writing():
+            return super().add_many(items)
+
+    def get(self, profile_id: str) -> ProfileRecord:
+        self._refresh()
+        return super().get(profile_id)
+
+    def set_jitter_faces(self, profile_id: str, jitter_faces: Sequence[bytes]) -> None:
+        with self._writing():
+            super().set_jitter_faces(profile_id, jitter_faces)
+
+    def delete(self, profile_id: str) -> None:
+        with self._writing():
+            i = self._row(profile_id)
+            self._rows.array["deleted"][i] = 1
+            self._rows.flush()
+            self._deleted += 1
+
+    def search(
+        self,
+        landmarks: Sequence[Tuple[int, int]],
+        eye_distance: float,
+        k: int = 5,
+        nprobe: Optional[int] = None,
+    ) -> List[Hit]:
+        self._refresh()
+        if self._count == self._deleted or k <= 0:
+            return []
+        with stage("store_search"):
+            probe = np.asarray(landmarks, dtype=np.float32).reshape(136)
+            return self._index.search(probe, eye_distance, k)
+
+    def _sorted_ids(self) -> List[str]:
+        self._refresh()  # before the cache key is taken
+        return super()._sorted_ids()
+
+    def _indexed_ids(self, start: int = 0) -> List[str]:
+        return [raw.decode("ascii") for raw in self._ids.array[start : self._count].tolist()]
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        self._refresh()
+        n = self._count
+        live = np.flatnonzero(self._rows.array["deleted"][:n] == 0)
+        ids = [raw.decode("ascii") for raw in self._ids.array[:n][live].tolist()]
+        vectors = self._landmarks.array[:n][live].reshape(-1, 136).astype(np.float32)
+        return ids, vectors, self._rows.array["eye_distance"][:n][live].astype(np.float32)
+
+    def rebuild_index(self) -> None:
+        """Nothing to retrain: the shared backend always searches exhaustively."""
+
+    def compact(self) -> int:
+        with self._locked(fcntl.LOCK_EX):
+            self._refresh(locked=True)
+            old_header = self._header
+            old_generation = self._generation
+            reclaimed = super().compact()
+            self._index = _MappedIndex(self)
+            if self._generation != old_generation:
+                # Readers still on the old files follow this to the new ones
+                old_header[_SUCCESSOR] = self._generation
+                old_header.flush()
+        return reclaimed
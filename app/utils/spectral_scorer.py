@@ -0,0 +1,198 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.utils.stage_timer import stage
+
+# Features computed per chip, in the order the model's vectors use
+FEATURES = ("hf_ratio", "mhf_ratio", "spectral_slope", "hf_tail_excess", "blockiness")
+
+# Built-in weights, used unless Settings.deepfake_model_path points at a JSON
+# file with the same keys. They were fitted (class-balanced logistic
+# regression) on chips of the bundled sample face and its jitters against
+# re-sampled, blurred and heavily re-compressed variants of them: a
+# heuristic artifact scorer, not a trained deepfake classifier.
+DEFAULT_MODEL: Dict[str, Any] = {
+    "features": list(FEATURES),
+    "mean": [-3.98112, -2.60055, -4.86207, 0.14054, 0.29966],
+    "scale": [0.42419, 0.37218, 0.41145, 0.31232, 0.25593],
+    "weights": [-0.4939, 0.1704, 0.1697, 1.7742, 0.5404],
+    "bias": 1.0784,
+    "threshold": 0.5,
+    "bins": 16,
+    "size": 150,
+}
+
+# ITU-R BT.601 luma, chips are BGR like every image in the pipeline
+_LUMA_BGR = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+class SpectralModel:
+    """Logistic model over frequency-domain features of face chips.
+
+    ``score`` takes a stack of chips (N×H×W grayscale or N×H×W×3 BGR, all
+    the same size) and scores them together: every step below is one
+    vectorized NumPy operation over the whole stack, so a single image, a
+    batch of uploads and the faces of a video share the same code path.
+
+    Features per chip, after resizing to ``size`` pixels and a Hann window:
+
+    * ``hf_ratio`` / ``mhf_ratio`` – log10 share of spectral power above half
+      and between a quarter and half of the Nyquist frequency
+    * ``spectral_slope`` – slope of log power against log frequency over the
+      radially averaged spectrum (``bins`` rings); natural images fall off
+      at about -2, re-sampled ones faster
+    * ``hf_tail_excess`` – how far the outer rings sit above that fit
+      (up-sampling and sharpening leave periodic high-frequency peaks)
+    * ``blockiness`` – gradient energy on the strongest 8-pixel grid phase
+      relative to the other phases (JPEG blocking from re-compression)
+    """
+
+    def __init__(self, params: Dict[str, Any]):
+        if list(params["features"]) != list(FEATURES):
+            raise ValueError(f"Model features {params['features']} do not match {list(FEATURES)}")
+        self.mean = np.asarray(params["mean"], dtype=np.float32)
+        self.scale = np.asarray(params["scale"], dtype=np.float32)
+        self.weights = np.asarray(params["weights"], dtype=np.float32)
+        self.bias = float(params["bias"])
+        self.threshold = float(params["threshold"])
+        self.bins = int(params["bins"])
+        self.size = int(params["size"])
+        self._ring_matrix = _ring_matrix(self.size, self.bins)
+        self._window = np.outer(np.hanning(self.size), np.hanning(self.size)).astype(np.float32)
+
+    @classmethod
+    def load(cls, path: str) -> "SpectralModel":
+        """Read model parameters from a JSON file (same keys as ``DEFAULT_MODEL``)."""
+        with open(path) as fh:
+            return cls(json.load(fh))
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "features": list(FEATURES),
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "weights": self.weights.tolist(),
+            "bias": self.bias,
+            "threshold": self.threshold,
+            "bins": self.bins,
+            "size": self.size,
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as fh:
+            json.dump(self.params(), fh, indent=2)
+
+    def features(self, chips: np.ndarray) -> np.ndarray:
+        """N×len(FEATURES) feature matrix of a chip stack."""
+        gray = _gray_stack(chips, self.size)
+        blockiness = _blockiness(gray)
+
+        centred = gray - gray.mean(axis=(1, 2), keepdims=True)
+        # Real input: the half spectrum carries all of it at half the cost
+        power = np.abs(np.fft.rfft2(centred * self._window)) ** 2
+        n = len(gray)
+        rings = power.reshape(n, -1) @ self._ring_matrix  # mean power per ring
+        total = rings.sum(axis=1) + 1e-12
+        bins = self.bins
+        hf = np.log10(rings[:, bins // 2 :].sum(axis=1) / total + 1e-12)
+        mhf = np.log10(rings[:, bins // 4 : bins // 2].sum(axis=1) / total + 1e-12)
+
+        # Least-squares line through (log f, log power) for every chip at once
+        log_f = np.log(np.arange(1, bins + 1, dtype=np.float32))
+        log_p = np.log(rings + 1e-12)
+        fx = log_f - log_f.mean()
+        slope = (log_p - log_p.mean(axis=1, keepdims=True)) @ fx / (fx @ fx)
+        fitted = log_p.mean(axis=1, keepdims=True) + slope[:, None] * fx
+        tail = (log_p - fitted)[:, -max(1, bins // 4) :].mean(axis=1)
+
+        return np.stack([hf, mhf, slope, tail, blockiness], axis=1).astype(np.float32)
+
+    def score(self, chips: np.ndarray) -> np.ndarray:
+        """Probability-like artifact score in [0, 1] for every chip of the stack."""
+        with stage("spectral_score"):
+            z = (self.features(chips) - self.mean) / self.scale
+            logits = z @ self.weights + self.bias
+            return 1.0 / (1.0 + np.exp(-logits))
+
+
+def _ring_matrix(size: int, bins: int) -> np.ndarray:
+    """Matrix averaging an ``rfft2`` power map (flattened) per frequency ring."""
+    fy = np.fft.fftfreq(size)
+    fx = np.fft.rfftfreq(size)
+    radius = np.hypot(fy[:, None], fx[None, :]) / 0.5  # 1.0 at Nyquist
+    ring = np.minimum((radius * bins).astype(np.int64), bins).ravel()  # corners beyond Nyquist → dropped
+    # Columns other than DC (and Nyquist for even sizes) stand for two
+    # mirrored coefficients of the full spectrum
+    weight = np.full(fx.shape, 2.0, dtype=np.float32)
+    weight[0] = 1.0
+    if size % 2 == 0:
+        weight[-1] = 1.0
+    weight = np.broadcast_to(weight, radius.shape).ravel().copy()
+    weight[0] = 0.0  # DC
+    matrix = np.zeros((radius.size, bins + 1), dtype=np.float32)
+    matrix[np.arange(radius.size), ring] = weight
+    matrix = matrix[:, :bins]
+    return matrix / np.maximum(matrix.sum(axis=0), 1.0)
+
+
+def _gray_stack(chips: np.ndarray, size: int) -> np.ndarray:
+    """float32 N×size×size luma stack."""
+    stack = np.asarray(chips)
+    if stack.ndim == 4:
+        stack = stack.astype(np.float32) @ _LUMA_BGR
+    else:
+        stack = stack.astype(np.float32)
+    if stack.shape[1:] != (size, size):
+        stack = np.stack([cv2.resize(img, (size, size), interpolation=cv2.INTER_AREA) for img in stack])
+    return stack
+
+
+def _blockiness(gray: np.ndarray) -> np.ndarray:
+    """Strongest 8-pixel-grid phase of horizontal+vertical gradient energy over the mean phase."""
+    n = len(gray)
+    dx = np.abs(np.diff(gray, axis=2)).mean(axis=1)  # N×(W-1)
+    dy = np.abs(np.diff(gray, axis=1)).mean(axis=2)  # N×(H-1)
+    cols, rows = (dx.shape[1] // 8) * 8, (dy.shape[1] // 8) * 8
+    phases = dx[:, :cols].reshape(n, -1, 8).mean(axis=1) + dy[:, :rows].reshape(n, -1, 8).mean(axis=1)
+    return phases.max(axis=1) / (phases.mean(axis=1) + 1e-6) - 1.0
+
+
+_model: Optional[SpectralModel] = None
+
+
+def get_model() -> SpectralModel:
+    """The configured model, loaded once per process."""
+    global _model
+    if _model is None:
+        path = settings.deepfake_model_path
+        _model = SpectralModel.load(path) if path else SpectralModel(DEFAULT_MODEL)
+    return _model
+
+
+def score_image(image_bytes: bytes) -> float:
+    """Artifact score of a whole image (centre square), for images without a usable face.
+
+    Raises:
+        ValueError: If the bytes cannot be decoded.
+    """
+    gray = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("Provided bytes do not represent a valid image")
+    h, w = gray.shape
+    side = min(h, w)
+    top, left = (h - side) // 2, (w - side) // 2
+    return float(get_model().score(gray[None, top : top + side, left : left + side])[0])
+
+
+def score_chips(chips: Sequence[np.ndarray]) -> List[float]:
+    """Artifact scores for equally sized chips, in batches of ``deepfake_batch_size``."""
+    model = get_model()
+    batch = max(1, settings.deepfake_batch_size)
+    out: List[float] = []
+    for i in range(0, len(chips), batch):
+        out.extend(model.score(np.stack(chips[i : i + batch])).tolist())
+    return out
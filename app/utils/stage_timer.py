@@ -0,0 +1,55 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Mapping, Optional
+
+# Stage → milliseconds of the innermost active ``record_stages()`` block
+_current: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def record_stages() -> Iterator[Dict[str, float]]:
+    """Collect the ``stage()`` timings of everything run inside the block.
+
+    Timings are per context, so concurrent requests on other threads or
+    tasks do not mix; run the block in the worker that does the work.
+    """
+    timings: Dict[str, float] = {}
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def add_stages(timings: Mapping[str, float]) -> None:
+    """Merge timings measured elsewhere (e.g. in a pool worker) into the active block."""
+    current = _current.get()
+    if current is None:
+        return
+    for name, ms in timings.items():
+        current[name] = current.get(name, 0.0) + ms
+
+
+class _Stage:
+    __slots__ = ("_name", "_timings", "_start")
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._timings = _current.get()
+        if self._timings is not None:
+            self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> bool:
+        timings = self._timings
+        if timings is not None:
+            ms = (time.perf_counter() - self._start) * 1000
+            timings[self._name] = timings.get(self._name, 0.0) + ms
+        return False
+
+
+def stage(name: str) -> _Stage:
+    """Time a pipeline stage; a near no-op unless ``record_stages()`` is active."""
+    return _Stage(name)
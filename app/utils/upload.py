@@ -0,0 +1,99 @@
+import os
+import tempfile
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.utils.image_header import HEADER_BYTES, sniff_image
+
+# Uploads are read in chunks of this size (never with one unbounded read)
+CHUNK_BYTES = 1024 * 1024
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=detail)
+
+
+def _check_header(view: memoryview) -> None:
+    """Reject images whose header reports more pixels than allowed."""
+    limit = settings.image_max_megapixels
+    header = sniff_image(view)
+    # Unparseable headers pass: the decoder reports invalid data as a 400
+    if limit and header is not None and header.megapixels > limit:
+        raise _too_large(
+            f"Image is {header.width}x{header.height} ({header.megapixels:.1f} MP); "
+            f"at most {limit:g} MP accepted"
+        )
+
+
+def _read_limited(stream: BinaryIO, size_hint: Optional[int], max_bytes: int) -> bytearray:
+    """Read ``stream`` into one preallocated buffer, enforcing the limits as it goes."""
+    capacity = size_hint or CHUNK_BYTES
+    if max_bytes:
+        # One byte over the limit is enough to tell that it was exceeded
+        capacity = min(capacity, max_bytes + 1)
+    buf = bytearray(capacity)
+    n = 0
+    header_checked = False
+    while True:
+        if n < len(buf):
+            with memoryview(buf) as whole, whole[n:] as free:
+                got = stream.readinto(free)
+        else:
+            # Full (the usual case once the declared size is read): only grow
+            # when there is more data, and then by appending what was read
+            extra = stream.read(CHUNK_BYTES)
+            buf += extra
+            got = len(extra)
+        if not got:
+            break
+        n += got
+        if max_bytes and n > max_bytes:
+            raise _too_large(f"Upload exceeds {max_bytes} bytes")
+        if not header_checked and n >= HEADER_BYTES:
+            with memoryview(buf) as whole, whole[:n] as head:
+                _check_header(head)
+            header_checked = True
+    del buf[n:]
+    if not header_checked:
+        with memoryview(buf) as whole:
+            _check_header(whole)
+    return buf
+
+
+async def read_image(file: UploadFile, max_bytes: Optional[int] = None) -> bytearray:
+    """Read an image upload, rejecting oversized files before they are decoded.
+
+    The body is streamed into a single buffer sized from the part's length,
+    which the decoder then wraps without copying. Uploads over ``max_bytes``
+    (default ``Settings.upload_max_bytes``) and images whose header reports
+    more than ``Settings.image_max_megapixels`` fail with 413 while reading.
+    """
+    limit = settings.upload_max_bytes if max_bytes is None else max_bytes
+    if limit and file.size is not None and file.size > limit:
+        raise _too_large(f"Upload exceeds {limit} bytes")
+    await file.seek(0)
+    return await run_in_threadpool(_read_limited, file.file, file.size, limit)
+
+
+async def spool_upload(file: UploadFile, max_bytes: int) -> str:
+    """Stream an upload into a named temporary file and return its path."""
+    suffix = os.path.splitext(file.filename or "")[1] or ".bin"
+    fd, path = tempfile.mkstemp(prefix="validia-", suffix=suffix)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(f"Upload exceeds {max_bytes} bytes")
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
@@ -0,0 +1,223 @@
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import dlib
+import numpy as np
+
+from app.core.config import settings
+from app.utils.face_analyzer import _detect_faces, _load_predictor
+from app.utils.head_pose import estimate_poses
+from app.utils.spectral_scorer import score_chips
+
+# Per-frame landmark flicker (fraction of the eye distance) that maps to a
+# score of 1 - 1/e ≈ 0.63; smooth head motion stays well below it
+_FLICKER_SCALE = 0.035
+
+Frame = Tuple[int, np.ndarray]
+
+
+def iter_frames(path: str) -> Iterator[Frame]:
+    """Yield ``(index, gray)`` frames one at a time, at detection resolution.
+
+    Frames are decoded lazily from disk and downscaled so their longest side
+    is at most ``detect_max_side``; the whole video is never held in memory.
+
+    Raises:
+        ValueError: If the file cannot be opened as a video.
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError("Provided bytes do not represent a readable video")
+        index = 0
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            h, w = gray.shape
+            max_side = settings.detect_max_side
+            if max_side and max(h, w) > max_side:
+                scale = max_side / max(h, w)
+                gray = cv2.resize(
+                    gray,
+                    (max(1, round(w * scale)), max(1, round(h * scale))),
+                    interpolation=cv2.INTER_AREA,
+                )
+            yield index, gray
+            index += 1
+    finally:
+        cap.release()
+
+
+class FaceTracker:
+    """Locate one face per frame, running HOG detection only when needed.
+
+    A full detection runs every ``detect_every`` frames, when no face is
+    being tracked, or when the correlation tracker's confidence (peak to
+    sidelobe ratio) drops below ``min_confidence``. In between, dlib's
+    correlation tracker follows the box, re-seeded from the landmarks of
+    the last frame so it does not drift off the face.
+    """
+
+    def __init__(self, detect_every: int, min_confidence: float):
+        self.detect_every = max(1, detect_every)
+        self.min_confidence = min_confidence
+        self._tracker: Optional[dlib.correlation_tracker] = None
+        self._since_detect = 0
+        self.detections = 0
+
+    def locate(self, gray: np.ndarray) -> Tuple[Optional[dlib.rectangle], bool]:
+        """Return ``(rect, tracked)``; ``rect`` is None when no face is found."""
+        if self._tracker is not None and self._since_detect < self.detect_every:
+            confidence = self._tracker.update(gray)
+            if confidence >= self.min_confidence:
+                self._since_detect += 1
+                pos = self._tracker.get_position()
+                return (
+                    dlib.rectangle(
+                        int(pos.left()), int(pos.top()), int(pos.right()), int(pos.bottom())
+                    ),
+                    True,
+                )
+
+        self.detections += 1
+        self._since_detect = 1
+        rects = _detect_faces(gray)
+        if not rects:
+            self._tracker = None
+            return None, False
+        rect = max(rects, key=lambda r: r.area())
+        self.seed(gray, rect)
+        return rect, False
+
+    def seed(self, gray: np.ndarray, rect: dlib.rectangle) -> None:
+        if self._tracker is None:
+            self._tracker = dlib.correlation_tracker()
+        self._tracker.start_track(gray, rect)
+
+
+def _normalized_shape(points: np.ndarray) -> np.ndarray:
+    """Centre landmarks and scale them by the outer-eye-corner distance."""
+    eye_distance = float(np.linalg.norm(points[36] - points[45])) or 1.0
+    return (points - points.mean(axis=0)) / eye_distance
+
+
+def _landmark_rect(points: np.ndarray, like: dlib.rectangle) -> dlib.rectangle:
+    """Detector-sized box centred on the landmarks (for re-seeding the tracker)."""
+    cx, cy = points.mean(axis=0)
+    half_w, half_h = like.width() / 2.0, like.height() / 2.0
+    return dlib.rectangle(
+        int(cx - half_w), int(cy - half_h), int(cx + half_w), int(cy + half_h)
+    )
+
+
+def _flush_chips(chips: List[np.ndarray], frames: List[Dict[str, Any]]) -> None:
+    """Score the pending chips as one stack and empty both lists."""
+    for frame, value in zip(frames, score_chips(chips)):
+        frame["artifact_score"] = value
+    chips.clear()
+    frames.clear()
+
+
+def analyze_video(
+    path: str,
+    detect_every: Optional[int] = None,
+    min_track_confidence: Optional[float] = None,
+    max_frames: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Score a video frame by frame for landmark flicker.
+
+    Pipeline: ``iter_frames`` (decode) → ``FaceTracker`` (detect or track) →
+    landmarks → per-frame score. The score is a temporal-consistency
+    heuristic: the mean landmark displacement between consecutive frames
+    after removing translation and scale, mapped to 0–1. Face-swap
+    artefacts show up as jitter that real head motion does not produce.
+    Each face is also aligned into a chip and, a stack of
+    ``deepfake_batch_size`` chips at a time, given the spectral artifact
+    score of ``/detect-deepfake`` (``artifact_score``). Head poses of all
+    face frames are estimated in one batch at the end.
+
+    Raises:
+        ValueError: If the video is unreadable or no frame contains a face.
+        RuntimeError: If the predictor model cannot be loaded.
+    """
+    predictor = _load_predictor()
+    tracker = FaceTracker(
+        detect_every or settings.video_detect_every,
+        settings.video_min_track_confidence if min_track_confidence is None else min_track_confidence,
+    )
+    max_frames = settings.video_max_frames if max_frames is None else max_frames
+
+    frames = []
+    # Chips waiting to be scored and the frames they belong to
+    chips: List[np.ndarray] = []
+    chip_frames: List[Dict[str, Any]] = []
+    # Landmarks of every face frame, for the batched head-pose estimate
+    face_points: List[np.ndarray] = []
+    face_frames: List[Dict[str, Any]] = []
+    frame_size = (0, 0)
+    previous: Optional[np.ndarray] = None
+    tracked_frames = 0
+    start = time.perf_counter()
+    for index, gray in iter_frames(path):
+        if max_frames and index >= max_frames:
+            break
+        rect, tracked = tracker.locate(gray)
+        if rect is None:
+            previous = None
+            frames.append(
+                {
+                    "index": index, "face_found": False, "tracked": False, "score": None, "artifact_score": None,
+                    "yaw": None, "pitch": None, "roll": None,
+                }
+            )
+            continue
+
+        shape = predictor(gray, rect)
+        points = np.array([(p.x, p.y) for p in shape.parts()], dtype=np.float32)
+        tracked_frames += tracked
+        if tracked:
+            tracker.seed(gray, _landmark_rect(points, rect))
+
+        current = _normalized_shape(points)
+        score = None
+        if previous is not None:
+            flicker = float(np.linalg.norm(current - previous, axis=1).mean())
+            score = float(1.0 - np.exp(-flicker / _FLICKER_SCALE))
+        previous = current
+        frame = {"index": index, "face_found": True, "tracked": tracked, "score": score, "artifact_score": None}
+        frames.append(frame)
+        face_points.append(points)
+        face_frames.append(frame)
+        frame_size = (gray.shape[1], gray.shape[0])
+
+        chips.append(dlib.get_face_chip(gray, shape, size=150))
+        chip_frames.append(frame)
+        if len(chips) >= settings.deepfake_batch_size:
+            _flush_chips(chips, chip_frames)
+    _flush_chips(chips, chip_frames)
+    if face_points:
+        for frame, (yaw, pitch, roll) in zip(face_frames, estimate_poses(np.stack(face_points), frame_size).tolist()):
+            frame.update(yaw=yaw, pitch=pitch, roll=roll)
+    elapsed = time.perf_counter() - start
+
+    if not frames:
+        raise ValueError("Provided bytes do not represent a readable video")
+    faces_found = sum(f["face_found"] for f in frames)
+    if not faces_found:
+        raise ValueError("No face detected in the video")
+
+    scores = [f["score"] for f in frames if f["score"] is not None]
+    artifacts = [f["artifact_score"] for f in frames if f["artifact_score"] is not None]
+    return {
+        "frames": frames,
+        "frames_analyzed": len(frames),
+        "faces_found": faces_found,
+        "detections": tracker.detections,
+        "tracked_frames": tracked_frames,
+        "confidence": float(np.mean(scores)) if scores else 0.0,
+        "artifact_confidence": float(np.mean(artifacts)) if artifacts else None,
+        "fps": len(frames) / elapsed if elapsed > 0 else 0.0,
+    }
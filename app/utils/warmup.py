@@ -0,0 +1,73 @@
+import time
+from typing import Any, Dict, Optional
+
+from app.utils import face_analyzer, spectral_scorer
+from app.utils.sample_face import sample_face_jpeg
+
+
+class Readiness:
+    """Model preload / warm-up state of this process, reported by ``/ready``.
+
+    ``warm_up()`` loads the dlib detector, the landmark model and the
+    spectral deepfake model, then runs one full ``analyze_face`` on the
+    bundled sample face so the first caller does not pay for the model read
+    or for first-touch allocations. Called before the analysis pool forks,
+    the loaded models are shared copy-on-write with every worker process.
+    """
+
+    def __init__(self):
+        self._t0 = time.monotonic()
+        self.ready = False
+        self.error: Optional[str] = None
+        self.model_load_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        # Seconds from process start (module import) to the first profile
+        # successfully returned to a caller
+        self.first_profile_s: Optional[float] = None
+
+    def warm_up(self) -> bool:
+        """Load and exercise the model; returns whether the process is ready.
+
+        A missing model is recorded rather than raised so the app still starts
+        (``/ping`` keeps answering and analysis endpoints return 500).
+        """
+        start = time.perf_counter()
+        try:
+            face_analyzer._load_predictor()
+        except RuntimeError as exc:
+            self.ready, self.error = False, str(exc)
+            return False
+        try:
+            spectral_scorer.get_model()
+        except (OSError, ValueError, KeyError) as exc:
+            self.ready, self.error = False, f"Unable to load deepfake model: {exc}"
+            return False
+        loaded = time.perf_counter()
+        try:
+            face_analyzer.analyze_face(sample_face_jpeg())
+        except (ValueError, RuntimeError) as exc:
+            self.ready, self.error = False, f"Warm-up inference failed: {exc}"
+            return False
+        done = time.perf_counter()
+
+        self.model_load_ms = (loaded - start) * 1000
+        self.warmup_ms = (done - loaded) * 1000
+        self.ready, self.error = True, None
+        return True
+
+    def profile_served(self) -> None:
+        if self.first_profile_s is None:
+            self.first_profile_s = time.monotonic() - self._t0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "starting" if self.error is None else "unavailable",
+            "detail": self.error,
+            "model_load_ms": self.model_load_ms,
+            "warmup_ms": self.warmup_ms,
+            "first_profile_s": self.first_profile_s,
+            "uptime_s": time.monotonic() - self._t0,
+        }
+
+
+readiness = Readiness()
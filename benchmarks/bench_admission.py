@@ -0,0 +1,109 @@
+"""Interactive latency under a bulk enrollment burst, with and without priorities.
+
+Drives a thread-backed ``AnalysisExecutor`` with a job that holds a worker
+for ``--job-ms`` (standing in for ``analyze_face``). A burst of ``--bulk``
+enrollment calls arrives at once, then ``--interactive`` verification calls
+arrive spread over the time the burst takes to drain. Scenarios:
+
+* ``fifo`` – every call at the same priority and no queue limit (how the
+  pool behaved before admission control)
+* ``priority`` – bulk calls at ``Priority.BULK``, verification calls at
+  ``Priority.INTERACTIVE``, default queue limits (``ANALYSIS_MAX_WAITING``)
+
+Reported per class: p50/p99 latency in ms and calls refused with 503.
+
+Usage::
+
+    python -m benchmarks.bench_admission [--bulk 300] [--interactive 30] [--workers 2] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils.admission import Overloaded, Priority, prioritized
+from app.utils.executor import AnalysisExecutor
+
+
+def _job(ms: float) -> None:
+    time.sleep(ms / 1000)
+
+
+async def _call(executor: AnalysisExecutor, priority: Priority, job_ms: float, delay: float) -> Optional[float]:
+    await asyncio.sleep(delay)
+    start = time.perf_counter()
+    try:
+        async with prioritized(priority):
+            await executor.run(_job, job_ms)
+    except Overloaded:
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def _summary(name: str, scenario: str, latencies: List[Optional[float]]) -> Dict:
+    done = np.array([ms for ms in latencies if ms is not None])
+    return {
+        "scenario": scenario,
+        "class": name,
+        "calls": len(latencies),
+        "p50_ms": float(np.percentile(done, 50)) if done.size else None,
+        "p99_ms": float(np.percentile(done, 99)) if done.size else None,
+        "refused": len(latencies) - int(done.size),
+    }
+
+
+async def _scenario(scenario: str, n_bulk: int, n_interactive: int, workers: int, job_ms: float) -> List[Dict]:
+    executor = AnalysisExecutor()
+    executor.start(backend="thread", workers=workers)
+    if scenario == "fifo":
+        executor.admission.max_waiting = 0
+        executor.admission.max_wait = 0
+    bulk_priority = Priority.NORMAL if scenario == "fifo" else Priority.BULK
+    urgent_priority = Priority.NORMAL if scenario == "fifo" else Priority.INTERACTIVE
+    drain = n_bulk * job_ms / workers / 1000
+    try:
+        bulk = [_call(executor, bulk_priority, job_ms, 0.0) for _ in range(n_bulk)]
+        urgent = [_call(executor, urgent_priority, job_ms, drain * (i + 0.5) / n_interactive) for i in range(n_interactive)]
+        results = await asyncio.gather(*bulk, *urgent)
+    finally:
+        executor.shutdown()
+    return [
+        _summary("bulk", scenario, results[:n_bulk]),
+        _summary("interactive", scenario, results[n_bulk:]),
+    ]
+
+
+def run(n_bulk: int, n_interactive: int, workers: int, job_ms: float) -> List[Dict]:
+    rows = []
+    for scenario in ("fifo", "priority"):
+        rows += asyncio.run(_scenario(scenario, n_bulk, n_interactive, workers, job_ms))
+    return rows
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bulk", type=int, default=300)
+    parser.add_argument("--interactive", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--job-ms", type=float, default=20.0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.bulk, args.interactive, args.workers, args.job_ms)
+    print(f"{'scenario':>8} {'class':>11} {'calls':>5} {'p50 ms':>9} {'p99 ms':>9} {'refused':>7}")
+    for r in rows:
+        print(f"{r['scenario']:>8} {r['class']:>11} {r['calls']:5d} {_fmt(r['p50_ms'])} {_fmt(r['p99_ms'])} {r['refused']:7d}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Recall@k and queries/second of the gallery indexes as the gallery grows.
+
+Synthetic galleries mimic landmark data: one template shape placed at a
+random position and scale per face, with an identity-specific deformation.
+Queries are noisy re-captures of enrolled faces. Ground truth is the
+exact ``compare_profiles`` distance (``ExactIndex``).
+
+Usage::
+
+    python -m benchmarks.bench_ann [--sizes 10000 100000 1000000] [--nprobe 4 8 16]
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils.ann_index import ExactIndex, IVFIndex
+
+
+def make_gallery(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    template = rng.uniform(-1, 1, size=(68, 2)).astype(np.float32)
+    # Per-face position, scale and identity-specific shape deformation
+    scale = rng.uniform(60, 200, n).astype(np.float32)
+    offset = rng.uniform(100, 900, size=(n, 2)).astype(np.float32)
+    identity = rng.normal(0, 0.05, (n, 68, 2)).astype(np.float32)
+    shapes = (template[None] + identity) * scale[:, None, None] + offset[:, None, :]
+    eye = (1.2 * scale).astype(np.float32)
+    return shapes.reshape(n, 136), eye
+
+
+def run(sizes: List[int], nprobes: List[int], k: int, queries: int) -> List[Dict]:
+    rows = []
+    for n in sizes:
+        vectors, eye = make_gallery(n)
+        ids = [str(i) for i in range(n)]
+        rng = np.random.default_rng(1)
+        q_idx = rng.integers(0, n, queries)
+        probes = vectors[q_idx] + rng.normal(0, 1.5, (queries, 136)).astype(np.float32)
+
+        exact = ExactIndex()
+        exact.add_many(ids, vectors, eye)
+        t0 = time.perf_counter()
+        truth = [exact.search(p, eye[i], k) for p, i in zip(probes, q_idx)]
+        exact_qps = queries / (time.perf_counter() - t0)
+        rows.append({"gallery": n, "index": "exact", "nprobe": None, "recall": 1.0, "qps": exact_qps})
+
+        ivf = IVFIndex(min_train_size=1)
+        t0 = time.perf_counter()
+        ivf.add_many(ids, vectors, eye)
+        ivf.join_training()
+        build_s = time.perf_counter() - t0
+        for nprobe in nprobes:
+            t0 = time.perf_counter()
+            found = [ivf.search(p, eye[i], k, nprobe=nprobe) for p, i in zip(probes, q_idx)]
+            qps = queries / (time.perf_counter() - t0)
+            recall = np.mean(
+                [len({h[0] for h in f} & {h[0] for h in t}) / len(t) for f, t in zip(found, truth)]
+            )
+            rows.append(
+                {
+                    "gallery": n,
+                    "index": "ivf",
+                    "nprobe": nprobe,
+                    "nlist": len(ivf._lists),
+                    "build_s": build_s,
+                    "recall": float(recall),
+                    "qps": qps,
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.nprobe, args.k, args.queries)
+    print(f"{'gallery':>9} {'index':>6} {'nprobe':>6} {f'recall@{args.k}':>10} {'qps':>9}")
+    for r in rows:
+        nprobe = "-" if r["nprobe"] is None else r["nprobe"]
+        print(f"{r['gallery']:>9} {r['index']:>6} {nprobe:>6} {r['recall']:10.3f} {r['qps']:9.1f}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Gallery-wide duplicate scan: tiled self-join against one-probe-at-a-time search.
+
+Builds a synthetic gallery of ``--profiles`` landmark sets (one template face
+at random positions, scales and jitter, like faces framed differently in
+their photos) with ``--dupes`` planted re-enrollments, and finds every pair
+within ``--threshold``:
+
+* ``brute force`` – what calling ``landmark_distances`` for each profile
+  against the rest costs, timed on ``--sample`` rows and extrapolated
+* ``tiled`` – ``gallery_dedup.find_duplicates`` in this process
+* ``tiled pool`` – the same over a process pool of ``--workers``
+  (default: one per core)
+
+No model needed.
+
+Usage::
+
+    python -m benchmarks.bench_dedup [--profiles 100000] [--threshold 0.02] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.models.profile_record import ProfileRecord
+from app.utils import gallery_dedup as gd
+from app.utils.executor import analysis_executor
+from app.utils.face_compare import landmark_distances
+from app.utils.profile_store import _InMemoryProfileStore
+
+
+def make_gallery(n: int, dupes: int, seed: int = 0) -> _InMemoryProfileStore:
+    rng = np.random.default_rng(seed)
+    face = rng.normal(0, 40, (1, 68, 2))
+    position = rng.uniform(80, 560, (n, 1, 2))
+    scale = rng.uniform(0.6, 1.4, (n, 1, 1))
+    vectors = face * scale + position + rng.normal(0, 3, (n, 68, 2))
+    eye = 60 * scale.ravel()
+    originals = rng.choice(n - dupes, dupes, replace=False)
+    vectors[n - dupes :] = vectors[originals] + rng.normal(0, 0.3, (dupes, 68, 2))
+    eye[n - dupes :] = eye[originals]
+    store = _InMemoryProfileStore()
+    store.add_many(
+        [(f"p{k}", ProfileRecord(landmarks=v, eye_distance=float(e), yaw=0.0)) for k, (v, e) in enumerate(zip(vectors, eye))]
+    )
+    return store
+
+
+def _brute_force(store: _InMemoryProfileStore, sample: int) -> float:
+    _, vectors, eye = store.snapshot()
+    n = len(eye)
+    rows = np.linspace(0, n - 2, sample).astype(int)
+    start = time.perf_counter()
+    for a in rows:
+        landmark_distances(vectors[a + 1 :], eye[a + 1 :], vectors[a], eye[a])
+    # Rows scan n - a - 1 others: the sample is spread evenly, so scale by rows
+    return (time.perf_counter() - start) * (n - 1) / sample
+
+
+def _tiled(store: _InMemoryProfileStore, threshold: float) -> Dict:
+    progress = gd.DedupProgress(threshold)
+    start = time.perf_counter()
+    clusters = asyncio.run(gd.find_duplicates(store, threshold, progress=progress))
+    return {
+        "seconds": time.perf_counter() - start,
+        "pairs": progress.pairs,
+        "clusters": len(clusters),
+        "scored": progress.work_total,
+    }
+
+
+def run(n_profiles: int, dupes: int, threshold: float, sample: int, workers: int) -> List[Dict]:
+    store = make_gallery(n_profiles, dupes)
+    all_pairs = n_profiles * (n_profiles - 1) // 2
+    rows = [{"mode": "brute force", "workers": 1, "seconds": _brute_force(store, sample), "pairs": None, "clusters": None, "scored": all_pairs}]
+    rows.append({"mode": "tiled", "workers": 1, **_tiled(store, threshold)})
+    analysis_executor.start(backend="process", workers=workers or None)
+    try:
+        rows.append({"mode": "tiled pool", "workers": analysis_executor.workers, **_tiled(store, threshold)})
+    finally:
+        analysis_executor.shutdown()
+    for r in rows:
+        r.update(profiles=n_profiles, threshold=threshold, scored_fraction=r["scored"] / all_pairs)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=100_000)
+    parser.add_argument("--dupes", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=0.02)
+    parser.add_argument("--sample", type=int, default=200, help="Rows timed for the brute-force estimate")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.profiles, args.dupes, args.threshold, args.sample, args.workers)
+    print(f"{'mode':>11} {'profiles':>8} {'workers':>7} {'seconds':>9} {'scored':>8} {'pairs':>6} {'clusters':>8}")
+    for r in rows:
+        pairs = "-" if r["pairs"] is None else str(r["pairs"])
+        clusters = "-" if r["clusters"] is None else str(r["clusters"])
+        print(
+            f"{r['mode']:>11} {r['profiles']:8d} {r['workers']:7d} {r['seconds']:9.2f} "
+            f"{r['scored_fraction']:8.2%} {pairs:>6} {clusters:>8}"
+        )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
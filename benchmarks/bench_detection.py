@@ -0,0 +1,107 @@
+"""Compare legacy full-resolution HOG detection with the adaptive policy.
+
+Builds deterministic synthetic scenes by pasting the bundled sample face at
+several sizes onto textured canvases of several resolutions, then reports
+per-image latency and recall (IoU ≥ 0.3 with the pasted box) for
+
+* ``legacy``   – ``_detector(gray, 1)`` on the full image (previous behaviour)
+* ``adaptive`` – ``face_analyzer._detect_faces`` (current behaviour)
+
+Usage::
+
+    python -m benchmarks.bench_detection [--repeat 3] [--json out.json]
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from app.utils import face_analyzer as fa
+from app.utils.sample_face import sample_face_jpeg
+
+RESOLUTIONS = [(640, 480), (1280, 960), (1920, 1440), (4032, 3024)]
+# Face size as a fraction of the image's shorter side
+FACE_FRACTIONS = [0.15, 0.3, 0.5]
+
+Box = Tuple[int, int, int, int]
+
+
+def make_scene(width: int, height: int, face_frac: float, seed: int = 0) -> Tuple[np.ndarray, Box]:
+    """Return a grayscale scene with the sample face pasted at a known box."""
+    rng = np.random.default_rng(seed)
+    canvas = rng.integers(90, 170, size=(height // 8 + 1, width // 8 + 1), dtype=np.uint8)
+    canvas = cv2.resize(canvas, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_GRAYSCALE)
+    # The bundled chip is a tight crop; pad it so HOG sees some context
+    face = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    side = max(32, int(min(width, height) * face_frac))
+    face = cv2.resize(face, (side, side), interpolation=cv2.INTER_AREA)
+
+    x = int(rng.integers(0, width - side))
+    y = int(rng.integers(0, height - side))
+    canvas[y : y + side, x : x + side] = face
+    inner = int(side * 40 / 230)  # remove the padding from the ground-truth box
+    return canvas, (x + inner, y + inner, x + side - inner, y + side - inner)
+
+
+def _iou(a: Box, b: Box) -> float:
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def _legacy(gray: np.ndarray):
+    return fa._detector(gray, 1)
+
+
+def run(repeat: int = 3) -> List[Dict]:
+    policies = {"legacy": _legacy, "adaptive": fa._detect_faces}
+    rows = []
+    for width, height in RESOLUTIONS:
+        scenes = [make_scene(width, height, f, seed=i) for i, f in enumerate(FACE_FRACTIONS)]
+        for name, detect in policies.items():
+            hits = 0
+            timings = []
+            for gray, box in scenes:
+                best = float("inf")
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    rects = detect(gray)
+                    best = min(best, time.perf_counter() - t0)
+                timings.append(best)
+                found = [(r.left(), r.top(), r.right(), r.bottom()) for r in rects]
+                hits += any(_iou(box, f) >= 0.3 for f in found)
+            rows.append(
+                {
+                    "resolution": f"{width}x{height}",
+                    "policy": name,
+                    "mean_ms": 1000 * float(np.mean(timings)),
+                    "recall": hits / len(scenes),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.repeat)
+    print(f"{'resolution':>12} {'policy':>9} {'mean ms':>9} {'recall':>7}")
+    for r in rows:
+        print(f"{r['resolution']:>12} {r['policy']:>9} {r['mean_ms']:9.1f} {r['recall']:7.2f}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Head-pose throughput: batched POSIT against one ``cv2.solvePnP`` call per face.
+
+Projects the reference face at ``--faces`` random poses (yaw ±60°, pitch
+±40°, roll ±30°, random position in a 1280×720 frame) and times:
+
+* ``solvePnP loop`` – ``cv2.solvePnP`` (iterative) and ``cv2.Rodrigues``
+  per face, what a per-request implementation costs
+* ``batched B`` – ``head_pose.estimate_poses`` on stacks of ``B`` faces
+  (``B=1`` is the single-face path of ``/verify-face``)
+
+and reports poses per second and the mean and worst angle error (the
+iterative ``solvePnP`` occasionally settles on a flipped solution). No model
+needed.
+
+Usage::
+
+    python -m benchmarks.bench_head_pose [--faces 20000] [--json out.json]
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from app.utils import head_pose as hp
+
+SIZE = (1280, 720)
+
+
+def make_faces(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    poses = rng.uniform((-60, -40, -30), (60, 40, 30), (n, 3))
+    focal, cx, cy = hp.camera_intrinsics(*SIZE)
+    landmarks = np.zeros((n, 68, 2))
+    for k, (yaw, pitch, roll) in enumerate(np.radians(poses)):
+        rx = np.array([[1, 0, 0], [0, np.cos(pitch), -np.sin(pitch)], [0, np.sin(pitch), np.cos(pitch)]])
+        ry = np.array([[np.cos(yaw), 0, np.sin(yaw)], [0, 1, 0], [-np.sin(yaw), 0, np.cos(yaw)]])
+        rz = np.array([[np.cos(roll), -np.sin(roll), 0], [np.sin(roll), np.cos(roll), 0], [0, 0, 1]])
+        shift = (rng.uniform(-400, 400), rng.uniform(-200, 200), rng.uniform(2500, 6000))
+        cam = hp._MODEL @ (rz @ ry @ rx).T + shift
+        landmarks[k, hp._MODEL_INDICES] = focal * cam[:, :2] / cam[:, 2:] + (cx, cy)
+    landmarks += rng.normal(0, 0.5, landmarks.shape)  # sub-pixel landmark noise
+    return landmarks, poses
+
+
+def _solve_pnp(landmarks: np.ndarray) -> np.ndarray:
+    focal, cx, cy = hp.camera_intrinsics(*SIZE)
+    camera = np.array([[focal, 0, cx], [0, focal, cy], [0, 0, 1]])
+    rotations = np.empty((len(landmarks), 3, 3))
+    for k, points in enumerate(landmarks):
+        _, rvec, _ = cv2.solvePnP(
+            hp._MODEL, points[hp._MODEL_INDICES], camera, None, flags=cv2.SOLVEPNP_ITERATIVE
+        )
+        rotations[k] = cv2.Rodrigues(rvec)[0]
+    return hp.rotation_to_euler(rotations)
+
+
+def _batched(batch: int) -> Callable[[np.ndarray], np.ndarray]:
+    def solve(landmarks: np.ndarray) -> np.ndarray:
+        return np.concatenate(
+            [hp.estimate_poses(landmarks[i : i + batch], SIZE) for i in range(0, len(landmarks), batch)]
+        )
+
+    return solve
+
+
+def run(n_faces: int, batches: List[int]) -> List[Dict]:
+    landmarks, truth = make_faces(n_faces)
+    modes = {"solvePnP loop": (1, _solve_pnp)}
+    modes.update({f"batched {b}": (b, _batched(b)) for b in batches})
+    rows = []
+    for mode, (batch, solve) in modes.items():
+        # The per-face paths are slow: time them on a slice
+        count = n_faces if batch >= 64 else min(n_faces, 2000)
+        solve(landmarks[:batch])  # warm-up
+        start = time.perf_counter()
+        poses = solve(landmarks[:count])
+        seconds = time.perf_counter() - start
+        rows.append(
+            {
+                "mode": mode,
+                "batch": batch,
+                "faces": count,
+                "poses_per_s": count / seconds,
+                "us_per_pose": seconds / count * 1e6,
+                "mean_error_deg": float(np.abs(poses - truth[:count]).mean()),
+                "max_error_deg": float(np.abs(poses - truth[:count]).max()),
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--faces", type=int, default=20_000)
+    parser.add_argument("--batches", default="1,16,256,4096", help="Comma-separated stack sizes")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.faces, [int(b) for b in args.batches.split(",")])
+    print(f"{'mode':>14} {'faces':>6} {'poses/s':>10} {'µs/pose':>8} {'mean err°':>9} {'max err°':>8}")
+    for r in rows:
+        print(
+            f"{r['mode']:>14} {r['faces']:6d} {r['poses_per_s']:10.0f} "
+            f"{r['us_per_pose']:8.1f} {r['mean_error_deg']:9.2f} {r['max_error_deg']:8.2f}"
+        )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Bulk ingest throughput in images per minute, against one-at-a-time enrollment.
+
+Builds a zip of ``--images`` distinct 640×480 scenes (the sample face pasted
+onto grained backgrounds, as in ``bench_pipeline``) and enrolls it into a
+fresh fsync'ing ``mmap`` store twice:
+
+* ``sequential`` – what one ``/store-profile`` call per image does:
+  ``analyze_face``, chip JPEG encode and one ``store.add`` (one fsync) each,
+  in this process
+* ``ingest`` – ``bulk_ingest.ingest`` over a process pool of ``--workers``
+  (default: one per core), committing ``INGEST_BATCH_SIZE`` profiles per write
+
+Needs the landmark model.
+
+Usage::
+
+    python -m benchmarks.bench_ingest [--images 200] [--workers 0] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import Dict, List
+
+from app.models.profile_record import ProfileRecord
+from app.utils import face_analyzer as fa
+from app.utils.bulk_ingest import ingest
+from app.utils.executor import analysis_executor
+from app.utils.mmap_store import MmapProfileStore
+from benchmarks.bench_pipeline import make_scene_jpeg
+
+
+def make_archive(path: str, n: int) -> List[bytes]:
+    images = [make_scene_jpeg(640, 480, seed=i) for i in range(n)]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for i, data in enumerate(images):
+            archive.writestr(f"person-{i:05d}.jpg", data)
+    return images
+
+
+def _sequential(images: List[bytes], store_path: str) -> float:
+    store = MmapProfileStore(store_path, fsync=True)
+    start = time.perf_counter()
+    for data in images:
+        result = fa.analyze_face(data)
+        chip = fa.encode_chip(result["_chip"])
+        store.add(ProfileRecord.from_analysis(result, aligned_face=chip))
+    return time.perf_counter() - start
+
+
+def _ingest(archive: str, store_path: str, journal: str, workers: int) -> float:
+    store = MmapProfileStore(store_path, fsync=True)
+    analysis_executor.start(backend="process", workers=workers or None)
+    try:
+        start = time.perf_counter()
+        progress = asyncio.run(ingest(archive, store, journal))
+        seconds = time.perf_counter() - start
+    finally:
+        analysis_executor.shutdown()
+    assert progress.failed == 0, progress.as_dict()
+    return seconds
+
+
+def run(n_images: int, workers: int) -> List[Dict]:
+    fa._load_predictor()
+    tmp = tempfile.mkdtemp(prefix="validia-ingest-")
+    try:
+        archive = os.path.join(tmp, "photos.zip")
+        images = make_archive(archive, n_images)
+        fa.analyze_face(images[0])  # warm-up
+        timings = {
+            "sequential": _sequential(images, os.path.join(tmp, "seq")),
+            "ingest": _ingest(archive, os.path.join(tmp, "bulk"), os.path.join(tmp, "journal.jsonl"), workers),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return [
+        {
+            "mode": mode,
+            "images": n_images,
+            "workers": 1 if mode == "sequential" else (workers or os.cpu_count() or 1),
+            "seconds": seconds,
+            "images_per_minute": n_images * 60 / seconds,
+        }
+        for mode, seconds in timings.items()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.images, args.workers)
+    print(f"{'mode':>10} {'images':>6} {'workers':>7} {'seconds':>8} {'images/min':>10}")
+    for r in rows:
+        print(f"{r['mode']:>10} {r['images']:6d} {r['workers']:7d} {r['seconds']:8.2f} {r['images_per_minute']:10.0f}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Group-photo throughput: one multi-face call vs one upload per face.
+
+Builds deterministic 1280×720 group images with 2–6 copies of the bundled
+sample face, then times per image
+
+* ``per_face``  – the old workflow: the client crops every face and each crop
+  goes through ``analyze_face`` (one decode + detection per face)
+* ``multi``     – ``analyze_faces``: one decode and detection, faces profiled
+  sequentially in one process
+* ``parallel``  – ``analyze_faces_parallel`` on a started process pool
+  (``--workers``), faces spread over the workers
+
+Usage::
+
+    python -m benchmarks.bench_multi_face [--repeat 3] [--workers 0] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from app.utils import face_analyzer as fa
+from app.utils.executor import analysis_executor
+from app.utils.multi_face import analyze_faces_parallel
+from app.utils.sample_face import sample_face_jpeg
+
+FACE_COUNTS = [2, 4, 6]
+
+
+def make_group_jpeg(n_faces: int, width: int = 1280, height: int = 720, seed: int = 0) -> bytes:
+    """``n_faces`` copies of the sample face in a grid on a grained textured canvas."""
+    rng = np.random.default_rng(seed)
+    canvas = cv2.resize(rng.integers(90, 170, (height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8), (width, height))
+    grain = rng.integers(-24, 25, (height, width, 1), dtype=np.int16)
+    canvas = np.clip(canvas.astype(np.int16) + grain, 0, 255).astype(np.uint8)
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    cols = min(n_faces, 3)
+    rows = (n_faces + cols - 1) // cols
+    side = min(280, width // cols - 20, height // rows - 20)
+    face = cv2.resize(face, (side, side), interpolation=cv2.INTER_AREA)
+    for i in range(n_faces):
+        x = 10 + (i % cols) * (width // cols)
+        y = 10 + (i // cols) * (height // rows)
+        canvas[y : y + side, x : x + side] = face
+    return cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def _client_crops(content: bytes) -> List[bytes]:
+    """What a client had to upload before: one padded crop per face."""
+    img = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR)
+    out = []
+    for face in fa.analyze_faces(content):
+        left, top, right, bottom = face["box"]
+        pad = (right - left) // 2
+        crop = img[max(0, top - pad) : bottom + pad, max(0, left - pad) : right + pad]
+        out.append(cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+    return out
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(repeat: int, workers: int) -> List[Dict]:
+    fa.analyze_face(sample_face_jpeg())  # load the model before forking
+    analysis_executor.start(backend="process", workers=workers or None)
+    try:
+        rows = []
+        for n in FACE_COUNTS:
+            content = make_group_jpeg(n)
+            crops = _client_crops(content)
+            found = len(fa.analyze_faces(content))
+            timings = {
+                "per_face": _best(lambda: [fa.analyze_face(c) for c in crops], repeat),
+                "multi": _best(lambda: fa.analyze_faces(content), repeat),
+                "parallel": _best(lambda: asyncio.run(analyze_faces_parallel(content)), repeat),
+            }
+            for name, ms in timings.items():
+                rows.append({"faces": found, "mode": name, "ms": ms, "faces_per_s": found / ms * 1000})
+        return rows
+    finally:
+        analysis_executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=0, help="Pool size (0 = one per core)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.repeat, args.workers)
+    print(f"pool workers: {analysis_executor.workers or args.workers or os.cpu_count()}")
+    print(f"{'faces':>5} {'mode':>9} {'ms/image':>9} {'faces/s':>8}")
+    for r in rows:
+        print(f"{r['faces']:5d} {r['mode']:>9} {r['ms']:9.1f} {r['faces_per_s']:8.1f}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Per-stage latency, allocation and throughput suite for the face pipeline.
+
+Deterministic inputs: the bundled sample face (padded, 230×230) and
+synthetic colour scenes with the sample face pasted onto a grained,
+textured background at 640×480, 1280×960, 1920×1440 and 4032×3024. Reports
+
+* ``analyze_face``   – p50/p95/p99 of every stage (decode, quality_gate,
+  detect, decode_full, landmarks, chip) and of the whole call
+* ``compare_profiles`` – one probe against one stored profile
+* ``store_jitter``   – the ``/store-profile`` image path: chip JPEG encode
+  plus five jitters
+* ``endpoint``       – ``/v1/create-profile`` requests/s and latency at
+  several concurrency levels through an in-process ASGI client (app
+  lifespan started, analysis cache off, every request a distinct image)
+
+Allocation figures come from ``tracemalloc`` in a separate pass (it slows
+the code down): ``alloc_peak_kib`` is the traced heap high-water mark of one
+call above its starting point (numpy buffers included, OpenCV/dlib internal
+buffers not) and ``alloc_blocks`` the traced blocks still held afterwards.
+
+``--json`` writes machine-readable results; ``--baseline`` compares against
+such a file and exits with status 1 when a p50/p95 latency or peak
+allocation grows, or a throughput drops, by more than ``--tolerance``.
+
+Usage::
+
+    python -m benchmarks.bench_pipeline [--iterations 20] [--requests 48] [--quick]
+        [--json out.json] [--baseline base.json --tolerance 0.25]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+import cv2
+import httpx
+import numpy as np
+
+from app.core.config import settings
+from app.main import app
+from app.models.profile_record import ProfileRecord
+from app.utils import face_analyzer as fa
+from app.utils.analysis_cache import analysis_cache
+from app.utils.face_compare import compare_profiles
+from app.utils.sample_face import sample_face_jpeg
+from app.utils.stage_timer import record_stages
+
+RESOLUTIONS = [(640, 480), (1280, 960), (1920, 1440), (4032, 3024)]
+CONCURRENCY = [1, 4, 16]
+# Differences below this many milliseconds are never reported as regressions
+NOISE_FLOOR_MS = 0.5
+
+
+def make_scene_jpeg(width: int, height: int, face_frac: float = 0.3, seed: int = 0) -> bytes:
+    """Colour JPEG of the sample face pasted onto a grained textured canvas."""
+    rng = np.random.default_rng(seed)
+    canvas = rng.integers(90, 170, size=(height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+    canvas = cv2.resize(canvas, (width, height), interpolation=cv2.INTER_LINEAR)
+    # Per-pixel grain keeps the scene above the quality gate's sharpness floor
+    grain = rng.integers(-24, 25, size=(height, width, 1), dtype=np.int16)
+    canvas = np.clip(canvas.astype(np.int16) + grain, 0, 255).astype(np.uint8)
+
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    side = max(64, int(min(width, height) * face_frac))
+    face = cv2.resize(face, (side, side), interpolation=cv2.INTER_AREA)
+    x = int(rng.integers(0, width - side))
+    y = int(rng.integers(0, height - side))
+    canvas[y : y + side, x : x + side] = face
+    return cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def _bundled_face_jpeg() -> bytes:
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    return cv2.imencode(".jpg", face, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+
+
+def images() -> Dict[str, bytes]:
+    cases = {"sample": _bundled_face_jpeg()}
+    for width, height in RESOLUTIONS:
+        cases[f"{width}x{height}"] = make_scene_jpeg(width, height, seed=width)
+    return cases
+
+
+def _percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(np.asarray(samples, dtype=float), [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "n": len(samples)}
+
+
+def _stage_rows(benchmark: str, case: str, fn: Callable[[], object], iterations: int) -> List[Dict]:
+    """Run ``fn`` repeatedly and summarise each recorded stage plus the total."""
+    fn()  # warm caches and lazy loads
+    per_stage: Dict[str, List[float]] = {}
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with record_stages() as timings:
+            fn()
+        timings["total"] = (time.perf_counter() - start) * 1000
+        for name, ms in timings.items():
+            per_stage.setdefault(name, []).append(ms)
+    return [
+        {"benchmark": benchmark, "case": case, "stage": name, **_percentiles(samples)}
+        for name, samples in per_stage.items()
+    ]
+
+
+def _allocations(fn: Callable[[], object]) -> Dict[str, float]:
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        before = tracemalloc.take_snapshot()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return {"alloc_peak_kib": (peak - base) / 1024, "alloc_blocks": blocks}
+
+
+def bench_analyze(cases: Dict[str, bytes], iterations: int) -> List[Dict]:
+    rows = []
+    for case, content in cases.items():
+        call = lambda content=content: fa.analyze_face(content)  # noqa: E731
+        stage_rows = _stage_rows("analyze_face", case, call, iterations)
+        for row in stage_rows:
+            if row["stage"] == "total":
+                row.update(_allocations(call))
+        rows.extend(stage_rows)
+    return rows
+
+
+def bench_compare(data: Dict, iterations: int) -> List[Dict]:
+    stored = ProfileRecord.from_analysis(data)
+    probe = ProfileRecord(np.asarray(data["landmarks"]) + 3, data["eye_distance"], data["yaw"])
+    call = lambda: compare_profiles(probe, stored)  # noqa: E731
+    rows = _stage_rows("compare_profiles", "record", call, iterations * 50)
+    rows[-1].update(_allocations(call))
+    return rows
+
+
+def bench_store_jitter(data: Dict, iterations: int) -> List[Dict]:
+    chip = data["_chip"]
+
+    def call():
+        aligned = fa.encode_chip(chip)
+        jitters = fa.generate_jitter_faces(chip)
+        return ProfileRecord.from_analysis(data, aligned_face=aligned, jitter_faces=jitters)
+
+    rows = _stage_rows("store_jitter", "chip150", call, iterations)
+    for row in rows:
+        if row["stage"] == "total":
+            row.update(_allocations(call))
+    return rows
+
+
+async def _endpoint_rows(bodies: List[bytes], levels: Sequence[int]) -> List[Dict]:
+    rows = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def post(body: bytes) -> float:
+                start = time.perf_counter()
+                res = await client.post(
+                    "/v1/create-profile",
+                    params={"fields": "landmarks,eye_distance,yaw"},
+                    files={"file": ("scene.jpg", body, "image/jpeg")},
+                )
+                res.raise_for_status()
+                return (time.perf_counter() - start) * 1000
+
+            await post(bodies[0])
+            for level in levels:
+                queue = list(bodies)
+                latencies: List[float] = []
+
+                async def worker():
+                    while queue:
+                        latencies.append(await post(queue.pop()))
+
+                start = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(level)))
+                elapsed = time.perf_counter() - start
+                rows.append(
+                    {
+                        "benchmark": "endpoint",
+                        "case": "create-profile",
+                        "stage": f"c{level}",
+                        "concurrency": level,
+                        "rps": len(bodies) / elapsed,
+                        **_percentiles(latencies),
+                    }
+                )
+    return rows
+
+
+def bench_endpoint(requests: int, levels: Sequence[int]) -> List[Dict]:
+    # Distinct uploads and no result cache: every request runs the pipeline
+    previous = analysis_cache.max_entries
+    analysis_cache.max_entries = 0
+    analysis_cache.clear()
+    try:
+        bodies = [make_scene_jpeg(640, 480, seed=1000 + i) for i in range(requests)]
+        return asyncio.run(_endpoint_rows(bodies, levels))
+    finally:
+        analysis_cache.max_entries = previous
+
+
+def run(iterations: int, requests: int, quick: bool = False) -> List[Dict]:
+    cases = images()
+    if quick:
+        cases = {k: cases[k] for k in ("sample", "1280x960")}
+    data = fa.analyze_face(cases["sample"])
+    rows = bench_analyze(cases, iterations)
+    rows += bench_compare(data, iterations)
+    rows += bench_store_jitter(data, iterations)
+    rows += bench_endpoint(requests, CONCURRENCY[:2] if quick else CONCURRENCY)
+    return rows
+
+
+def _key(row: Dict) -> str:
+    return f"{row['benchmark']}/{row['case']}/{row['stage']}"
+
+
+def compare(rows: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Regressions of ``rows`` against ``baseline`` (matching rows only)."""
+    previous = {_key(r): r for r in baseline}
+    regressions = []
+    for row in rows:
+        base = previous.get(_key(row))
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if metric in base and row[metric] > base[metric] * (1 + tolerance) and (
+                row[metric] - base[metric] > NOISE_FLOOR_MS
+            ):
+                regressions.append(f"{_key(row)} {metric} {base[metric]:.2f} -> {row[metric]:.2f}")
+        if "alloc_peak_kib" in base and row.get("alloc_peak_kib", 0) > base["alloc_peak_kib"] * (1 + tolerance) + 1:
+            regressions.append(
+                f"{_key(row)} alloc_peak_kib {base['alloc_peak_kib']:.0f} -> {row['alloc_peak_kib']:.0f}"
+            )
+        if "rps" in base and row["rps"] < base["rps"] / (1 + tolerance):
+            regressions.append(f"{_key(row)} rps {base['rps']:.1f} -> {row['rps']:.1f}")
+    return regressions
+
+
+def _load_results(path: str) -> List[Dict]:
+    with open(path) as fh:
+        doc = json.load(fh)
+    return doc["results"] if isinstance(doc, dict) else doc
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per case")
+    parser.add_argument("--requests", type=int, default=48, help="Requests per concurrency level")
+    parser.add_argument("--quick", action="store_true", help="Two image cases, two concurrency levels")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Fail when regressing against this earlier --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    rows = run(args.iterations, args.requests, args.quick)
+    print(f"{'benchmark/case/stage':<36} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak KiB':>9} {'req/s':>7}")
+    for r in rows:
+        peak = f"{r['alloc_peak_kib']:9.0f}" if "alloc_peak_kib" in r else " " * 9
+        rps = f"{r['rps']:7.1f}" if "rps" in r else ""
+        print(f"{_key(r):<36} {r['p50_ms']:8.3f} {r['p95_ms']:8.3f} {r['p99_ms']:8.3f} {peak} {rps}")
+
+    if args.json:
+        meta = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "analysis_backend": settings.analysis_backend,
+            "iterations": args.iterations,
+            "requests": args.requests,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(args.json, "w") as fh:
+            json.dump({"meta": meta, "results": rows}, fh, indent=2)
+
+    if args.baseline:
+        regressions = compare(rows, _load_results(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
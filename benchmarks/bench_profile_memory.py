@@ -0,0 +1,97 @@
+"""Bytes per stored profile: Pydantic ``Profile`` vs compact ``ProfileRecord``.
+
+Analyses the bundled sample face once (chip + five jitters), then builds
+``--count`` distinct profiles per representation, each with landmarks moved
+to a random position in a 12 MP frame, and measures the heap growth with
+``tracemalloc``. Reported both with images (what ``/store-profile`` keeps)
+and landmarks-only (the part searched on every request).
+
+Usage::
+
+    python -m benchmarks.bench_profile_memory [--count 5000] [--json out.json]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.models.profile import Profile
+from app.models.profile_record import ProfileRecord
+from app.utils.face_analyzer import analyze_face, encode_chip, generate_jitter_faces
+from app.utils.sample_face import sample_face_jpeg
+
+
+def _measure(build: Callable[[int], object], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(i) for i in range(count)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def run(count: int) -> List[Dict]:
+    data = analyze_face(sample_face_jpeg())
+    chip = encode_chip(data["_chip"])
+    jitters = generate_jitter_faces(data["_chip"], 5) or []
+    base = np.asarray(data["landmarks"], dtype=np.int64)
+    offsets = np.random.default_rng(0).integers(0, 3800, size=(count, 2))
+
+    def landmarks(i: int) -> np.ndarray:
+        return base + offsets[i]
+
+    def pydantic(i: int, images: bool) -> Profile:
+        record = ProfileRecord(
+            landmarks(i), data["eye_distance"], data["yaw"], "Stored profile",
+            aligned_face=bytes(chip) if images else None,
+            jitter_faces=[bytes(j) for j in jitters] if images else None,
+        )
+        # Validate like the API does so the landmark tuples are fresh objects
+        return Profile(**record.to_profile().dict())
+
+    def compact(i: int, images: bool) -> ProfileRecord:
+        return ProfileRecord(
+            landmarks(i), data["eye_distance"], data["yaw"], "Stored profile",
+            aligned_face=bytes(bytearray(chip)) if images else None,
+            jitter_faces=[bytes(bytearray(j)) for j in jitters] if images else None,
+        )
+
+    rows = []
+    for images in (True, False):
+        before = _measure(lambda i: pydantic(i, images), count)
+        after = _measure(lambda i: compact(i, images), count)
+        rows.append(
+            {
+                "images": images,
+                "profile_bytes": before,
+                "record_bytes": after,
+                "ratio": before / after,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.count)
+    print(f"{'payload':>15} {'Profile B':>10} {'Record B':>10} {'ratio':>6}")
+    for r in rows:
+        payload = "chip+jitters" if r["images"] else "landmarks only"
+        print(f"{payload:>15} {r['profile_bytes']:10.0f} {r['record_bytes']:10.0f} {r['ratio']:6.1f}x")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Serialization time and bytes on the wire per profile, by response format.
+
+Formats:
+
+* ``pydantic`` – the previous path: build a validated ``Profile``, revalidate
+  it as the response model, ``jsonable_encoder`` and ``json.dumps``
+* ``json``     – ``serialization.encode`` of the plain payload (no validation)
+* ``msgpack``  – the same payload with ``Accept: application/msgpack``
+  (packed int16 landmarks, raw JPEG bytes)
+
+Each is measured for a ``create-profile`` body (landmarks + chip) and a
+``store-profile`` body (+ five jitters), using the bundled sample face.
+The chip is JPEG-encoded once up front, so only serialization is timed.
+
+Usage::
+
+    python -m benchmarks.bench_serialization [--repeat 2000] [--json out.json]
+"""
+import argparse
+import base64
+import json
+import time
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.v1.response_fields import profile_payload
+from app.api.v1.serialization import JSON, MSGPACK, encode
+from app.models.profile import Profile
+from app.utils.face_analyzer import analyze_face, encode_chip, generate_jitter_faces
+from app.utils.sample_face import sample_face_jpeg
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def _pydantic(data: dict, chip: bytes, jitters: List[bytes]) -> bytes:
+    profile = Profile(
+        landmarks=data["landmarks"],
+        eye_distance=data["eye_distance"],
+        yaw=data["yaw"],
+        description="Stored profile",
+        aligned_face=base64.b64encode(chip).decode("ascii"),
+        jitter_faces=[base64.b64encode(j).decode("ascii") for j in jitters] or None,
+    )
+    # FastAPI validates the returned object against response_model again
+    validated = Profile.validate(profile.dict())
+    return json.dumps(
+        jsonable_encoder(validated), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _payload(data: dict, chip: bytes, jitters: List[bytes]) -> dict:
+    return profile_payload(
+        None,
+        data["landmarks"],
+        data["eye_distance"],
+        data["yaw"],
+        description="Stored profile",
+        aligned_face=chip,
+        jitter_faces=jitters or None,
+    )
+
+
+def run(repeat: int) -> List[Dict]:
+    data = analyze_face(sample_face_jpeg())
+    chip = encode_chip(data["_chip"])
+    all_jitters = generate_jitter_faces(data["_chip"], 5) or []
+    rows = []
+    for body, jitters in (("create-profile", []), ("store-profile", all_jitters)):
+        cases = {
+            "pydantic": lambda: _pydantic(data, chip, jitters),
+            "json": lambda: encode(_payload(data, chip, jitters), JSON),
+            "msgpack": lambda: encode(_payload(data, chip, jitters), MSGPACK),
+        }
+        for fmt, fn in cases.items():
+            rows.append(
+                {"body": body, "format": fmt, "us": _time(fn, repeat), "bytes": len(fn())}
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.repeat)
+    print(f"{'body':>15} {'format':>9} {'µs/profile':>11} {'bytes':>8}")
+    for r in rows:
+        print(f"{r['body']:>15} {r['format']:>9} {r['us']:11.1f} {r['bytes']:8d}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
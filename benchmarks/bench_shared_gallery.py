@@ -0,0 +1,164 @@
+"""Per-worker memory, search latency and enrollment visibility of a shared gallery.
+
+Fills a store directory with ``--profiles`` random profiles, then forks
+``--workers`` processes that each open it and run searches, once with the
+``mmap`` backend (every worker bulk-loads its own index copy) and once with
+the ``shared`` backend (every worker scans the same mapped files). Reported
+per backend:
+
+* ``private_mib`` – memory private to each worker after opening + searching
+  (anonymous pages: index copies, id dicts), from ``/proc/self/smaps_rollup``
+* ``pss_mib`` – each worker's proportional share of all memory it touches
+* ``search_ms`` – median search latency in a worker
+* ``visible_ms`` – for ``shared`` only: time from one worker's ``add``
+  returning to another worker finding the new id (polling every call)
+
+Usage::
+
+    python -m benchmarks.bench_shared_gallery [--profiles 200000] [--workers 4] [--json out.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.models.profile_record import ProfileRecord
+from app.utils.mmap_store import MmapProfileStore
+from app.utils.shared_store import SharedProfileStore
+
+BACKENDS = {"mmap": MmapProfileStore, "shared": SharedProfileStore}
+
+
+def _record(rng: np.random.Generator) -> ProfileRecord:
+    return ProfileRecord(
+        landmarks=rng.integers(0, 600, size=(68, 2)),
+        eye_distance=float(rng.uniform(40, 90)),
+        yaw=0.0,
+    )
+
+
+def fill(path: str, n: int, seed: int = 0) -> None:
+    """Write ``n`` profiles in large batches (one commit per batch)."""
+    rng = np.random.default_rng(seed)
+    store = MmapProfileStore(path, fsync=False)
+    batch = 10_000
+    for start in range(0, n, batch):
+        items = [(f"{i:036d}", _record(rng)) for i in range(start, min(n, start + batch))]
+        store._append(items)
+    store.close()
+
+
+def _smaps_mib() -> Dict[str, float]:
+    out = {}
+    with open("/proc/self/smaps_rollup") as fh:
+        for line in fh:
+            key, _, rest = line.partition(":")
+            if key in ("Pss", "Private_Clean", "Private_Dirty"):
+                out[key] = int(rest.split()[0]) / 1024
+    return out
+
+
+def _worker(backend: str, path: str, searches: int, seed: int, queue) -> None:
+    before = _smaps_mib()
+    store = BACKENDS[backend](path, fsync=False)
+    rng = np.random.default_rng(seed)
+    timings = []
+    for _ in range(searches):
+        probe = rng.integers(0, 600, size=(68, 2))
+        start = time.perf_counter()
+        store.search(probe, 60.0, k=5)
+        timings.append((time.perf_counter() - start) * 1000)
+    after = _smaps_mib()
+    private = (after["Private_Clean"] + after["Private_Dirty"]) - (before["Private_Clean"] + before["Private_Dirty"])
+    queue.put({"private_mib": private, "pss_mib": after["Pss"] - before["Pss"], "search_ms": statistics.median(timings)})
+    # Keep the mapping alive while the other workers measure, so shared
+    # pages are split between all of them in their PSS
+    time.sleep(0.5)
+
+
+def _watch(path: str, ready, queue) -> None:
+    store = SharedProfileStore(path, fsync=False)
+    ready.set()
+    pid_wanted, t_added = queue.get()
+    while pid_wanted not in store:
+        pass
+    queue.put((time.perf_counter() - t_added) * 1000)
+
+
+def visibility_ms(path: str, trials: int = 20) -> float:
+    """Median delay until a second process sees an enrollment."""
+    ctx = multiprocessing.get_context("fork")
+    writer = SharedProfileStore(path, fsync=False)
+    rng = np.random.default_rng(1)
+    delays = []
+    for _ in range(trials):
+        ready, queue = ctx.Event(), ctx.Queue()
+        proc = ctx.Process(target=_watch, args=(path, ready, queue))
+        proc.start()
+        ready.wait()
+        pid = writer.add(_record(rng))
+        queue.put((pid, time.perf_counter()))
+        time.sleep(0.01)
+        delays.append(queue.get(timeout=30))
+        proc.join()
+    return statistics.median(delays)
+
+
+def run(n_profiles: int, workers: int, searches: int) -> List[Dict]:
+    path = tempfile.mkdtemp(prefix="validia-gallery-")
+    try:
+        fill(path, n_profiles)
+        ctx = multiprocessing.get_context("fork")
+        rows = []
+        for backend in BACKENDS:
+            queue = ctx.Queue()
+            procs = [ctx.Process(target=_worker, args=(backend, path, searches, i, queue)) for i in range(workers)]
+            for p in procs:
+                p.start()
+            results = [queue.get(timeout=600) for _ in procs]
+            for p in procs:
+                p.join()
+            rows.append(
+                {
+                    "backend": backend,
+                    "profiles": n_profiles,
+                    "workers": workers,
+                    "private_mib": statistics.mean(r["private_mib"] for r in results),
+                    "pss_mib": statistics.mean(r["pss_mib"] for r in results),
+                    "search_ms": statistics.median(r["search_ms"] for r in results),
+                    "visible_ms": visibility_ms(path) if backend == "shared" else None,
+                }
+            )
+        return rows
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--searches", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.profiles, args.workers, args.searches)
+    print(f"gallery: {args.profiles} profiles, {args.workers} workers, pid {os.getpid()}")
+    print(f"{'backend':>8} {'private MiB':>11} {'PSS MiB':>8} {'search ms':>9} {'visible ms':>10}")
+    for r in rows:
+        visible = f"{r['visible_ms']:10.3f}" if r["visible_ms"] is not None else f"{'-':>10}"
+        print(f"{r['backend']:>8} {r['private_mib']:11.1f} {r['pss_mib']:8.1f} {r['search_ms']:9.2f} {visible}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Gallery snapshot export/import throughput and peak memory.
+
+Fills an ``mmap`` store with ``--profiles`` profiles (random landmarks, a
+~4 KB chip JPEG and five ~3 KB jitters each) and measures:
+
+* ``disk write`` – writing the finished NDJSON snapshot to a file in 1 MiB
+  chunks: the ceiling for any export
+* ``export ndjson`` / ``export msgpack`` – ``snapshot.export_snapshot``
+  streamed to a file, as ``GET /v1/profiles/export`` does
+* ``one body`` – every profile rendered into a single JSON response, which
+  is what a non-streaming endpoint would hold in memory
+* ``import ndjson`` / ``import msgpack`` – ``snapshot.import_snapshot`` from
+  the exported files into an empty ``mmap`` store
+
+Peak memory is the largest Python heap growth seen by ``tracemalloc``
+(measured in a separate pass, so the timings run untraced). No model needed.
+
+Usage::
+
+    python -m benchmarks.bench_snapshot [--profiles 20000] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import AsyncIterator, Callable, Dict, List
+
+import numpy as np
+
+from app.api.v1.response_fields import record_payload
+from app.api.v1.serialization import JSON, MSGPACK, encode
+from app.api.v1.snapshot import NDJSON, export_snapshot, import_snapshot
+from app.models.profile_record import ProfileRecord
+from app.utils.mmap_store import MmapProfileStore
+
+CHUNK = 1024 * 1024
+
+
+def fill_store(path: str, n: int, seed: int = 0) -> MmapProfileStore:
+    rng = np.random.default_rng(seed)
+    store = MmapProfileStore(path, fsync=False)
+    for start in range(0, n, 1000):
+        batch = []
+        for k in range(start, min(n, start + 1000)):
+            batch.append(
+                (
+                    f"emp-{k:07d}",
+                    ProfileRecord(
+                        landmarks=rng.integers(0, 640, (68, 2)),
+                        eye_distance=float(rng.uniform(40, 90)),
+                        yaw=float(rng.uniform(-0.3, 0.3)),
+                        description="Stored profile",
+                        aligned_face=rng.bytes(4000),
+                        jitter_faces=[rng.bytes(3000) for _ in range(5)],
+                    ),
+                )
+            )
+        store.add_many(batch)
+    return store
+
+
+def _write_stream(chunks, path: str) -> int:
+    size = 0
+    with open(path, "wb") as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+            size += len(chunk)
+        fh.flush()
+        os.fsync(fh.fileno())
+    return size
+
+
+def _write_export(store: MmapProfileStore, media_type: str, path: str) -> int:
+    async def write() -> int:
+        size = 0
+        with open(path, "wb") as fh:
+            async for chunk in export_snapshot(store, media_type):
+                fh.write(chunk)
+                size += len(chunk)
+            fh.flush()
+            os.fsync(fh.fileno())
+        return size
+
+    return asyncio.run(write())
+
+
+def _file_chunks(path: str):
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def _aiter(path: str) -> AsyncIterator[bytes]:
+    for chunk in _file_chunks(path):
+        yield chunk
+
+
+def _one_body(store: MmapProfileStore, path: str) -> int:
+    profiles = [record_payload(store.get(pid), None) for pid in store.list_ids(None, len(store))]
+    return _write_stream([encode({"profiles": profiles}, JSON)], path)
+
+
+def _measure(fn: Callable[[], int]) -> Dict:
+    start = time.perf_counter()
+    size = fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "mb": size / 1e6, "mb_per_s": size / 1e6 / seconds, "peak_mib": peak / 2**20}
+
+
+def run(n_profiles: int) -> List[Dict]:
+    tmp = tempfile.mkdtemp(prefix="validia-snapshot-")
+    try:
+        store = fill_store(os.path.join(tmp, "store"), n_profiles)
+        files = {fmt: os.path.join(tmp, f"snapshot.{fmt}") for fmt in ("ndjson", "msgpack")}
+        rows = {
+            "export ndjson": _measure(lambda: _write_export(store, NDJSON, files["ndjson"])),
+            "export msgpack": _measure(lambda: _write_export(store, MSGPACK, files["msgpack"])),
+            "disk write": _measure(lambda: _write_stream(_file_chunks(files["ndjson"]), os.path.join(tmp, "copy"))),
+            "one body": _measure(lambda: _one_body(store, os.path.join(tmp, "body.json"))),
+        }
+        for fmt, media_type in (("ndjson", NDJSON), ("msgpack", MSGPACK)):
+            def restore(fmt=fmt, media_type=media_type) -> int:
+                target = tempfile.mkdtemp(dir=tmp)
+                counts = asyncio.run(import_snapshot(_aiter(files[fmt]), MmapProfileStore(target, fsync=False), media_type))
+                shutil.rmtree(target)
+                assert counts["imported"] == n_profiles, counts
+                return os.path.getsize(files[fmt])
+
+            rows[f"import {fmt}"] = _measure(restore)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return [{"mode": mode, "profiles": n_profiles, **r} for mode, r in rows.items()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=20_000)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.profiles)
+    print(f"{'mode':>14} {'profiles':>8} {'MB':>8} {'seconds':>8} {'MB/s':>7} {'peak MiB':>8}")
+    for r in rows:
+        print(
+            f"{r['mode']:>14} {r['profiles']:8d} {r['mb']:8.1f} {r['seconds']:8.2f} "
+            f"{r['mb_per_s']:7.0f} {r['peak_mib']:8.1f}"
+        )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
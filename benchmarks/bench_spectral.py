@@ -0,0 +1,86 @@
+"""Throughput of the spectral deepfake scorer in chips per second.
+
+Scores deterministic 150×150 face chips (crops of the bundled sample face
+with per-chip noise) with ``SpectralModel.score`` for several stack sizes,
+against scoring the same chips one call per chip. The batch size that
+``/detect-deepfake-video`` uses is ``DEEPFAKE_BATCH_SIZE``.
+
+Usage::
+
+    python -m benchmarks.bench_spectral [--chips 512] [--repeat 3] [--json out.json]
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from app.utils.sample_face import sample_face_jpeg
+from app.utils.spectral_scorer import DEFAULT_MODEL, SpectralModel
+
+BATCH_SIZES = [1, 8, 32, 64, 256]
+
+
+def make_chips(n: int, seed: int = 0) -> np.ndarray:
+    """``n`` BGR chips: the sample face, resized to 150 px, plus light noise."""
+    rng = np.random.default_rng(seed)
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    chip = cv2.resize(face, (150, 150), interpolation=cv2.INTER_AREA).astype(np.int16)
+    noise = rng.integers(-6, 7, (n, 150, 150, 1), dtype=np.int16)
+    return np.clip(chip[None] + noise, 0, 255).astype(np.uint8)
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n_chips: int, repeat: int) -> List[Dict]:
+    model = SpectralModel(DEFAULT_MODEL)
+    chips = make_chips(n_chips)
+    model.score(chips[:8])  # first-call FFT plan / allocation warm-up
+
+    rows = []
+    for batch in BATCH_SIZES:
+
+        def score_all(batch=batch):
+            for i in range(0, n_chips, batch):
+                model.score(chips[i : i + batch])
+
+        seconds = _best(score_all, repeat)
+        rows.append(
+            {
+                "batch": batch,
+                "chips": n_chips,
+                "ms": seconds * 1000,
+                "us_per_chip": seconds / n_chips * 1e6,
+                "chips_per_s": n_chips / seconds,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chips", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.chips, args.repeat)
+    print(f"{'batch':>5} {'chips':>6} {'ms':>8} {'µs/chip':>8} {'chips/s':>8}")
+    for r in rows:
+        print(f"{r['batch']:5d} {r['chips']:6d} {r['ms']:8.1f} {r['us_per_chip']:8.1f} {r['chips_per_s']:8.0f}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Time to first profile for a fresh process, with and without model preloading.
+
+Each run starts a new interpreter that imports the app, runs its startup
+(lifespan) and posts the bundled sample face to ``/v1/create-profile``.
+``PRELOAD_MODEL=false`` is the old lazy behaviour where the first request
+reads the landmark model; with preloading the model load and a warm-up
+inference happen during startup, before ``/ready`` turns 200.
+
+Usage::
+
+    python -m benchmarks.bench_startup [--runs 3] [--workers 2] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+_CHILD = r"""
+import json, time
+t0 = time.monotonic()
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.sample_face import sample_face_jpeg
+imported = time.monotonic()
+with TestClient(app) as client:
+    started = time.monotonic()
+    ready = client.get("/ready").status_code
+    t = time.monotonic()
+    res = client.post("/v1/create-profile", files={"file": ("s.jpg", sample_face_jpeg(), "image/jpeg")})
+    first = time.monotonic()
+    assert res.status_code == 200, res.text
+print(json.dumps({
+    "import_s": imported - t0,
+    "startup_s": started - imported,
+    "ready_status": ready,
+    "first_request_ms": (first - t) * 1000,
+    "first_profile_s": first - t0,
+}))
+"""
+
+
+def _run_once(preload: bool, workers: int) -> Dict:
+    env = dict(os.environ, PRELOAD_MODEL=str(preload).lower(), ANALYSIS_WORKERS=str(workers))
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int, workers: int) -> List[Dict]:
+    rows = []
+    for preload in (False, True):
+        samples = [_run_once(preload, workers) for _ in range(runs)]
+        row = {"preload": preload, "ready_status": samples[-1]["ready_status"]}
+        for key in ("import_s", "startup_s", "first_request_ms", "first_profile_s"):
+            row[key] = statistics.median(s[key] for s in samples)
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.runs, args.workers)
+    print(f"{'preload':>8} {'import s':>9} {'startup s':>10} {'/ready':>7} {'1st req ms':>11} {'1st profile s':>14}")
+    for r in rows:
+        print(
+            f"{str(r['preload']):>8} {r['import_s']:9.2f} {r['startup_s']:10.2f} {r['ready_status']:7d} "
+            f"{r['first_request_ms']:11.1f} {r['first_profile_s']:14.2f}"
+        )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
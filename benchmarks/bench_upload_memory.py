@@ -0,0 +1,118 @@
+"""Peak memory and latency of reading and analysing large photo uploads.
+
+Builds deterministic JPEG photos of increasing resolution (one large copy of
+the bundled sample face on a grained canvas) and measures per image
+
+* ``read``  – ``read_image`` on an in-memory ``UploadFile``: the single
+  preallocated buffer the upload is streamed into
+* ``analyze`` – ``analyze_face`` with the colour decode at full resolution
+  (``IMAGE_DECODE_MAX_MEGAPIXELS=0``) and with the configured decode budget
+
+Peak memory is the tracemalloc peak (Python and NumPy allocations, which
+include every decoded image; decoder scratch memory inside OpenCV is not
+counted).
+
+Usage::
+
+    python -m benchmarks.bench_upload_memory [--repeat 3] [--budget 24] [--json out.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.utils import face_analyzer as fa
+from app.utils.sample_face import sample_face_jpeg
+from app.utils.upload import read_image
+
+SIZES = [(4000, 3000), (6000, 4000), (8000, 6000)]
+
+
+def make_photo_jpeg(width: int, height: int, seed: int = 0) -> bytes:
+    """A ``width`` x ``height`` photo with the sample face filling half its height."""
+    rng = np.random.default_rng(seed)
+    canvas = cv2.resize(rng.integers(90, 170, (height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8), (width, height))
+    grain = rng.integers(-24, 25, (height, width, 1), dtype=np.int16)
+    canvas = np.clip(canvas.astype(np.int16) + grain, 0, 255).astype(np.uint8)
+    del grain
+    face = cv2.imdecode(np.frombuffer(sample_face_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    face = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    side = height // 2
+    y, x = (height - side) // 2, (width - side) // 2
+    canvas[y : y + side, x : x + side] = cv2.resize(face, (side, side), interpolation=cv2.INTER_CUBIC)
+    return cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> Tuple[float, float]:
+    """Best wall time (ms) and tracemalloc peak (MiB) of ``fn``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best * 1000, peak / 2**20
+
+
+def _read(loop: asyncio.AbstractEventLoop, content: bytes) -> bytearray:
+    upload = UploadFile(io.BytesIO(content), size=len(content), filename="photo.jpg")
+    return loop.run_until_complete(read_image(upload, max_bytes=0))
+
+
+def run(repeat: int, budget: float) -> List[Dict]:
+    fa.analyze_face(sample_face_jpeg())  # load the model outside the measurements
+    original = settings.image_decode_max_megapixels
+    loop = asyncio.new_event_loop()
+    rows = []
+    try:
+        for width, height in SIZES:
+            content = make_photo_jpeg(width, height)
+            base = {"image": f"{width}x{height}", "megapixels": width * height / 1e6, "file_mib": len(content) / 2**20}
+            ms, peak = _measure(lambda: _read(loop, content), repeat)
+            rows.append({**base, "mode": "read", "ms": ms, "peak_mib": peak})
+            for name, limit in (("analyze_full", 0.0), (f"analyze_{budget:g}mp", budget)):
+                settings.image_decode_max_megapixels = limit
+                ms, peak = _measure(lambda: fa.analyze_face(content), repeat)
+                rows.append({**base, "mode": name, "ms": ms, "peak_mib": peak})
+    finally:
+        settings.image_decode_max_megapixels = original
+        loop.close()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--budget", type=float, default=settings.image_decode_max_megapixels, help="Decode budget in megapixels"
+    )
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.repeat, args.budget)
+    print(f"{'image':>10} {'MP':>5} {'file MiB':>8} {'mode':>14} {'ms':>8} {'peak MiB':>9}")
+    for r in rows:
+        print(
+            f"{r['image']:>10} {r['megapixels']:5.1f} {r['file_mib']:8.2f} {r['mode']:>14} "
+            f"{r['ms']:8.1f} {r['peak_mib']:9.1f}"
+        )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(rows, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
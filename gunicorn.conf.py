@@ -0,0 +1,30 @@
+"""Gunicorn settings for multi-worker deployments.
+
+Usage::
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported and the landmark model warmed up once in the master
+process; the Uvicorn workers forked afterwards share the loaded model
+copy-on-write, so scaling to N workers neither re-reads the ~100 MB file N
+times nor keeps N private copies of it, and they skip their own warm-up.
+
+Each worker starts its own analysis pool; the worker count is exported as
+``WEB_CONCURRENCY`` so the pools split the CPU cores between them.
+"""
+import os
+
+worker_class = "uvicorn.workers.UvicornWorker"
+# Exported before the app (and its settings) is imported by preload_app;
+# no more web workers than cores, as each needs at least one pool process
+workers = int(os.environ.setdefault("WEB_CONCURRENCY", str(min(4, os.cpu_count() or 1))))
+bind = os.environ.get("BIND", "0.0.0.0:80")
+preload_app = True
+
+
+def on_starting(server):
+    from app.core.config import settings
+    from app.utils.warmup import readiness
+
+    if settings.preload_model:
+        readiness.warm_up()